@@ -12,6 +12,8 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 # Import the main app from the src module
 from src.app import main
+from src.utils.logging_utils import setup_logging
 
 if __name__ == "__main__":
+    setup_logging()
     main() 
\ No newline at end of file
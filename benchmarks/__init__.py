@@ -0,0 +1,5 @@
+"""
+Benchmarks for DeepMindset.ai
+
+This package contains load-testing and performance benchmark scripts.
+"""
@@ -0,0 +1,62 @@
+"""
+Adaptive selection benchmark
+
+This script fills an in-memory question bank with synthetic MCQs and times
+AdaptiveEngine.select and AdaptiveEngine.record for a user who keeps
+answering, the loop the MCQ page runs in Adaptive mode.
+
+Usage:
+    python -m benchmarks.bench_adaptive_select --items 100000 --topics 2000 --requests 2000
+"""
+import os
+import sys
+import json
+import time
+import argparse
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def main():
+    """
+    Build the bank, run the selection loop and print latency percentiles.
+    """
+    parser = argparse.ArgumentParser(description="Time adaptive question selection over a large bank.")
+    parser.add_argument("--items", type=int, default=100000, help="Number of stored questions")
+    parser.add_argument("--topics", type=int, default=2000, help="Number of distinct topic paths")
+    parser.add_argument("--requests", type=int, default=2000, help="Number of select/record rounds")
+    args = parser.parse_args()
+
+    sys.path.insert(0, REPO_ROOT)
+    from src.services.adaptive_service import AdaptiveEngine
+    from src.services.question_bank import DIFFICULTY_LEVELS, QuestionBank
+
+    bank = QuestionBank()
+    start = time.perf_counter()
+    for i in range(args.items):
+        difficulty = DIFFICULTY_LEVELS[i % len(DIFFICULTY_LEVELS)]
+        payload = json.dumps({"question": f"Question {i}", "options": ["a", "b", "c", "d"],
+                              "correct_answers": [0], "explanation": "", "difficulty": difficulty})
+        bank.add("mcq", f"Area {i % 7}, Topic {i % args.topics}", difficulty, payload)
+    print(f"built bank of {len(bank)} questions in {time.perf_counter() - start:.2f} s")
+
+    engine = AdaptiveEngine(bank, seed=0)
+    select_times, record_times = [], []
+    for i in range(args.requests):
+        start = time.perf_counter()
+        row, probability = engine.select("user-1")
+        select_times.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        engine.record("user-1", bank.item_id(row), i % 3 != 0)
+        record_times.append(time.perf_counter() - start)
+
+    for name, timings in (("select", select_times), ("record", record_times)):
+        timings.sort()
+        print(f"{name}: p50 {timings[len(timings) // 2] * 1e3:.3f} ms, "
+              f"p99 {timings[int(len(timings) * 0.99)] * 1e3:.3f} ms")
+    print(f"final ability {engine.ability('user-1'):.2f}, suggested {engine.suggest_difficulty('user-1')}")
+
+
+if __name__ == "__main__":
+    main()
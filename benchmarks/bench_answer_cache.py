@@ -0,0 +1,57 @@
+"""
+Answer cache benchmark
+
+This script measures get_gpt_answer for a first (uncached) question and for
+repeats of it differing only in case and whitespace, using the offline LLM
+backend with a synthetic model latency.
+
+Usage:
+    python -m benchmarks.bench_answer_cache --latency-ms 1000 --repeats 10000
+"""
+import os
+import sys
+import time
+import argparse
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def main():
+    """
+    Run the measurement and print miss and hit latencies.
+    """
+    parser = argparse.ArgumentParser(description="Measure cached and uncached Quick Search answers.")
+    parser.add_argument("--latency-ms", type=float, default=1000, help="Synthetic model latency")
+    parser.add_argument("--repeats", type=int, default=10000, help="Number of cached lookups")
+    args = parser.parse_args()
+
+    sys.path.insert(0, REPO_ROOT)
+    from src.services.answer_cache import answer_cache
+    from src.services.answer_service import get_gpt_answer
+    from src.services.llm_backend import OfflineBackend, set_llm_backend
+
+    set_llm_backend(OfflineBackend(latency_ms=args.latency_ms))
+    question = "What is the difference between L1 and L2 regularization?"
+
+    start = time.perf_counter()
+    get_gpt_answer(question)
+    miss_ms = (time.perf_counter() - start) * 1000
+
+    variants = [question.upper(), f"  {question}  ", question.replace(" ", "   "), question.lower()]
+    timings = []
+    for i in range(args.repeats):
+        start = time.perf_counter()
+        get_gpt_answer(variants[i % len(variants)])
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+
+    stats = answer_cache.get_stats()
+    print(f"miss: {miss_ms:.1f} ms")
+    print(f"hit:  p50 {timings[len(timings) // 2] * 1e6:.1f} us, "
+          f"p99 {timings[int(len(timings) * 0.99)] * 1e6:.1f} us")
+    print(f"hit ratio {stats['hit_ratio']:.4f} over {stats['hits'] + stats['misses']} lookups, "
+          f"{stats['entries']} entries, {stats['bytes']} bytes")
+
+
+if __name__ == "__main__":
+    main()
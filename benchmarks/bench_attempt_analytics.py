@@ -0,0 +1,79 @@
+"""
+Attempt analytics benchmark
+
+This script writes a synthetic attempt log (many users, a realistic number of
+topic paths) and times loading it and computing the accuracy summaries.
+
+Usage:
+    python -m benchmarks.bench_attempt_analytics --attempts 2000000 --segments 20
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+import numpy as np
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def main():
+    """
+    Generate the log, run the analytics and print timings.
+    """
+    parser = argparse.ArgumentParser(description="Time attempt log loading and analytics.")
+    parser.add_argument("--attempts", type=int, default=2000000, help="Total number of attempts")
+    parser.add_argument("--segments", type=int, default=20, help="Number of segment files")
+    parser.add_argument("--users", type=int, default=10000, help="Number of distinct users")
+    parser.add_argument("--topics", type=int, default=2000, help="Number of distinct topic paths")
+    args = parser.parse_args()
+
+    sys.path.insert(0, REPO_ROOT)
+    from src.services.attempt_analytics import (
+        accuracy_trend, difficulty_accuracy, load_attempts, topic_accuracy, weakest_topics
+    )
+    from src.services.attempt_log import encode_strings, write_segment
+
+    rng = np.random.default_rng(0)
+    users = np.array([f"user-{i}" for i in range(args.users)])
+    topics = np.array([f"Area {i % 7}, Subject {i % 61}, Topic {i}" for i in range(args.topics)])
+    difficulties = np.array(["Easy", "Medium", "Hard"])
+
+    with tempfile.TemporaryDirectory() as directory:
+        rows = args.attempts // args.segments
+        start = time.perf_counter()
+        for segment in range(args.segments):
+            columns = {}
+            for column, values in (("user", users), ("topic", topics), ("difficulty", difficulties)):
+                columns[f"{column}_values"], columns[f"{column}_codes"] = encode_strings(
+                    values[rng.integers(0, len(values), rows)])
+            columns["correct"] = rng.random(rows) < 0.6
+            columns["seconds"] = rng.gamma(2.0, 8.0, rows).astype(np.float32)
+            columns["timestamp"] = np.sort(1.7e9 + rng.random(rows) * 90 * 86400)
+            write_segment(os.path.join(directory, f"attempts_{segment:020d}.npz"), columns)
+        print(f"wrote {rows * args.segments} attempts in {args.segments} segments: "
+              f"{time.perf_counter() - start:.2f} s")
+
+        timings = {}
+        start = time.perf_counter()
+        df = load_attempts(directory)
+        timings["load"] = time.perf_counter() - start
+        for name, func in (
+            ("topic_accuracy", lambda: topic_accuracy(df)),
+            ("topic_accuracy level 2", lambda: topic_accuracy(df, level=2)),
+            ("difficulty_accuracy", lambda: difficulty_accuracy(df)),
+            ("accuracy_trend daily", lambda: accuracy_trend(df)),
+            ("weakest_topics one user", lambda: weakest_topics(df, "user-42", min_attempts=1)),
+        ):
+            start = time.perf_counter()
+            func()
+            timings[name] = time.perf_counter() - start
+
+        print(f"frame memory: {df.memory_usage(deep=True).sum() / 1e6:.1f} MB")
+        for name, seconds in timings.items():
+            print(f"{name:<24} {seconds * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
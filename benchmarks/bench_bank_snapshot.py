@@ -0,0 +1,78 @@
+"""
+Question bank snapshot benchmark
+
+This script writes a synthetic question bank file, then compares loading it
+record by record (with one pydantic model per question) against exporting it
+once to a columnar snapshot and opening that memory-mapped.
+
+Usage:
+    python -m benchmarks.bench_bank_snapshot --items 1000000
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def timed(label, func):
+    """
+    Run func, print its duration and return its result.
+    """
+    start = time.perf_counter()
+    result = func()
+    print(f"{label:<40} {(time.perf_counter() - start) * 1000:10.1f} ms")
+    return result
+
+
+def main():
+    """
+    Generate the bank and print load, validation and snapshot timings.
+    """
+    parser = argparse.ArgumentParser(description="Compare JSON Lines and snapshot question bank loading.")
+    parser.add_argument("--items", type=int, default=200000, help="Number of questions")
+    parser.add_argument("--serve", type=int, default=1000, help="Number of questions materialized from the snapshot")
+    args = parser.parse_args()
+
+    sys.path.insert(0, REPO_ROOT)
+    from src.models.question_models import MCQFormat
+    from src.services.bank_snapshot import BankSnapshot, validate_payloads, write_snapshot
+    from src.services.question_bank import DIFFICULTY_LEVELS, QuestionBank, make_item_id
+
+    with tempfile.TemporaryDirectory() as directory:
+        bank_path = os.path.join(directory, "bank.jsonl")
+        snapshot_dir = os.path.join(directory, "snapshot")
+        with open(bank_path, "w", encoding="utf-8") as f:
+            for i in range(args.items):
+                difficulty = DIFFICULTY_LEVELS[i % len(DIFFICULTY_LEVELS)]
+                text = f"Question {i}: which statement about topic {i % 5000} is correct?"
+                payload = json.dumps({"question": text, "options": ["first", "second", "third", "fourth"],
+                                      "correct_answers": [i % 4], "explanation": "An explanation. " * 20,
+                                      "difficulty": difficulty})
+                f.write(json.dumps({"id": make_item_id("mcq", text), "type": "mcq",
+                                    "topic": f"Area {i % 7}, Topic {i % 5000}", "difficulty": difficulty,
+                                    "payload": payload}) + "\n")
+        print(f"bank file: {os.path.getsize(bank_path) / 1e6:.1f} MB, {args.items} questions")
+
+        bank = timed("load JSON Lines bank", lambda: QuestionBank(bank_path))
+        payloads = [bank.payload(row) for row in range(len(bank))]
+        timed("validate one model per question", lambda: [MCQFormat.model_validate_json(p) for p in payloads])
+        timed("validate in bulk (cached TypeAdapter)", lambda: validate_payloads("mcq", payloads))
+        timed("export snapshot (with validation)", lambda: write_snapshot(bank, snapshot_dir))
+        del bank, payloads
+
+        # Opened like the app does: on the snapshot and the JSON Lines file it was exported from
+        snapshot_bank = timed("open snapshot bank (mmap)",
+                              lambda: QuestionBank(bank_path, snapshot=BankSnapshot(snapshot_dir)))
+        step = max(1, len(snapshot_bank) // args.serve)
+        rows = range(0, len(snapshot_bank), step)
+        timed(f"materialize {len(rows)} questions", lambda: [json.loads(snapshot_bank.payload(row)) for row in rows])
+        ids = [snapshot_bank.item_id(row) for row in rows]
+        timed(f"look up {len(ids)} ids", lambda: [snapshot_bank.index_of(item_id) for item_id in ids])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Exam generation benchmark
+
+This script generates an exam of MCQs through question_service against an
+offline backend with a jittered latency, once one question after another and
+once as an exam, and prints the time until the first question and the whole
+exam were ready, next to the slowest single question.
+
+Usage:
+    python -m benchmarks.bench_exam --questions 20 --latency-ms 500 --jitter-ms 500
+"""
+import os
+import sys
+import time
+import argparse
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def main():
+    """
+    Generate the questions sequentially and as an exam and print the timings.
+    """
+    parser = argparse.ArgumentParser(description="Measure how long an exam takes to generate.")
+    parser.add_argument("--questions", type=int, default=20, help="Questions per exam")
+    parser.add_argument("--latency-ms", type=float, default=500.0, help="Fixed latency per call")
+    parser.add_argument("--jitter-ms", type=float, default=500.0, help="Maximum extra latency per call")
+    args = parser.parse_args()
+
+    sys.path.insert(0, REPO_ROOT)
+    from src.services.exam_service import Exam
+    from src.services.llm_backend import OfflineBackend, set_llm_backend
+    from src.services.question_bank import QuestionBank, set_question_bank
+    from src.services.question_service import generate_mcq_question
+
+    set_llm_backend(OfflineBackend(latency_ms=args.latency_ms, jitter_ms=args.jitter_ms))
+    topics = [f"Topic {i}" for i in range(args.questions)]
+
+    set_question_bank(QuestionBank())
+    timings = []
+    start = time.perf_counter()
+    for topic in topics:
+        question_start = time.perf_counter()
+        generate_mcq_question(topic, "Medium")
+        timings.append(time.perf_counter() - question_start)
+    sequential = time.perf_counter() - start
+
+    set_question_bank(QuestionBank())
+    start = time.perf_counter()
+    exam = Exam(topics, "Medium")
+    while not exam.ready_count():
+        time.sleep(0.001)
+    first = time.perf_counter() - start
+    exam.score()
+    total = time.perf_counter() - start
+
+    print(f"sequential: {sequential * 1000:.0f} ms, slowest question {max(timings) * 1000:.0f} ms")
+    print(f"exam: first question {first * 1000:.0f} ms, all {len(exam)} questions {total * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
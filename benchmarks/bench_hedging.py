@@ -0,0 +1,73 @@
+"""
+Request hedging benchmark
+
+This script generates MCQs through question_service against an offline
+backend whose latency has a heavy tail (most calls are fast, a few are very
+slow), once without and once with hedging, and prints the latency
+percentiles and hedge rate of each run.
+
+Usage:
+    python -m benchmarks.bench_hedging --requests 400 --slow-rate 0.05
+"""
+import os
+import sys
+import time
+import random
+import argparse
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def main():
+    """
+    Run the generation loop with and without hedging and print the latency percentiles.
+    """
+    parser = argparse.ArgumentParser(description="Measure the tail latency reduction of hedged requests.")
+    parser.add_argument("--requests", type=int, default=400, help="Questions generated per run")
+    parser.add_argument("--fast-ms", type=float, default=40.0, help="Typical call latency")
+    parser.add_argument("--slow-ms", type=float, default=600.0, help="Latency of a slow call")
+    parser.add_argument("--slow-rate", type=float, default=0.05, help="Share of slow calls")
+    parser.add_argument("--max-rate", type=float, default=0.15, help="Hedge rate cap")
+    args = parser.parse_args()
+
+    sys.path.insert(0, REPO_ROOT)
+    import numpy as np
+    from src.services.hedging import RequestHedger, set_request_hedger
+    from src.services.llm_backend import OfflineBackend, set_llm_backend
+    from src.services.question_bank import QuestionBank, set_question_bank
+    from src.services.question_service import generate_mcq_question
+
+    class TailLatencyBackend(OfflineBackend):
+        """Offline backend with a random, heavy-tailed latency per call."""
+
+        def __init__(self):
+            super().__init__()
+            self.rng = random.Random(0)
+
+        def _sleep(self, rng):
+            slow = self.rng.random() < args.slow_rate
+            time.sleep((args.slow_ms if slow else self.rng.uniform(0.5, 1.5) * args.fast_ms) / 1000.0)
+
+    for hedging in (False, True):
+        os.environ["HEDGE_ENABLED"] = "true" if hedging else "false"
+        hedger = RequestHedger(max_hedge_rate=args.max_rate, min_samples=20, min_deadline=0.0) if hedging else None
+        set_request_hedger(hedger)
+        set_llm_backend(TailLatencyBackend())
+        set_question_bank(QuestionBank())
+        timings = []
+        for i in range(args.requests):
+            start = time.perf_counter()
+            generate_mcq_question(f"Topic {i}", "Medium")
+            timings.append(time.perf_counter() - start)
+        p50, p90, p99 = np.percentile(timings, [50, 90, 99]) * 1000
+        line = f"hedging {'on ' if hedging else 'off'}: p50 {p50:.0f} ms, p90 {p90:.0f} ms, p99 {p99:.0f} ms"
+        if hedger is not None:
+            stats = hedger.stats()["mcq"]
+            line += (f", hedge rate {stats['hedge_rate']:.1%}, hedge wins {stats['hedge_wins']}"
+                     f", capped {stats['capped']}, deadline {stats['deadline'] * 1000:.0f} ms")
+            hedger.shutdown()
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Logging benchmark
+
+This script measures what a logger.info call costs the calling (request)
+thread with the previous synchronous FileHandler + StreamHandler setup and
+with the queue-based setup of setup_logging. Each setup runs in a fresh
+interpreter whose stdout goes to a pipe that is drained slowly, like a busy
+container log collector, so stdout writes can block.
+
+Usage:
+    python -m benchmarks.bench_logging --calls 20000
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import subprocess
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Code run in a fresh interpreter for each setup. Per-call latencies are
+# measured on the calling thread; the result is written to a file because
+# stdout is the pipe under test.
+_MEASURE_SOURCE = r'''
+import json, logging, os, sys, time
+sys.path.insert(0, sys.argv[4])
+from src.utils.logging_utils import LOG_FORMAT, setup_logging, shutdown_logging
+
+mode, calls, log_dir, result_path = sys.argv[1], int(sys.argv[2]), sys.argv[3], sys.argv[5]
+if mode == "sync":
+    logging.basicConfig(
+        level=logging.INFO,
+        format=LOG_FORMAT,
+        handlers=[logging.FileHandler(os.path.join(log_dir, "sync.log")), logging.StreamHandler(sys.stdout)]
+    )
+else:
+    setup_logging(log_dir=log_dir, settings={
+        "level": "INFO", "json_format": mode == "json", "max_bytes": 1024 * 1024,
+        "rotate_seconds": 86400, "backup_count": 3, "debug_sample_rate": 1.0,
+    })
+
+logger = logging.getLogger("src.services.question_service")
+latencies = []
+for i in range(calls):
+    start = time.perf_counter()
+    logger.info(f"Generated MCQ question for topic Machine Learning, Supervised, Regression #{i}")
+    latencies.append(time.perf_counter() - start)
+
+drain_start = time.perf_counter()
+if mode != "sync":
+    shutdown_logging()
+drain = time.perf_counter() - drain_start
+latencies.sort()
+with open(result_path, "w") as f:
+    json.dump({
+        "mean_us": sum(latencies) / len(latencies) * 1e6,
+        "p50_us": latencies[len(latencies) // 2] * 1e6,
+        "p99_us": latencies[int(len(latencies) * 0.99)] * 1e6,
+        "max_us": latencies[-1] * 1e6,
+        "drain_ms": drain * 1000,
+    }, f)
+'''
+
+
+def measure(mode, calls, drain_delay):
+    """
+    Measure one logging setup in a fresh interpreter.
+
+    Args:
+        mode (str): "sync", "queue" or "json"
+        calls (int): Number of log calls
+        drain_delay (float): Seconds to pause between 64 KB reads of the child's stdout
+
+    Returns:
+        dict: Per-call latency statistics in microseconds and the final drain time
+    """
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        result_path = os.path.join(tmp_dir, "result.json")
+        process = subprocess.Popen(
+            [sys.executable, "-c", _MEASURE_SOURCE, mode, str(calls), tmp_dir, REPO_ROOT, result_path],
+            stdout=subprocess.PIPE,
+        )
+        # Read the pipe slowly, like a log collector that cannot keep up
+        while process.stdout.read1(65536):
+            time.sleep(drain_delay)
+        process.wait()
+        with open(result_path) as f:
+            return json.load(f)
+
+
+def main():
+    """
+    Run every setup and print the per-call cost on the calling thread.
+    """
+    parser = argparse.ArgumentParser(description="Measure the per-call cost of logging on the request thread.")
+    parser.add_argument("--calls", type=int, default=20000, help="Number of log calls per setup")
+    parser.add_argument("--drain-delay", type=float, default=0.1,
+                        help="Seconds between 64 KB reads of stdout (0 drains as fast as possible)")
+    args = parser.parse_args()
+
+    rows = [
+        ("sync file + stdout", "sync"),
+        ("queue, text", "queue"),
+        ("queue, JSON lines", "json"),
+    ]
+    print(f"{'setup':<20} {'mean us':>9} {'p50 us':>9} {'p99 us':>9} {'max us':>10} {'drain ms':>9}")
+    for label, mode in rows:
+        result = measure(mode, args.calls, args.drain_delay)
+        print(f"{label:<20} {result['mean_us']:>9.1f} {result['p50_us']:>9.1f} {result['p99_us']:>9.1f} "
+              f"{result['max_us']:>10.1f} {result['drain_ms']:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
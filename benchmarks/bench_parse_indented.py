@@ -0,0 +1,116 @@
+"""
+Indented topic parser benchmark
+
+This script generates a large raw topic outline with many roots and mixed
+tab/space indentation, then measures the throughput (lines per second) and
+peak RSS of the streaming parser, compared with reading the whole file with
+readlines() first. Each measurement runs in a fresh interpreter so the peak
+RSS of one does not hide the other.
+
+Usage:
+    python -m benchmarks.bench_parse_indented --roots 20000 --lines-per-root 200
+"""
+import os
+import sys
+import json
+import random
+import argparse
+import tempfile
+import subprocess
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Code run in a fresh interpreter for each measurement
+_MEASURE_SOURCE = r'''
+import json, resource, sys, time
+sys.path.insert(0, sys.argv[3])
+from src.services.topic_service import iter_indented_lines, iter_indented_topics
+
+mode, path = sys.argv[1], sys.argv[2]
+start = time.perf_counter()
+lines = roots = 0
+if mode == "readlines":
+    with open(path, "r", encoding="utf-8") as f:
+        all_lines = f.readlines()
+    lines = sum(1 for line in all_lines if line.strip())
+elif mode == "lines":
+    for _ in iter_indented_lines(path):
+        lines += 1
+else:
+    for root in iter_indented_topics(path):
+        roots += 1
+    lines = sum(1 for _ in iter_indented_lines(path))
+elapsed = time.perf_counter() - start
+peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+peak_mb = peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+print(json.dumps({"lines": lines, "roots": roots, "seconds": elapsed, "peak_rss_mb": peak_mb}))
+'''
+
+
+def write_outline(path, roots, lines_per_root, seed=0):
+    """
+    Write a synthetic outline with mixed tab and space indentation.
+
+    Args:
+        path (str): The file to write
+        roots (int): Number of root topics
+        lines_per_root (int): Number of lines under each root
+        seed (int): Seed for the random structure
+    """
+    rng = random.Random(seed)
+    with open(path, "w", encoding="utf-8") as f:
+        for root in range(roots):
+            f.write(f"Root topic {root}\n")
+            depth = 0
+            for line in range(lines_per_root):
+                depth = max(1, min(depth + rng.choice([-1, 0, 1]), 6))
+                # Alternate tabs and 4-space indentation; both measure 4 columns per level
+                indentation = "\t" * depth if line % 2 else "    " * depth
+                f.write(f"{indentation}Subtopic {root}.{line} with a descriptive name\n")
+
+
+def measure(mode, path):
+    """
+    Measure one parsing mode in a fresh interpreter.
+
+    Args:
+        mode (str): "readlines", "lines" or "topics"
+        path (str): The outline file
+
+    Returns:
+        dict: Line count, root count, elapsed seconds and peak RSS
+    """
+    output = subprocess.check_output([sys.executable, "-c", _MEASURE_SOURCE, mode, path, REPO_ROOT], text=True)
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    """
+    Generate the outline and print the throughput of each mode.
+    """
+    parser = argparse.ArgumentParser(description="Benchmark the streaming indented topic parser.")
+    parser.add_argument("--roots", type=int, default=20000, help="Number of root topics")
+    parser.add_argument("--lines-per-root", type=int, default=200, help="Lines under each root")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "outline.txt")
+        write_outline(path, args.roots, args.lines_per_root)
+        print(f"Outline: {os.path.getsize(path) / 1e6:.0f} MB, {args.roots * (args.lines_per_root + 1)} lines")
+
+        rows = [
+            ("readlines() only", "readlines"),
+            ("iter_indented_lines", "lines"),
+            ("iter_indented_topics", "topics"),
+        ]
+        print(f"{'mode':<22} {'lines/s':>12} {'peak RSS MB':>12}")
+        for label, mode in rows:
+            result = measure(mode, path)
+            # The topics mode streams the file twice (trees, then a line count)
+            passes = 2 if mode == "topics" else 1
+            rate = passes * result["lines"] / result["seconds"] if result["seconds"] else 0.0
+            print(f"{label:<22} {rate:>12,.0f} {result['peak_rss_mb']:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
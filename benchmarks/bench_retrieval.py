@@ -0,0 +1,87 @@
+"""
+Retrieval benchmark
+
+This script indexes a synthetic question bank with the BM25 retriever and
+times the query that grounds each Quick Search answer, before and after the
+index is saved and reloaded.
+
+Usage:
+    python -m benchmarks.bench_retrieval --items 100000 --queries 1000
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+WORDS = ("gradient descent dropout activation relu sigmoid softmax attention transformer embedding tokenizer "
+         "regularization overfitting variance bias kernel convolution pooling batch normalization optimizer "
+         "momentum learning rate loss entropy likelihood prior posterior bayes sampling markov chain").split()
+
+
+def report(label, timings):
+    """
+    Print latency percentiles of a list of durations in seconds.
+    """
+    timings = sorted(timings)
+    print(f"{label}: p50 {timings[len(timings) // 2] * 1e3:.3f} ms, "
+          f"p99 {timings[int(len(timings) * 0.99)] * 1e3:.3f} ms")
+
+
+def main():
+    """
+    Build the index, run the queries and print indexing time and query latency.
+    """
+    parser = argparse.ArgumentParser(description="Time BM25 context retrieval over a large question bank.")
+    parser.add_argument("--items", type=int, default=100000, help="Number of stored questions")
+    parser.add_argument("--queries", type=int, default=1000, help="Number of queries")
+    args = parser.parse_args()
+
+    sys.path.insert(0, REPO_ROOT)
+    from src.services.question_bank import QuestionBank
+    from src.services.retrieval_service import BM25Index, ContextRetriever
+
+    rng = random.Random(0)
+    bank = QuestionBank()
+    for i in range(args.items):
+        text = f"Question {i}: how does {' '.join(rng.sample(WORDS, 4))} work?"
+        payload = json.dumps({"question": text, "options": rng.sample(WORDS, 4), "correct_answers": [0],
+                              "explanation": " ".join(rng.choices(WORDS, k=25)), "difficulty": "Medium"})
+        bank.add("mcq", f"Topic {i % 500}", "Medium", payload)
+    queries = [f"What is {' '.join(rng.sample(WORDS, 3))}?" for _ in range(args.queries)]
+
+    with tempfile.TemporaryDirectory() as directory:
+        retriever = ContextRetriever(bank=bank, topics_dir=directory)
+        start = time.perf_counter()
+        retriever.refresh()
+        print(f"indexed {len(retriever.index)} documents in {time.perf_counter() - start:.2f} s")
+
+        timings = []
+        for query in queries:
+            start = time.perf_counter()
+            retriever.retrieve(query, 4, 400)
+            timings.append(time.perf_counter() - start)
+        report("retrieve", timings)
+
+        path = os.path.join(directory, "index.npz")
+        start = time.perf_counter()
+        retriever.index.save(path)
+        print(f"saved index ({os.path.getsize(path) / 1e6:.1f} MB) in {time.perf_counter() - start:.2f} s")
+        start = time.perf_counter()
+        index = BM25Index.load(path)
+        print(f"loaded index in {time.perf_counter() - start:.2f} s")
+
+        timings = []
+        for query in queries:
+            start = time.perf_counter()
+            index.search(query, 4)
+            timings.append(time.perf_counter() - start)
+        report("search after reload", timings)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+Streaming generation benchmark
+
+This script generates MCQs and coding questions through question_service
+against an offline backend that streams its output at a steady rate, and
+prints the time until the fields a page needs to become interactive have
+arrived next to the time until the whole question is finished.
+
+Usage:
+    python -m benchmarks.bench_streaming --requests 20 --latency-ms 2000
+"""
+import os
+import sys
+import time
+import argparse
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Fields each page renders before the rest of the question has arrived, as in src/app.py
+INTERACTIVE_FIELDS = {
+    "mcq": ("question", "options", "correct_answers"),
+    "coding": ("question", "description", "examples", "starter_code", "language"),
+}
+
+
+def main():
+    """
+    Generate streamed questions and print the time-to-interactive and total time percentiles.
+    """
+    parser = argparse.ArgumentParser(description="Measure the time-to-first-interaction of streamed questions.")
+    parser.add_argument("--requests", type=int, default=20, help="Questions generated per type")
+    parser.add_argument("--latency-ms", type=float, default=2000.0, help="Time to stream a whole completion")
+    args = parser.parse_args()
+
+    sys.path.insert(0, REPO_ROOT)
+    import numpy as np
+    from src.services.llm_backend import OfflineBackend, set_llm_backend
+    from src.services.question_bank import QuestionBank, set_question_bank
+    from src.services.question_service import generate_mcq_question, generate_coding_question
+
+    set_llm_backend(OfflineBackend(latency_ms=args.latency_ms))
+    set_question_bank(QuestionBank())
+    for question_type, generate in (("mcq", generate_mcq_question), ("coding", generate_coding_question)):
+        needed = set(INTERACTIVE_FIELDS[question_type])
+        interactive, total = [], []
+        for i in range(args.requests):
+            received = set()
+            start = time.perf_counter()
+
+            def on_field(name, value):
+                received.add(name)
+                if len(interactive) == len(total) and needed <= received:
+                    interactive.append(time.perf_counter() - start)
+
+            generate(f"Topic {i}", "Medium", on_field=on_field)
+            total.append(time.perf_counter() - start)
+        for name, timings in (("interactive", interactive), ("finished", total)):
+            p50, p90 = np.percentile(timings, [50, 90]) * 1000
+            print(f"{question_type} {name}: p50 {p50:.0f} ms, p90 {p90:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""
+Topic catalog benchmark
+
+This script generates a synthetic topic store with thousands of taxonomies
+in the per-file JSON layout, compiles it into a catalog, and compares the
+two layouts. Each measurement runs in a fresh interpreter so that load time
+and RSS growth are not affected by earlier runs.
+
+Usage:
+    python -m benchmarks.bench_topic_catalog --taxonomies 5000 --fanout 4 --depth 3
+"""
+import os
+import sys
+import json
+import random
+import argparse
+import tempfile
+import subprocess
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Code run in a fresh interpreter for each measurement. It prints the load time,
+# the time for 1000 random topic selections and the RSS growth caused by loading.
+_MEASURE_SOURCE = r'''
+import glob, json, os, random, sys, time
+sys.path.insert(0, sys.argv[3])
+from src.services.topic_catalog import TopicCatalog, load_topic_catalog
+
+def rss_kb():
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") // 1024
+
+layout, path = sys.argv[1], sys.argv[2]
+rng = random.Random(0)
+before = rss_kb()
+start = time.perf_counter()
+if layout == "json":
+    trees = []
+    for name in sorted(glob.glob(os.path.join(path, "*.json"))):
+        with open(name, "r", encoding="utf-8") as f:
+            trees.append(json.load(f))
+else:
+    catalog = load_topic_catalog(path, sys.argv[4]) if sys.argv[4] else TopicCatalog(path)
+load_time = time.perf_counter() - start
+growth = rss_kb() - before
+
+start = time.perf_counter()
+for _ in range(1000):
+    if layout == "json":
+        topic = rng.choice(trees)
+        while topic["subTopics"]:
+            topic = rng.choice(topic["subTopics"])
+    else:
+        catalog.get_random_topic_path(rng)
+select_time = time.perf_counter() - start
+print(json.dumps({"load_ms": load_time * 1000, "select_ms": select_time * 1000, "rss_growth_kb": growth}))
+'''
+
+
+def build_tree(rng, prefix, fanout, depth):
+    """
+    Build a synthetic topic tree.
+
+    Args:
+        rng (random.Random): Source of randomness
+        prefix (str): Name prefix of the tree
+        fanout (int): Maximum number of children per topic
+        depth (int): Remaining depth below this topic
+
+    Returns:
+        dict: The nested topic structure
+    """
+    name = f"{prefix} topic {rng.randint(0, 10 ** 6)}"
+    children = []
+    if depth > 0:
+        children = [build_tree(rng, f"{prefix}.{i}", fanout, depth - 1) for i in range(rng.randint(1, fanout))]
+    return {"topicId": name.lower().replace(" ", "_"), "topicName": name, "subTopics": children}
+
+
+def measure(layout, path, topics_dir=""):
+    """
+    Measure a layout in a fresh interpreter.
+
+    Args:
+        layout (str): "json" or "catalog"
+        path (str): The topics directory or catalog path
+        topics_dir (str): For catalogs, the directory to validate freshness against
+
+    Returns:
+        dict: Load time, selection time and RSS growth
+    """
+    output = subprocess.check_output(
+        [sys.executable, "-c", _MEASURE_SOURCE, layout, path, REPO_ROOT, topics_dir],
+        text=True,
+    )
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    """
+    Generate the synthetic store, compile it and print the comparison.
+    """
+    parser = argparse.ArgumentParser(description="Compare the JSON topic layout with the compiled catalog.")
+    parser.add_argument("--taxonomies", type=int, default=2000, help="Number of topic files")
+    parser.add_argument("--fanout", type=int, default=4, help="Maximum children per topic")
+    parser.add_argument("--depth", type=int, default=3, help="Depth of each tree")
+    parser.add_argument("--runs", type=int, default=3, help="Measurements per layout (best is reported)")
+    args = parser.parse_args()
+
+    sys.path.insert(0, REPO_ROOT)
+    from src.services.topic_catalog import compile_topic_catalog
+
+    rng = random.Random(0)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        topics_dir = os.path.join(tmp_dir, "topics")
+        os.makedirs(topics_dir)
+        for i in range(args.taxonomies):
+            with open(os.path.join(topics_dir, f"taxonomy_{i}.json"), "w", encoding="utf-8") as f:
+                json.dump(build_tree(rng, f"T{i}", args.fanout, args.depth), f, indent=4)
+
+        catalog_path = os.path.join(tmp_dir, "catalog.bin")
+        compile_topic_catalog(topics_dir, catalog_path)
+        json_bytes = sum(os.path.getsize(os.path.join(topics_dir, name)) for name in os.listdir(topics_dir))
+        print(f"{args.taxonomies} taxonomies: {json_bytes / 1e6:.1f} MB of JSON, "
+              f"{os.path.getsize(catalog_path) / 1e6:.1f} MB catalog")
+
+        rows = [
+            ("per-file JSON", "json", topics_dir, ""),
+            ("catalog (unvalidated)", "catalog", catalog_path, ""),
+            ("catalog (validated)", "catalog", catalog_path, topics_dir),
+        ]
+        print(f"{'layout':<24} {'load ms':>10} {'1k picks ms':>12} {'rss growth MB':>14}")
+        for label, layout, path, validate_dir in rows:
+            results = [measure(layout, path, validate_dir) for _ in range(args.runs)]
+            best = min(results, key=lambda result: result["load_ms"])
+            print(f"{label:<24} {best['load_ms']:>10.1f} {best['select_ms']:>12.2f} "
+                  f"{best['rss_growth_kb'] / 1024:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,423 @@
+"""
+Concurrent-session load test for the Streamlit app
+
+This script starts one replica of the app (streamlit run app.py) with the LLM
+replaced by the offline backend, and drives N simulated user sessions through
+realistic flows over Streamlit's websocket protocol, exactly like browsers do.
+For each concurrency level it reports rerun latency percentiles, throughput,
+and the CPU and RSS of the replica, and flags the level at which rerun latency
+saturates.
+
+Streamlit's AppTest is not used because it swaps process-wide globals on every
+run, so several AppTest sessions cannot run concurrently in one process.
+
+Usage:
+    python -m benchmarks.load_test --concurrency 1,2,4,8,16 --steps 20 --latency-ms 500
+"""
+import os
+import sys
+import json
+import time
+import random
+import socket
+import asyncio
+import logging
+import argparse
+import subprocess
+import urllib.request
+
+import numpy as np
+import websockets
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# A level is considered saturated once its p90 exceeds the single-session p90 by this factor
+SATURATION_FACTOR = 2.0
+
+# Interval between CPU/RSS samples of the replica, in seconds
+SAMPLE_INTERVAL = 0.25
+
+# Relative frequency of each user flow
+FLOW_WEIGHTS = {
+    "mcq_answer_next": 5,
+    "subjective_show_answer": 2,
+    "coding": 1,
+    "quick_search": 2,
+}
+
+# Widget element types whose ids are tracked
+WIDGET_TYPES = ("button", "text_area")
+
+
+class SimulatedSession:
+    """
+    A single user session speaking Streamlit's websocket protocol.
+    """
+
+    def __init__(self, url, session_id, seed, timeout):
+        """
+        Initialize the session.
+
+        Args:
+            url (str): Base http URL of the replica
+            session_id (int): Identifier of the session
+            seed (int): Seed for the session's flow choices
+            timeout (float): Timeout for a single rerun, in seconds
+        """
+        self.stream_url = url.replace("http", "ws", 1).rstrip("/") + "/_stcore/stream"
+        self.session_id = session_id
+        self.rng = random.Random(seed)
+        self.timeout = timeout
+        self.websocket = None
+        self.widget_ids = {}
+        self.latencies = []
+        self.errors = 0
+
+    async def rerun(self, flow, widget_states=()):
+        """
+        Request a script rerun and wait until it finishes.
+
+        Args:
+            flow (str): The flow the rerun belongs to, for reporting
+            widget_states (iterable): WidgetState protos to send with the rerun
+        """
+        message = BackMsg()
+        message.rerun_script.query_string = ""
+        message.rerun_script.widget_states.widgets.extend(widget_states)
+
+        start = time.perf_counter()
+        await self.websocket.send(message.SerializeToString())
+        widget_ids = {}
+        while True:
+            forward = ForwardMsg()
+            forward.ParseFromString(await asyncio.wait_for(self.websocket.recv(), self.timeout))
+            kind = forward.WhichOneof("type")
+            if kind == "delta" and forward.delta.WhichOneof("type") == "new_element":
+                element = forward.delta.new_element
+                if element.WhichOneof("type") in WIDGET_TYPES:
+                    widget_id = getattr(element, element.WhichOneof("type")).id
+                    widget_ids[widget_id.rsplit("-", 1)[-1]] = widget_id
+            elif kind == "script_finished":
+                break
+        self.latencies.append((flow, time.perf_counter() - start))
+        self.widget_ids = widget_ids
+
+    async def click(self, key, flow, **extra_values):
+        """
+        Click a button if it is on the page and wait for the rerun.
+
+        Args:
+            key (str): The widget key of the button
+            flow (str): The flow the click belongs to
+            **extra_values: String values to send for other widgets, by widget key
+        """
+        if key not in self.widget_ids:
+            return
+        states = []
+        trigger = BackMsg().rerun_script.widget_states.widgets.add()
+        trigger.id = self.widget_ids[key]
+        trigger.trigger_value = True
+        states.append(trigger)
+        for widget_key, value in extra_values.items():
+            if widget_key in self.widget_ids:
+                state = BackMsg().rerun_script.widget_states.widgets.add()
+                state.id = self.widget_ids[widget_key]
+                state.string_value = value
+                states.append(state)
+        await self.rerun(flow, states)
+
+    async def run_flow(self, flow):
+        """
+        Run one user flow.
+
+        Args:
+            flow (str): The name of the flow to run
+        """
+        if flow == "mcq_answer_next":
+            await self.click("quiz_btn", flow)
+            await self.click("mcq_submit_button", flow)
+            await self.click("mcq_next_button", flow)
+        elif flow == "subjective_show_answer":
+            await self.click("subjectives_btn", flow)
+            await self.click("subj_show_answer_button", flow)
+            await self.click("subj_next_button", flow)
+        elif flow == "coding":
+            await self.click("coding_btn", flow)
+            await self.click("coding_solution_button", flow)
+            await self.click("coding_next_button", flow)
+        elif flow == "quick_search":
+            # The search text area has no key, so its id ends in "None"
+            question = f"Question {self.rng.randint(0, 50)} about transformers?"
+            await self.click("ask_button", flow, **{"None": question})
+
+    async def run(self, steps):
+        """
+        Open the session, load the app and run a sequence of randomly chosen flows.
+
+        Args:
+            steps (int): Number of flows to run
+        """
+        flows, weights = zip(*FLOW_WEIGHTS.items())
+        try:
+            async with websockets.connect(self.stream_url, max_size=None) as websocket:
+                self.websocket = websocket
+                await self.rerun("initial_load")
+                for _ in range(steps):
+                    await self.run_flow(self.rng.choices(flows, weights=weights)[0])
+        except Exception as e:
+            logger.error(f"Session {self.session_id} failed: {type(e).__name__}: {str(e)}")
+            self.errors += 1
+
+
+class ProcessSampler:
+    """
+    Samples CPU time and RSS of a process from /proc (Linux only).
+    """
+
+    def __init__(self, pid):
+        """
+        Initialize the sampler.
+
+        Args:
+            pid (int): The process to sample
+        """
+        self.pid = pid
+        self.ticks_per_second = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+        self.page_size = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+    def cpu_seconds(self):
+        """
+        Get the CPU time used by the process so far.
+
+        Returns:
+            float: User plus system CPU time in seconds, or None if unavailable
+        """
+        try:
+            with open(f"/proc/{self.pid}/stat", "r") as f:
+                # The command name may contain spaces, so split after its closing parenthesis
+                fields = f.read().rsplit(")", 1)[1].split()
+            return (int(fields[11]) + int(fields[12])) / self.ticks_per_second
+        except (OSError, IndexError, ValueError):
+            return None
+
+    def rss_mb(self):
+        """
+        Get the resident set size of the process.
+
+        Returns:
+            float: RSS in megabytes, or None if unavailable
+        """
+        try:
+            with open(f"/proc/{self.pid}/statm", "r") as f:
+                return int(f.read().split()[1]) * self.page_size / (1024 * 1024)
+        except (OSError, IndexError, ValueError):
+            return None
+
+
+async def run_level(url, sampler, concurrency, steps, timeout, seed):
+    """
+    Run one concurrency level.
+
+    Args:
+        url (str): Base http URL of the replica
+        sampler (ProcessSampler): Sampler for the replica process, or None
+        concurrency (int): Number of simultaneous sessions
+        steps (int): Number of flows per session
+        timeout (float): Timeout for a single rerun, in seconds
+        seed (int): Base seed for the sessions
+
+    Returns:
+        dict: Latency percentiles, throughput, CPU and RSS for the level
+    """
+    sessions = [SimulatedSession(url, i, seed + i, timeout) for i in range(concurrency)]
+    rss_samples = []
+
+    async def sample_rss():
+        while True:
+            rss_samples.append(sampler.rss_mb())
+            await asyncio.sleep(SAMPLE_INTERVAL)
+
+    sampling = asyncio.ensure_future(sample_rss()) if sampler else None
+    cpu_start = sampler.cpu_seconds() if sampler else None
+    wall_start = time.perf_counter()
+    await asyncio.gather(*(session.run(steps) for session in sessions))
+    wall = time.perf_counter() - wall_start
+    cpu_end = sampler.cpu_seconds() if sampler else None
+    if sampling:
+        sampling.cancel()
+
+    latencies = np.array([latency for session in sessions for _, latency in session.latencies]) * 1000
+    by_flow = {}
+    for session in sessions:
+        for flow, latency in session.latencies:
+            by_flow.setdefault(flow, []).append(latency * 1000)
+    rss_samples = [rss for rss in rss_samples if rss is not None]
+
+    def pct(q):
+        return float(np.percentile(latencies, q)) if latencies.size else None
+
+    return {
+        "concurrency": concurrency,
+        "reruns": int(latencies.size),
+        "errors": sum(session.errors for session in sessions),
+        "throughput_rps": latencies.size / wall if wall else 0.0,
+        "p50_ms": pct(50),
+        "p90_ms": pct(90),
+        "p99_ms": pct(99),
+        "max_ms": float(latencies.max()) if latencies.size else None,
+        "cpu_percent": 100.0 * (cpu_end - cpu_start) / wall if cpu_start is not None and cpu_end is not None else None,
+        "rss_mb": max(rss_samples) if rss_samples else None,
+        "p90_ms_by_flow": {flow: float(np.percentile(values, 90)) for flow, values in by_flow.items()},
+    }
+
+
+def find_saturation(levels):
+    """
+    Find the first concurrency level whose p90 latency exceeds the baseline by SATURATION_FACTOR.
+
+    Args:
+        levels (list): Results of run_level, ordered by concurrency
+
+    Returns:
+        int: The saturating concurrency, or None if no level saturated
+    """
+    baseline = levels[0]["p90_ms"] if levels else None
+    if not baseline:
+        return None
+    for level in levels[1:]:
+        if level["p90_ms"] and level["p90_ms"] > SATURATION_FACTOR * baseline:
+            return level["concurrency"]
+    return None
+
+
+def start_replica(port, latency_ms, jitter_ms):
+    """
+    Start a headless replica of the app using the offline LLM backend.
+
+    Args:
+        port (int): Port to serve on
+        latency_ms (float): Synthetic LLM latency, in milliseconds
+        jitter_ms (float): Maximum extra synthetic latency, in milliseconds
+
+    Returns:
+        subprocess.Popen: The replica process, once it answers health checks
+    """
+    env = dict(os.environ)
+    env.update({
+        "LLM_BACKEND": "offline",
+        "OFFLINE_LLM_LATENCY_MS": str(latency_ms),
+        "OFFLINE_LLM_JITTER_MS": str(jitter_ms),
+    })
+    process = subprocess.Popen(
+        [sys.executable, "-m", "streamlit", "run", "app.py",
+         "--server.headless", "true",
+         "--server.port", str(port),
+         "--server.fileWatcherType", "none",
+         "--browser.gatherUsageStats", "false"],
+        cwd=REPO_ROOT,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        try:
+            with urllib.request.urlopen(f"http://localhost:{port}/_stcore/health", timeout=1):
+                return process
+        except OSError:
+            if process.poll() is not None:
+                raise RuntimeError("The Streamlit replica exited during startup")
+            time.sleep(0.25)
+    process.kill()
+    raise RuntimeError("The Streamlit replica did not become healthy within 60 seconds")
+
+
+def find_free_port():
+    """
+    Find a free local TCP port.
+
+    Returns:
+        int: The port number
+    """
+    with socket.socket() as sock:
+        sock.bind(("localhost", 0))
+        return sock.getsockname()[1]
+
+
+async def run_levels(url, sampler, args):
+    """
+    Run every requested concurrency level and print a row for each.
+
+    Args:
+        url (str): Base http URL of the replica
+        sampler (ProcessSampler): Sampler for the replica process, or None
+        args (argparse.Namespace): Parsed command-line arguments
+
+    Returns:
+        list: The results of each level
+    """
+    levels = []
+    print(f"{'sessions':>8} {'reruns':>7} {'err':>4} {'rps':>7} {'p50 ms':>8} {'p90 ms':>8} "
+          f"{'p99 ms':>8} {'cpu %':>6} {'rss MB':>7}")
+    for concurrency in [int(value) for value in args.concurrency.split(",") if value]:
+        level = await run_level(url, sampler, concurrency, args.steps, args.timeout, args.seed)
+        levels.append(level)
+        print(f"{level['concurrency']:>8} {level['reruns']:>7} {level['errors']:>4} "
+              f"{level['throughput_rps']:>7.1f} {level['p50_ms'] or 0:>8.1f} {level['p90_ms'] or 0:>8.1f} "
+              f"{level['p99_ms'] or 0:>8.1f} {level['cpu_percent'] or 0:>6.0f} {level['rss_mb'] or 0:>7.0f}")
+    return levels
+
+
+def main():
+    """
+    Parse arguments, start the replica, run every concurrency level and print the report.
+    """
+    parser = argparse.ArgumentParser(description="Load test the DeepMindset.ai Streamlit app.")
+    parser.add_argument("--concurrency", default="1,2,4,8", help="Comma-separated session counts")
+    parser.add_argument("--steps", type=int, default=10, help="Flows per session")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Synthetic LLM latency")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="Maximum extra synthetic LLM latency")
+    parser.add_argument("--timeout", type=float, default=120.0, help="Timeout per rerun, in seconds")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for the flow choices")
+    parser.add_argument("--url", help="Test an already running replica instead of starting one")
+    parser.add_argument("--pid", type=int, help="Process id of the replica given with --url, for CPU/RSS")
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+
+    process = None
+    if args.url:
+        url, pid = args.url, args.pid
+    else:
+        port = find_free_port()
+        process = start_replica(port, args.latency_ms, args.jitter_ms)
+        url, pid = f"http://localhost:{port}", process.pid
+
+    sampler = ProcessSampler(pid) if pid and os.path.exists(f"/proc/{pid}") else None
+    try:
+        levels = asyncio.run(run_levels(url, sampler, args))
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait(timeout=10)
+
+    saturation = find_saturation(levels)
+    if saturation:
+        print(f"Saturation: p90 rerun latency exceeds {SATURATION_FACTOR:g}x baseline at {saturation} sessions")
+    else:
+        print("No saturation detected at the tested concurrency levels")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"levels": levels, "saturation_concurrency": saturation}, f, indent=4)
+
+
+if __name__ == "__main__":
+    main()
@@ -6,18 +6,46 @@ It handles the UI setup, navigation, and interaction with the various components
 """
 import streamlit as st
 import json
-import torch
 import threading
 import time
+import uuid
 from code_editor import code_editor
 
-from src.services.question_service import generate_mcq_question, generate_subjective_question, generate_coding_question
+from src.services.question_service import (
+    generate_mcq_question, generate_subjective_question, generate_coding_question, request_explanation
+)
 from src.services.topic_service import update_topics, get_random_topic
-from src.services.answer_service import get_gpt_answer
-from src.config.app_config import setup_page_config
-
-# Fix for torch classes path issue
-torch.classes.__path__ = []  # Manually set it to empty
+from src.services.topic_watcher import get_topic_watcher
+from src.services.answer_service import get_gpt_answer, is_successful_answer
+from src.services.retrieval_service import get_context_retriever
+from src.services.search_history_service import get_search_history_store
+from src.services.attempt_log import get_attempt_log
+from src.services.adaptive_service import get_adaptive_engine
+from src.services.question_bank import make_item_id
+from src.services.prefetch_service import SpeculativePrefetch
+from src.services.question_stream import QuestionStream
+from src.services.exam_service import Exam, MAX_EXAM_QUESTIONS
+from src.services.code_runner_service import run_tests
+from src.config.app_config import setup_page_config, is_code_runner_enabled
+from src.utils.tracing import start_span, traced
+from src.utils.profiling import profile_rerun
+
+# Fix for torch classes path issue (torch is optional and only patched when installed)
+try:
+    import torch
+    torch.classes.__path__ = []  # Manually set it to empty
+except ImportError:
+    pass
+
+# Fields a question page needs before the user can start working on it; the rest is streamed in later
+MCQ_INTERACTIVE_FIELDS = ("question", "options", "correct_answers")
+CODING_INTERACTIVE_FIELDS = ("question", "description", "examples", "starter_code", "language")
+
+# How often an explanation still being generated in the background is checked for, in seconds
+EXPLANATION_POLL_SECONDS = 1
+
+# How often the exam page checks for newly generated questions, in seconds
+EXAM_POLL_SECONDS = 1
 
 # Initialize session state for minimal reruns
 def initialize_session_state():
@@ -35,9 +63,13 @@ def initialize_session_state():
         st.session_state.mcq_answered = False
         st.session_state.mcq_score = 0
         st.session_state.mcq_current_topic = None
+        st.session_state.mcq_question_shown_at = None
+        st.session_state.mcq_item_id = None
         st.session_state.mcq_current_question_id = 0
         st.session_state.mcq_question_version = 0
         st.session_state.mcq_selected_options = []
+        st.session_state.mcq_prefetch = SpeculativePrefetch()
+        st.session_state.mcq_stream = None
         
         # Subjective state
         st.session_state.subj_question_data = None
@@ -45,6 +77,7 @@ def initialize_session_state():
         st.session_state.subj_current_topic = None
         st.session_state.subj_current_question_id = 0
         st.session_state.subj_question_version = 0
+        st.session_state.subj_prefetch = SpeculativePrefetch()
         
         # Coding state
         st.session_state.coding_question_data = None
@@ -53,6 +86,14 @@ def initialize_session_state():
         st.session_state.coding_current_question_id = 0
         st.session_state.coding_question_version = 0
         st.session_state.user_code_input = ""
+        st.session_state.coding_test_results = None
+        st.session_state.coding_stream = None
+        
+        # Exam state
+        st.session_state.exam = None
+        st.session_state.exam_id = 0
+        st.session_state.exam_index = 0
+        st.session_state.exam_result = None
         
         # Search state
         st.session_state.search_history = []
@@ -69,29 +110,41 @@ def main():
     # Set page configuration
     setup_page_config()
     
-    # Initialize all session state at once
-    initialize_session_state()
+    # Profile sampled reruns, or any rerun an admin requests with ?profile=<token>
+    with profile_rerun(st.query_params.get("profile")):
+        # Initialize all session state at once
+        initialize_session_state()
 
-    # Create a layout with main content and right sidebar
-    main_col, right_sidebar = st.columns([3, 1], gap="medium")
+        # Keep the topic index in sync with topic_store/raw in the background
+        get_topic_watcher()
 
-    with main_col:
-        # Set up navigation in the sidebar
-        setup_navigation()
-        
-        # Handle different pages based on user selection
-        if st.session_state.current_page == "Update Topics":
-            render_update_topics_page()
-        elif st.session_state.current_page == "MCQ":
-            render_mcq_page()
-        elif st.session_state.current_page == "Subjectives":
-            render_subjective_page()
-        elif st.session_state.current_page == "Coding Interviews":
-            render_coding_interview_page()
+        # Start indexing topics and stored questions for Quick Search context
+        get_context_retriever()
 
-    # Right sidebar for quick search
-    with right_sidebar:
-        render_search_sidebar()
+        # Time the whole rerun as the root span of its trace
+        with start_span("rerun", page=st.session_state.current_page):
+            # Create a layout with main content and right sidebar
+            main_col, right_sidebar = st.columns([3, 1], gap="medium")
+
+            with main_col:
+                # Set up navigation in the sidebar
+                setup_navigation()
+        
+                # Handle different pages based on user selection
+                if st.session_state.current_page == "Update Topics":
+                    render_update_topics_page()
+                elif st.session_state.current_page == "MCQ":
+                    render_mcq_page()
+                elif st.session_state.current_page == "Subjectives":
+                    render_subjective_page()
+                elif st.session_state.current_page == "Coding Interviews":
+                    render_coding_interview_page()
+                elif st.session_state.current_page == "Exam":
+                    render_exam_page()
+
+            # Right sidebar for quick search
+            with right_sidebar:
+                render_search_sidebar()
 
 
 def setup_navigation():
@@ -107,6 +160,8 @@ def setup_navigation():
         st.session_state.current_page = "Subjectives"
     if st.sidebar.button("Coding Interviews", key="coding_btn", use_container_width=True):
         st.session_state.current_page = "Coding Interviews"
+    if st.sidebar.button("Exam", key="exam_btn", use_container_width=True):
+        st.session_state.current_page = "Exam"
     if st.sidebar.button("Update Topics", key="update_topics_btn", use_container_width=True):
         st.session_state.current_page = "Update Topics"
 
@@ -114,13 +169,13 @@ def setup_navigation():
     st.sidebar.markdown(f"**Current page:** {st.session_state.current_page}")
 
     # Add quiz settings to sidebar when on quiz pages
-    if st.session_state.current_page in ["MCQ", "Subjectives", "Coding Interviews"]:
+    if st.session_state.current_page in ["MCQ", "Subjectives", "Coding Interviews", "Exam"]:
         st.sidebar.markdown("---")  # Add separator
         st.sidebar.markdown("### Quiz Settings")
         # Difficulty dropdown and stay on topic checkbox
         difficulty = st.sidebar.selectbox(
             "Select Difficulty", 
-            ["Easy", "Medium", "Hard", "Expert"],
+            ["Easy", "Medium", "Hard", "Expert", "Adaptive"],
             index=1,
             key="difficulty_selector"
         )
@@ -146,6 +201,15 @@ def render_update_topics_page():
     
     st.write("This will scan the topic_store/raw directory for new topic files and generate JSON files in the topic_store/topics directory.")
     
+    watcher = get_topic_watcher()
+    if watcher is not None:
+        status = watcher.get_status()
+        last_reload = time.strftime("%H:%M:%S", time.localtime(status["last_reload"])) if status["last_reload"] else "pending"
+        st.info(f"Changes in topic_store/raw are picked up automatically every {watcher.interval:g}s. "
+                f"Loaded {status['topics']} topics from {status['files']} files (last reload: {last_reload}).")
+        if status["last_error"]:
+            st.warning(f"Last topic reload error: {status['last_error']}")
+    
     if st.button("Update Topics", key="update_topics_button"):
         with st.spinner("Updating topics..."):
             result = update_topics()
@@ -162,6 +226,10 @@ def render_mcq_page():
     # Load first question automatically if none exists
     if st.session_state.mcq_question_data is None:
         load_new_mcq_question()
+    
+    # Pick up the explanation once the streamed question has finished
+    if st.session_state.mcq_stream is not None and st.session_state.mcq_stream.done():
+        finish_mcq_stream()
 
     if st.session_state.mcq_question_data:
         question = st.session_state.mcq_question_data
@@ -206,53 +274,404 @@ def render_mcq_page():
 
             # Submit button logic
             if st.button("Submit", key="mcq_submit_button") and not st.session_state.mcq_answered:
-                correct_options = [question["options"][i] for i in question["correct_answers"]]
-                if set(st.session_state.mcq_selected_options) == set(correct_options):
-                    st.success("Correct Answer!")
-                    st.write("Correct Answers: " + ", ".join(correct_options))
-                    st.session_state.mcq_score += 1
+                # The explanation may still be streaming
+                with st.spinner("Finishing the explanation..."):
+                    changed = finish_mcq_stream()
+                question = st.session_state.mcq_question_data
+                if changed:
+                    st.warning("The question was corrected while it loaded. Please check your answer and submit again.")
                 else:
-                    st.error("Wrong Answer!")
-                    st.write("Correct Answers: " + ", ".join(correct_options))
-                st.write("**Explanation:** " + question["explanation"])
-                st.session_state.mcq_answered = True
+                    correct_options = [question["options"][i] for i in question["correct_answers"]]
+                    is_correct = set(st.session_state.mcq_selected_options) == set(correct_options)
+                    if is_correct:
+                        st.success("Correct Answer!")
+                        st.write("Correct Answers: " + ", ".join(correct_options))
+                        st.session_state.mcq_score += 1
+                    else:
+                        st.error("Wrong Answer!")
+                        st.write("Correct Answers: " + ", ".join(correct_options))
+                    render_explanation("mcq", st.session_state.mcq_current_topic, question)
+                    st.session_state.mcq_answered = True
+                    record_mcq_attempt(question, is_correct)
 
             # Next button logic
             if st.session_state.mcq_answered:  # Show "Next" only after answering
                 if st.button("Next Question", key="mcq_next_button", on_click=load_new_mcq_question):
                     pass
 
+        # Start generating the likely next question while the user answers this one
+        schedule_next_question_prefetch(
+            st.session_state.mcq_prefetch, generate_mcq_question, st.session_state.mcq_current_topic
+        )
+
     st.write("### Your Score:", st.session_state.mcq_score)
 
 
+def finish_question_stream(page, fields):
+    """
+    Replace the streamed fields of a page's question with the finished question.
+    
+    Waits for the generation to finish. If the finished question differs in the
+    given fields, e.g. because validation repaired it, the page's widgets are refreshed.
+    
+    Args:
+        page (str): The session state prefix of the page ("mcq" or "coding")
+        fields (tuple): The fields already shown to the user
+        
+    Returns:
+        bool: Whether the finished question differs from the one shown
+    """
+    stream = st.session_state[f"{page}_stream"]
+    if stream is None:
+        return False
+    st.session_state[f"{page}_stream"] = None
+    shown = st.session_state[f"{page}_question_data"]
+    try:
+        question = stream.result()
+    except Exception as e:
+        st.error(f"Failed to finish question: {str(e)}")
+        return False
+    
+    st.session_state[f"{page}_question_data"] = question
+    changed = any(question.get(field) != shown.get(field) for field in fields)
+    if changed:
+        st.session_state[f"{page}_question_version"] += 1  # Increment version to refresh widgets
+    return changed
+
+
+def finish_mcq_stream():
+    """
+    Replace the streamed fields of the current MCQ with the finished question.
+    
+    Returns:
+        bool: Whether the finished question differs from the one shown
+    """
+    changed = finish_question_stream("mcq", MCQ_INTERACTIVE_FIELDS)
+    if changed:
+        st.session_state.mcq_item_id = make_item_id("mcq", st.session_state.mcq_question_data["question"])
+        st.session_state.mcq_selected_options = []
+    return changed
+
+
+def render_explanation(question_type, topic, question):
+    """
+    Show the explanation of a question, which two-phase generation produces in the background.
+    
+    Args:
+        question_type (str): The question type ("mcq" or "subjective")
+        topic (str): The topic of the question
+        question (dict): The question, updated with the explanation once it is ready
+    """
+    if "explanation" in question:
+        st.write("**Explanation:** " + question["explanation"])
+        return
+    render_pending_explanation(request_explanation(question_type, topic, question), question)
+
+
+@st.fragment(run_every=EXPLANATION_POLL_SECONDS)
+def render_pending_explanation(future, question):
+    """
+    Show an explanation as soon as its background generation finishes, rerunning only this fragment until then.
+    
+    Args:
+        future (Future): The explanation being generated
+        question (dict): The question, updated with the explanation once it is ready
+    """
+    if "explanation" not in question:
+        if not future.done():
+            st.info("Generating the explanation...")
+            return
+        try:
+            question["explanation"] = future.result()
+        except Exception as e:
+            st.warning(f"The explanation is not available: {str(e)}")
+            return
+    st.write("**Explanation:** " + question["explanation"])
+
+
+def record_mcq_attempt(question, is_correct):
+    """
+    Append a submitted MCQ answer to the attempt log.
+
+    Args:
+        question (dict): The answered question
+        is_correct (bool): Whether the answer was correct
+    """
+    shown_at = st.session_state.mcq_question_shown_at
+    seconds = time.time() - shown_at if shown_at else 0.0
+    get_attempt_log().record(
+        get_user_id(),
+        st.session_state.mcq_current_topic,
+        question.get("difficulty", st.session_state.difficulty),
+        is_correct,
+        seconds,
+    )
+    # Every answer refines the ability estimates used by the Adaptive difficulty
+    get_adaptive_engine().record(get_user_id(), st.session_state.mcq_item_id, is_correct)
+
+
+def get_generation_difficulty(topic=None):
+    """
+    Get the difficulty new questions are generated with.
+    
+    With the "Adaptive" setting this is the level matching the user's estimated ability.
+    
+    Args:
+        topic (str, optional): The topic of the question to generate
+        
+    Returns:
+        str: The difficulty level
+    """
+    if st.session_state.difficulty == "Adaptive":
+        return get_adaptive_engine().suggest_difficulty(get_user_id(), topic)
+    return st.session_state.difficulty
+
+
+def select_adaptive_mcq_question():
+    """
+    Pick the stored MCQ that is most informative about the user's ability.
+    
+    Returns:
+        tuple: The topic and question JSON string, or None if no unseen stored question is eligible
+    """
+    topic = st.session_state.mcq_current_topic if st.session_state.stay_topic else None
+    engine = get_adaptive_engine()
+    with start_span("adaptive.select") as span:
+        selected = engine.select(get_user_id(), "mcq", topic=topic, exclude=[st.session_state.mcq_item_id])
+        span.set_attribute("hit", selected is not None)
+    if selected is None:
+        return None
+    row, _ = selected
+    return engine.bank.topic(row), engine.bank.payload(row)
+
+
+def get_prefetch_key(current_topic):
+    """
+    Build the key identifying the settings a speculative question is generated for.
+    
+    Args:
+        current_topic (str): The topic of the question currently shown
+        
+    Returns:
+        tuple: The difficulty, stay_topic setting and the topic when it is kept
+    """
+    topic = current_topic if st.session_state.stay_topic else None
+    return (get_generation_difficulty(topic), st.session_state.stay_topic, topic)
+
+
+def generate_question_for_topic(generate_func, topic, difficulty):
+    """
+    Generate a question, picking a random topic if none is given.
+    
+    Args:
+        generate_func: The question generation function to call
+        topic (str or None): The topic to generate the question for
+        difficulty (str): The difficulty level for the question
+        
+    Returns:
+        tuple: The topic used and the generated question JSON string
+    """
+    if not topic:
+        topic = get_random_topic()
+    return topic, generate_func(topic, difficulty)
+
+
+def schedule_next_question_prefetch(prefetch, generate_func, current_topic):
+    """
+    Speculatively generate the next question for the current settings.
+    
+    A prefetch generated for different settings is discarded and replaced.
+    
+    Args:
+        prefetch (SpeculativePrefetch): The session's prefetch slot for the page
+        generate_func: The question generation function to call
+        current_topic (str): The topic of the question currently shown
+    """
+    key = get_prefetch_key(current_topic)
+    difficulty, _, topic = key
+    prefetch.schedule(key, generate_question_for_topic, generate_func, topic, difficulty)
+
+
+@traced("question.load")
 def load_new_mcq_question():
     """
     Load a new MCQ question based on the current settings.
     """
     # Show a spinner while loading
     with st.spinner("Loading new question..."):
-        if st.session_state.stay_topic:
-            topic = st.session_state.mcq_current_topic
-            if not topic:
+        try:
+            # In adaptive mode, prefer a stored question matched to the user's ability
+            prefetched = select_adaptive_mcq_question() if st.session_state.difficulty == "Adaptive" else None
+            if prefetched is None:
+                # Use the speculatively generated question if it matches the current settings
+                with start_span("prefetch.take") as span:
+                    prefetch_key = get_prefetch_key(st.session_state.mcq_current_topic)
+                    prefetched = st.session_state.mcq_prefetch.take(prefetch_key)
+                    span.set_attribute("hit", prefetched is not None)
+            question_data = None
+            if prefetched:
+                topic, question_data = prefetched
+                st.session_state.mcq_current_topic = topic
+            elif st.session_state.stay_topic:
+                topic = st.session_state.mcq_current_topic
+                if not topic:
+                    topic = get_random_topic()
+                    st.session_state.mcq_current_topic = topic
+            else:
                 topic = get_random_topic()
                 st.session_state.mcq_current_topic = topic
-        else:
-            topic = get_random_topic()
-            st.session_state.mcq_current_topic = topic
-        
-        try:
-            question_data = generate_mcq_question(topic, st.session_state.difficulty)
-            st.session_state.mcq_question_data = json.loads(question_data)
+            
+            st.session_state.mcq_stream = None
+            if question_data is None:
+                # Stream the question and show it as soon as the stem and options have arrived
+                stream = QuestionStream(generate_mcq_question, topic, get_generation_difficulty(topic))
+                st.session_state.mcq_question_data = stream.wait_for(MCQ_INTERACTIVE_FIELDS)
+                if not stream.done():
+                    st.session_state.mcq_stream = stream
+            else:
+                with start_span("question.decode"):
+                    st.session_state.mcq_question_data = json.loads(question_data)
+            st.session_state.mcq_item_id = make_item_id("mcq", st.session_state.mcq_question_data["question"])
             st.session_state.mcq_current_question_id += 1
             st.session_state.mcq_selected_options = []  # Reset selected options
             st.session_state.mcq_answered = False
             st.session_state.mcq_question_version += 1  # Increment version to refresh widgets
+            st.session_state.mcq_question_shown_at = time.time()
             
         except Exception as e:
             st.error(f"Failed to generate question: {str(e)}")
             st.session_state.mcq_question_data = None
 
 
+def render_exam_page():
+    """
+    Render the exam page: start an exam, page through its questions as they arrive, and score it.
+    """
+    exam = st.session_state.exam
+    if exam is None:
+        render_exam_setup()
+        return
+    
+    if st.session_state.exam_result is not None:
+        render_exam_result(exam, st.session_state.exam_result)
+        return
+    
+    ready = exam.ready_count()
+    if ready < len(exam):
+        render_exam_progress(exam, ready)
+    
+    # Page through the questions; the ones still being generated can be visited later
+    index = st.session_state.exam_index
+    col1, col2, col3 = st.columns([1, 2, 1])
+    with col1:
+        if st.button("Previous", key="exam_previous_button", disabled=index == 0):
+            st.session_state.exam_index = index = index - 1
+    with col3:
+        if st.button("Next", key="exam_next_button", disabled=index == len(exam) - 1):
+            st.session_state.exam_index = index = index + 1
+    with col2:
+        st.write(f"Question {index + 1} of {len(exam)} ({len(exam.answers)} answered)")
+    
+    question = exam.question(index)
+    if question is None:
+        st.info("This question is still being generated.")
+    else:
+        render_exam_question(exam, index, question)
+    
+    if st.button("Finish Exam", key="exam_finish_button"):
+        with st.spinner("Waiting for the remaining questions..."):
+            st.session_state.exam_result = exam.score()
+        st.rerun()
+
+
+def render_exam_setup():
+    """
+    Render the form starting an exam with the selected topic scope, difficulty and length.
+    """
+    st.header("Exam", divider="rainbow")
+    scope = st.text_input("Topic scope (leave empty for random topics)", value=st.session_state.mcq_current_topic or "",
+                          key="exam_scope_input")
+    count = st.number_input("Number of questions", min_value=1, max_value=MAX_EXAM_QUESTIONS, value=10,
+                            key="exam_count_input")
+    if st.button("Start Exam", key="exam_start_button"):
+        try:
+            topics = [scope.strip() or get_random_topic() for _ in range(int(count))]
+            st.session_state.exam = Exam(topics, get_generation_difficulty(scope.strip() or None))
+        except Exception as e:
+            st.error(f"Failed to start exam: {str(e)}")
+            return
+        st.session_state.exam_id += 1
+        st.session_state.exam_index = 0
+        st.session_state.exam_result = None
+        st.rerun()
+
+
+@st.fragment(run_every=EXAM_POLL_SECONDS)
+def render_exam_progress(exam, shown_ready):
+    """
+    Show how many exam questions have arrived, rerunning the page when more arrive.
+    
+    Args:
+        exam (Exam): The running exam
+        shown_ready (int): The number of ready questions the page was rendered with
+    """
+    ready = exam.ready_count()
+    st.progress(ready / len(exam), text=f"{ready} of {len(exam)} questions ready")
+    if ready != shown_ready:
+        st.rerun()
+
+
+def render_exam_question(exam, index, question):
+    """
+    Render an exam question and record the selected options.
+    
+    Args:
+        exam (Exam): The running exam
+        index (int): The question number, from 0
+        question (dict): The question
+    """
+    st.subheader(question["question"])
+    st.write(f"###### Topics: {exam.topics[index]}")
+    key = f"exam_{st.session_state.exam_id}_{index}"
+    labels = [chr(97 + i) + ". " + option for i, option in enumerate(question["options"])]
+    answer = exam.answers.get(index)
+    if len(question["correct_answers"]) == 1:
+        selected = st.radio("Select your answer:", list(range(len(labels))), format_func=lambda i: labels[i],
+                            index=answer[0] if answer else None, key=key)
+        if selected is not None:
+            exam.answer(index, [selected])
+    else:
+        selected = [i for i, label in enumerate(labels)
+                    if st.checkbox(label, value=bool(answer) and i in answer, key=f"{key}_{i}")]
+        if selected or answer is not None:
+            exam.answer(index, selected)
+
+
+def render_exam_result(exam, result):
+    """
+    Render the score of a finished exam with the correct answers and explanations.
+    
+    Args:
+        exam (Exam): The finished exam
+        result (dict): The score returned by Exam.score
+    """
+    st.header(f"Score: {result['correct']} / {result['total']}", divider="rainbow")
+    st.write(f"{result['answered']} of {result['total']} questions answered.")
+    for row in result["results"]:
+        question = exam.question(row["index"])
+        status = "Correct" if row["correct"] else ("Wrong" if row["answered"] else "Not answered")
+        with st.expander(f"Question {row['index'] + 1}: {status}"):
+            st.markdown(f"**{question['question']}**")
+            st.write("Correct Answers: " + ", ".join(question["options"][i] for i in question["correct_answers"]))
+            render_explanation("mcq", exam.topics[row["index"]], question)
+    
+    if st.button("New Exam", key="exam_new_button"):
+        exam.cancel()
+        st.session_state.exam = None
+        st.session_state.exam_result = None
+        st.rerun()
+
+
 def render_subjective_page():
     """
     Render the subjective questions page with optimized performance.
@@ -275,7 +694,7 @@ def render_subjective_page():
             
             # Submit button logic
             if st.button("Show Answer", key="subj_show_answer_button") and not st.session_state.subj_answered:
-                st.write("**Explanation:** " + question["explanation"])
+                render_explanation("subjective", st.session_state.subj_current_topic, question)
                 st.session_state.subj_answered = True
                 
 
@@ -283,14 +702,28 @@ def render_subjective_page():
             if st.button("Next Question", key="subj_next_button", on_click=load_new_subjective_question):
                 pass
 
+        # Start generating the likely next question while the user reads this one
+        schedule_next_question_prefetch(
+            st.session_state.subj_prefetch, generate_subjective_question, st.session_state.subj_current_topic
+        )
+
 
+@traced("question.load")
 def load_new_subjective_question():
     """
     Load a new subjective question based on the current settings.
     """
     # Show a spinner while loading
     with st.spinner("Loading new question..."):
-        if st.session_state.stay_topic:
+        # Use the speculatively generated question if it matches the current settings
+        with start_span("prefetch.take") as span:
+            prefetched = st.session_state.subj_prefetch.take(get_prefetch_key(st.session_state.subj_current_topic))
+            span.set_attribute("hit", prefetched is not None)
+        question_data = None
+        if prefetched:
+            topic, question_data = prefetched
+            st.session_state.subj_current_topic = topic
+        elif st.session_state.stay_topic:
             topic = st.session_state.subj_current_topic
             if not topic:
                 topic = get_random_topic()
@@ -300,8 +733,10 @@ def load_new_subjective_question():
             st.session_state.subj_current_topic = topic
         
         try:
-            question_data = generate_subjective_question(topic, st.session_state.difficulty)
-            st.session_state.subj_question_data = json.loads(question_data)
+            if question_data is None:
+                question_data = generate_subjective_question(topic, get_generation_difficulty(topic))
+            with start_span("question.decode"):
+                st.session_state.subj_question_data = json.loads(question_data)
             st.session_state.subj_current_question_id += 1
             st.session_state.subj_answered = False
             st.session_state.subj_question_version += 1  # Increment version to refresh widgets
@@ -318,21 +753,73 @@ def render_search_sidebar():
     st.markdown("### Quick Search")
     st.write("Ask any question and get a quick answer.")
     
+    # Persistent history, or None if the database is unavailable
+    history_store = get_search_history_store()
+    user_id = get_user_id()
+    
     # Search input and button
     search_query = st.text_area("Your question:", height=100)
+    
+    # Show matching past answers before offering to ask again
+    if history_store is not None and search_query.strip():
+        matches = history_store.search(user_id, search_query, limit=3)
+        if matches:
+            st.markdown("### Previously Answered")
+            for item in matches:
+                render_search_history_item(item)
+    
     if st.button("Ask", key="ask_button"):
         if search_query:
             with st.spinner("Getting answer..."):
                 answer = get_gpt_answer(search_query)
-                # Add to search history
+            if not is_successful_answer(answer):
+                # Failed lookups are shown once, not kept as answers
+                st.error(answer or "No answer was returned.")
+            else:
+                # Add to search history; the database write happens in the background
                 st.session_state.search_history.append({"question": search_query, "answer": answer})
+                if history_store is not None:
+                    history_store.record(user_id, search_query, answer)
     
     # Display search history
-    if st.session_state.search_history:
+    if history_store is not None:
+        recent = history_store.recent(user_id, limit=5)
+    else:
+        recent = list(reversed(st.session_state.search_history[-5:]))  # Show last 5 searches
+    if recent:
         st.markdown("### Recent Answers")
-        for i, item in enumerate(reversed(st.session_state.search_history[-5:])):  # Show last 5 searches
-            with st.expander(f"Q: {item['question'][:50]}..." if len(item['question']) > 50 else f"Q: {item['question']}"):
-                st.markdown(f"**Answer:** {item['answer']}")
+        for item in recent:
+            render_search_history_item(item)
+
+
+def render_search_history_item(item):
+    """
+    Render a past question and its answer as an expander.
+    
+    Args:
+        item (dict): The entry, with "question" and "answer"
+    """
+    with st.expander(f"Q: {item['question'][:50]}..." if len(item['question']) > 50 else f"Q: {item['question']}"):
+        st.markdown(f"**Answer:** {item['answer']}")
+
+
+def get_user_id():
+    """
+    Get the id the current user's search history is stored under.
+    
+    The id is kept in the "uid" query parameter, so reopening the same URL
+    (e.g. from a bookmark) restores the history.
+    
+    Returns:
+        str: The user id
+    """
+    if not st.session_state.get("user_id"):
+        user_id = st.query_params.get("uid")
+        if not user_id:
+            user_id = uuid.uuid4().hex
+            st.query_params["uid"] = user_id
+        st.session_state.user_id = user_id
+    return st.session_state.user_id
 
 
 def render_coding_interview_page():
@@ -342,6 +829,10 @@ def render_coding_interview_page():
     # Load first question automatically if none exists
     if st.session_state.coding_question_data is None:
         load_new_coding_question()
+    
+    # Pick up the solution once the streamed question has finished
+    if st.session_state.coding_stream is not None and st.session_state.coding_stream.done():
+        finish_question_stream("coding", CODING_INTERACTIVE_FIELDS)
 
     if st.session_state.coding_question_data:
         question = st.session_state.coding_question_data
@@ -393,9 +884,15 @@ def render_coding_interview_page():
                                         options=get_editor_options()
                 )
                 
+                # The editor returns its contents once the user submits them (Ctrl+Enter)
+                if isinstance(user_code, dict):
+                    user_code = user_code.get("text") or st.session_state.user_code_input
+                
                 # Only update if code actually changed (reduces reruns)
                 if user_code != st.session_state.user_code_input:
                     st.session_state.user_code_input = user_code
+                
+                render_code_test_runner(question, language)
             
             with solution_tab:
                 if not st.session_state.coding_answered:
@@ -418,6 +915,9 @@ def render_coding_interview_page():
             # Submit button logic
             with col1:
                 if st.button("Show Solution", key="coding_solution_button") and not st.session_state.coding_answered:
+                    # The solution may still be streaming
+                    with st.spinner("Finishing the solution..."):
+                        finish_question_stream("coding", CODING_INTERACTIVE_FIELDS)
                     st.session_state.coding_answered = True
                     # Force a rerun to show solution tab
                     st.experimental_rerun()
@@ -428,6 +928,56 @@ def render_coding_interview_page():
                     pass
 
 
+def render_code_test_runner(question, language):
+    """
+    Render the "Run tests" button and the results of the last test run.
+    
+    Args:
+        question (dict): The current coding question
+        language (str): The programming language of the question
+    """
+    if not is_code_runner_enabled():
+        return
+    if language != "python":
+        st.info("Running tests is only supported for Python solutions.")
+        return
+    
+    if st.button("Run tests", key="coding_run_tests_button"):
+        with st.spinner("Running tests..."):
+            try:
+                st.session_state.coding_test_results = run_tests(
+                    st.session_state.user_code_input, question.get("examples", "")
+                )
+            except Exception as e:
+                st.session_state.coding_test_results = {"error": f"Failed to run tests: {str(e)}", "results": []}
+    
+    test_run = st.session_state.coding_test_results
+    if not test_run:
+        return
+    if test_run["error"]:
+        st.error(test_run["error"])
+        return
+    
+    results = test_run["results"]
+    passed = sum(1 for result in results if result["status"] == "passed")
+    if passed == len(results):
+        st.success(f"All {len(results)} tests passed!")
+    else:
+        st.warning(f"{passed} of {len(results)} tests passed")
+    
+    for i, result in enumerate(results, start=1):
+        with st.expander(f"Test {i}: {result['status']}"):
+            st.markdown(f"**Input:** `{result['input']}`")
+            st.markdown(f"**Expected:** `{result['expected']}`")
+            if "actual" in result:
+                st.markdown(f"**Got:** `{result['actual']}`")
+            if result.get("error"):
+                st.code(result["error"], language="text")
+            if result.get("stdout"):
+                st.code(result["stdout"], language="text")
+
+
+@traced("question.load")
 def load_new_coding_question():
     """
     Load a new coding interview question based only on the difficulty level.
@@ -439,9 +989,11 @@ def load_new_coding_question():
         st.session_state.coding_current_topic = topic
         
         try:
-            # Note: We're now passing None as the topic, as we don't want to constrain by topic
-            question_data = generate_coding_question(None, st.session_state.difficulty)
-            st.session_state.coding_question_data = json.loads(question_data)
+            # Note: We're now passing None as the topic, as we don't want to constrain by topic.
+            # The question is streamed and shown as soon as the problem and starter code have arrived.
+            stream = QuestionStream(generate_coding_question, None, get_generation_difficulty())
+            st.session_state.coding_question_data = stream.wait_for(CODING_INTERACTIVE_FIELDS)
+            st.session_state.coding_stream = None if stream.done() else stream
             st.session_state.coding_current_question_id += 1
             
             # Initialize code input with starter code if available
@@ -456,6 +1008,7 @@ def load_new_coding_question():
                     st.session_state.user_code_input = "# Write your solution here"
             
             st.session_state.coding_answered = False
+            st.session_state.coding_test_results = None
             st.session_state.coding_question_version += 1  # Increment version to refresh widgets
             
         except Exception as e:
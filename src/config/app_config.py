@@ -4,8 +4,15 @@ Application configuration module
 This module contains configuration-related functions for the application.
 """
 import os
+import logging
 import streamlit as st
 
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Values of boolean environment variables that turn a setting on
+_TRUE_VALUES = ("1", "true", "yes", "on")
+
 
 def setup_page_config():
     """
@@ -21,6 +28,46 @@ def setup_page_config():
     )
 
 
+def _env_flag(name, default="false"):
+    """
+    Read a boolean environment variable.
+    
+    Args:
+        name (str): The environment variable
+        default (str): The value used when it is not set
+    
+    Returns:
+        bool: True if the value is one of 1, true, yes or on
+    """
+    return os.environ.get(name, default).strip().lower() in _TRUE_VALUES
+
+
+def _read_env_settings(settings, spec):
+    """
+    Override numeric settings with environment variables.
+    
+    Values are clamped to be non-negative. Invalid values are logged and the
+    default is kept; before logging is configured the warning still reaches
+    stderr through the logging module's last-resort handler.
+    
+    Args:
+        settings (dict): The default settings, updated in place
+        spec (list): (key, environment variable, conversion function) tuples
+    
+    Returns:
+        dict: The updated settings
+    """
+    for key, name, convert in spec:
+        value = os.environ.get(name)
+        if value is None:
+            continue
+        try:
+            settings[key] = max(0, convert(value))
+        except ValueError:
+            logger.warning(f"Invalid {name}={value!r}, using {settings[key]}")
+    return settings
+
+
 def get_openai_api_key():
     """
     Get the OpenAI API key from Streamlit secrets or environment variable.
@@ -31,9 +78,379 @@ def get_openai_api_key():
     # Try to get from Streamlit secrets
     try:
         return st.secrets["openai"]["api_key"]
-    except KeyError:
+    except (KeyError, FileNotFoundError):
         # Fallback to environment variable
         api_key = os.environ.get("OPENAI_API_KEY")
         if not api_key:
             st.error("OpenAI API key not found. Please set it in .streamlit/secrets.toml or as an environment variable.")
-        return api_key 
\ No newline at end of file
+        return api_key 
+
+
+def get_llm_backend_name():
+    """
+    Get the name of the LLM backend to use from the LLM_BACKEND environment variable.
+    
+    Returns:
+        str: "openai" (default) or "offline"
+    """
+    return os.environ.get("LLM_BACKEND", "openai").strip().lower()
+
+
+def get_offline_latency_settings():
+    """
+    Get the synthetic latency of the offline LLM backend.
+    
+    Read from the OFFLINE_LLM_LATENCY_MS and OFFLINE_LLM_JITTER_MS environment variables.
+    
+    Returns:
+        tuple: The fixed latency and the maximum jitter, in milliseconds
+    """
+    settings = _read_env_settings({"latency_ms": 0.0, "jitter_ms": 0.0}, [
+        ("latency_ms", "OFFLINE_LLM_LATENCY_MS", float),
+        ("jitter_ms", "OFFLINE_LLM_JITTER_MS", float),
+    ])
+    return settings["latency_ms"], settings["jitter_ms"]
+
+
+def get_topic_watch_interval():
+    """
+    Get how often the topic store watcher polls topic_store/raw for changes.
+    
+    Read from the TOPIC_WATCH_INTERVAL_SECONDS environment variable.
+    
+    Returns:
+        float: The polling interval in seconds; 0 disables the watcher
+    """
+    return _read_env_settings({"interval": 5.0}, [("interval", "TOPIC_WATCH_INTERVAL_SECONDS", float)])["interval"]
+
+
+def get_logging_settings():
+    """
+    Get the logging configuration from environment variables.
+    
+    LOG_LEVEL sets the level, LOG_FORMAT is "text" or "json" (JSON lines),
+    LOG_MAX_BYTES and LOG_ROTATE_SECONDS trigger rotation of the log file,
+    LOG_BACKUP_COUNT limits the rotated files kept and LOG_DEBUG_SAMPLE_RATE
+    is the fraction of DEBUG records written.
+    
+    Returns:
+        dict: The logging settings
+    """
+    settings = {
+        "level": os.environ.get("LOG_LEVEL", "INFO").strip().upper(),
+        "json_format": os.environ.get("LOG_FORMAT", "text").strip().lower() == "json",
+        "max_bytes": 10 * 1024 * 1024,
+        "rotate_seconds": 24 * 60 * 60,
+        "backup_count": 5,
+        "debug_sample_rate": 1.0,
+    }
+    _read_env_settings(settings, [
+        ("max_bytes", "LOG_MAX_BYTES", int),
+        ("rotate_seconds", "LOG_ROTATE_SECONDS", float),
+        ("backup_count", "LOG_BACKUP_COUNT", int),
+        ("debug_sample_rate", "LOG_DEBUG_SAMPLE_RATE", float),
+    ])
+    settings["debug_sample_rate"] = min(1.0, settings["debug_sample_rate"])
+    return settings
+
+
+def get_tracing_settings():
+    """
+    Get the tracing configuration from environment variables.
+    
+    TRACE_FILE is the JSONL file spans are appended to (tracing is disabled
+    when it is empty) and TRACE_SAMPLE_RATE is the fraction of traces recorded.
+    
+    Returns:
+        tuple: The trace file path (or None) and the sample rate
+    """
+    trace_file = os.environ.get("TRACE_FILE", "").strip() or None
+    try:
+        sample_rate = float(os.environ.get("TRACE_SAMPLE_RATE", "1.0"))
+    except ValueError:
+        logger.warning("Invalid TRACE_SAMPLE_RATE, recording every trace")
+        sample_rate = 1.0
+    return trace_file, min(1.0, max(0.0, sample_rate))
+
+
+def get_profiling_settings():
+    """
+    Get the profiling configuration from environment variables.
+    
+    PROFILE_ENABLED turns on profiling of a PROFILE_SAMPLE_RATE fraction of
+    reruns, and PROFILE_SERVICES additionally profiles service calls made
+    outside a profiled rerun. PROFILE_MODE is "cprofile" (deterministic, .prof
+    files for pstats/snakeviz) or "sample" (low-overhead stack sampling,
+    folded stacks for flame graphs). Profiles are written to PROFILE_DIR,
+    keeping the newest PROFILE_MAX_FILES. When PROFILE_ADMIN_TOKEN is set, a
+    rerun requested with ?profile=<token> is always profiled.
+    
+    Returns:
+        dict: The profiling settings
+    """
+    settings = {
+        "enabled": _env_flag("PROFILE_ENABLED"),
+        "services": _env_flag("PROFILE_SERVICES"),
+        "mode": os.environ.get("PROFILE_MODE", "cprofile").strip().lower(),
+        "directory": os.environ.get("PROFILE_DIR", os.path.join("logs", "profiles")),
+        "admin_token": os.environ.get("PROFILE_ADMIN_TOKEN", "").strip() or None,
+        "sample_rate": 0.1,
+        "max_files": 50,
+    }
+    if settings["mode"] not in ("cprofile", "sample"):
+        logger.warning(f"Invalid PROFILE_MODE={settings['mode']!r}, using cprofile")
+        settings["mode"] = "cprofile"
+    _read_env_settings(settings, [("sample_rate", "PROFILE_SAMPLE_RATE", float),
+                                  ("max_files", "PROFILE_MAX_FILES", int)])
+    settings["sample_rate"] = min(1.0, settings["sample_rate"])
+    return settings
+
+
+def get_search_history_path():
+    """
+    Get the path of the SQLite database storing Quick Search history.
+    
+    Read from the SEARCH_HISTORY_DB environment variable.
+    
+    Returns:
+        str: The database path (default: data/search_history.db)
+    """
+    return os.environ.get("SEARCH_HISTORY_DB", os.path.join("data", "search_history.db"))
+
+
+def get_attempt_log_dir():
+    """
+    Get the directory MCQ attempt log segments are written to.
+    
+    Read from the ATTEMPT_LOG_DIR environment variable.
+    
+    Returns:
+        str: The directory (default: data/attempts)
+    """
+    return os.environ.get("ATTEMPT_LOG_DIR", os.path.join("data", "attempts"))
+
+
+def get_question_bank_path():
+    """
+    Get the path of the question bank file storing generated questions.
+    
+    Read from the QUESTION_BANK_PATH environment variable.
+    
+    Returns:
+        str: The path (default: data/question_bank.jsonl)
+    """
+    return os.environ.get("QUESTION_BANK_PATH", os.path.join("data", "question_bank.jsonl"))
+
+
+def get_adaptive_state_path():
+    """
+    Get the path of the file storing user abilities and question difficulties for adaptive mode.
+    
+    Read from the ADAPTIVE_STATE_PATH environment variable.
+    
+    Returns:
+        str: The path (default: data/adaptive_state.npz)
+    """
+    return os.environ.get("ADAPTIVE_STATE_PATH", os.path.join("data", "adaptive_state.npz"))
+
+
+def get_question_bank_snapshot_dir():
+    """
+    Get the directory of the columnar question bank snapshot opened at startup.
+    
+    Read from the QUESTION_BANK_SNAPSHOT_DIR environment variable.
+    
+    Returns:
+        str: The directory (default: data/question_bank_snapshot)
+    """
+    return os.environ.get("QUESTION_BANK_SNAPSHOT_DIR", os.path.join("data", "question_bank_snapshot"))
+
+
+def get_retrieval_settings():
+    """
+    Get the configuration of the local retrieval that grounds Quick Search answers.
+    
+    RETRIEVAL_ENABLED (default true) turns retrieval on. The BM25 index is
+    persisted to RETRIEVAL_INDEX_PATH and refreshed every
+    RETRIEVAL_REFRESH_SECONDS. Up to RETRIEVAL_TOP_K snippets are added to a
+    prompt, within RETRIEVAL_CONTEXT_TOKENS tokens in total.
+    
+    Returns:
+        dict: The retrieval settings
+    """
+    settings = {
+        "enabled": _env_flag("RETRIEVAL_ENABLED", "true"),
+        "index_path": os.environ.get("RETRIEVAL_INDEX_PATH", os.path.join("data", "retrieval_index.npz")),
+        "top_k": 4,
+        "context_tokens": 400,
+        "refresh_interval": 5.0,
+    }
+    _read_env_settings(settings, [("top_k", "RETRIEVAL_TOP_K", int),
+                                  ("context_tokens", "RETRIEVAL_CONTEXT_TOKENS", int),
+                                  ("refresh_interval", "RETRIEVAL_REFRESH_SECONDS", float)])
+    return settings
+
+
+def get_circuit_breaker_settings():
+    """
+    Get the configuration of the circuit breaker around LLM calls.
+    
+    The breaker opens when, among at least CIRCUIT_MIN_CALLS calls in the last
+    CIRCUIT_WINDOW_SECONDS, the share of failed calls or of calls slower than
+    CIRCUIT_SLOW_CALL_SECONDS reaches CIRCUIT_FAILURE_RATE. It stays open for
+    CIRCUIT_OPEN_SECONDS before letting a probe call through.
+    
+    Returns:
+        dict: The circuit breaker settings
+    """
+    settings = {
+        "window_seconds": 60.0,
+        "min_calls": 5,
+        "failure_rate": 0.5,
+        "slow_call_seconds": 20.0,
+        "open_seconds": 30.0,
+    }
+    _read_env_settings(settings, [("window_seconds", "CIRCUIT_WINDOW_SECONDS", float),
+                                  ("min_calls", "CIRCUIT_MIN_CALLS", int),
+                                  ("failure_rate", "CIRCUIT_FAILURE_RATE", float),
+                                  ("slow_call_seconds", "CIRCUIT_SLOW_CALL_SECONDS", float),
+                                  ("open_seconds", "CIRCUIT_OPEN_SECONDS", float)])
+    settings["failure_rate"] = min(1.0, settings["failure_rate"])
+    return settings
+
+
+def get_worker_pool_settings():
+    """
+    Get the configuration of the background worker pool.
+    
+    The pool keeps between WORKER_POOL_MIN and WORKER_POOL_MAX workers. It
+    grows when tasks queue up or wait longer than WORKER_POOL_TARGET_WAIT_SECONDS
+    for a worker, and workers idle for WORKER_POOL_IDLE_SECONDS are retired. With a
+    minimum of 0 every idle worker retires, and the first queued task starts one again.
+    
+    Returns:
+        dict: The worker pool settings
+    """
+    settings = {
+        "min_workers": 1,
+        "max_workers": 8,
+        "target_wait": 0.5,
+        "idle_seconds": 30.0,
+    }
+    _read_env_settings(settings, [("min_workers", "WORKER_POOL_MIN", int),
+                                  ("max_workers", "WORKER_POOL_MAX", int),
+                                  ("target_wait", "WORKER_POOL_TARGET_WAIT_SECONDS", float),
+                                  ("idle_seconds", "WORKER_POOL_IDLE_SECONDS", float)])
+    settings["max_workers"] = max(1, settings["max_workers"], settings["min_workers"])
+    return settings
+
+
+def get_rate_limit_settings():
+    """
+    Get the configuration of the rate limit shared by all LLM calls.
+    
+    At most LLM_RATE_LIMIT_RPM requests start per minute, in bursts of up to
+    LLM_RATE_LIMIT_BURST, and at most LLM_MAX_CONCURRENT run at once (0 disables
+    either bound). After a rate-limit error, calls pause for
+    LLM_RATE_LIMIT_BACKOFF_SECONDS, doubling up to LLM_RATE_LIMIT_MAX_BACKOFF_SECONDS.
+    
+    Returns:
+        dict: The rate limit settings
+    """
+    settings = {
+        "requests_per_minute": 500.0,
+        "burst": 50,
+        "max_concurrent": 32,
+        "backoff_seconds": 1.0,
+        "max_backoff_seconds": 30.0,
+    }
+    _read_env_settings(settings, [("requests_per_minute", "LLM_RATE_LIMIT_RPM", float),
+                                  ("burst", "LLM_RATE_LIMIT_BURST", int),
+                                  ("max_concurrent", "LLM_MAX_CONCURRENT", int),
+                                  ("backoff_seconds", "LLM_RATE_LIMIT_BACKOFF_SECONDS", float),
+                                  ("max_backoff_seconds", "LLM_RATE_LIMIT_MAX_BACKOFF_SECONDS", float)])
+    return settings
+
+
+def get_hedging_settings():
+    """
+    Get the configuration of hedged question generation requests.
+    
+    With HEDGE_ENABLED (default false), a generation request still running at
+    the HEDGE_PERCENTILE of recent latencies for its question type (at least
+    HEDGE_MIN_DEADLINE_SECONDS, and only once HEDGE_MIN_SAMPLES requests have
+    been observed) is sent again, to HEDGE_MODEL if set. At most
+    HEDGE_MAX_RATE of recent requests are hedged.
+    
+    Returns:
+        dict: The hedging settings
+    """
+    settings = {
+        "enabled": _env_flag("HEDGE_ENABLED"),
+        "model": os.environ.get("HEDGE_MODEL", "").strip() or None,
+        "percentile": 0.9,
+        "max_rate": 0.15,
+        "min_samples": 20,
+        "min_deadline": 0.5,
+    }
+    _read_env_settings(settings, [("percentile", "HEDGE_PERCENTILE", float),
+                                  ("max_rate", "HEDGE_MAX_RATE", float),
+                                  ("min_samples", "HEDGE_MIN_SAMPLES", int),
+                                  ("min_deadline", "HEDGE_MIN_DEADLINE_SECONDS", float)])
+    settings["percentile"] = min(1.0, settings["percentile"])
+    settings["max_rate"] = min(1.0, settings["max_rate"])
+    return settings
+
+
+def get_model_routing_settings():
+    """
+    Get the configuration of the model router.
+    
+    MODEL_ROUTING_POLICY names an optional JSON file mapping routes such as
+    "mcq:Easy", "coding:*" or "*" to lists of candidate models. With
+    MODEL_ROUTING_AUTO (default false) the router picks among the candidates
+    by measured latency, failure rate and cost, after MODEL_ROUTING_MIN_SAMPLES
+    requests per candidate, and routes MODEL_ROUTING_EXPLORE of requests to
+    a random candidate.
+    
+    Returns:
+        dict: The model routing settings
+    """
+    settings = {
+        "policy_path": os.environ.get("MODEL_ROUTING_POLICY", "").strip() or None,
+        "auto": _env_flag("MODEL_ROUTING_AUTO"),
+        "min_samples": 10,
+        "explore_rate": 0.05,
+    }
+    _read_env_settings(settings, [("min_samples", "MODEL_ROUTING_MIN_SAMPLES", int),
+                                  ("explore_rate", "MODEL_ROUTING_EXPLORE", float)])
+    settings["explore_rate"] = min(1.0, settings["explore_rate"])
+    return settings
+
+
+def is_code_runner_enabled():
+    """
+    Check whether users can run their coding solutions against the examples.
+    
+    CODE_RUNNER_ENABLED (default false) enables the "Run tests" button. The
+    sandbox limits resources but not file system or network access, so only
+    enable it where every user is trusted.
+    
+    Returns:
+        bool: True if running tests is enabled
+    """
+    return _env_flag("CODE_RUNNER_ENABLED")
+
+
+def is_two_phase_generation_enabled():
+    """
+    Check whether MCQs and subjective questions are generated in two phases.
+    
+    With TWO_PHASE_GENERATION (default false), the first request generates only
+    the fields needed to show and grade a question, and the explanation is
+    generated in the background while the user answers.
+    
+    Returns:
+        bool: True if two-phase generation is enabled
+    """
+    return _env_flag("TWO_PHASE_GENERATION")
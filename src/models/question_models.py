@@ -3,9 +3,17 @@ Question models module
 
 This module contains Pydantic models for question data.
 """
-from pydantic import BaseModel, Field
+import functools
+
+from pydantic import BaseModel, Field, create_model
 from typing import List
 
+# Question types, in the order used for their integer codes
+QUESTION_TYPES = ("mcq", "subjective", "coding")
+
+# Difficulty levels, in the order used for their integer codes
+DIFFICULTY_LEVELS = ("Easy", "Medium", "Hard", "Expert")
+
 
 class MCQFormat(BaseModel):
     """
@@ -34,9 +42,38 @@ class CodingQuestionFormat(BaseModel):
     question: str = Field(..., description="The coding question title")
     description: str = Field(..., description="Detailed description of the problem")
     examples: str = Field(..., description="Example inputs and outputs")
-    solution: str = Field(..., description="Explanation of the solution approach")
-    code_solution: str = Field(..., description="Code solution to the problem")
+    # The fields shown before the solution come first, so they can be rendered while the rest streams
     starter_code: str = Field(..., description="Starter code template for the problem")
     language: str = Field(..., description="Programming language of the solution")
+    solution: str = Field(..., description="Explanation of the solution approach")
+    code_solution: str = Field(..., description="Code solution to the problem")
     explanation: str = Field(..., description="Detailed explanation of the code and concepts")
-    difficulty: str = Field(..., description="Difficulty level of the question") 
\ No newline at end of file
+    difficulty: str = Field(..., description="Difficulty level of the question") 
+
+# Model of each question type
+QUESTION_MODELS = {
+    "mcq": MCQFormat,
+    "subjective": SubjectiveQuestionFormat,
+    "coding": CodingQuestionFormat,
+}
+
+
+@functools.lru_cache(maxsize=None)
+def question_fields_model(question_type, fields=None):
+    """
+    Get the model holding some fields of a question type, e.g. for a partial generation.
+
+    Args:
+        question_type (str): The question type ("mcq", "subjective", "coding")
+        fields (tuple, optional): The field names; None for the whole question
+
+    Returns:
+        type: A Pydantic model with those fields, as declared on the question model
+    """
+    model = QUESTION_MODELS[question_type]
+    if fields is None:
+        return model
+    return create_model(
+        f"{model.__name__}Fields",
+        **{field: (model.model_fields[field].annotation, model.model_fields[field]) for field in fields}
+    )
@@ -0,0 +1,469 @@
+"""
+Adaptive service module
+
+This module picks the next question for a user from the question bank using
+a Rasch (one-parameter IRT) model fitted online with Elo-style updates:
+
+    P(correct) = 1 / (1 + exp(-(theta_user + offset_user[topic] - b_item)))
+
+Each user has a global ability theta and a per-topic offset, and each
+question has a difficulty b, initialized from its difficulty label. The
+Fisher information of a Rasch item is p * (1 - p), which is largest when
+b is closest to the user's ability on the item's topic. Selection therefore
+takes the unseen item minimizing |ability - b|. The whole bank is scored
+with vectorized NumPy operations, with no per-item Python loop.
+"""
+import os
+import atexit
+import logging
+import threading
+
+import numpy as np
+
+from src.config.app_config import get_adaptive_state_path
+from src.services.question_bank import QUESTION_TYPES, DIFFICULTY_LEVELS, get_question_bank
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Initial item difficulty for each level of DIFFICULTY_LEVELS (and unknown levels, index -1)
+LEVEL_DIFFICULTIES = np.array([-1.5, 0.0, 1.5, 3.0, 0.0])
+
+# Elo step sizes; they shrink as 1 / sqrt(1 + n) with the number of responses seen
+USER_K = 0.6
+TOPIC_K = 0.4
+ITEM_K = 0.3
+
+# Lower bound of the step sizes, so estimates keep tracking learning
+MIN_K_FACTOR = 0.1
+
+# Seconds between background saves of the model state
+SAVE_INTERVAL = 30.0
+
+# Items whose distance to the ability is within this of the best are treated as ties
+TIE_TOLERANCE = 1e-6
+
+
+def probability_correct(ability, difficulty):
+    """
+    Rasch probability of a correct answer.
+
+    Args:
+        ability: User ability (scalar or array)
+        difficulty: Item difficulty (scalar or array)
+
+    Returns:
+        The probability (scalar or array)
+    """
+    return 1.0 / (1.0 + np.exp(difficulty - ability))
+
+
+def step_size(base, count):
+    """
+    Elo step size after count responses.
+
+    Args:
+        base (float): The initial step size
+        count: Number of responses seen (scalar or array)
+
+    Returns:
+        The step size (scalar or array)
+    """
+    return np.maximum(base / np.sqrt(1.0 + count), MIN_K_FACTOR)
+
+
+def ability_to_difficulty(ability):
+    """
+    Map an ability to the difficulty label whose initial item difficulty is closest.
+
+    Args:
+        ability (float): The ability estimate
+
+    Returns:
+        str: The difficulty label
+    """
+    return DIFFICULTY_LEVELS[int(np.argmin(np.abs(LEVEL_DIFFICULTIES[:len(DIFFICULTY_LEVELS)] - ability)))]
+
+
+class UserAbility:
+    """
+    A user's ability estimates and answered questions.
+    """
+
+    def __init__(self):
+        self.theta = 0.0
+        self.count = 0
+        self.topic_offsets = np.zeros(0)
+        self.topic_counts = np.zeros(0, dtype=np.int32)
+        self.seen = np.zeros(0, dtype=np.int64)
+
+    def ensure_topics(self, topic_count):
+        """
+        Grow the per-topic arrays to cover topic_count topics.
+        """
+        if len(self.topic_offsets) < topic_count:
+            extra = topic_count - len(self.topic_offsets)
+            self.topic_offsets = np.concatenate([self.topic_offsets, np.zeros(extra)])
+            self.topic_counts = np.concatenate([self.topic_counts, np.zeros(extra, dtype=np.int32)])
+
+
+class AdaptiveEngine:
+    """
+    Online Rasch model over the question bank with information-maximizing selection.
+    """
+
+    def __init__(self, bank, state_path=None, save_interval=SAVE_INTERVAL, seed=None):
+        """
+        Initialize the engine, loading the state saved at state_path.
+
+        Args:
+            bank (QuestionBank): The question bank to select from
+            state_path (str, optional): The .npz state file; None keeps the state in memory only
+            save_interval (float): Seconds between background saves
+            seed (int, optional): Seed of the tie-breaking noise, for tests
+        """
+        self.bank = bank
+        self.state_path = state_path
+        self.save_interval = save_interval
+        self._rng = np.random.default_rng(seed)
+        self._lock = threading.RLock()
+        self._users = {}
+        self._item_difficulty = np.zeros(0)
+        self._item_counts = np.zeros(0, dtype=np.int32)
+        self._distance = np.zeros(0)
+        self._dirty = False
+        self._saver = None
+        self._closed = False
+        self._wake = threading.Event()
+        if state_path and os.path.exists(state_path):
+            self._load()
+
+    def _sync_items(self):
+        """
+        Extend the item parameters to questions added to the bank since the last call.
+
+        Returns:
+            tuple: The bank columns the item parameters now cover
+        """
+        columns = self.bank.columns()
+        levels = columns[2]
+        known = len(self._item_difficulty)
+        if len(levels) > known:
+            self._item_difficulty = np.concatenate([self._item_difficulty, LEVEL_DIFFICULTIES[levels[known:]]])
+            self._item_counts = np.concatenate([self._item_counts, np.zeros(len(levels) - known, dtype=np.int32)])
+        return columns
+
+    def _user(self, user_id):
+        """
+        Get a user's state, creating it on first use; the caller holds the lock.
+        """
+        user = self._users.get(user_id)
+        if user is None:
+            user = self._users[user_id] = UserAbility()
+        user.ensure_topics(self.bank.topic_count)
+        return user
+
+    def ability(self, user_id, topic=None):
+        """
+        Get a user's ability estimate.
+
+        Args:
+            user_id (str): The user
+            topic (str, optional): A topic path, to include the user's offset on it
+
+        Returns:
+            float: The ability on the Rasch logit scale
+        """
+        with self._lock:
+            user = self._user(user_id)
+            code = self.bank.topic_code(topic) if topic is not None else None
+            return float(user.theta + (user.topic_offsets[code] if code is not None else 0.0))
+
+    def item_difficulty(self, item_id):
+        """
+        Get the current difficulty estimate of a question.
+
+        Args:
+            item_id (str): The question
+
+        Returns:
+            float: The difficulty on the Rasch logit scale, or None if the question is not in the bank
+        """
+        row = self.bank.index_of(item_id)
+        if row is None:
+            return None
+        with self._lock:
+            self._sync_items()
+            return float(self._item_difficulty[row])
+
+    def suggest_difficulty(self, user_id, topic=None):
+        """
+        Get the difficulty label matching a user's ability, for generating new questions.
+
+        Args:
+            user_id (str): The user
+            topic (str, optional): The topic path of the question to generate
+
+        Returns:
+            str: The difficulty label
+        """
+        return ability_to_difficulty(self.ability(user_id, topic))
+
+    def select(self, user_id, question_type="mcq", topic=None, exclude=()):
+        """
+        Pick the unseen question of a type with the most information for the user.
+
+        Args:
+            user_id (str): The user
+            question_type (str): The question type to select
+            topic (str, optional): Only consider questions with this topic path
+            exclude: Item ids to skip in addition to the ones the user answered
+
+        Returns:
+            tuple: (row, probability of a correct answer), or None if no question is eligible
+        """
+        with self._lock:
+            types, topics, _ = self._sync_items()
+            user = self._user(user_id)
+            size = len(types)
+            if size == 0:
+                return None
+
+            # |ability - b| is monotone in the Rasch information p(1 - p), so the closest item is the
+            # most informative. The distances are computed in place in a reused buffer.
+            if len(self._distance) < size:
+                self._distance = np.empty(max(size, 2 * len(self._distance)))
+            distance = self._distance[:size]
+            np.take(user.topic_offsets, topics, out=distance)
+            distance += user.theta
+            distance -= self._item_difficulty[:size]
+            np.abs(distance, out=distance)
+
+            distance[types != QUESTION_TYPES.index(question_type)] = np.inf
+            if topic is not None:
+                code = self.bank.topic_code(topic)
+                if code is None:
+                    return None
+                distance[topics != code] = np.inf
+            distance[user.seen] = np.inf
+            # The page passes the current question's id, which is None before the first question
+            excluded = [self.bank.index_of(item_id) for item_id in exclude if item_id is not None]
+            excluded = [row for row in excluded if row is not None]
+            if excluded:
+                distance[excluded] = np.inf
+
+            best = distance.min()
+            if not np.isfinite(best):
+                return None
+            # Pick at random among equally informative items, e.g. new questions of the same level
+            ties = np.flatnonzero(distance <= best + TIE_TOLERANCE)
+            row = int(ties[self._rng.integers(len(ties))])
+            ability = user.theta + user.topic_offsets[topics[row]]
+            return row, float(probability_correct(ability, self._item_difficulty[row]))
+
+    def record(self, user_id, item_id, correct):
+        """
+        Update the user's abilities and the question's difficulty after an answer.
+
+        Args:
+            user_id (str): The user
+            item_id (str): The answered question
+            correct (bool): Whether the answer was correct
+
+        Returns:
+            bool: False if the question is not in the bank
+        """
+        return self.record_batch(user_id, [item_id], [correct]) > 0
+
+    def record_batch(self, user_id, item_ids, correct):
+        """
+        Update the model with several answers of one user, e.g. a whole quiz.
+
+        All answers are scored against the estimates from before the batch and
+        applied together, so the update is a single vectorized step.
+
+        Args:
+            user_id (str): The user
+            item_ids (list): The answered questions
+            correct (list): Whether each answer was correct
+
+        Returns:
+            int: The number of answers applied (questions missing from the bank are skipped)
+        """
+        rows = [self.bank.index_of(item_id) for item_id in item_ids]
+        keep = [i for i, row in enumerate(rows) if row is not None]
+        if not keep:
+            return 0
+        rows = np.array([rows[i] for i in keep])
+        outcomes = np.array([bool(correct[i]) for i in keep], dtype=np.float64)
+
+        with self._lock:
+            _, topics, _ = self._sync_items()
+            user = self._user(user_id)
+            item_topics = topics[rows]
+
+            residuals = outcomes - probability_correct(
+                user.theta + user.topic_offsets[item_topics], self._item_difficulty[rows])
+            user.theta += float(step_size(USER_K, user.count) * residuals.mean())
+            np.add.at(user.topic_offsets, item_topics,
+                      step_size(TOPIC_K, user.topic_counts[item_topics]) * residuals)
+            np.add.at(self._item_difficulty, rows, -step_size(ITEM_K, self._item_counts[rows]) * residuals)
+
+            user.count += len(rows)
+            np.add.at(user.topic_counts, item_topics, 1)
+            np.add.at(self._item_counts, rows, 1)
+            # Duplicates are harmless for masking and removed when saving
+            user.seen = np.concatenate([user.seen, rows])
+            self._dirty = True
+            self._start_saver()
+        return len(rows)
+
+    def _start_saver(self):
+        """
+        Start the background saver thread if the state is persisted; the caller holds the lock.
+        """
+        if self.state_path and self._saver is None:
+            self._saver = threading.Thread(target=self._run_saver, name="adaptive-state-saver", daemon=True)
+            self._saver.start()
+
+    def _run_saver(self):
+        """
+        Save the state periodically until closed.
+        """
+        while not self._closed:
+            self._wake.wait(self.save_interval)
+            self.save()
+
+    def save(self):
+        """
+        Write the model state if it changed since the last save.
+
+        Item parameters are keyed by item id and topic offsets by topic path,
+        so the state stays valid if the bank is rebuilt in a different order.
+        """
+        if not self.state_path:
+            return
+        with self._lock:
+            if not self._dirty:
+                return
+            user_ids = list(self._users)
+            users = [self._users[user_id] for user_id in user_ids]
+            topic_rows, seen_rows = [], []
+            for code, user in enumerate(users):
+                used = np.nonzero(user.topic_counts)[0]
+                topic_rows.append((np.full(len(used), code), used, user.topic_offsets[used], user.topic_counts[used]))
+                seen = np.unique(user.seen)
+                seen_rows.append((np.full(len(seen), code), seen))
+            state = {
+                "user_ids": np.array(user_ids, dtype=str),
+                "user_theta": np.array([user.theta for user in users]),
+                "user_count": np.array([user.count for user in users], dtype=np.int64),
+                "item_difficulty": self._item_difficulty.copy(),
+                "item_count": self._item_counts.copy(),
+                "offset_user": np.concatenate([r[0] for r in topic_rows] or [np.zeros(0)]).astype(np.int64),
+                "offset_topic": np.concatenate([r[1] for r in topic_rows] or [np.zeros(0)]).astype(np.int64),
+                "offset_value": np.concatenate([r[2] for r in topic_rows] or [np.zeros(0)]),
+                "offset_count": np.concatenate([r[3] for r in topic_rows] or [np.zeros(0)]).astype(np.int64),
+                "seen_user": np.concatenate([r[0] for r in seen_rows] or [np.zeros(0)]).astype(np.int64),
+                "seen_item": np.concatenate([r[1] for r in seen_rows] or [np.zeros(0)]).astype(np.int64),
+            }
+            self._dirty = False
+
+        # Bank rows are append-only, so the ids of the copied rows can be read without blocking select and record
+        state["item_ids"] = np.array([self.bank.item_id(row) for row in range(len(state["item_difficulty"]))],
+                                     dtype=str)
+        state["topic_names"] = np.array(self.bank.topic_names(), dtype=str)
+        try:
+            directory = os.path.dirname(self.state_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            tmp_path = f"{self.state_path}.tmp"
+            with open(tmp_path, "wb") as f:
+                np.savez_compressed(f, **state)
+            os.replace(tmp_path, self.state_path)
+        except OSError as e:
+            logger.error(f"Error saving adaptive state to {self.state_path}: {str(e)}")
+            with self._lock:
+                self._dirty = True
+
+    def _load(self):
+        """
+        Load the saved state, mapping item ids and topic paths onto the current bank.
+        """
+        try:
+            with np.load(self.state_path, allow_pickle=False) as data:
+                state = {name: data[name] for name in data.files}
+        except (OSError, ValueError) as e:
+            logger.error(f"Error loading adaptive state from {self.state_path}: {str(e)}")
+            return
+
+        self._sync_items()
+        item_rows = np.array([-1 if row is None else row
+                              for row in map(self.bank.index_of, state["item_ids"].tolist())], dtype=np.int64)
+        topic_codes = np.array([-1 if code is None else code
+                                for code in map(self.bank.topic_code, state["topic_names"].tolist())], dtype=np.int64)
+        known = item_rows >= 0
+        self._item_difficulty[item_rows[known]] = state["item_difficulty"][known]
+        self._item_counts[item_rows[known]] = state["item_count"][known]
+
+        users = []
+        for user_id, theta, count in zip(state["user_ids"].tolist(), state["user_theta"], state["user_count"]):
+            user = self._user(user_id)
+            user.theta, user.count = float(theta), int(count)
+            users.append(user)
+        for code, topic, value, count in zip(state["offset_user"], topic_codes[state["offset_topic"]],
+                                             state["offset_value"], state["offset_count"]):
+            if topic >= 0:
+                users[code].topic_offsets[topic] = value
+                users[code].topic_counts[topic] = count
+        seen_users, seen_rows = state["seen_user"], item_rows[state["seen_item"]]
+        known_seen = seen_rows >= 0
+        seen_users, seen_rows = seen_users[known_seen], seen_rows[known_seen]
+        order = np.lexsort((seen_rows, seen_users))
+        seen_users, seen_rows = seen_users[order], seen_rows[order]
+        bounds = np.searchsorted(seen_users, np.arange(len(users) + 1))
+        for code, user in enumerate(users):
+            user.seen = seen_rows[bounds[code]:bounds[code + 1]]
+        logger.info(f"Loaded adaptive state for {len(users)} users and {int(known.sum())} questions")
+
+    def close(self):
+        """
+        Stop the saver thread and save the final state.
+        """
+        self._closed = True
+        self._wake.set()
+        if self._saver is not None:
+            self._saver.join(timeout=5)
+        self.save()
+
+
+# Shared engine, created on first use
+_adaptive_engine = None
+_adaptive_engine_lock = threading.Lock()
+
+
+def get_adaptive_engine():
+    """
+    Get the shared adaptive engine over the shared question bank.
+
+    Returns:
+        AdaptiveEngine: The shared engine
+    """
+    global _adaptive_engine
+    with _adaptive_engine_lock:
+        if _adaptive_engine is None:
+            _adaptive_engine = AdaptiveEngine(get_question_bank(), get_adaptive_state_path())
+            atexit.register(_adaptive_engine.close)
+        return _adaptive_engine
+
+
+def set_adaptive_engine(engine):
+    """
+    Replace the shared engine, e.g. with an in-memory engine in tests.
+
+    Args:
+        engine (AdaptiveEngine or None): The engine to use, or None to create the configured one
+    """
+    global _adaptive_engine
+    with _adaptive_engine_lock:
+        _adaptive_engine = engine
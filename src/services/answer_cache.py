@@ -0,0 +1,192 @@
+"""
+Answer cache module
+
+This module provides a bounded in-memory cache for Quick Search answers.
+Keys are the normalized question text plus the model and request parameters,
+entries expire after a TTL, failed requests are cached briefly so a failing
+backend is not hammered with repeats, and the least recently used entries are
+evicted once the cached text exceeds a byte budget.
+"""
+import re
+import sys
+import time
+import logging
+import threading
+import unicodedata
+from collections import OrderedDict
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Total size of cached keys and answers before LRU eviction
+DEFAULT_MAX_BYTES = 16 * 1024 * 1024
+
+# Lifetime of a cached answer
+DEFAULT_TTL_SECONDS = 6 * 60 * 60
+
+# Lifetime of a cached error, short so transient failures recover quickly
+DEFAULT_ERROR_TTL_SECONDS = 30
+
+# Approximate bookkeeping overhead per entry, counted against the byte budget
+ENTRY_OVERHEAD_BYTES = 200
+
+
+def normalize_query(text):
+    """
+    Normalize question text so trivially different spellings share a cache entry.
+
+    Applies Unicode compatibility normalization, case folding and whitespace collapsing.
+
+    Args:
+        text (str): The question text
+
+    Returns:
+        str: The normalized text
+    """
+    return re.sub(r"\s+", " ", unicodedata.normalize("NFKC", text).casefold()).strip()
+
+
+def make_cache_key(question, model, **params):
+    """
+    Build the cache key of a request.
+
+    Args:
+        question (str): The question text
+        model (str): The model answering the question
+        **params: Other request parameters that change the answer (backend, max_tokens, ...)
+
+    Returns:
+        tuple: The hashable cache key
+    """
+    return (normalize_query(question), model, tuple(sorted(params.items())))
+
+
+class CachedAnswer:
+    """
+    A cache entry.
+    """
+
+    __slots__ = ("value", "is_error", "expires_at", "size")
+
+    def __init__(self, value, is_error, expires_at, size):
+        self.value = value
+        self.is_error = is_error
+        self.expires_at = expires_at
+        self.size = size
+
+
+class AnswerCache:
+    """
+    Thread-safe LRU cache bounded by the total size of its entries, with per-entry TTLs.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES, ttl_seconds=DEFAULT_TTL_SECONDS,
+                 error_ttl_seconds=DEFAULT_ERROR_TTL_SECONDS, clock=time.monotonic):
+        """
+        Initialize the cache.
+
+        Args:
+            max_bytes (int): Byte budget for all entries
+            ttl_seconds (float): Default lifetime of an answer
+            error_ttl_seconds (float): Default lifetime of an error
+            clock (callable): Monotonic time source, replaceable in tests
+        """
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.error_ttl_seconds = error_ttl_seconds
+        self._clock = clock
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "error_hits": 0, "misses": 0, "expirations": 0, "evictions": 0}
+
+    @staticmethod
+    def _entry_size(key, value):
+        """
+        Estimate the memory held by an entry.
+        """
+        return ENTRY_OVERHEAD_BYTES + sys.getsizeof(key[0]) + sys.getsizeof(value)
+
+    def get(self, key):
+        """
+        Look up a live entry and mark it as recently used.
+
+        Args:
+            key (tuple): The cache key
+
+        Returns:
+            CachedAnswer: The entry, or None on a miss
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires_at <= self._clock():
+                self._remove(key)
+                self._stats["expirations"] += 1
+                entry = None
+            if entry is None:
+                self._stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats["error_hits" if entry.is_error else "hits"] += 1
+            return entry
+
+    def put(self, key, value, is_error=False, ttl_seconds=None):
+        """
+        Store an answer or an error.
+
+        Args:
+            key (tuple): The cache key
+            value (str): The answer, or the error message shown to the user
+            is_error (bool): Whether the value is an error (cached with the shorter TTL)
+            ttl_seconds (float, optional): Lifetime overriding the default
+        """
+        if ttl_seconds is None:
+            ttl_seconds = self.error_ttl_seconds if is_error else self.ttl_seconds
+        size = self._entry_size(key, value)
+        if ttl_seconds <= 0 or size > self.max_bytes:
+            return
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = CachedAnswer(value, is_error, self._clock() + ttl_seconds, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self._stats["evictions"] += 1
+
+    def _remove(self, key):
+        """
+        Remove an entry; the caller holds the lock.
+        """
+        entry = self._entries.pop(key)
+        self._bytes -= entry.size
+
+    def clear(self):
+        """
+        Remove all entries. Statistics are kept.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def get_stats(self):
+        """
+        Get cache statistics.
+
+        Returns:
+            dict: Hit, error hit, miss, expiration and eviction counts, the number
+                of entries, their total size and the hit ratio (including error hits)
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._entries)
+            stats["bytes"] = self._bytes
+        lookups = stats["hits"] + stats["error_hits"] + stats["misses"]
+        stats["hit_ratio"] = (stats["hits"] + stats["error_hits"]) / lookups if lookups else 0.0
+        return stats
+
+
+# Shared cache used by the answer service
+answer_cache = AnswerCache()
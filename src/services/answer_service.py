@@ -1,43 +1,126 @@
 """
 Answer service module
 
-This module contains functionality for generating answers using OpenAI's GPT models.
+This module contains functionality for generating answers using the configured LLM backend.
 """
 import logging
-from openai import OpenAI
-import streamlit as st
 
-from src.config.app_config import get_openai_api_key
+from src.services.llm_backend import get_llm_backend
+from src.services.model_router import get_model_router
+from src.services.answer_cache import answer_cache, make_cache_key
+from src.services.prompt_service import build_answer_context_prompt
+from src.services.retrieval_service import get_context_retriever
+from src.config.app_config import get_retrieval_settings
+from src.utils.circuit_breaker import get_circuit_breaker
+from src.utils.rate_limiter import get_rate_limiter
+from src.utils.tracing import start_span
+from src.utils.profiling import profile_service_call
 
 # Set up logging
 logger = logging.getLogger(__name__)
 
+# Request parameters of Quick Search answers
+ANSWER_SYSTEM_PROMPT = "You are a helpful assistant providing concise answers to questions about any topic."
+ANSWER_MAX_TOKENS = 300
+ANSWER_TEMPERATURE = 0.7
 
+# Answers returned instead of a model answer
+ANSWER_ERROR_PREFIX = "Error: "
+EMPTY_QUESTION_ANSWER = "Please provide a question."
+
+
+def is_successful_answer(answer):
+    """
+    Check whether get_gpt_answer returned an answer from the model.
+    
+    Args:
+        answer (str or None): The value returned by get_gpt_answer
+        
+    Returns:
+        bool: False for errors, the empty-question reply and missing content
+    """
+    return (isinstance(answer, str) and bool(answer.strip()) and not answer.startswith(ANSWER_ERROR_PREFIX)
+            and answer != EMPTY_QUESTION_ANSWER)
+
+
+def retrieve_answer_context(question):
+    """
+    Retrieve context snippets for a question from the local retrieval index.
+    
+    Args:
+        question (str): The question
+        
+    Returns:
+        list: (key, snippet) tuples, most relevant first; empty when retrieval is disabled
+    """
+    retriever = get_context_retriever()
+    if retriever is None:
+        return []
+    settings = get_retrieval_settings()
+    with start_span("retrieval.search") as span:
+        context = retriever.retrieve(question, settings["top_k"], settings["context_tokens"])
+        span.set_attribute("snippets", len(context))
+    return context
+
+
+@profile_service_call
 def get_gpt_answer(question):
     """
     Get an answer from GPT model for the given question.
     
+    Snippets retrieved from the topics and stored questions are added to the
+    prompt as context. Repeated questions (ignoring case and whitespace) are
+    answered from the answer cache, without retrieval, while the retrieval
+    index is unchanged; errors are cached briefly as well.
+    
     Args:
         question (str): The question to ask GPT
         
     Returns:
         str: The answer from GPT
     """
-    if not question:
-        return "Please provide a question."
+    if not question or not question.strip():
+        return EMPTY_QUESTION_ANSWER
+    
+    backend = get_llm_backend()
+    router = get_model_router()
+    model = router.select("answer")
+    # The same question over the same index retrieves the same context, so the cache is checked first
+    retriever = get_context_retriever()
+    cache_key = make_cache_key(
+        question, model, backend=backend.name, system=ANSWER_SYSTEM_PROMPT,
+        max_tokens=ANSWER_MAX_TOKENS, temperature=ANSWER_TEMPERATURE,
+        index_version=retriever.index.version if retriever is not None else None
+    )
+    cached = answer_cache.get(cache_key)
+    if cached is not None:
+        return cached.value
+    
+    context = retrieve_answer_context(question)
+    
+    messages = [{"role": "system", "content": ANSWER_SYSTEM_PROMPT}]
+    if context:
+        messages.append({"role": "system", "content": build_answer_context_prompt([s for _, s in context])})
+    messages.append({"role": "user", "content": question.strip()})
     
     try:
-        client = OpenAI(api_key=get_openai_api_key())
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",  # You can change the model as needed
-            messages=[
-                {"role": "system", "content": "You are a helpful assistant providing concise answers to questions about any topic."},
-                {"role": "user", "content": question}
-            ],
-            temperature=0.7,
-            max_tokens=300
-        )
-        return response.choices[0].message.content
+        with start_span("llm.call", backend=backend.name, model=model, max_tokens=ANSWER_MAX_TOKENS) as span, \
+                get_rate_limiter().slot():
+            response = router.call("answer", None, model, lambda m: get_circuit_breaker().call(
+                backend.complete,
+                messages=messages,
+                max_tokens=ANSWER_MAX_TOKENS,
+                model=m,
+                temperature=ANSWER_TEMPERATURE
+            ))
+            span.set_attribute("finish_reason", response.finish_reason)
+            span.set_attribute("completion_tokens", response.completion_tokens)
     except Exception as e:
         logger.error(f"Error getting answer from GPT: {str(e)}")
-        return f"Error: {str(e)}" 
\ No newline at end of file
+        error_message = f"{ANSWER_ERROR_PREFIX}{str(e)}"
+        answer_cache.put(cache_key, error_message, is_error=True)
+        return error_message
+    
+    if isinstance(response.content, str):
+        answer_cache.put(cache_key, response.content)
+    return response.content
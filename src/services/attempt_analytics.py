@@ -0,0 +1,209 @@
+"""
+Attempt analytics module
+
+This module loads the attempt log written by attempt_log and computes
+accuracy statistics with vectorized pandas/NumPy operations. String columns
+stay dictionary-encoded as pandas categoricals, so grouping millions of
+attempts works on integer codes rather than Python strings.
+
+Usage:
+    python -m src.services.attempt_analytics [--dir data/attempts] [--user ID] [--level N]
+"""
+import argparse
+import logging
+
+import numpy as np
+import pandas as pd
+
+from src.config.app_config import get_attempt_log_dir
+from src.services.attempt_log import STRING_COLUMNS, list_segments, merge_segments, read_segment
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+ATTEMPT_COLUMNS = list(STRING_COLUMNS) + ["correct", "seconds", "timestamp"]
+
+
+def load_attempts(directory=None):
+    """
+    Load all attempts of a log directory into a DataFrame.
+
+    Args:
+        directory (str, optional): The log directory (default: the configured one)
+
+    Returns:
+        DataFrame: One row per attempt; user, topic and difficulty are categoricals
+    """
+    paths = list_segments(directory or get_attempt_log_dir())
+    if not paths:
+        return pd.DataFrame({
+            **{column: pd.Categorical([]) for column in STRING_COLUMNS},
+            "correct": np.array([], dtype=bool),
+            "seconds": np.array([], dtype=np.float32),
+            "timestamp": np.array([], dtype=np.float64),
+        }, columns=ATTEMPT_COLUMNS)
+
+    merged = merge_segments([read_segment(path) for path in paths])
+    data = {
+        column: pd.Categorical.from_codes(merged[f"{column}_codes"], categories=merged[f"{column}_values"])
+        for column in STRING_COLUMNS
+    }
+    for column in ("correct", "seconds", "timestamp"):
+        data[column] = merged[column]
+    return pd.DataFrame(data, columns=ATTEMPT_COLUMNS)
+
+
+def truncate_topics(topics, level):
+    """
+    Truncate topic paths to their first levels.
+
+    The truncation is applied to the categories only, so its cost does not
+    depend on the number of attempts.
+
+    Args:
+        topics (Categorical or Series): Comma-separated topic paths
+        level (int): Number of leading path components to keep
+
+    Returns:
+        Series: Categorical topic prefixes
+    """
+    topics = pd.Series(topics).astype("category")
+    prefixes = [", ".join(part.strip() for part in topic.split(",")[:level]) for topic in topics.cat.categories]
+    distinct, inverse = np.unique(np.asarray(prefixes, dtype=str), return_inverse=True)
+    codes = topics.cat.codes.to_numpy()
+    # Codes of -1 mark missing values and stay missing
+    new_codes = np.where(codes >= 0, inverse.ravel()[codes], -1)
+    return pd.Series(pd.Categorical.from_codes(new_codes, categories=distinct), index=topics.index)
+
+
+def _accuracy_by(df, keys):
+    """
+    Group attempts and compute attempt counts, accuracy and median answer time.
+
+    Args:
+        df (DataFrame): Attempts
+        keys: Column name(s) or Series to group by
+
+    Returns:
+        DataFrame: attempts, correct, accuracy and median_seconds per group
+    """
+    grouped = df.groupby(keys, observed=True)
+    stats = grouped.agg(attempts=("correct", "size"), correct=("correct", "sum"),
+                        median_seconds=("seconds", "median"))
+    stats["accuracy"] = stats["correct"] / stats["attempts"]
+    return stats[["attempts", "correct", "accuracy", "median_seconds"]]
+
+
+def topic_accuracy(df, level=None, user_id=None):
+    """
+    Compute accuracy per topic.
+
+    Args:
+        df (DataFrame): Attempts as returned by load_attempts
+        level (int, optional): Aggregate topics to their first `level` path components
+        user_id (str, optional): Only count this user's attempts
+
+    Returns:
+        DataFrame: attempts, correct, accuracy and median_seconds per topic, most attempted first
+    """
+    if user_id is not None:
+        df = df[df["user"] == user_id]
+    topics = truncate_topics(df["topic"], level).rename("topic") if level else "topic"
+    return _accuracy_by(df, topics).sort_values("attempts", ascending=False)
+
+
+def difficulty_accuracy(df, user_id=None):
+    """
+    Compute accuracy per difficulty level.
+
+    Args:
+        df (DataFrame): Attempts as returned by load_attempts
+        user_id (str, optional): Only count this user's attempts
+
+    Returns:
+        DataFrame: attempts, correct, accuracy and median_seconds per difficulty
+    """
+    if user_id is not None:
+        df = df[df["user"] == user_id]
+    return _accuracy_by(df, "difficulty")
+
+
+def accuracy_trend(df, bucket_seconds=86400, user_id=None):
+    """
+    Compute accuracy over time in fixed-width buckets.
+
+    Args:
+        df (DataFrame): Attempts as returned by load_attempts
+        bucket_seconds (float): Bucket width (default: one day)
+        user_id (str, optional): Only count this user's attempts
+
+    Returns:
+        DataFrame: attempts, correct and accuracy per bucket start time, empty buckets omitted
+    """
+    if user_id is not None:
+        df = df[df["user"] == user_id]
+    if df.empty:
+        return pd.DataFrame(columns=["attempts", "correct", "accuracy"])
+
+    timestamps = df["timestamp"].to_numpy()
+    start = np.floor(timestamps.min() / bucket_seconds) * bucket_seconds
+    buckets = ((timestamps - start) // bucket_seconds).astype(np.int64)
+    attempts = np.bincount(buckets)
+    correct = np.bincount(buckets, weights=df["correct"].to_numpy())
+    used = np.nonzero(attempts)[0]
+    index = pd.to_datetime(start + used * bucket_seconds, unit="s")
+    return pd.DataFrame({
+        "attempts": attempts[used],
+        "correct": correct[used].astype(np.int64),
+        "accuracy": correct[used] / attempts[used],
+    }, index=pd.Index(index, name="bucket"))
+
+
+def weakest_topics(df, user_id, min_attempts=3, limit=5):
+    """
+    Find the topics a user answers least accurately.
+
+    Args:
+        df (DataFrame): Attempts as returned by load_attempts
+        user_id (str): The user
+        min_attempts (int): Ignore topics with fewer attempts
+        limit (int): Maximum number of topics returned
+
+    Returns:
+        DataFrame: Per-topic statistics, lowest accuracy first
+    """
+    stats = topic_accuracy(df, user_id=user_id)
+    stats = stats[stats["attempts"] >= min_attempts]
+    return stats.sort_values(["accuracy", "attempts"], ascending=[True, False]).head(limit)
+
+
+def main():
+    """
+    Print accuracy summaries of the attempt log.
+    """
+    parser = argparse.ArgumentParser(description="Summarize MCQ attempt accuracy.")
+    parser.add_argument("--dir", default=None, help="Attempt log directory")
+    parser.add_argument("--user", default=None, help="Only include this user's attempts")
+    parser.add_argument("--level", type=int, default=None, help="Aggregate topics to this path depth")
+    parser.add_argument("--bucket-hours", type=float, default=24, help="Trend bucket width")
+    args = parser.parse_args()
+
+    df = load_attempts(args.dir)
+    print(f"{len(df)} attempts by {df['user'].nunique()} users")
+    if df.empty:
+        return
+
+    with pd.option_context("display.width", 160, "display.max_rows", 50):
+        print("\nBy topic:")
+        print(topic_accuracy(df, level=args.level, user_id=args.user).head(30))
+        print("\nBy difficulty:")
+        print(difficulty_accuracy(df, user_id=args.user))
+        print("\nTrend:")
+        print(accuracy_trend(df, bucket_seconds=args.bucket_hours * 3600, user_id=args.user))
+        if args.user:
+            print("\nWeakest topics:")
+            print(weakest_topics(df, args.user))
+
+
+if __name__ == "__main__":
+    main()
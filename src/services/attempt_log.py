@@ -0,0 +1,277 @@
+"""
+Attempt log module
+
+This module records MCQ attempts (user, topic path, difficulty, correctness,
+time to answer) in a columnar log. Attempts are buffered in memory and
+written in batches by a background thread as compressed NumPy segment files.
+String columns are dictionary-encoded: each segment stores the distinct
+values once plus an int32 code per row, which keeps files small and lets the
+analytics module aggregate with integer operations.
+
+Segment layout (one .npz file per batch):
+    <column>_values   str[k]    distinct values of a string column
+    <column>_codes    int32[n]  index into <column>_values for each row
+    correct           bool[n]
+    seconds           float32[n]  time from showing the question to submitting
+    timestamp         float64[n]  submission time, seconds since the epoch
+"""
+import os
+import time
+import atexit
+import logging
+import itertools
+import threading
+
+import numpy as np
+
+from src.config.app_config import get_attempt_log_dir
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# String columns, stored dictionary-encoded
+STRING_COLUMNS = ("user", "topic", "difficulty")
+
+# Seconds between write-behind flushes
+FLUSH_INTERVAL = 5.0
+
+# Number of buffered attempts that triggers an immediate flush
+FLUSH_ROWS = 1000
+
+# Number of segments above which they are merged into one
+MAX_SEGMENTS = 64
+
+SEGMENT_PREFIX = "attempts_"
+SEGMENT_SUFFIX = ".npz"
+
+
+def encode_strings(values):
+    """
+    Dictionary-encode a sequence of strings.
+
+    Args:
+        values: Strings, one per row
+
+    Returns:
+        tuple: (distinct values as a str array, int32 codes)
+    """
+    distinct, codes = np.unique(np.asarray(values, dtype=str), return_inverse=True)
+    return distinct, codes.astype(np.int32).ravel()
+
+
+def write_segment(path, columns):
+    """
+    Write columns to a segment file atomically.
+
+    Args:
+        path (str): The segment path
+        columns (dict): Arrays keyed by segment field name
+    """
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        np.savez_compressed(f, **columns)
+    os.replace(tmp_path, path)
+
+
+def read_segment(path):
+    """
+    Read a segment file.
+
+    Args:
+        path (str): The segment path
+
+    Returns:
+        dict: Arrays keyed by segment field name
+    """
+    with np.load(path, allow_pickle=False) as data:
+        return {name: data[name] for name in data.files}
+
+
+def list_segments(directory):
+    """
+    List the segment files of a log directory, oldest first.
+
+    Args:
+        directory (str): The log directory
+
+    Returns:
+        list: Segment paths
+    """
+    if not os.path.isdir(directory):
+        return []
+    return sorted(os.path.join(directory, name) for name in os.listdir(directory)
+                  if name.startswith(SEGMENT_PREFIX) and name.endswith(SEGMENT_SUFFIX))
+
+
+def merge_segments(segments):
+    """
+    Concatenate segments, re-encoding string columns against their combined values.
+
+    Args:
+        segments (list): Segment dicts as returned by read_segment
+
+    Returns:
+        dict: A single segment dict
+    """
+    merged = {}
+    for column in STRING_COLUMNS:
+        distinct = np.unique(np.concatenate([segment[f"{column}_values"] for segment in segments]))
+        # Map each segment's local codes onto the combined values without touching the strings per row
+        merged[f"{column}_values"] = distinct
+        merged[f"{column}_codes"] = np.concatenate([
+            np.searchsorted(distinct, segment[f"{column}_values"]).astype(np.int32)[segment[f"{column}_codes"]]
+            for segment in segments
+        ])
+    for column in ("correct", "seconds", "timestamp"):
+        merged[column] = np.concatenate([segment[column] for segment in segments])
+    return merged
+
+
+class AttemptLog:
+    """
+    Buffers attempts and writes them as columnar segments from a background thread.
+    """
+
+    def __init__(self, directory, flush_interval=FLUSH_INTERVAL, flush_rows=FLUSH_ROWS,
+                 max_segments=MAX_SEGMENTS):
+        """
+        Initialize the log.
+
+        Args:
+            directory (str): Directory of the segment files
+            flush_interval (float): Seconds between flushes
+            flush_rows (int): Buffered attempts that trigger an immediate flush
+            max_segments (int): Segment count above which segments are merged
+        """
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self.flush_rows = flush_rows
+        self.max_segments = max_segments
+        self._rows = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._closed = False
+        self._counter = itertools.count()
+        self._thread = None
+
+    def record(self, user_id, topic, difficulty, correct, seconds, timestamp=None):
+        """
+        Buffer one attempt.
+
+        Args:
+            user_id (str): The user who answered
+            topic (str): The comma-separated topic path of the question
+            difficulty (str): The difficulty level
+            correct (bool): Whether the answer was correct
+            seconds (float): Time from showing the question to submitting
+            timestamp (float, optional): Submission time (default: now)
+        """
+        row = (user_id or "", topic or "", difficulty or "", bool(correct), float(seconds),
+               time.time() if timestamp is None else timestamp)
+        with self._lock:
+            self._rows.append(row)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="attempt-log-writer", daemon=True)
+                self._thread.start()
+            if len(self._rows) >= self.flush_rows:
+                self._wake.set()
+
+    def flush(self):
+        """
+        Write buffered attempts as a new segment, merging segments when there are too many.
+
+        Returns:
+            int: The number of attempts written
+        """
+        with self._flush_lock:
+            with self._lock:
+                rows, self._rows = self._rows, []
+            if not rows:
+                return 0
+
+            users, topics, difficulties, correct, seconds, timestamps = zip(*rows)
+            columns = {}
+            for column, values in zip(STRING_COLUMNS, (users, topics, difficulties)):
+                columns[f"{column}_values"], columns[f"{column}_codes"] = encode_strings(values)
+            columns["correct"] = np.asarray(correct, dtype=bool)
+            columns["seconds"] = np.asarray(seconds, dtype=np.float32)
+            columns["timestamp"] = np.asarray(timestamps, dtype=np.float64)
+
+            try:
+                os.makedirs(self.directory, exist_ok=True)
+                name = f"{SEGMENT_PREFIX}{time.time_ns():020d}_{os.getpid()}_{next(self._counter)}{SEGMENT_SUFFIX}"
+                write_segment(os.path.join(self.directory, name), columns)
+            except OSError as e:
+                logger.error(f"Error writing attempt log segment: {str(e)}")
+                with self._lock:
+                    self._rows[:0] = rows
+                return 0
+
+            # The attempts are persisted; a failed merge only leaves more segments to read
+            if len(list_segments(self.directory)) > self.max_segments:
+                try:
+                    self.compact()
+                except Exception as e:
+                    logger.error(f"Error merging attempt log segments: {str(e)}")
+            return len(rows)
+
+    def compact(self):
+        """
+        Merge all current segments into one.
+
+        The merged segment is written before the originals are removed, and
+        takes the name of the newest one, so it sorts after segments written
+        by other processes in the meantime.
+        """
+        paths = list_segments(self.directory)
+        if len(paths) < 2:
+            return
+        merged = merge_segments([read_segment(path) for path in paths])
+        write_segment(paths[-1], merged)
+        for path in paths[:-1]:
+            os.remove(path)
+        logger.info(f"Merged {len(paths)} attempt log segments ({len(merged['correct'])} attempts)")
+
+    def _run(self):
+        """
+        Flush periodically until closed.
+        """
+        while not self._closed:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                # Keep the writer alive; the attempts stay buffered for the next flush
+                logger.error(f"Error flushing attempt log: {str(e)}")
+
+    def close(self):
+        """
+        Stop the writer thread and write the remaining attempts.
+        """
+        self._closed = True
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        self.flush()
+
+
+# Shared log, created on first use
+_attempt_log = None
+_attempt_log_lock = threading.Lock()
+
+
+def get_attempt_log():
+    """
+    Get the shared attempt log, creating it on first use.
+
+    Returns:
+        AttemptLog: The shared log
+    """
+    global _attempt_log
+    with _attempt_log_lock:
+        if _attempt_log is None:
+            _attempt_log = AttemptLog(get_attempt_log_dir())
+            atexit.register(_attempt_log.close)
+        return _attempt_log
@@ -0,0 +1,392 @@
+"""
+Bank snapshot module
+
+This module exports the question bank to a columnar snapshot and opens
+snapshots memory-mapped, so a replica can start serving from a large bank
+without parsing it. A snapshot is a directory of .npy arrays:
+
+    ids.npy               S16[n]    item id of each row
+    sorted_ids.npy        S16[n]    item ids in sorted order, for binary search
+    sorted_rows.npy       int64[n]  row of each sorted id
+    types.npy             int8[n]   index into QUESTION_TYPES
+    topics.npy            int32[n]  index into the topic names
+    levels.npy            int8[n]   index into DIFFICULTY_LEVELS, -1 if unknown
+    payload_offsets.npy   int64[n+1]  start of each question in payload_data
+    payload_data.npy      uint8[m]  the question JSON strings, UTF-8, concatenated
+    topic_offsets.npy     int64[k+1]
+    topic_data.npy        uint8[j]  the topic names, UTF-8, concatenated
+
+plus a manifest.json with the format version and row count. The manifest
+also records how much of the bank's JSON Lines file the snapshot covers, so a
+bank opened on the snapshot only parses the questions appended since the
+export. Only the small metadata columns are read eagerly; question JSON is decoded per row when
+served. Exports and imports validate questions in bulk, with one cached
+pydantic TypeAdapter call per question type instead of a model per question.
+
+Usage:
+    python -m src.services.bank_snapshot export [--bank data/question_bank.jsonl] [--out DIR]
+    python -m src.services.bank_snapshot import SNAPSHOT_DIR [--bank data/question_bank.jsonl]
+"""
+import os
+import json
+import shutil
+import hashlib
+import logging
+import argparse
+from functools import lru_cache
+from typing import List
+
+import numpy as np
+from pydantic import TypeAdapter, ValidationError
+
+from src.config.app_config import get_question_bank_path, get_question_bank_snapshot_dir
+from src.models.question_models import QUESTION_TYPES, DIFFICULTY_LEVELS, QUESTION_MODELS
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_FORMAT = 1
+
+# Bytes before the covered offset that identify the bank file a snapshot was exported from
+BANK_TAIL_BYTES = 4096
+
+
+@lru_cache(maxsize=None)
+def get_list_adapter(question_type):
+    """
+    Get the cached adapter validating a JSON array of questions of a type.
+
+    Args:
+        question_type (str): The question type ("mcq", "subjective", "coding")
+
+    Returns:
+        TypeAdapter: The adapter for List[model]
+    """
+    return TypeAdapter(List[QUESTION_MODELS[question_type]])
+
+
+@lru_cache(maxsize=None)
+def get_item_adapter(question_type):
+    """
+    Get the cached adapter validating a single question of a type.
+
+    Args:
+        question_type (str): The question type ("mcq", "subjective", "coding")
+
+    Returns:
+        TypeAdapter: The adapter for the model
+    """
+    return TypeAdapter(QUESTION_MODELS[question_type])
+
+
+def validate_payloads(question_type, payloads):
+    """
+    Validate question JSON strings of one type in bulk.
+
+    All payloads are validated by a single call on a JSON array. Only when that
+    fails because of malformed JSON, which hides which element is at fault, are
+    the payloads validated one at a time.
+
+    Args:
+        question_type (str): The question type of all payloads
+        payloads (list): Question JSON strings
+
+    Returns:
+        ndarray: A bool mask of the valid payloads
+    """
+    valid = np.ones(len(payloads), dtype=bool)
+    if not payloads:
+        return valid
+    try:
+        get_list_adapter(question_type).validate_json("[" + ",".join(payloads) + "]")
+        return valid
+    except ValidationError as e:
+        errors = e.errors()
+    if all(error["loc"] and isinstance(error["loc"][0], int) for error in errors):
+        valid[[error["loc"][0] for error in errors]] = False
+        return valid
+
+    adapter = get_item_adapter(question_type)
+    for i, payload in enumerate(payloads):
+        try:
+            adapter.validate_json(payload)
+        except ValidationError:
+            valid[i] = False
+    return valid
+
+
+def pack_strings(strings):
+    """
+    Encode strings as UTF-8 and concatenate them.
+
+    Returns:
+        tuple: (int64 offsets of length len(strings) + 1, uint8 data)
+    """
+    encoded = [s.encode("utf-8") for s in strings]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(b) for b in encoded], out=offsets[1:])
+    return offsets, np.frombuffer(b"".join(encoded), dtype=np.uint8)
+
+
+def unpack_strings(offsets, data):
+    """
+    Decode all strings packed by pack_strings.
+    """
+    raw = data.tobytes()
+    return [raw[offsets[i]:offsets[i + 1]].decode("utf-8") for i in range(len(offsets) - 1)]
+
+
+def bank_file_tail(path, offset):
+    """
+    Hash the bytes of a bank file just before an offset.
+
+    Args:
+        path (str): The JSON Lines bank file
+        offset (int): End of the hashed range
+
+    Returns:
+        str: SHA-1 hex digest of up to BANK_TAIL_BYTES bytes before offset
+
+    Raises:
+        OSError: If the file cannot be read
+    """
+    with open(path, "rb") as f:
+        f.seek(max(0, offset - BANK_TAIL_BYTES))
+        return hashlib.sha1(f.read(min(offset, BANK_TAIL_BYTES))).hexdigest()
+
+
+def write_snapshot(bank, directory, validate=True):
+    """
+    Export a question bank to a snapshot directory.
+
+    The snapshot is written next to the target and swapped in with renames,
+    so readers never see a partial snapshot.
+
+    Args:
+        bank (QuestionBank): The bank to export
+        directory (str): The snapshot directory
+        validate (bool): Drop questions that fail validation against their model
+
+    Returns:
+        dict: Counts of exported and invalid questions
+    """
+    # Measured before the columns are read, so questions appended meanwhile are parsed again rather than lost
+    manifest = {"format": SNAPSHOT_FORMAT}
+    if bank.path and os.path.exists(bank.path):
+        offset = os.path.getsize(bank.path)
+        manifest.update(bank_offset=offset, bank_tail=bank_file_tail(bank.path, offset))
+    types, topic_codes, levels = bank.columns()
+    keep = np.ones(len(types), dtype=bool)
+    if validate:
+        for code, question_type in enumerate(QUESTION_TYPES):
+            rows = np.flatnonzero(types == code)
+            keep[rows] = validate_payloads(question_type, [bank.payload(row) for row in rows])
+    rows = np.flatnonzero(keep)
+
+    ids = np.array([bank.item_id(row) for row in rows], dtype="S16")
+    order = np.argsort(ids, kind="stable")
+    payload_offsets, payload_data = pack_strings([bank.payload(row) for row in rows])
+    topic_offsets, topic_data = pack_strings(bank.topic_names())
+    arrays = {
+        "ids": ids,
+        "sorted_ids": ids[order],
+        "sorted_rows": order.astype(np.int64),
+        "types": np.ascontiguousarray(types[rows]),
+        "topics": np.ascontiguousarray(topic_codes[rows]),
+        "levels": np.ascontiguousarray(levels[rows]),
+        "payload_offsets": payload_offsets,
+        "payload_data": payload_data,
+        "topic_offsets": topic_offsets,
+        "topic_data": topic_data,
+    }
+
+    tmp_dir = f"{directory.rstrip(os.sep)}.tmp"
+    old_dir = f"{directory.rstrip(os.sep)}.old"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    for name, array in arrays.items():
+        np.save(os.path.join(tmp_dir, f"{name}.npy"), array)
+    with open(os.path.join(tmp_dir, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump(dict(manifest, count=int(len(rows))), f)
+    shutil.rmtree(old_dir, ignore_errors=True)
+    if os.path.exists(directory):
+        os.rename(directory, old_dir)
+    os.rename(tmp_dir, directory)
+    shutil.rmtree(old_dir, ignore_errors=True)
+
+    stats = {"exported": int(len(rows)), "invalid": int(len(keep) - len(rows))}
+    logger.info(f"Exported {stats['exported']} questions to {directory} ({stats['invalid']} invalid)")
+    return stats
+
+
+class BankSnapshot:
+    """
+    A read-only, memory-mapped question bank snapshot.
+    """
+
+    def __init__(self, directory):
+        """
+        Open a snapshot. Arrays are memory-mapped, not read.
+
+        Args:
+            directory (str): The snapshot directory
+
+        Raises:
+            ValueError: If the snapshot format is not supported
+        """
+        self.directory = directory
+        with open(os.path.join(directory, "manifest.json"), "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        if manifest.get("format") != SNAPSHOT_FORMAT:
+            raise ValueError(f"Unsupported question bank snapshot format: {manifest.get('format')}")
+        self.bank_offset = manifest.get("bank_offset", 0)
+        self.bank_tail = manifest.get("bank_tail")
+
+        def load(name):
+            return np.load(os.path.join(directory, f"{name}.npy"), mmap_mode="r")
+
+        self.ids = load("ids")
+        self.sorted_ids = load("sorted_ids")
+        self.sorted_rows = load("sorted_rows")
+        self.types = load("types")
+        self.topics = load("topics")
+        self.levels = load("levels")
+        self.payload_offsets = load("payload_offsets")
+        self.payload_data = load("payload_data")
+        self.topic_names = unpack_strings(load("topic_offsets"), load("topic_data"))
+
+    def __len__(self):
+        return len(self.ids)
+
+    def item_id(self, row):
+        """
+        Get the id of the question at a row.
+        """
+        return self.ids[row].decode("ascii")
+
+    def payload(self, row):
+        """
+        Decode the question JSON string at a row.
+        """
+        return self.payload_data[self.payload_offsets[row]:self.payload_offsets[row + 1]].tobytes().decode("utf-8")
+
+    def covered_offset(self, path):
+        """
+        Get how much of a bank file the snapshot already contains.
+
+        Args:
+            path (str): The JSON Lines bank file
+
+        Returns:
+            int: The offset to start parsing from; 0 unless the file starts with the bytes the snapshot was
+                exported from
+        """
+        if not self.bank_offset or not self.bank_tail:
+            return 0
+        try:
+            if os.path.getsize(path) < self.bank_offset or bank_file_tail(path, self.bank_offset) != self.bank_tail:
+                return 0
+        except OSError:
+            return 0
+        return self.bank_offset
+
+    def find(self, item_id):
+        """
+        Find the row of a question by binary search over the sorted ids.
+
+        Args:
+            item_id (str): The item id
+
+        Returns:
+            int: The row, or None if the question is not in the snapshot
+        """
+        if not isinstance(item_id, str):
+            return None
+        key = item_id.encode("ascii", "replace")
+        position = int(np.searchsorted(self.sorted_ids, key))
+        if position < len(self.sorted_ids) and self.sorted_ids[position] == key:
+            return int(self.sorted_rows[position])
+        return None
+
+
+def open_snapshot(directory=None):
+    """
+    Open the configured snapshot if there is one.
+
+    Args:
+        directory (str, optional): The snapshot directory (default: the configured one)
+
+    Returns:
+        BankSnapshot: The snapshot, or None if it is missing or unreadable
+    """
+    directory = directory or get_question_bank_snapshot_dir()
+    if not directory or not os.path.exists(os.path.join(directory, "manifest.json")):
+        return None
+    try:
+        return BankSnapshot(directory)
+    except (OSError, ValueError) as e:
+        logger.error(f"Error opening question bank snapshot {directory}: {str(e)}")
+        return None
+
+
+def import_snapshot(snapshot, bank, validate=True):
+    """
+    Copy the questions of a snapshot into a bank, e.g. to merge banks from several replicas.
+
+    Args:
+        snapshot (BankSnapshot): The snapshot to import
+        bank (QuestionBank): The bank to add the questions to
+        validate (bool): Skip questions that fail validation against their model
+
+    Returns:
+        dict: Counts of added, duplicate and invalid questions
+    """
+    stats = {"added": 0, "duplicate": 0, "invalid": 0}
+    types = np.asarray(snapshot.types)
+    for code, question_type in enumerate(QUESTION_TYPES):
+        rows = np.flatnonzero(types == code)
+        payloads = [snapshot.payload(row) for row in rows]
+        valid = validate_payloads(question_type, payloads) if validate else np.ones(len(rows), dtype=bool)
+        stats["invalid"] += int(len(rows) - valid.sum())
+        for row, payload in zip(rows[valid], (p for p, ok in zip(payloads, valid) if ok)):
+            if snapshot.item_id(row) in bank:
+                stats["duplicate"] += 1
+                continue
+            level = int(snapshot.levels[row])
+            difficulty = DIFFICULTY_LEVELS[level] if level >= 0 else ""
+            if bank.add(question_type, snapshot.topic_names[snapshot.topics[row]], difficulty, payload):
+                stats["added"] += 1
+    logger.info(f"Imported {stats['added']} questions from {snapshot.directory} "
+                f"({stats['duplicate']} duplicate, {stats['invalid']} invalid)")
+    return stats
+
+
+def main():
+    """
+    Export the question bank to a snapshot, or import a snapshot into it.
+    """
+    parser = argparse.ArgumentParser(description="Export or import columnar question bank snapshots.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    export_parser = subparsers.add_parser("export", help="Write the bank to a snapshot directory")
+    export_parser.add_argument("--bank", default=None, help="Question bank file")
+    export_parser.add_argument("--out", default=None, help="Snapshot directory")
+    import_parser = subparsers.add_parser("import", help="Add the questions of a snapshot to the bank")
+    import_parser.add_argument("snapshot", help="Snapshot directory")
+    import_parser.add_argument("--bank", default=None, help="Question bank file")
+    for subparser in (export_parser, import_parser):
+        subparser.add_argument("--no-validate", action="store_true", help="Skip model validation")
+    args = parser.parse_args()
+
+    # Imported here because the question bank itself opens snapshots through this module
+    from src.services.question_bank import QuestionBank
+
+    bank = QuestionBank(args.bank or get_question_bank_path(), snapshot=open_snapshot())
+    if args.command == "export":
+        out = args.out or get_question_bank_snapshot_dir()
+        print(write_snapshot(bank, out, validate=not args.no_validate))
+    else:
+        print(import_snapshot(BankSnapshot(args.snapshot), bank, validate=not args.no_validate))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,446 @@
+"""
+Code runner service module
+
+This module runs user-submitted Python solutions against the examples of a
+coding question. Each test case runs in its own isolated interpreter process
+with CPU, memory, process and wall-clock limits. Interpreters are started
+ahead of time and kept warm in a pool, so a run does not pay interpreter
+startup.
+
+Each interpreter runs in its own process group, so a timeout kills the
+processes it started as well. An interpreter started by root switches to the
+unprivileged "nobody" user before running any submitted code. The sandbox
+does not isolate the file system or the network: submitted code can read any
+file its user can read and open connections. Running tests is therefore
+disabled in the app unless CODE_RUNNER_ENABLED is set, which should only be
+done where every user is trusted.
+"""
+import os
+import re
+import ast
+import sys
+import json
+import time
+import atexit
+import signal
+import logging
+import tempfile
+import threading
+import subprocess
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from src.utils.error_handlers import handle_exceptions
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Default limits applied to every test case
+DEFAULT_CPU_SECONDS = 2
+DEFAULT_MEMORY_BYTES = 256 * 1024 * 1024
+DEFAULT_WALL_SECONDS = 5
+
+# Number of warm interpreters kept ready
+DEFAULT_POOL_SIZE = max(2, os.cpu_count() or 1)
+
+# Maximum size of captured output returned to the UI
+MAX_OUTPUT_CHARS = 2000
+
+# Time to wait for the pipes of a killed interpreter to close
+KILL_GRACE_SECONDS = 1
+
+# Source of the interpreter started for each sandbox. It imports the modules
+# solutions commonly need, then blocks on stdin until it receives a single job.
+_WORKER_SOURCE = r'''
+import ast, io, json, math, os, sys, time, traceback
+import bisect, collections, functools, heapq, inspect, itertools, operator, re, string, typing
+try:
+    import resource
+except ImportError:
+    resource = None
+
+def _limit(kind, value):
+    if resource is not None and hasattr(resource, kind):
+        try:
+            resource.setrlimit(getattr(resource, kind), (value, value))
+        except (ValueError, OSError):
+            pass
+
+def _literal(source):
+    try:
+        return ast.literal_eval(source)
+    except (ValueError, SyntaxError):
+        try:
+            return json.loads(source)
+        except ValueError:
+            return source.strip().strip('"\'')
+
+def _matches(actual, expected):
+    if isinstance(actual, float) or isinstance(expected, float):
+        try:
+            return math.isclose(actual, expected, rel_tol=1e-6, abs_tol=1e-9)
+        except TypeError:
+            return False
+    if isinstance(actual, tuple):
+        actual = list(actual)
+    if isinstance(expected, tuple):
+        expected = list(expected)
+    return actual == expected or (isinstance(expected, str) and str(actual) == expected)
+
+job = json.loads(sys.stdin.readline())
+_limit("RLIMIT_CPU", job["cpu_seconds"])
+_limit("RLIMIT_AS", job["memory_bytes"])
+_limit("RLIMIT_FSIZE", 1024 * 1024)
+_limit("RLIMIT_NPROC", 0)
+if hasattr(os, "getuid") and os.getuid() == 0:
+    # Never run submitted code as root, which also ignores RLIMIT_NPROC; 65534 is "nobody"
+    os.setgroups([])
+    os.setgid(65534)
+    os.setuid(65534)
+
+channel = sys.stdout
+captured = io.StringIO()
+sys.stdout = sys.stderr = captured
+payload = {}
+start = time.perf_counter()
+try:
+    namespace = {"__name__": "__solution__"}
+    exec(compile(job["code"], "<solution>", "exec"), namespace)
+    entry = job["entry_point"]
+    if entry.get("class"):
+        target = getattr(namespace[entry["class"]](), entry["name"])
+    else:
+        target = namespace[entry["name"]]
+    args = [_literal(arg) for arg in job["args"]]
+    kwargs = {name: _literal(value) for name, value in job["kwargs"].items()}
+    if kwargs:
+        parameters = inspect.signature(target).parameters
+        if not all(name in parameters for name in kwargs):
+            args, kwargs = args + list(kwargs.values()), {}
+    actual = target(*args, **kwargs)
+    payload["actual"] = repr(actual)
+    payload["status"] = "passed" if _matches(actual, _literal(job["expected"])) else "failed"
+except MemoryError:
+    payload["status"] = "memory_limit"
+except BaseException:
+    payload["status"] = "error"
+    payload["error"] = traceback.format_exc(limit=-2)
+payload["duration"] = time.perf_counter() - start
+payload["stdout"] = captured.getvalue()
+channel.write(json.dumps(payload))
+channel.flush()
+'''
+
+
+class WarmInterpreterPool:
+    """
+    A pool of idle Python interpreters, each ready to run exactly one job.
+
+    Interpreters are never reused, so one user's code cannot affect another
+    run. A replacement is started in the background whenever one is taken.
+    """
+
+    def __init__(self, size=DEFAULT_POOL_SIZE):
+        """
+        Initialize the pool and start its interpreters.
+
+        Args:
+            size (int): Number of warm interpreters to keep ready
+        """
+        self.size = size
+        self._idle = deque()
+        self._lock = threading.Lock()
+        self._closed = False
+        self._workdir = tempfile.mkdtemp(prefix="deepmindset_sandbox_")
+        for _ in range(size):
+            self._idle.append(self._spawn())
+
+    def _spawn(self):
+        """
+        Start a new sandbox interpreter.
+
+        Returns:
+            subprocess.Popen: The started process, blocked waiting for a job
+        """
+        # -I isolates the interpreter from PYTHONPATH, user site-packages and the cwd.
+        # The environment is emptied so secrets such as API keys are not visible.
+        env = {"SYSTEMROOT": os.environ["SYSTEMROOT"]} if "SYSTEMROOT" in os.environ else {}
+        # A new session makes the interpreter the leader of a process group that _kill can stop as a whole
+        return subprocess.Popen(
+            [sys.executable, "-I", "-c", _WORKER_SOURCE],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            cwd=self._workdir,
+            env=env,
+            text=True,
+            start_new_session=os.name == "posix",
+        )
+
+    @staticmethod
+    def _kill(process):
+        """
+        Kill a sandbox interpreter and every process it started, without waiting on pipes they hold open.
+
+        Args:
+            process (subprocess.Popen): The interpreter to kill
+        """
+        try:
+            if os.name == "posix":
+                os.killpg(process.pid, signal.SIGKILL)
+            else:
+                process.kill()
+        except (ProcessLookupError, PermissionError):
+            process.kill()
+        try:
+            process.communicate(timeout=KILL_GRACE_SECONDS)
+        except subprocess.TimeoutExpired:
+            # A process that left the group still holds the pipes; stop reading them
+            for stream in (process.stdin, process.stdout):
+                if stream is not None:
+                    stream.close()
+            process.wait()
+
+    def _replenish(self):
+        """
+        Top the pool back up to its configured size.
+        """
+        while True:
+            with self._lock:
+                if self._closed or len(self._idle) >= self.size:
+                    return
+            process = self._spawn()
+            with self._lock:
+                if self._closed:
+                    self._kill(process)
+                    return
+                self._idle.append(process)
+
+    def acquire(self):
+        """
+        Take a warm interpreter from the pool, starting one if none is idle.
+
+        Returns:
+            subprocess.Popen: A process ready to receive a job
+        """
+        process = None
+        with self._lock:
+            while self._idle:
+                candidate = self._idle.popleft()
+                if candidate.poll() is None:
+                    process = candidate
+                    break
+        threading.Thread(target=self._replenish, daemon=True).start()
+        return process if process is not None else self._spawn()
+
+    def run(self, job, wall_seconds=DEFAULT_WALL_SECONDS):
+        """
+        Run a single job in a fresh interpreter.
+
+        Args:
+            job (dict): The job description sent to the interpreter
+            wall_seconds (float): Wall-clock limit for the job
+
+        Returns:
+            dict: The result reported by the interpreter
+        """
+        process = self.acquire()
+        try:
+            output, _ = process.communicate(json.dumps(job) + "\n", timeout=wall_seconds)
+        except subprocess.TimeoutExpired:
+            self._kill(process)
+            return {"status": "timeout"}
+
+        try:
+            return json.loads(output)
+        except ValueError:
+            # The interpreter died without reporting, e.g. killed by the CPU limit
+            return {"status": "cpu_limit" if process.returncode and process.returncode < 0 else "crashed"}
+
+    def close(self):
+        """
+        Stop all idle interpreters.
+        """
+        with self._lock:
+            self._closed = True
+            idle, self._idle = list(self._idle), deque()
+        for process in idle:
+            self._kill(process)
+
+
+# Shared pool, created on first use
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_interpreter_pool():
+    """
+    Get the shared warm interpreter pool, creating it on first use.
+
+    Returns:
+        WarmInterpreterPool: The shared pool
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = WarmInterpreterPool()
+            atexit.register(_pool.close)
+        return _pool
+
+
+def parse_examples(examples_text):
+    """
+    Extract test cases from the free-form examples of a coding question.
+
+    Recognizes "Input: ... / Output: ..." pairs, as generated by the coding
+    question prompt, with optional markdown emphasis and code spans.
+
+    Args:
+        examples_text (str): The examples text of a coding question
+
+    Returns:
+        list: A list of dicts with "input" and "expected" source strings
+    """
+    cases = []
+    pending_input = None
+    for line in (examples_text or "").splitlines():
+        line = line.replace("`", "").replace("*", "").strip()
+        match = re.match(r"^(?:[-\s]*)(input|output|expected output|expected)\s*:\s*(.*)$", line, re.IGNORECASE)
+        if not match:
+            continue
+        label, value = match.group(1).lower(), match.group(2).strip()
+        if label == "input":
+            pending_input = value
+        elif pending_input is not None:
+            cases.append({"input": pending_input, "expected": value})
+            pending_input = None
+    return cases
+
+
+def parse_arguments(input_text):
+    """
+    Split an example input into positional and keyword argument sources.
+
+    Args:
+        input_text (str): The example input, e.g. "nums = [1, 2], target = 3"
+
+    Returns:
+        tuple: A list of positional sources and a dict of keyword sources
+
+    Raises:
+        ValueError: If the input is not a list of literal arguments
+    """
+    source = f"f({input_text})"
+    try:
+        call = ast.parse(source, mode="eval").body
+    except SyntaxError:
+        raise ValueError(f"Cannot parse example input: {input_text}")
+    # Inputs such as "1) + (2" parse to another expression than a single call
+    if not isinstance(call, ast.Call) or any(keyword.arg is None for keyword in call.keywords):
+        raise ValueError(f"Cannot parse example input: {input_text}")
+
+    for node in list(call.args) + [keyword.value for keyword in call.keywords]:
+        try:
+            ast.literal_eval(node)
+        except (TypeError, SyntaxError, RecursionError):
+            raise ValueError(f"Example input is not a list of literal arguments: {input_text}")
+
+    args = [ast.get_source_segment(source, node) for node in call.args]
+    kwargs = {keyword.arg: ast.get_source_segment(source, keyword.value) for keyword in call.keywords}
+    return args, kwargs
+
+
+def find_entry_point(code):
+    """
+    Find the function the tests should call in the user's code.
+
+    Prefers the first public top-level function. Otherwise uses the first public
+    method of the first top-level class (e.g. a LeetCode-style "Solution").
+
+    Args:
+        code (str): The user's Python code
+
+    Returns:
+        dict: The entry point name and, for methods, its class name
+
+    Raises:
+        SyntaxError: If the code does not parse
+        ValueError: If no callable entry point is found
+    """
+    tree = ast.parse(code)
+    for node in tree.body:
+        if isinstance(node, ast.FunctionDef) and not node.name.startswith("_"):
+            return {"name": node.name}
+    for node in tree.body:
+        if isinstance(node, ast.ClassDef):
+            for item in node.body:
+                if isinstance(item, ast.FunctionDef) and not item.name.startswith("_"):
+                    return {"class": node.name, "name": item.name}
+    raise ValueError("No public function found to test.")
+
+
+@handle_exceptions
+def run_tests(code, examples_text, cpu_seconds=DEFAULT_CPU_SECONDS, memory_bytes=DEFAULT_MEMORY_BYTES,
+              wall_seconds=DEFAULT_WALL_SECONDS, pool=None):
+    """
+    Run the user's code against the examples of a coding question.
+
+    Test cases run in parallel, each in its own sandboxed interpreter.
+
+    Args:
+        code (str): The user's Python code
+        examples_text (str): The examples text of the coding question
+        cpu_seconds (int): CPU time limit per test case
+        memory_bytes (int): Address space limit per test case
+        wall_seconds (float): Wall-clock limit per test case
+        pool (WarmInterpreterPool, optional): The pool to use (default: the shared pool)
+
+    Returns:
+        dict: "error" for problems with the code or examples, otherwise "results",
+            a list of per-case dicts with input, expected, status and output
+    """
+    cases = parse_examples(examples_text)
+    if not cases:
+        return {"error": "No runnable examples found for this question.", "results": []}
+
+    try:
+        entry_point = find_entry_point(code)
+    except SyntaxError as e:
+        return {"error": f"Syntax error on line {e.lineno}: {e.msg}", "results": []}
+    except ValueError as e:
+        return {"error": str(e), "results": []}
+
+    pool = pool or get_interpreter_pool()
+
+    def run_case(case):
+        result = {"input": case["input"], "expected": case["expected"]}
+        try:
+            args, kwargs = parse_arguments(case["input"])
+        except ValueError as e:
+            result.update(status="skipped", error=str(e))
+            return result
+
+        job = {
+            "code": code,
+            "entry_point": entry_point,
+            "args": args,
+            "kwargs": kwargs,
+            "expected": case["expected"],
+            "cpu_seconds": cpu_seconds,
+            "memory_bytes": memory_bytes,
+        }
+        start = time.perf_counter()
+        result.update(pool.run(job, wall_seconds=wall_seconds))
+        result["wall_time"] = time.perf_counter() - start
+        for field in ("actual", "error", "stdout"):
+            if field in result:
+                result[field] = result[field][:MAX_OUTPUT_CHARS]
+        return result
+
+    workers = min(len(cases), os.cpu_count() or 1, pool.size)
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        results = list(executor.map(run_case, cases))
+
+    passed = sum(1 for result in results if result["status"] == "passed")
+    logger.info(f"Ran {len(results)} test cases for {entry_point['name']}: {passed} passed")
+    return {"error": None, "results": results}
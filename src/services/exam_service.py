@@ -0,0 +1,146 @@
+"""
+Exam service module
+
+This module runs exams: a fixed number of MCQs generated concurrently,
+answered in any order and scored together at the end. All questions are
+requested at once from a shared pool of exam workers. The shared LLM rate
+limit spreads the calls out, so an exam is ready in about the time of its
+slowest question instead of one generation wait per question. Questions can
+be answered as soon as they have arrived.
+"""
+import json
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+from src.services.question_service import generate_mcq_question
+from src.utils.tracing import propagate
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Largest exam that can be requested
+MAX_EXAM_QUESTIONS = 50
+
+# Worker threads generating the questions of all exams; the LLM rate limit bounds the calls they make
+MAX_EXAM_WORKERS = 32
+
+# Shared exam workers, created on first use
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    """
+    Get the worker pool shared by all exams.
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=MAX_EXAM_WORKERS, thread_name_prefix="exam")
+        return _executor
+
+
+class Exam:
+    """
+    A fixed-length MCQ exam whose questions are generated concurrently.
+    """
+
+    def __init__(self, topics, difficulty, generate_func=generate_mcq_question):
+        """
+        Start generating every question of the exam.
+
+        Args:
+            topics (list): The topic of each question, one per question
+            difficulty (str): The difficulty level of all questions
+            generate_func: The MCQ generation function, returning a question JSON string
+
+        Raises:
+            ValueError: If there are no topics or more than MAX_EXAM_QUESTIONS
+        """
+        if not 0 < len(topics) <= MAX_EXAM_QUESTIONS:
+            raise ValueError(f"An exam has between 1 and {MAX_EXAM_QUESTIONS} questions")
+        self.topics = list(topics)
+        self.difficulty = difficulty
+        self.answers = {}
+        executor = _get_executor()
+        self._futures = [executor.submit(propagate(generate_func), topic, difficulty) for topic in self.topics]
+        logger.info(f"Generating a {len(self.topics)}-question {difficulty} exam")
+
+    def __len__(self):
+        return len(self._futures)
+
+    def ready_count(self):
+        """
+        Count the questions that have arrived.
+
+        Returns:
+            int: The number of generated questions
+        """
+        return sum(future.done() for future in self._futures)
+
+    def question(self, index, timeout=0):
+        """
+        Get a question once it has been generated.
+
+        Args:
+            index (int): The question number, from 0
+            timeout (float): Maximum time to wait for it, in seconds; None to wait until it arrives
+
+        Returns:
+            dict: The question, or None if it has not arrived yet
+        """
+        future = self._futures[index]
+        if timeout == 0 and not future.done():
+            return None
+        try:
+            return json.loads(future.result(timeout=timeout))
+        except FutureTimeoutError:
+            return None
+        except Exception as e:
+            logger.error(f"Error generating exam question {index + 1}: {str(e)}")
+            return {"question": "Error generating question.", "options": ["Error"], "correct_answers": [0],
+                    "explanation": str(e), "difficulty": self.difficulty}
+
+    def answer(self, index, selected):
+        """
+        Record the answer to a question; it can be changed until the exam is scored.
+
+        Args:
+            index (int): The question number, from 0
+            selected (list): The indices of the selected options
+        """
+        self.answers[index] = sorted(set(selected))
+
+    def score(self):
+        """
+        Score the exam. Questions that failed to generate are left out.
+
+        Returns:
+            dict: The number of correct answers, answered and scored questions, and for each
+                question its number, whether it was answered and whether the answer was correct
+        """
+        results = []
+        for index in range(len(self)):
+            question = self.question(index, timeout=None)
+            if question["question"] == "Error generating question.":
+                continue
+            selected = self.answers.get(index)
+            results.append({
+                "index": index,
+                "answered": selected is not None,
+                "correct": selected == sorted(set(question["correct_answers"])),
+            })
+        return {
+            "correct": sum(result["correct"] for result in results),
+            "answered": sum(result["answered"] for result in results),
+            "total": len(results),
+            "results": results,
+        }
+
+    def cancel(self):
+        """
+        Stop generating the questions that have not started yet, e.g. when the exam is abandoned.
+        """
+        for future in self._futures:
+            future.cancel()
@@ -0,0 +1,102 @@
+"""
+Explanation cache module
+
+This module keeps the explanations of two-phase questions, which are
+generated in the background after the question itself. Each question gets at
+most one background generation: its future is cached, so the page showing the
+question and the generation that started it share the result. Failed
+generations are dropped, so the next request retries them.
+"""
+import logging
+import threading
+from collections import OrderedDict
+
+from src.utils.thread_manager import submit_task
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Number of explanations kept before the least recently used ones are evicted
+DEFAULT_MAX_ENTRIES = 512
+
+
+class ExplanationCache:
+    """
+    Thread-safe LRU cache of background explanation generations.
+    """
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES):
+        """
+        Initialize an empty cache.
+
+        Args:
+            max_entries (int): Number of explanations kept
+        """
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+    def get_or_submit(self, key, func, *args, **kwargs):
+        """
+        Get the generation of an explanation, starting it in the background if needed.
+
+        Args:
+            key (tuple): Identifies the question
+            func: The function generating the explanation
+            *args: Arguments to pass to the function
+            **kwargs: Keyword arguments to pass to the function
+
+        Returns:
+            Future: A future resolved with the explanation
+        """
+        with self._lock:
+            future = self._entries.get(key)
+            if future is not None and not (future.done() and future.exception() is not None):
+                self._entries.move_to_end(key)
+                self._stats["hits"] += 1
+                return future
+            self._stats["misses"] += 1
+            future = submit_task(func, *args, **kwargs)
+            self._entries[key] = future
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+            return future
+
+    def get(self, key):
+        """
+        Get the generation of an explanation if one was started.
+
+        Args:
+            key (tuple): Identifies the question
+
+        Returns:
+            Future: The cached future, or None
+        """
+        with self._lock:
+            return self._entries.get(key)
+
+    def clear(self):
+        """
+        Remove all entries and reset the counters.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+    def get_stats(self):
+        """
+        Get cache statistics.
+
+        Returns:
+            dict: Entries, explanations still being generated, hits, misses and evictions
+        """
+        with self._lock:
+            pending = sum(not future.done() for future in self._entries.values())
+            return dict(self._stats, entries=len(self._entries), pending=pending)
+
+
+# Shared cache of all two-phase questions
+explanation_cache = ExplanationCache()
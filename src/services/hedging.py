@@ -0,0 +1,260 @@
+"""
+Request hedging module
+
+This module cuts the tail latency of LLM calls with hedged requests. A call
+runs on a worker thread. If it is still running at an adaptive deadline
+(a percentile of the recent call latencies for the same key, e.g. the p90
+for MCQs), a second request is sent. The second request is either identical
+or uses a fallback model. The first valid result wins, and the other request
+is cancelled if it has not started yet; otherwise its result is discarded.
+
+Hedges are capped at a fraction of recent calls, so the extra spend is
+bounded. For every key, the hedger keeps the latency callers saw next to the
+latency the first request alone had, which shows the tail reduction achieved.
+"""
+import time
+import logging
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+import numpy as np
+
+from src.config.app_config import get_hedging_settings
+from src.utils.tracing import propagate
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Number of recent calls per key kept for deadlines, the hedge rate and latency stats
+HISTORY_SIZE = 500
+
+# Worker threads running hedged calls
+MAX_HEDGE_WORKERS = 8
+
+
+class _KeyStats:
+    """
+    Rolling latency and hedging history of one key.
+    """
+
+    def __init__(self, history_size):
+        # Latency of the first request, recorded when it finishes even if it lost
+        self.primary = deque(maxlen=history_size)
+        # Latency seen by the caller
+        self.effective = deque(maxlen=history_size)
+        # Whether each recent call was hedged
+        self.hedged = deque(maxlen=history_size)
+        self.calls = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.capped = 0
+
+
+class RequestHedger:
+    """
+    Runs calls with a hedged second request after an adaptive deadline.
+    """
+
+    def __init__(self, percentile=0.9, max_hedge_rate=0.15, min_samples=20, min_deadline=0.5,
+                 history_size=HISTORY_SIZE, max_workers=MAX_HEDGE_WORKERS):
+        """
+        Initialize the hedger.
+
+        Args:
+            percentile (float): Percentile (0-1) of recent latencies used as the hedging deadline
+            max_hedge_rate (float): Maximum share of recent calls that may be hedged
+            min_samples (int): Calls of a key observed before hedging it
+            min_deadline (float): Lower bound of the deadline in seconds
+            history_size (int): Number of recent calls kept per key
+            max_workers (int): Worker threads running the requests
+        """
+        self.percentile = percentile
+        self.max_hedge_rate = max_hedge_rate
+        self.min_samples = min_samples
+        self.min_deadline = min_deadline
+        self.history_size = history_size
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="hedge")
+        self._lock = threading.Lock()
+        self._keys = {}
+        # Requests submitted and not finished yet, cancelled on shutdown
+        self._futures = set()
+
+    def _submit(self, func):
+        """
+        Run a request on the workers, tracking it until it finishes.
+        """
+        future = self._executor.submit(propagate(func))
+        with self._lock:
+            self._futures.add(future)
+        future.add_done_callback(self._discard)
+        return future
+
+    def _discard(self, future):
+        """
+        Stop tracking a finished request.
+        """
+        with self._lock:
+            self._futures.discard(future)
+
+    def _key_stats(self, key):
+        """
+        Get the stats of a key, creating them on first use; the caller holds the lock.
+        """
+        stats = self._keys.get(key)
+        if stats is None:
+            stats = self._keys[key] = _KeyStats(self.history_size)
+        return stats
+
+    def deadline(self, key):
+        """
+        Get the time after which a call of a key is hedged.
+
+        Args:
+            key: The call key, e.g. the question type
+
+        Returns:
+            float: The deadline in seconds, or None until enough calls have been observed
+        """
+        with self._lock:
+            primary = list(self._key_stats(key).primary)
+        if len(primary) < self.min_samples:
+            return None
+        return max(self.min_deadline, float(np.quantile(primary, self.percentile)))
+
+    def _claim_hedge(self, stats):
+        """
+        Check the hedge rate cap and count a hedge if it allows one; the caller holds the lock.
+        """
+        if sum(stats.hedged) + 1 > self.max_hedge_rate * (len(stats.hedged) + 1):
+            stats.capped += 1
+            return False
+        stats.hedges += 1
+        return True
+
+    def _record_primary(self, key, start, future):
+        """
+        Record the latency of a first request once it finishes.
+        """
+        if future.cancelled():
+            return
+        with self._lock:
+            self._key_stats(key).primary.append(time.perf_counter() - start)
+
+    def call(self, key, func, hedge_func=None, is_valid=None):
+        """
+        Run func, sending a hedged request if it is slower than the deadline for key.
+
+        Args:
+            key: The call key; calls with the same key share a deadline and hedge budget
+            func (callable): The request, called without arguments
+            hedge_func (callable, optional): The hedged request (default: func again)
+            is_valid (callable, optional): Returns whether a result may win; invalid results
+                and exceptions only win when no other request is left
+
+        Returns:
+            The result of the winning request
+
+        Raises:
+            Exception: The exception of the last request, if every request raised
+        """
+        deadline = self.deadline(key)
+        start = time.perf_counter()
+        primary = self._submit(func)
+        primary.add_done_callback(lambda future: self._record_primary(key, start, future))
+
+        pending = {primary}
+        hedged = False
+        if deadline is not None:
+            done, _ = wait(pending, timeout=deadline)
+            if not done:
+                with self._lock:
+                    hedged = self._claim_hedge(self._key_stats(key))
+                if hedged:
+                    logger.info(f"Hedging {key} request still running after {deadline:.2f} s")
+                    pending.add(self._submit(hedge_func or func))
+
+        winner = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            winner = next(iter(done))
+            if winner.exception() is None and (is_valid is None or is_valid(winner.result())):
+                break
+        for future in pending:
+            future.cancel()
+
+        with self._lock:
+            stats = self._key_stats(key)
+            stats.calls += 1
+            stats.hedged.append(hedged)
+            stats.effective.append(time.perf_counter() - start)
+            stats.hedge_wins += hedged and winner is not primary
+        return winner.result()
+
+    def stats(self):
+        """
+        Get per-key hedging and latency stats.
+
+        Returns:
+            dict: For each key, call and hedge counts, the recent hedge rate, the current
+                deadline, and p50/p99 latencies of the first request alone and as seen by callers
+        """
+        with self._lock:
+            keys = {key: (stats.calls, stats.hedges, stats.hedge_wins, stats.capped, list(stats.hedged),
+                          list(stats.primary), list(stats.effective))
+                    for key, stats in self._keys.items()}
+        result = {}
+        for key, (calls, hedges, wins, capped, hedged, primary, effective) in keys.items():
+            row = {"calls": calls, "hedges": hedges, "hedge_wins": wins, "capped": capped,
+                   "hedge_rate": sum(hedged) / len(hedged) if hedged else 0.0, "deadline": self.deadline(key)}
+            for name, values in (("primary", primary), ("effective", effective)):
+                for q in (50, 99):
+                    row[f"{name}_p{q}"] = float(np.percentile(values, q)) if values else None
+            result[key] = row
+        return result
+
+    def shutdown(self):
+        """
+        Stop the worker threads after the running requests finish; queued requests are cancelled.
+        """
+        # ThreadPoolExecutor.shutdown only accepts cancel_futures from Python 3.9
+        with self._lock:
+            futures = list(self._futures)
+        for future in futures:
+            future.cancel()
+        self._executor.shutdown(wait=False)
+
+
+# Shared hedger, created on first use
+_hedger = None
+_hedger_lock = threading.Lock()
+
+
+def get_request_hedger():
+    """
+    Get the shared request hedger.
+
+    Returns:
+        RequestHedger: The shared hedger, or None if hedging is disabled
+    """
+    global _hedger
+    settings = get_hedging_settings()
+    if not settings["enabled"]:
+        return None
+    with _hedger_lock:
+        if _hedger is None:
+            _hedger = RequestHedger(percentile=settings["percentile"], max_hedge_rate=settings["max_rate"],
+                                    min_samples=settings["min_samples"], min_deadline=settings["min_deadline"])
+        return _hedger
+
+
+def set_request_hedger(hedger):
+    """
+    Replace the shared hedger, e.g. with one using a lower sample threshold in tests.
+
+    Args:
+        hedger (RequestHedger or None): The hedger to use, or None to re-read the configuration
+    """
+    global _hedger
+    with _hedger_lock:
+        _hedger = hedger
@@ -0,0 +1,425 @@
+"""
+LLM backend module
+
+This module defines the interface all text generation goes through, together
+with the OpenAI backend and a deterministic offline backend. The backend is
+selected by configuration (see get_llm_backend_name).
+"""
+import re
+import json
+import time
+import random
+import hashlib
+import logging
+import threading
+from typing import List, get_args, get_origin
+
+from openai import OpenAI, LengthFinishReasonError
+
+from src.config.app_config import get_openai_api_key, get_llm_backend_name, get_offline_latency_settings
+from src.models.question_models import MCQFormat, SubjectiveQuestionFormat, CodingQuestionFormat
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Model used when the caller does not ask for a specific one
+DEFAULT_MODEL = "gpt-4o-mini"
+
+# Characters per streamed chunk of the offline backend (about 4 tokens)
+OFFLINE_CHUNK_SIZE = 16
+
+
+class LLMResponse:
+    """
+    A completion returned by a backend.
+    """
+
+    def __init__(self, content, finish_reason="stop", completion_tokens=None, model=None):
+        """
+        Initialize the response.
+
+        Args:
+            content (str): The generated text, or None if it was cut off
+            finish_reason (str): Why generation stopped ("stop", "length", ...)
+            completion_tokens (int, optional): Number of completion tokens used
+            model (str, optional): The model that produced the completion
+        """
+        self.content = content
+        self.finish_reason = finish_reason
+        self.completion_tokens = completion_tokens
+        self.model = model
+
+
+class LLMBackend:
+    """
+    Interface for LLM backends.
+    """
+
+    name = "base"
+
+    def parse(self, messages, response_format, max_completion_tokens, model=DEFAULT_MODEL, temperature=0.7):
+        """
+        Generate a structured completion matching a Pydantic model.
+
+        Args:
+            messages (list): The chat messages to send
+            response_format: The Pydantic model describing the output
+            max_completion_tokens (int): Maximum number of completion tokens
+            model (str): The model to use
+            temperature (float): Sampling temperature
+
+        Returns:
+            LLMResponse: The completion, with the JSON payload as content
+        """
+        raise NotImplementedError
+
+    def stream_parse(self, messages, response_format, max_completion_tokens, on_delta, model=DEFAULT_MODEL,
+                     temperature=0.7):
+        """
+        Generate a structured completion, passing its text to on_delta as it is generated.
+
+        Backends that cannot stream pass the whole content in one delta.
+
+        Args:
+            messages (list): The chat messages to send
+            response_format: The Pydantic model describing the output
+            max_completion_tokens (int): Maximum number of completion tokens
+            on_delta (callable): Called with each new piece of the JSON payload
+            model (str): The model to use
+            temperature (float): Sampling temperature
+
+        Returns:
+            LLMResponse: The completion, with the whole JSON payload as content
+        """
+        response = self.parse(messages, response_format, max_completion_tokens, model=model,
+                              temperature=temperature)
+        if response.content:
+            on_delta(response.content)
+        return response
+
+    def complete(self, messages, max_tokens, model=DEFAULT_MODEL, temperature=0.7):
+        """
+        Generate a free-text completion.
+
+        Args:
+            messages (list): The chat messages to send
+            max_tokens (int): Maximum number of completion tokens
+            model (str): The model to use
+            temperature (float): Sampling temperature
+
+        Returns:
+            LLMResponse: The completion
+        """
+        raise NotImplementedError
+
+
+class OpenAIBackend(LLMBackend):
+    """
+    Backend calling the OpenAI API.
+    """
+
+    name = "openai"
+
+    def __init__(self):
+        """
+        Initialize the backend. The client is created on first use.
+        """
+        self._client = None
+        self._api_key = None
+        self._lock = threading.Lock()
+
+    def _get_client(self):
+        """
+        Get a client for the configured API key, reusing its connection pool.
+
+        Returns:
+            OpenAI: The OpenAI client
+        """
+        api_key = get_openai_api_key()
+        with self._lock:
+            if self._client is None or api_key != self._api_key:
+                self._client = OpenAI(api_key=api_key)
+                self._api_key = api_key
+            return self._client
+
+    def parse(self, messages, response_format, max_completion_tokens, model=DEFAULT_MODEL, temperature=0.7):
+        """
+        Run a structured completion with the OpenAI parse helper.
+        """
+        try:
+            response = self._get_client().beta.chat.completions.parse(
+                model=model,
+                messages=messages,
+                temperature=temperature,
+                response_format=response_format,
+                max_completion_tokens=max_completion_tokens
+            )
+        except LengthFinishReasonError:
+            return LLMResponse(None, finish_reason="length", model=model)
+        return self._to_response(response, model)
+
+    def stream_parse(self, messages, response_format, max_completion_tokens, on_delta, model=DEFAULT_MODEL,
+                     temperature=0.7):
+        """
+        Run a structured completion as an OpenAI stream, passing on each content delta.
+        """
+        try:
+            with self._get_client().beta.chat.completions.stream(
+                model=model,
+                messages=messages,
+                temperature=temperature,
+                response_format=response_format,
+                max_completion_tokens=max_completion_tokens,
+                stream_options={"include_usage": True}
+            ) as stream:
+                for event in stream:
+                    if event.type == "content.delta":
+                        on_delta(event.delta)
+                response = stream.get_final_completion()
+        except LengthFinishReasonError:
+            return LLMResponse(None, finish_reason="length", model=model)
+        return self._to_response(response, model)
+
+    def complete(self, messages, max_tokens, model=DEFAULT_MODEL, temperature=0.7):
+        """
+        Run a free-text chat completion.
+        """
+        response = self._get_client().chat.completions.create(
+            model=model,
+            messages=messages,
+            temperature=temperature,
+            max_tokens=max_tokens
+        )
+        return self._to_response(response, model)
+
+    @staticmethod
+    def _to_response(response, model):
+        """
+        Convert an OpenAI chat completion into an LLMResponse.
+        """
+        choice = response.choices[0]
+        tokens = getattr(response.usage, "completion_tokens", None)
+        return LLMResponse(
+            choice.message.content,
+            finish_reason=choice.finish_reason,
+            completion_tokens=tokens if isinstance(tokens, int) else None,
+            model=model
+        )
+
+
+class OfflineBackend(LLMBackend):
+    """
+    Deterministic backend that needs no network access.
+
+    It returns schema-valid payloads derived from a hash of the request, after a
+    configurable synthetic latency. This allows measuring the application's own
+    overhead separately from model latency.
+    """
+
+    name = "offline"
+
+    def __init__(self, latency_ms=0, jitter_ms=0):
+        """
+        Initialize the backend.
+
+        Args:
+            latency_ms (float): Fixed synthetic latency per call, in milliseconds
+            jitter_ms (float): Maximum extra latency per call, derived from the request hash
+        """
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+
+    def parse(self, messages, response_format, max_completion_tokens, model=DEFAULT_MODEL, temperature=0.7):
+        """
+        Return a deterministic schema-valid payload after the synthetic latency.
+        """
+        rng = self._rng(model, messages, response_format.__name__)
+        self._sleep(rng)
+        content = self._payload(messages, response_format, rng)
+        return LLMResponse(content, completion_tokens=_estimate_tokens(content), model=model)
+
+    def stream_parse(self, messages, response_format, max_completion_tokens, on_delta, model=DEFAULT_MODEL,
+                     temperature=0.7):
+        """
+        Return a deterministic payload in chunks of OFFLINE_CHUNK_SIZE characters.
+        """
+        rng = self._rng(model, messages, response_format.__name__)
+        delay = self._latency(rng)
+        content = self._payload(messages, response_format, rng)
+        # Spread the synthetic latency evenly over the chunks, like tokens arriving at a steady rate
+        chunks = [content[i:i + OFFLINE_CHUNK_SIZE] for i in range(0, len(content), OFFLINE_CHUNK_SIZE)]
+        for chunk in chunks:
+            if delay > 0:
+                time.sleep(delay / len(chunks))
+            on_delta(chunk)
+        return LLMResponse(content, completion_tokens=_estimate_tokens(content), model=model)
+
+    def complete(self, messages, max_tokens, model=DEFAULT_MODEL, temperature=0.7):
+        """
+        Return a deterministic placeholder answer after the synthetic latency.
+        """
+        rng = self._rng(model, messages, "text")
+        self._sleep(rng)
+        question = messages[-1]["content"]
+        content = (f"Offline answer #{rng.randint(1000, 9999)} to: {question.strip()[:200]}. "
+                   "This text is generated locally for testing and does not come from a model.")
+        return LLMResponse(content, completion_tokens=_estimate_tokens(content), model=model)
+
+    @staticmethod
+    def _rng(model, messages, kind):
+        """
+        Create a random generator seeded from the request.
+        """
+        digest = hashlib.sha256(json.dumps([model, messages, kind], sort_keys=True).encode("utf-8")).hexdigest()
+        return random.Random(int(digest[:16], 16))
+
+    @staticmethod
+    def _payload(messages, response_format, rng):
+        """
+        Build the JSON payload of a structured request.
+        """
+        prompt = messages[-1]["content"]
+        payload = response_format.model_validate(_build_offline_payload(response_format, prompt, rng))
+        return payload.model_dump_json()
+
+    def _latency(self, rng):
+        """
+        Draw the synthetic latency of a call, in seconds.
+        """
+        return (self.latency_ms + (rng.uniform(0, self.jitter_ms) if self.jitter_ms else 0)) / 1000.0
+
+    def _sleep(self, rng):
+        """
+        Wait for the configured synthetic latency.
+        """
+        delay = self._latency(rng)
+        if delay > 0:
+            time.sleep(delay)
+
+
+def _estimate_tokens(text):
+    """
+    Roughly estimate the number of tokens in a text (about 4 characters per token).
+    """
+    return max(1, len(text) // 4)
+
+
+def _extract_prompt_value(prompt, label, default):
+    """
+    Extract a "- **Label**: value" specification line from a generation prompt.
+    """
+    match = re.search(r"\*\*" + re.escape(label) + r"\*\*:\s*(.+)", prompt)
+    return match.group(1).strip() if match and match.group(1).strip() != "None" else default
+
+
+def _build_offline_payload(response_format, prompt, rng):
+    """
+    Build a deterministic payload for a response format.
+
+    Args:
+        response_format: The Pydantic model describing the output
+        prompt (str): The user prompt of the request
+        rng (random.Random): Random generator seeded from the request
+
+    Returns:
+        dict: Field values for the response format
+    """
+    # Models holding some fields of a question (see question_fields_model) get those fields of a whole question
+    for question_format in (MCQFormat, SubjectiveQuestionFormat, CodingQuestionFormat):
+        if response_format is not question_format and response_format.__name__.startswith(question_format.__name__):
+            payload = _build_offline_payload(question_format, prompt, rng)
+            return {name: payload[name] for name in response_format.model_fields}
+
+    difficulty = _extract_prompt_value(prompt, "Difficulty", "Medium")
+    topic = _extract_prompt_value(prompt, "Hierarchy of Topics & Sub-Topics", "general machine learning")
+    number = rng.randint(1, 10000)
+
+    if response_format is MCQFormat:
+        correct = rng.randrange(4)
+        return {
+            "question": f"Offline question #{number}: which statement about {topic} is correct?",
+            "options": [f"Statement {chr(65 + i)} about {topic}" for i in range(4)],
+            "correct_answers": [correct],
+            "explanation": f"Statement {chr(65 + correct)} is correct for this offline question. " * 4,
+            "difficulty": difficulty,
+        }
+    if response_format is SubjectiveQuestionFormat:
+        return {
+            "question": f"Offline question #{number}: explain the key trade-offs in {topic}.",
+            "explanation": f"A model answer discussing {topic} in depth. " * 8,
+            "difficulty": difficulty,
+        }
+    if response_format is CodingQuestionFormat:
+        offset = rng.randint(1, 9)
+        return {
+            "question": f"Offline problem #{number}: Offset Sum",
+            "description": f"Return the sum of the integers in `nums` plus {offset}.",
+            "examples": (f"Input: nums = [1, 2, 3]\nOutput: {6 + offset}\n\n"
+                         f"Input: nums = []\nOutput: {offset}"),
+            "solution": "Sum the list once and add the offset.",
+            "code_solution": f"def offset_sum(nums):\n    return sum(nums) + {offset}\n",
+            "starter_code": "def offset_sum(nums):\n    pass\n",
+            "language": "python",
+            "explanation": "The sum takes O(n) time and O(1) extra space.",
+            "difficulty": difficulty,
+        }
+
+    # Generic payload for any other model, built from its field annotations
+    return {name: _offline_value(field.annotation, name, number)
+            for name, field in response_format.model_fields.items()}
+
+
+def _offline_value(annotation, name, number):
+    """
+    Build a placeholder value for a field annotation.
+    """
+    origin = get_origin(annotation)
+    if origin in (list, List):
+        item_type = (get_args(annotation) or (str,))[0]
+        return [_offline_value(item_type, name, number + i) for i in range(4)]
+    if annotation is int:
+        return 0
+    if annotation is float:
+        return 0.0
+    if annotation is bool:
+        return False
+    return f"Offline {name} #{number}"
+
+
+# Shared backend instance, created on first use
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_llm_backend():
+    """
+    Get the configured LLM backend.
+
+    Returns:
+        LLMBackend: The shared backend instance
+    """
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            name = get_llm_backend_name()
+            if name == "offline":
+                latency_ms, jitter_ms = get_offline_latency_settings()
+                _backend = OfflineBackend(latency_ms=latency_ms, jitter_ms=jitter_ms)
+            else:
+                if name != "openai":
+                    logger.warning(f"Unknown LLM backend '{name}', using OpenAI")
+                _backend = OpenAIBackend()
+            logger.info(f"Using LLM backend: {_backend.name}")
+        return _backend
+
+
+def set_llm_backend(backend):
+    """
+    Replace the shared backend, e.g. with a stub in tests or load harnesses.
+
+    Args:
+        backend (LLMBackend or None): The backend to use, or None to re-read the configuration
+    """
+    global _backend
+    with _backend_lock:
+        _backend = backend
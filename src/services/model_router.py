@@ -0,0 +1,281 @@
+"""
+Model router module
+
+This module picks the model for each LLM request. A policy table maps a
+route, the task ("mcq", "subjective", "coding" or "answer") and difficulty,
+to the candidate models in order of preference. Routes are looked up as
+"task:difficulty", then "task:*", then "*".
+
+By default the first candidate of a route is used. With automatic selection
+enabled, the router measures the latency, validation failure rate and token
+cost of every candidate on every route, and picks the candidate with the
+lowest combined score. Candidates with too few samples, and a small share of
+random requests, are routed to keep the measurements current.
+
+Per-route statistics are available from ModelRouter.stats() for tuning the
+policy.
+"""
+import json
+import time
+import random
+import logging
+import threading
+
+from src.config.app_config import get_model_routing_settings
+from src.services.llm_backend import DEFAULT_MODEL
+from src.utils.error_handlers import CircuitOpenError
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Candidate models per route, in order of preference
+DEFAULT_ROUTING_POLICY = {
+    "mcq:Easy": ["gpt-4.1-nano", "gpt-4o-mini"],
+    "coding:Expert": ["gpt-4o", "gpt-4o-mini"],
+    "answer:*": ["gpt-4.1-nano", "gpt-4o-mini"],
+    "*": [DEFAULT_MODEL],
+}
+
+# Price of one million completion tokens in USD, used for the cost term of automatic selection
+MODEL_COSTS = {
+    "gpt-4.1-nano": 0.40,
+    "gpt-4o-mini": 0.60,
+    "gpt-4.1-mini": 1.60,
+    "gpt-4.1": 8.00,
+    "gpt-4o": 10.00,
+}
+
+# Weights of the score terms: seconds of latency, failure rate and cost in cents per request
+LATENCY_WEIGHT = 1.0
+FAILURE_WEIGHT = 10.0
+COST_WEIGHT = 1.0
+
+# Smoothing factor of the latency, failure and token moving averages
+EWMA_ALPHA = 0.1
+
+
+class _ModelStats:
+    """
+    Measurements of one model on one route.
+    """
+
+    def __init__(self):
+        self.calls = 0
+        self.failures = 0
+        self.latency = None
+        self.failure_rate = 0.0
+        self.tokens = None
+
+    def record(self, latency, completion_tokens, ok):
+        """
+        Add the outcome of a request to the counters and moving averages.
+        """
+        self.calls += 1
+        self.failures += not ok
+        first = self.calls == 1
+        self.latency = latency if first else (1 - EWMA_ALPHA) * self.latency + EWMA_ALPHA * latency
+        self.failure_rate = float(not ok) if first else (1 - EWMA_ALPHA) * self.failure_rate + EWMA_ALPHA * (not ok)
+        if isinstance(completion_tokens, int) and completion_tokens > 0:
+            self.tokens = completion_tokens if self.tokens is None else (
+                (1 - EWMA_ALPHA) * self.tokens + EWMA_ALPHA * completion_tokens)
+
+    def score(self, model):
+        """
+        Combine latency, failure rate and token cost into one number; lower is better.
+        """
+        cost_cents = (self.tokens or 0) * MODEL_COSTS.get(model, 0.0) / 1e4
+        return LATENCY_WEIGHT * self.latency + FAILURE_WEIGHT * self.failure_rate + COST_WEIGHT * cost_cents
+
+
+class ModelRouter:
+    """
+    Thread-safe policy-table router with optional measurement-driven selection.
+    """
+
+    def __init__(self, policy=None, auto=False, min_samples=10, explore_rate=0.05, seed=None):
+        """
+        Initialize the router.
+
+        Args:
+            policy (dict, optional): Candidate models per route (default: DEFAULT_ROUTING_POLICY)
+            auto (bool): Pick candidates by measured latency, failures and cost instead of policy order
+            min_samples (int): Requests measured per candidate before automatic selection trusts it
+            explore_rate (float): Share of requests routed to a random candidate in automatic mode
+            seed (int, optional): Seed of the exploration random generator
+        """
+        self.policy = {route: list(models) for route, models in (policy or DEFAULT_ROUTING_POLICY).items() if models}
+        self.policy.setdefault("*", [DEFAULT_MODEL])
+        self.auto = auto
+        self.min_samples = min_samples
+        self.explore_rate = explore_rate
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    def route(self, task, difficulty=None):
+        """
+        Get the policy route of a request.
+
+        Args:
+            task (str): "mcq", "subjective", "coding" or "answer"
+            difficulty (str, optional): The difficulty level
+
+        Returns:
+            str: The most specific route in the policy
+        """
+        for route in (f"{task}:{difficulty}", f"{task}:*"):
+            if route in self.policy:
+                return route
+        return "*"
+
+    def select(self, task, difficulty=None):
+        """
+        Pick the model for a request.
+
+        Args:
+            task (str): "mcq", "subjective", "coding" or "answer"
+            difficulty (str, optional): The difficulty level
+
+        Returns:
+            str: The model name
+        """
+        route = self.route(task, difficulty)
+        candidates = self.policy[route]
+        if not self.auto or len(candidates) == 1:
+            return candidates[0]
+        with self._lock:
+            stats = self._stats.get(route, {})
+            for model in candidates:
+                if model not in stats or stats[model].calls < self.min_samples:
+                    return model
+            if self._rng.random() < self.explore_rate:
+                return self._rng.choice(candidates)
+            return min(candidates, key=lambda model: stats[model].score(model))
+
+    def record(self, task, difficulty, model, latency, completion_tokens=None, ok=True):
+        """
+        Record the outcome of a request.
+
+        Args:
+            task (str): The task of the request
+            difficulty (str): The difficulty level of the request
+            model (str): The model that served it
+            latency (float): The request duration in seconds
+            completion_tokens (int, optional): Completion tokens used
+            ok (bool): False if the request failed or its output did not validate
+        """
+        route = self.route(task, difficulty)
+        with self._lock:
+            stats = self._stats.setdefault(route, {}).setdefault(model, _ModelStats())
+            stats.record(latency, completion_tokens, ok)
+
+    def call(self, task, difficulty, model, func, is_valid=None):
+        """
+        Call func with a model and record how the model did.
+
+        Calls rejected by the circuit breaker never reach the model and are not recorded.
+
+        Args:
+            task (str): The task of the request
+            difficulty (str): The difficulty level of the request
+            model (str): The model to use
+            func (callable): Sends the request, called with the model, returning an LLMResponse
+            is_valid (callable, optional): Returns whether a response counts as a success
+
+        Returns:
+            LLMResponse: The response of func
+        """
+        start = time.perf_counter()
+        try:
+            response = func(model)
+        except CircuitOpenError:
+            raise
+        except Exception:
+            self.record(task, difficulty, model, time.perf_counter() - start, ok=False)
+            raise
+        ok = is_valid is None or is_valid(response)
+        self.record(task, difficulty, model, time.perf_counter() - start, response.completion_tokens, ok)
+        return response
+
+    def stats(self):
+        """
+        Get the measurements of every model on every route.
+
+        Returns:
+            dict: For each route, the candidates, the currently selected model in automatic
+                mode, and per-model calls, failures, latency, failure rate, tokens, cost and score
+        """
+        result = {}
+        with self._lock:
+            for route, models in self._stats.items():
+                rows = {}
+                for model, stats in models.items():
+                    rows[model] = {
+                        "calls": stats.calls,
+                        "failures": stats.failures,
+                        "latency": stats.latency,
+                        "failure_rate": stats.failure_rate,
+                        "completion_tokens": stats.tokens,
+                        "cost_per_request": (stats.tokens or 0) * MODEL_COSTS.get(model, 0.0) / 1e6,
+                        "score": stats.score(model),
+                    }
+                result[route] = {"candidates": list(self.policy.get(route, [])), "models": rows}
+        return result
+
+
+def load_routing_policy(path):
+    """
+    Load a policy table from a JSON file mapping routes to lists of models.
+
+    Args:
+        path (str): The policy file
+
+    Returns:
+        dict: The policy, or None if the file is missing or malformed
+    """
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            policy = json.load(f)
+    except (OSError, ValueError) as e:
+        logger.error(f"Error loading model routing policy {path}: {str(e)}")
+        return None
+    if not isinstance(policy, dict) or not all(
+            isinstance(models, list) and all(isinstance(m, str) for m in models) for models in policy.values()):
+        logger.error(f"Model routing policy {path} must map routes to lists of model names")
+        return None
+    return policy
+
+
+# Shared router, created on first use
+_model_router = None
+_model_router_lock = threading.Lock()
+
+
+def get_model_router():
+    """
+    Get the shared model router, configured from the environment on first use.
+
+    Returns:
+        ModelRouter: The shared router
+    """
+    global _model_router
+    with _model_router_lock:
+        if _model_router is None:
+            settings = get_model_routing_settings()
+            policy = load_routing_policy(settings["policy_path"]) if settings["policy_path"] else None
+            _model_router = ModelRouter(policy, auto=settings["auto"], min_samples=settings["min_samples"],
+                                        explore_rate=settings["explore_rate"])
+            logger.info(f"Model routing policy: {_model_router.policy} (automatic selection: {settings['auto']})")
+        return _model_router
+
+
+def set_model_router(router):
+    """
+    Replace the shared router, e.g. with a fixed policy in tests.
+
+    Args:
+        router (ModelRouter or None): The router to use, or None to re-read the configuration
+    """
+    global _model_router
+    with _model_router_lock:
+        _model_router = router
@@ -0,0 +1,92 @@
+"""
+Prefetch service module
+
+This module provides speculative generation of a session's next question
+while the user is still working on the current one.
+"""
+import logging
+
+from src.utils.thread_manager import submit_task
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Maximum time to wait for an in-flight speculative generation, in seconds
+PREFETCH_WAIT_TIMEOUT = 60
+
+
+class SpeculativePrefetch:
+    """
+    Holds at most one speculatively generated result for a session.
+    
+    A prefetch is identified by a key describing the settings it was generated
+    with. It is only handed out for a matching key and is discarded otherwise.
+    """
+
+    def __init__(self):
+        """
+        Initialize an empty prefetch slot.
+        """
+        self.key = None
+        self.future = None
+
+    def schedule(self, key, func, *args, **kwargs):
+        """
+        Start generating in the background unless a prefetch for the key already exists.
+        
+        A pending prefetch for a different key is discarded first.
+        
+        Args:
+            key (tuple): The settings the result is generated for
+            func: The function producing the result
+            *args: Arguments to pass to the function
+            **kwargs: Keyword arguments to pass to the function
+        """
+        if self.future is not None and self.key == key:
+            return
+
+        self.discard()
+        logger.info(f"Scheduling speculative {func.__name__} for {key}")
+        self.key = key
+        self.future = submit_task(func, *args, **kwargs)
+
+    def take(self, key, timeout=PREFETCH_WAIT_TIMEOUT):
+        """
+        Consume the prefetched result if it was generated for the given key.
+        
+        A prefetch that is still queued is cancelled, since generating inline is
+        no slower. One that is already running is waited for.
+        
+        Args:
+            key (tuple): The current settings
+            timeout (float): Maximum time to wait for a running prefetch, in seconds
+            
+        Returns:
+            The prefetched result, or None if there is no usable prefetch
+        """
+        future, prefetch_key = self.future, self.key
+        self.future = None
+        self.key = None
+
+        if future is None:
+            return None
+        if prefetch_key != key:
+            future.cancel()
+            return None
+        if future.cancel():
+            return None
+
+        try:
+            return future.result(timeout=timeout)
+        except Exception as e:
+            logger.warning(f"Discarding failed speculative result: {str(e)}")
+            return None
+
+    def discard(self):
+        """
+        Drop the current prefetch, cancelling it if it has not started yet.
+        """
+        if self.future is not None:
+            self.future.cancel()
+        self.future = None
+        self.key = None
@@ -3,6 +3,7 @@ Prompt service module
 
 This module provides prompt templates for GPT models to generate questions.
 """
+import json
 import logging
 
 # Set up logging
@@ -177,4 +178,76 @@ Now, generate a coding interview question based on the following difficulty leve
 - **Difficulty**: {difficulty}
 
 The question should test practical coding skills at the appropriate level of complexity.
-""" 
\ No newline at end of file
+""" 
+
+def build_answer_context_prompt(snippets):
+    """
+    Builds the system message giving Quick Search answers retrieved context.
+    
+    Args:
+        snippets (list): Context snippets, most relevant first
+        
+    Returns:
+        str: The context message
+    """
+    notes = "\n".join(f"- {snippet}" for snippet in snippets)
+    return (
+        "The following notes come from the learner's study material and past questions. "
+        "Use them if they are relevant to the question, and ignore them otherwise.\n"
+        f"{notes}"
+    )
+
+
+def build_field_repair_prompt(question_type, question, fields, problems):
+    """
+    Builds a prompt asking GPT to regenerate only the faulty fields of a question.
+    
+    Args:
+        question_type (str): The question type ("mcq", "subjective", "coding")
+        question (dict): The current question fields
+        fields (list): The fields to regenerate
+        problems (list): Descriptions of what is wrong with them
+        
+    Returns:
+        str: The formatted prompt
+    """
+    field_list = ", ".join(f'"{field}"' for field in fields)
+    problem_list = "\n".join(f"- {problem}" for problem in problems)
+    return f"""
+The following {question_type} question was generated with mistakes:
+
+{json.dumps(question, indent=2, ensure_ascii=False)}
+
+Problems:
+{problem_list}
+
+Return only the fields {field_list} with corrected values, consistent with the rest of the question.
+Keep the same difficulty level and topic. Multiple-choice questions need at least 4 distinct options, and
+"correct_answers" holds 0-based indices into "options".
+"""
+
+
+def build_explanation_prompt(question_type, question):
+    """
+    Builds a prompt asking GPT to explain a question generated without its explanation.
+    
+    Args:
+        question_type (str): The question type ("mcq" or "subjective")
+        question (dict): The question fields
+        
+    Returns:
+        str: The formatted prompt
+    """
+    if question_type == "mcq":
+        task = ("Explain why the options at the 0-based indices in \"correct_answers\" are correct and why each "
+                "other option is wrong.")
+    else:
+        task = "Write a model answer to the question, covering the key points a strong answer would make."
+    return f"""
+The following {question_type} question is shown to a learner:
+
+{json.dumps(question, indent=2, ensure_ascii=False)}
+
+{task}
+Match the difficulty level of the question. Return only the field "explanation".
+"""
@@ -0,0 +1,374 @@
+"""
+Question bank module
+
+This module keeps every successfully generated question so it can be served
+again: by the adaptive selection engine, and later by other features that
+need questions without waiting for the LLM. Questions are appended to a JSON
+Lines file and loaded back at startup. In memory, the bank keeps the question
+payloads in a list and their type, topic and difficulty level in NumPy
+arrays, so selection code can filter the whole bank with vectorized
+operations.
+
+A bank can also start from a memory-mapped snapshot (see bank_snapshot):
+the snapshot's rows come first and questions generated afterwards are
+appended to the JSON Lines file as usual. Only the part of the file written
+after the snapshot was exported is parsed at startup.
+"""
+import os
+import json
+import hashlib
+import logging
+import threading
+
+import numpy as np
+
+from src.config.app_config import get_question_bank_path
+from src.models.question_models import QUESTION_TYPES, DIFFICULTY_LEVELS
+from src.services.bank_snapshot import open_snapshot
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Initial capacity of the column arrays; they double when full
+INITIAL_CAPACITY = 1024
+
+# Question text of the placeholder returned when generation fails
+ERROR_QUESTION = "Error generating question."
+
+
+def make_item_id(question_type, question_text):
+    """
+    Build the stable id of a question from its type and text.
+
+    Args:
+        question_type (str): The question type ("mcq", "subjective", "coding")
+        question_text (str): The question text
+
+    Returns:
+        str: A 16-character hex id
+    """
+    return hashlib.sha1(f"{question_type}\n{question_text}".encode("utf-8")).hexdigest()[:16]
+
+
+def difficulty_level(difficulty):
+    """
+    Map a difficulty label to its index in DIFFICULTY_LEVELS.
+
+    Args:
+        difficulty (str): The difficulty label
+
+    Returns:
+        int: The level index, or -1 for an unknown label
+    """
+    normalized = (difficulty or "").strip().capitalize()
+    return DIFFICULTY_LEVELS.index(normalized) if normalized in DIFFICULTY_LEVELS else -1
+
+
+def topic_similarity(topic, other):
+    """
+    Score how close two comma-separated topic paths are.
+
+    Args:
+        topic (str): A topic path, e.g. "Machine Learning, Regularization, Dropout"
+        other (str): Another topic path
+
+    Returns:
+        int: The number of leading path components they share, plus one if the paths are equal
+    """
+    parts = [part.strip().casefold() for part in (topic or "").split(",")]
+    other_parts = [part.strip().casefold() for part in (other or "").split(",")]
+    shared = 0
+    for part, other_part in zip(parts, other_parts):
+        if part != other_part:
+            break
+        shared += 1
+    return shared + 1 if shared == len(parts) == len(other_parts) else shared
+
+
+class QuestionBank:
+    """
+    Append-only store of generated questions with columnar metadata.
+    """
+
+    def __init__(self, path=None, snapshot=None):
+        """
+        Initialize the bank, loading the questions stored at path.
+
+        Args:
+            path (str, optional): The JSON Lines file; None keeps the bank in memory only
+            snapshot (BankSnapshot, optional): A snapshot providing the first rows of the bank
+        """
+        self.path = path
+        self._snapshot = snapshot
+        self._base = len(snapshot) if snapshot is not None else 0
+        self._lock = threading.Lock()
+        # Ids and payloads of the rows after the snapshot
+        self._ids = []
+        self._payloads = []
+        self._index = {}
+        self._topics = list(snapshot.topic_names) if snapshot is not None else []
+        self._topic_codes = {topic: code for code, topic in enumerate(self._topics)}
+        self._size = self._base
+        # Only the small metadata columns of a snapshot are copied into memory
+        capacity = self._base + INITIAL_CAPACITY
+        self._type_codes = np.empty(capacity, dtype=np.int8)
+        self._topic_column = np.empty(capacity, dtype=np.int32)
+        self._level_column = np.empty(capacity, dtype=np.int8)
+        if snapshot is not None:
+            self._type_codes[:self._base] = snapshot.types
+            self._topic_column[:self._base] = snapshot.topics
+            self._level_column[:self._base] = snapshot.levels
+        if path and os.path.exists(path):
+            self._load()
+
+    def _load(self):
+        """
+        Load the stored questions, skipping malformed lines such as a truncated last write.
+        """
+        skipped = 0
+        # The part of the file exported to the snapshot is not parsed again
+        start = self._snapshot.covered_offset(self.path) if self._snapshot is not None else 0
+        with open(self.path, "rb") as f:
+            f.seek(start)
+            for line in f:
+                try:
+                    record = json.loads(line)
+                    self._append(record["id"], record["type"], record["topic"], record["difficulty"],
+                                 record["payload"])
+                except (ValueError, KeyError, TypeError):
+                    skipped += 1
+        if skipped:
+            logger.warning(f"Skipped {skipped} malformed question bank records in {self.path}")
+        logger.info(f"Loaded {self._size} questions from {self.path}"
+                    + (f" ({self._base} from the snapshot, skipped {start} bytes)" if start else ""))
+
+    def _append(self, item_id, question_type, topic, difficulty, payload):
+        """
+        Add a question to the in-memory columns; the caller holds the lock or owns the bank.
+
+        Returns:
+            bool: False if the question was already in the bank
+        """
+        if self.index_of(item_id) is not None:
+            return False
+        if self._size == len(self._type_codes):
+            capacity = 2 * len(self._type_codes)
+            self._type_codes = np.resize(self._type_codes, capacity)
+            self._topic_column = np.resize(self._topic_column, capacity)
+            self._level_column = np.resize(self._level_column, capacity)
+        topic_code = self._topic_codes.get(topic)
+        if topic_code is None:
+            topic_code = self._topic_codes[topic] = len(self._topics)
+            self._topics.append(topic)
+
+        self._type_codes[self._size] = QUESTION_TYPES.index(question_type)
+        self._topic_column[self._size] = topic_code
+        self._level_column[self._size] = difficulty_level(difficulty)
+        self._index[item_id] = self._size
+        self._ids.append(item_id)
+        self._payloads.append(payload)
+        self._size += 1
+        return True
+
+    def add(self, question_type, topic, difficulty, payload):
+        """
+        Store a generated question. Error placeholders and duplicates are ignored.
+
+        Failures are logged rather than raised, so storing a question never
+        breaks the request that generated it.
+
+        Args:
+            question_type (str): The question type ("mcq", "subjective", "coding")
+            topic (str or None): The topic path the question was generated for
+            difficulty (str): The requested difficulty level
+            payload (str): The question JSON string
+
+        Returns:
+            str: The item id, or None if the question was not stored
+        """
+        try:
+            question_text = json.loads(payload)["question"]
+        except (ValueError, KeyError, TypeError):
+            logger.warning(f"Not storing malformed {question_type} question in the bank")
+            return None
+        if question_text == ERROR_QUESTION:
+            return None
+
+        item_id = make_item_id(question_type, question_text)
+        topic = topic or ""
+        with self._lock:
+            if not self._append(item_id, question_type, topic, difficulty, payload):
+                return item_id
+            if self.path:
+                record = {"id": item_id, "type": question_type, "topic": topic,
+                          "difficulty": difficulty, "payload": payload}
+                try:
+                    directory = os.path.dirname(self.path)
+                    if directory:
+                        os.makedirs(directory, exist_ok=True)
+                    with open(self.path, "a", encoding="utf-8") as f:
+                        f.write(json.dumps(record) + "\n")
+                except OSError as e:
+                    logger.error(f"Error writing question bank {self.path}: {str(e)}")
+        return item_id
+
+    def __len__(self):
+        return self._size
+
+    def __contains__(self, item_id):
+        return self.index_of(item_id) is not None
+
+    def index_of(self, item_id):
+        """
+        Get the row of a question.
+
+        Args:
+            item_id (str): The item id
+
+        Returns:
+            int: The row, or None if the question is not in the bank, also for ids that are not strings
+        """
+        if not isinstance(item_id, str):
+            return None
+        row = self._index.get(item_id)
+        if row is None and self._snapshot is not None:
+            row = self._snapshot.find(item_id)
+        return row
+
+    def item_id(self, row):
+        """
+        Get the id of the question at a row.
+        """
+        if row < self._base:
+            return self._snapshot.item_id(row)
+        return self._ids[row - self._base]
+
+    def payload(self, row):
+        """
+        Get the question JSON string at a row.
+        """
+        if row < self._base:
+            return self._snapshot.payload(row)
+        return self._payloads[row - self._base]
+
+    def topic(self, row):
+        """
+        Get the topic path of the question at a row.
+        """
+        return self._topics[self._topic_column[row]]
+
+    def topic_code(self, topic):
+        """
+        Get the code of a topic path.
+
+        Args:
+            topic (str): The topic path
+
+        Returns:
+            int: The code, or None if no stored question has this topic
+        """
+        return self._topic_codes.get(topic or "")
+
+    def topic_names(self):
+        """
+        Get the topic paths in code order.
+
+        Returns:
+            list: The topic path of each code
+        """
+        with self._lock:
+            return list(self._topics)
+
+    @property
+    def topic_count(self):
+        """
+        Number of distinct topic paths in the bank.
+        """
+        return len(self._topics)
+
+    def columns(self):
+        """
+        Get read-only views of the metadata columns.
+
+        Rows added later are not included, so callers can use the views without holding a lock.
+
+        Returns:
+            tuple: (type codes int8, topic codes int32, difficulty levels int8), one entry per question
+        """
+        with self._lock:
+            size = self._size
+            columns = (self._type_codes[:size], self._topic_column[:size], self._level_column[:size])
+        for column in columns:
+            column.flags.writeable = False
+        return columns
+
+    def find_similar(self, question_type, topic, difficulty, rng=None):
+        """
+        Pick a stored question to serve in place of a newly generated one.
+
+        Questions of the requested type are ranked by how close their topic path
+        is (see topic_similarity), then by how close their difficulty level is.
+        A question is picked at random among the best ranked ones. Questions
+        from unrelated topics are never picked, unless no topic is requested.
+
+        Args:
+            question_type (str): The question type ("mcq", "subjective", "coding")
+            topic (str or None): The requested topic path
+            difficulty (str): The requested difficulty level
+            rng (numpy.random.Generator, optional): Random generator for the pick
+
+        Returns:
+            int: The row of the question, or None if there is no suitable question
+        """
+        types, topic_codes, levels = self.columns()
+        rows = np.flatnonzero(types == QUESTION_TYPES.index(question_type))
+        if not len(rows):
+            return None
+        if topic:
+            similarity = np.array([topic_similarity(topic, name) for name in self.topic_names()], dtype=np.int64)
+            topic_scores = similarity[topic_codes[rows]]
+            rows, topic_scores = rows[topic_scores > 0], topic_scores[topic_scores > 0]
+            if not len(rows):
+                return None
+        else:
+            topic_scores = np.zeros(len(rows), dtype=np.int64)
+
+        # Unknown levels rank after every known level
+        level = difficulty_level(difficulty)
+        row_levels = levels[rows].astype(np.int64)
+        distance = np.where((row_levels < 0) | (level < 0), len(DIFFICULTY_LEVELS), np.abs(row_levels - level))
+        rank = topic_scores * (len(DIFFICULTY_LEVELS) + 1) - distance
+        best = rows[rank == rank.max()]
+        rng = rng if rng is not None else np.random.default_rng()
+        return int(best[rng.integers(len(best))])
+
+
+# Shared bank, created on first use
+_question_bank = None
+_question_bank_lock = threading.Lock()
+
+
+def get_question_bank():
+    """
+    Get the shared question bank, loading it on first use.
+
+    Returns:
+        QuestionBank: The shared bank
+    """
+    global _question_bank
+    with _question_bank_lock:
+        if _question_bank is None:
+            _question_bank = QuestionBank(get_question_bank_path(), snapshot=open_snapshot())
+        return _question_bank
+
+
+def set_question_bank(bank):
+    """
+    Replace the shared bank, e.g. with an in-memory bank in tests.
+
+    Args:
+        bank (QuestionBank or None): The bank to use, or None to reload the configured one
+    """
+    global _question_bank
+    with _question_bank_lock:
+        _question_bank = bank
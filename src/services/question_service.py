@@ -1,33 +1,247 @@
 """
 Question service module
 
-This module provides functionality for generating quiz questions using OpenAI API.
+This module provides functionality for generating quiz questions through the configured LLM backend.
+When the backend fails or is slow, similar questions from the question bank are served instead.
 """
 import json
+import time
 import logging
-from openai import OpenAI
+import functools
 
-from src.config.app_config import get_openai_api_key
+from src.services.llm_backend import get_llm_backend
 from src.services.prompt_service import (
     build_mcq_question_generation_prompt,
     build_subjective_question_generation_prompt,
-    build_coding_question_generation_prompt
+    build_coding_question_generation_prompt,
+    build_field_repair_prompt,
+    build_explanation_prompt
 )
-from src.models.question_models import MCQFormat, SubjectiveQuestionFormat, CodingQuestionFormat
+from src.models.question_models import CodingQuestionFormat, QUESTION_MODELS, question_fields_model
+from src.services.explanation_cache import explanation_cache
+from src.services.question_validation import validate_question
+from src.services.token_budget import token_budget
+from src.services.question_bank import get_question_bank
+from src.services.hedging import get_request_hedger
+from src.services.model_router import get_model_router
+from src.config.app_config import get_hedging_settings, is_two_phase_generation_enabled
+from src.utils.circuit_breaker import get_circuit_breaker
+from src.utils.rate_limiter import get_rate_limiter
 from src.utils.error_handlers import handle_exceptions, QuestionGenerationError
+from src.utils.json_stream import IncrementalJSONParser
+from src.utils.tracing import start_span, traced
+from src.utils.profiling import profile_service_call
 
 # Set up logging
 logger = logging.getLogger(__name__)
 
+# Number of times a truncated completion is retried with a larger limit
+MAX_LENGTH_RETRIES = 2
 
+# Fields generated by the first phase of two-phase generation: what is needed to show and grade a question
+STEM_FIELDS = {
+    "mcq": ("question", "options", "correct_answers", "difficulty"),
+    "subjective": ("question", "difficulty"),
+}
+
+
+def _parse_with_adaptive_limit(question_type, difficulty, messages, response_format, phase=None,
+                               on_field=None):
+    """
+    Request a structured completion using an adaptive max_completion_tokens limit.
+    
+    The limit comes from the observed completion lengths for the question type and
+    difficulty. Only completions that stop with a "length" finish reason are retried,
+    each time with a larger limit. The model router picks the model, calls go
+    through the shared rate limit and the LLM circuit breaker and, when hedging is
+    enabled, are hedged after the adaptive deadline of the type.
+    
+    With on_field, the completion is streamed and each top-level field is passed
+    on as soon as it is complete. Streamed calls are not hedged, since a second
+    stream would interleave with the first.
+    
+    Args:
+        question_type (str): The question type ("mcq", "subjective", "coding")
+        difficulty (str): The difficulty level for the question
+        messages (list): The chat messages to send
+        response_format: The Pydantic model describing the structured output
+        phase (str, optional): "stem" or "explanation" for the phases of two-phase generation,
+            which have their own token budget and hedging deadline, or "repair" for a field
+            repair; repairs vary in length, so they are kept out of the token budget
+        on_field (callable, optional): Called with (name, value) for each completed field;
+            a retried completion starts over from its first field
+        
+    Returns:
+        str: The raw JSON content of the completion
+        
+    Raises:
+        QuestionGenerationError: If the completion is still truncated at the maximum limit
+        CircuitOpenError: If the circuit breaker rejects the call
+    """
+    backend = get_llm_backend()
+    breaker = get_circuit_breaker()
+    router = get_model_router()
+    hedger = get_request_hedger()
+    limiter = get_rate_limiter()
+    model = router.select(question_type, difficulty)
+    hedge_model = (get_hedging_settings()["model"] or model) if hedger is not None else None
+    key = f"{question_type}:{phase}" if phase else question_type
+    budget_key = question_type if phase == "repair" else key
+    max_tokens = token_budget.get_limit(budget_key, difficulty)
+    
+    def is_complete(response):
+        return response.finish_reason != "length"
+    
+    def send(request_model, limit):
+        with limiter.slot():
+            return router.call(
+                question_type, difficulty, request_model,
+                lambda m: breaker.call(backend.parse, messages, response_format, limit, model=m),
+                is_valid=is_complete
+            )
+    
+    def send_streamed(request_model, limit, span):
+        parser = IncrementalJSONParser()
+        start = time.perf_counter()
+        
+        def on_delta(delta):
+            completed = parser.feed(delta)
+            if completed and len(parser.fields) == len(completed):
+                span.set_attribute("first_field_seconds", time.perf_counter() - start)
+            for name, value in completed:
+                on_field(name, value)
+        
+        with limiter.slot():
+            return router.call(
+                question_type, difficulty, request_model,
+                lambda m: breaker.call(backend.stream_parse, messages, response_format, limit, on_delta, model=m),
+                is_valid=is_complete
+            )
+    
+    for attempt in range(MAX_LENGTH_RETRIES + 1):
+        with start_span("llm.call", backend=backend.name, model=model, max_tokens=max_tokens,
+                        attempt=attempt, streamed=on_field is not None) as span:
+            if on_field is not None:
+                response = send_streamed(model, max_tokens, span)
+            elif hedger is None:
+                response = send(model, max_tokens)
+            else:
+                response = hedger.call(
+                    key,
+                    functools.partial(send, model, max_tokens),
+                    hedge_func=functools.partial(send, hedge_model, max_tokens),
+                    is_valid=is_complete
+                )
+            span.set_attribute("finish_reason", response.finish_reason)
+            span.set_attribute("completion_tokens", response.completion_tokens)
+        
+        if response.finish_reason != "length":
+            if phase != "repair":
+                token_budget.record(budget_key, difficulty, response.completion_tokens)
+            return response.content.strip()
+        
+        if phase != "repair":
+            token_budget.record_truncation(budget_key, difficulty)
+        retry_limit = token_budget.get_retry_limit(max_tokens)
+        if retry_limit is None or attempt == MAX_LENGTH_RETRIES:
+            break
+        logger.warning(f"{question_type} completion truncated at {max_tokens} tokens, retrying with {retry_limit}")
+        max_tokens = retry_limit
+    
+    raise QuestionGenerationError(f"Completion truncated at {max_tokens} tokens")
+
+
+def _repair_fields(question_type, difficulty, question, fields, issues):
+    """
+    Ask the model to regenerate only the faulty fields of a question.
+    
+    Args:
+        question_type (str): The question type ("mcq", "subjective", "coding")
+        difficulty (str): The difficulty level for the question
+        question (dict): The question fields after local repairs
+        fields (list): The fields to regenerate
+        issues (list): The ValidationIssues found in them
+        
+    Returns:
+        dict: The regenerated field values
+    """
+    with start_span("question.repair", question_type=question_type, fields=",".join(fields)):
+        prompt = build_field_repair_prompt(question_type, question, fields, [issue.message for issue in issues])
+        raw_output = _parse_with_adaptive_limit(
+            question_type,
+            difficulty,
+            [
+                {"role": "system", "content": "You are an expert educator correcting quiz questions."},
+                {"role": "user", "content": prompt}
+            ],
+            question_fields_model(question_type, tuple(fields)),
+            phase="repair"
+        )
+    return json.loads(raw_output)
+
+
+def _validate(question_type, raw_output, difficulty, fields=None):
+    """
+    Run the semantic validation of a generated question, regenerating faulty fields.
+    
+    Raises:
+        QuestionGenerationError: If the question cannot be repaired
+    """
+    with start_span("question.validate", question_type=question_type):
+        return validate_question(question_type, raw_output, difficulty,
+                                 functools.partial(_repair_fields, question_type, difficulty), fields)
+
+
+def _get_stem_fields(question_type):
+    """
+    Get the fields the first request generates for a question type.
+    
+    Returns:
+        tuple: The stem fields with two-phase generation enabled, or None to generate whole questions
+    """
+    return STEM_FIELDS.get(question_type) if is_two_phase_generation_enabled() else None
+
+
+def _serve_stored_question(question_type, topic, difficulty):
+    """
+    Pick a previously generated question to serve when generation fails.
+    
+    Args:
+        question_type (str): The question type ("mcq", "subjective", "coding")
+        topic (str or None): The requested topic path
+        difficulty (str): The requested difficulty level
+        
+    Returns:
+        str: The stored question JSON string, or None if the bank has no similar question
+    """
+    with start_span("question.fallback", question_type=question_type) as span:
+        bank = get_question_bank()
+        row = bank.find_similar(question_type, topic, difficulty)
+        span.set_attribute("served", row is not None)
+    if row is None:
+        return None
+    logger.warning(f"Serving stored {question_type} question on topic '{bank.topic(row)}' instead")
+    return bank.payload(row)
+
+
+@traced("question.generate")
+@profile_service_call
 @handle_exceptions
-def generate_mcq_question(topic, difficulty):
+def generate_mcq_question(topic, difficulty, on_field=None):
     """
     Generate a multiple-choice question for the given topic and difficulty.
     
+    With two-phase generation, the question has no explanation yet; it is
+    generated in the background (see request_explanation).
+    
+    If generation fails or the LLM circuit breaker is open, a similar stored
+    question is served instead.
+    
     Args:
         topic (str): The topic or topic path for the question
         difficulty (str): The difficulty level for the question
+        on_field (callable, optional): Called with (name, value) for each field of the
+            question as soon as it has been streamed, before validation
         
     Returns:
         str: JSON string representing the generated question
@@ -38,32 +252,40 @@ def generate_mcq_question(topic, difficulty):
     logger.info(f"Generating MCQ for topic: {topic}, difficulty: {difficulty}")
     
     # Build the prompt for GPT
-    prompt = build_mcq_question_generation_prompt(difficulty, topic)
+    with start_span("prompt.build", question_type="mcq"):
+        prompt = build_mcq_question_generation_prompt(difficulty, topic)
     
     try:
-        # Initialize OpenAI client
-        client = OpenAI(api_key=get_openai_api_key())
-        
-        # Call the OpenAI API
-        response = client.beta.chat.completions.parse(
-            model="gpt-4o-mini",
-            messages=[
+        # Call the LLM backend with an adaptive token limit
+        stem_fields = _get_stem_fields("mcq")
+        raw_output = _parse_with_adaptive_limit(
+            "mcq",
+            difficulty,
+            [
                 {"role": "system", "content": "You are an expert educator and question generator."},
                 {"role": "user", "content": prompt}
             ],
-            temperature=0.7,
-            response_format=MCQFormat,
-            max_completion_tokens=800
+            question_fields_model("mcq", stem_fields),
+            phase="stem" if stem_fields else None,
+            on_field=on_field
         )
-        
-        # Extract and return the response content
-        raw_output = response.choices[0].message.content.strip()
+        raw_output = _validate("mcq", raw_output, difficulty, stem_fields)
         logger.debug(f"Generated MCQ: {raw_output[:100]}...")  # Log first 100 chars of response
         
+        if stem_fields:
+            # Explain the question while the user answers it; it is stored once explained
+            request_explanation("mcq", topic, json.loads(raw_output))
+        else:
+            # Keep the question so it can be served again without a model call
+            get_question_bank().add("mcq", topic, difficulty, raw_output)
+        
         return raw_output
     
     except Exception as e:
         logger.error(f"Error generating MCQ: {str(e)}")
+        stored = _serve_stored_question("mcq", topic, difficulty)
+        if stored is not None:
+            return stored
         # Return a formatted error message as JSON
         error_response = {
             "question": "Error generating question.",
@@ -75,14 +297,24 @@ def generate_mcq_question(topic, difficulty):
         return json.dumps(error_response)
 
 
+@traced("question.generate")
+@profile_service_call
 @handle_exceptions
-def generate_subjective_question(topic, difficulty):
+def generate_subjective_question(topic, difficulty, on_field=None):
     """
     Generate a subjective question for the given topic and difficulty.
     
+    With two-phase generation, the question has no explanation yet; it is
+    generated in the background (see request_explanation).
+    
+    If generation fails or the LLM circuit breaker is open, a similar stored
+    question is served instead.
+    
     Args:
         topic (str): The topic or topic path for the question
         difficulty (str): The difficulty level for the question
+        on_field (callable, optional): Called with (name, value) for each field of the
+            question as soon as it has been streamed, before validation
         
     Returns:
         str: JSON string representing the generated question
@@ -93,32 +325,40 @@ def generate_subjective_question(topic, difficulty):
     logger.info(f"Generating subjective question for topic: {topic}, difficulty: {difficulty}")
     
     # Build the prompt for GPT
-    prompt = build_subjective_question_generation_prompt(difficulty, topic)
+    with start_span("prompt.build", question_type="subjective"):
+        prompt = build_subjective_question_generation_prompt(difficulty, topic)
     
     try:
-        # Initialize OpenAI client
-        client = OpenAI(api_key=get_openai_api_key())
-        
-        # Call the OpenAI API
-        response = client.beta.chat.completions.parse(
-            model="gpt-4o-mini",
-            messages=[
+        # Call the LLM backend with an adaptive token limit
+        stem_fields = _get_stem_fields("subjective")
+        raw_output = _parse_with_adaptive_limit(
+            "subjective",
+            difficulty,
+            [
                 {"role": "system", "content": "You are an expert educator and question generator."},
                 {"role": "user", "content": prompt}
             ],
-            temperature=0.7,
-            response_format=SubjectiveQuestionFormat,
-            max_completion_tokens=800
+            question_fields_model("subjective", stem_fields),
+            phase="stem" if stem_fields else None,
+            on_field=on_field
         )
-        
-        # Extract and return the response content
-        raw_output = response.choices[0].message.content.strip()
+        raw_output = _validate("subjective", raw_output, difficulty, stem_fields)
         logger.debug(f"Generated subjective question: {raw_output[:100]}...")  # Log first 100 chars of response
         
+        if stem_fields:
+            # Explain the question while the user answers it; it is stored once explained
+            request_explanation("subjective", topic, json.loads(raw_output))
+        else:
+            # Keep the question so it can be served again without a model call
+            get_question_bank().add("subjective", topic, difficulty, raw_output)
+        
         return raw_output
     
     except Exception as e:
         logger.error(f"Error generating subjective question: {str(e)}")
+        stored = _serve_stored_question("subjective", topic, difficulty)
+        if stored is not None:
+            return stored
         # Return a formatted error message as JSON
         error_response = {
             "question": "Error generating question.",
@@ -128,14 +368,21 @@ def generate_subjective_question(topic, difficulty):
         return json.dumps(error_response)
 
 
+@traced("question.generate")
+@profile_service_call
 @handle_exceptions
-def generate_coding_question(topic, difficulty):
+def generate_coding_question(topic, difficulty, on_field=None):
     """
     Generate a coding interview question based on difficulty, without topic constraint.
     
+    If generation fails or the LLM circuit breaker is open, a similar stored
+    question is served instead.
+    
     Args:
         topic (str or None): The topic or topic path (optional, not used for generation)
         difficulty (str): The difficulty level for the question
+        on_field (callable, optional): Called with (name, value) for each field of the
+            question as soon as it has been streamed, before validation
         
     Returns:
         str: JSON string representing the generated question
@@ -146,32 +393,34 @@ def generate_coding_question(topic, difficulty):
     logger.info(f"Generating coding interview question with difficulty: {difficulty}")
     
     # Build the prompt for GPT, passing None for topic since we don't want to use it
-    prompt = build_coding_question_generation_prompt(difficulty, None)
+    with start_span("prompt.build", question_type="coding"):
+        prompt = build_coding_question_generation_prompt(difficulty, None)
     
     try:
-        # Initialize OpenAI client
-        client = OpenAI(api_key=get_openai_api_key())
-        
-        # Call the OpenAI API
-        response = client.beta.chat.completions.parse(
-            model="gpt-4o-mini",
-            messages=[
+        # Call the LLM backend with an adaptive token limit
+        raw_output = _parse_with_adaptive_limit(
+            "coding",
+            difficulty,
+            [
                 {"role": "system", "content": "You are an expert programmer and technical interviewer."},
                 {"role": "user", "content": prompt}
             ],
-            temperature=0.7,
-            response_format=CodingQuestionFormat,
-            max_completion_tokens=1500
+            CodingQuestionFormat,
+            on_field=on_field
         )
-        
-        # Extract and return the response content
-        raw_output = response.choices[0].message.content.strip()
+        raw_output = _validate("coding", raw_output, difficulty)
         logger.debug(f"Generated coding question: {raw_output[:100]}...")  # Log first 100 chars of response
         
+        # Keep the question so it can be served again without a model call
+        get_question_bank().add("coding", topic, difficulty, raw_output)
+        
         return raw_output
     
     except Exception as e:
         logger.error(f"Error generating coding question: {str(e)}")
+        stored = _serve_stored_question("coding", None, difficulty)
+        if stored is not None:
+            return stored
         # Return a formatted error message as JSON
         error_response = {
             "question": "Error generating question.",
@@ -180,4 +429,62 @@ def generate_coding_question(topic, difficulty):
             "explanation": str(e),
             "difficulty": difficulty
         }
-        return json.dumps(error_response) 
\ No newline at end of file
+        return json.dumps(error_response)
+
+
+@traced("question.explain")
+@profile_service_call
+@handle_exceptions
+def generate_explanation(question_type, topic, question):
+    """
+    Generate the explanation of a question generated without one, and store the whole question.
+    
+    Args:
+        question_type (str): The question type ("mcq" or "subjective")
+        topic (str): The topic or topic path of the question
+        question (dict): The question fields
+        
+    Returns:
+        str: The explanation
+        
+    Raises:
+        QuestionGenerationError: If there's an error generating the explanation
+    """
+    difficulty = question["difficulty"]
+    with start_span("prompt.build", question_type=question_type):
+        prompt = build_explanation_prompt(question_type, question)
+    raw_output = _parse_with_adaptive_limit(
+        question_type,
+        difficulty,
+        [
+            {"role": "system", "content": "You are an expert educator explaining quiz questions."},
+            {"role": "user", "content": prompt}
+        ],
+        question_fields_model(question_type, ("explanation",)),
+        phase="explanation"
+    )
+    explanation = json.loads(raw_output)["explanation"].strip()
+    if not explanation:
+        raise QuestionGenerationError(f"Generated {question_type} explanation is empty")
+    
+    # Keep the whole question so it can be served again without a model call
+    whole = QUESTION_MODELS[question_type].model_validate(dict(question, explanation=explanation))
+    get_question_bank().add(question_type, topic, difficulty, whole.model_dump_json())
+    return explanation
+
+
+def request_explanation(question_type, topic, question):
+    """
+    Get the explanation of a question generated without one, generating it in the background once.
+    
+    Args:
+        question_type (str): The question type ("mcq" or "subjective")
+        topic (str): The topic or topic path of the question
+        question (dict): The question fields
+        
+    Returns:
+        Future: A future resolved with the explanation
+    """
+    return explanation_cache.get_or_submit(
+        (question_type, question["question"]), generate_explanation, question_type, topic, question
+    )
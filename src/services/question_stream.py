@@ -0,0 +1,128 @@
+"""
+Question stream module
+
+This module runs a question generation in the background and exposes the
+fields of the question as they are streamed. Pages can render the stem and
+options as soon as they have arrived, while the explanation is still being
+generated, and pick up the finished question later.
+
+Streams run on workers of their own rather than the shared background pool,
+so the question a user is waiting for never queues behind prefetches and
+other speculative work.
+"""
+import json
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from src.utils.tracing import propagate
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Maximum time to wait for streamed fields or the finished question, in seconds
+STREAM_WAIT_TIMEOUT = 120
+
+# Worker threads running the streams of all sessions; the LLM rate limit bounds the calls they make
+MAX_STREAM_WORKERS = 32
+
+# Shared stream workers, created on first use
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    """
+    Get the worker pool shared by all question streams.
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=MAX_STREAM_WORKERS, thread_name_prefix="question-stream")
+        return _executor
+
+
+class QuestionStream:
+    """
+    A question being generated in the background, with the fields streamed so far.
+
+    The stream lives in the session state, so it survives the reruns caused by
+    the user interacting with the fields already shown.
+    """
+
+    def __init__(self, generate_func, topic, difficulty):
+        """
+        Start generating the question.
+
+        Args:
+            generate_func: The generation function, accepting an on_field keyword argument
+            topic (str or None): The topic or topic path for the question
+            difficulty (str): The difficulty level for the question
+        """
+        self.difficulty = difficulty
+        self._condition = threading.Condition()
+        self._fields = {}
+        self.future = _get_executor().submit(propagate(generate_func), topic, difficulty, on_field=self._on_field)
+        self.future.add_done_callback(self._on_done)
+
+    def _on_field(self, name, value):
+        """
+        Keep a streamed field and wake up waiting readers.
+        """
+        with self._condition:
+            self._fields[name] = value
+            self._condition.notify_all()
+
+    def _on_done(self, future):
+        """
+        Wake up waiting readers once the generation has finished.
+        """
+        with self._condition:
+            self._condition.notify_all()
+
+    def done(self):
+        """
+        Check whether the generation has finished.
+
+        Returns:
+            bool: True once the finished question is available
+        """
+        return self.future.done()
+
+    def wait_for(self, names, timeout=STREAM_WAIT_TIMEOUT):
+        """
+        Wait until some fields have been streamed or the generation has finished.
+
+        Args:
+            names (tuple): The fields needed
+            timeout (float): Maximum time to wait, in seconds
+
+        Returns:
+            dict: The finished question if the generation has finished, else the fields
+                streamed so far, with the requested difficulty until it is streamed
+
+        Raises:
+            TimeoutError: If neither happened in time
+        """
+        with self._condition:
+            ready = self._condition.wait_for(
+                lambda: self.future.done() or all(name in self._fields for name in names), timeout)
+            fields = dict(self._fields)
+        if not ready:
+            raise TimeoutError(f"No question fields received within {timeout} s")
+        if self.future.done():
+            return self.result()
+        fields.setdefault("difficulty", self.difficulty)
+        return fields
+
+    def result(self, timeout=STREAM_WAIT_TIMEOUT):
+        """
+        Wait for the finished question.
+
+        Args:
+            timeout (float): Maximum time to wait, in seconds
+
+        Returns:
+            dict: The validated question, or the fallback returned by the generation function
+        """
+        return json.loads(self.future.result(timeout=timeout))
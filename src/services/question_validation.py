@@ -0,0 +1,263 @@
+"""
+Question validation module
+
+This module checks generated questions beyond their Pydantic schema and
+repairs what it can. Semantic checks catch questions that parse but cannot
+be served correctly: too few or duplicated options, correct answer indices
+out of range, empty fields, a difficulty other than the requested one, or
+Python code that does not compile.
+
+Trivial problems are fixed locally: the difficulty is normalized, duplicate
+options are merged (remapping the answer indices), and duplicate answer
+indices are dropped. The remaining problems are repaired by regenerating
+only the faulty fields, which is far cheaper than generating the whole
+question again. Each problem found is counted by category in the shared
+validation_metrics.
+"""
+import ast
+import json
+import logging
+import threading
+from collections import Counter
+
+from pydantic import ValidationError
+
+from src.models.question_models import DIFFICULTY_LEVELS, QUESTION_MODELS, question_fields_model
+from src.utils.error_handlers import QuestionGenerationError
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Minimum number of options of an MCQ
+MIN_MCQ_OPTIONS = 4
+
+# Fields that must be regenerated together, because one refers to the other
+FIELD_GROUPS = {
+    "options": ("options", "correct_answers"),
+    "correct_answers": ("options", "correct_answers"),
+}
+
+
+class ValidationIssue:
+    """
+    A problem found in a generated question.
+    """
+
+    def __init__(self, field, category, message):
+        """
+        Initialize the issue.
+
+        Args:
+            field (str): The faulty field
+            category (str): The failure category, e.g. "answer_out_of_range"
+            message (str): A description the model can act on when repairing the field
+        """
+        self.field = field
+        self.category = category
+        self.message = message
+
+    def __repr__(self):
+        return f"ValidationIssue({self.field!r}, {self.category!r})"
+
+
+class ValidationMetrics:
+    """
+    Thread-safe counters of validation failures and repair outcomes.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._questions = Counter()
+        self._failures = Counter()
+        self._outcomes = Counter()
+
+    def record(self, question_type, issues, outcome):
+        """
+        Count a validated question, its failure categories and how it ended.
+
+        Args:
+            question_type (str): The question type
+            issues (list): The issues found before any repair
+            outcome (str): "valid", "repaired_locally", "repaired_by_model" or "rejected"
+        """
+        with self._lock:
+            self._questions[question_type] += 1
+            for issue in issues:
+                self._failures[(question_type, issue.category)] += 1
+            self._outcomes[(question_type, outcome)] += 1
+
+    def stats(self):
+        """
+        Get the counters.
+
+        Returns:
+            dict: Validated questions per type, failures per "type:category" and outcomes per "type:outcome"
+        """
+        with self._lock:
+            return {
+                "questions": dict(self._questions),
+                "failures": {f"{t}:{c}": n for (t, c), n in self._failures.items()},
+                "outcomes": {f"{t}:{o}": n for (t, o), n in self._outcomes.items()},
+            }
+
+    def clear(self):
+        """
+        Reset all counters.
+        """
+        with self._lock:
+            self._questions.clear()
+            self._failures.clear()
+            self._outcomes.clear()
+
+
+# Shared metrics of all validated questions
+validation_metrics = ValidationMetrics()
+
+
+def normalize_difficulty(difficulty):
+    """
+    Map a difficulty label to its canonical spelling.
+
+    Returns:
+        str: The label from DIFFICULTY_LEVELS, or None if it is not one
+    """
+    normalized = (difficulty or "").strip().capitalize()
+    return normalized if normalized in DIFFICULTY_LEVELS else None
+
+
+def find_issues(question_type, question, difficulty):
+    """
+    Run the semantic checks of a question type.
+
+    Only the fields present in the question are checked.
+
+    Args:
+        question_type (str): The question type ("mcq", "subjective", "coding")
+        question (dict): The question fields
+        difficulty (str): The requested difficulty level
+
+    Returns:
+        list: The ValidationIssues found
+    """
+    issues = []
+    model = QUESTION_MODELS[question_type]
+    for field, info in model.model_fields.items():
+        if field in question and info.annotation is str and not str(question[field]).strip():
+            issues.append(ValidationIssue(field, "empty_field", f'"{field}" is empty'))
+
+    if "difficulty" in question and question["difficulty"] != (normalize_difficulty(difficulty) or difficulty):
+        issues.append(ValidationIssue("difficulty", "difficulty_mismatch",
+                                      f'"difficulty" is {question.get("difficulty")!r}, not {difficulty!r}'))
+
+    if question_type == "mcq" and "options" in question:
+        options = question.get("options") or []
+        answers = question.get("correct_answers") or []
+        normalized = [option.strip().casefold() for option in options]
+        if len(set(normalized)) != len(normalized):
+            issues.append(ValidationIssue("options", "duplicate_options", "some options are identical"))
+        if len(set(normalized)) < MIN_MCQ_OPTIONS:
+            issues.append(ValidationIssue("options", "too_few_options",
+                                          f"there are fewer than {MIN_MCQ_OPTIONS} distinct options"))
+        if not answers:
+            issues.append(ValidationIssue("correct_answers", "no_correct_answer", "no correct answer is given"))
+        elif any(not 0 <= i < len(options) for i in answers):
+            issues.append(ValidationIssue("correct_answers", "answer_out_of_range",
+                                          f"correct answer indices {answers} do not all refer to the "
+                                          f"{len(options)} options"))
+        elif len(set(answers)) != len(answers):
+            issues.append(ValidationIssue("correct_answers", "duplicate_answers", "correct answers repeat"))
+
+    if question_type == "coding" and str(question.get("language", "")).strip().lower() == "python":
+        for field in ("code_solution", "starter_code"):
+            if field not in question:
+                continue
+            try:
+                ast.parse(question.get(field) or "")
+            except SyntaxError as e:
+                issues.append(ValidationIssue(field, "code_syntax", f'"{field}" is not valid Python: {e.msg}'))
+    return issues
+
+
+def repair_locally(question_type, question, difficulty):
+    """
+    Fix trivial problems in place: the difficulty label, duplicate options and duplicate answers.
+
+    Args:
+        question_type (str): The question type
+        question (dict): The question fields, modified in place
+        difficulty (str): The requested difficulty level
+    """
+    if "difficulty" in question:
+        question["difficulty"] = normalize_difficulty(difficulty) or difficulty
+    if question_type != "mcq" or "options" not in question:
+        return
+
+    options = question.get("options") or []
+    answers = question.get("correct_answers") or []
+    kept, first_index, remap = [], {}, {}
+    for i, option in enumerate(options):
+        key = option.strip().casefold()
+        if key not in first_index:
+            first_index[key] = len(kept)
+            kept.append(option.strip())
+        remap[i] = first_index[key]
+    question["options"] = kept
+    question["correct_answers"] = sorted({remap.get(i, len(kept)) for i in answers})
+
+
+def validate_question(question_type, raw_output, difficulty, repair_fields=None, fields=None):
+    """
+    Validate a generated question, repairing it locally and, if needed, by regenerating fields.
+
+    Args:
+        question_type (str): The question type ("mcq", "subjective", "coding")
+        raw_output (str): The question JSON string
+        difficulty (str): The requested difficulty level
+        repair_fields (callable, optional): Called with (question dict, field names, issues);
+            returns new values for those fields. Without it, only local repairs are made.
+        fields (tuple, optional): The fields of a partially generated question; None for a whole question
+
+    Returns:
+        str: The valid question JSON string
+
+    Raises:
+        QuestionGenerationError: If the question is still invalid after repair
+    """
+    model = question_fields_model(question_type, fields)
+    try:
+        question = model.model_validate_json(raw_output).model_dump()
+    except ValidationError as e:
+        validation_metrics.record(question_type, [ValidationIssue("", "schema", str(e))], "rejected")
+        raise QuestionGenerationError(f"Generated {question_type} question does not match its schema") from e
+
+    found = find_issues(question_type, question, difficulty)
+    if not found:
+        validation_metrics.record(question_type, found, "valid")
+        return raw_output
+
+    repair_locally(question_type, question, difficulty)
+    outcome = "repaired_locally"
+    issues = find_issues(question_type, question, difficulty)
+    if issues and repair_fields is not None:
+        fields = []
+        for issue in issues:
+            for field in FIELD_GROUPS.get(issue.field, (issue.field,)):
+                if field not in fields:
+                    fields.append(field)
+        logger.info(f"Regenerating {fields} of a {question_type} question: {[i.category for i in issues]}")
+        try:
+            values = repair_fields(question, fields, issues)
+            question.update({field: values[field] for field in fields})
+            question = model.model_validate(question).model_dump()
+            repair_locally(question_type, question, difficulty)
+            issues = find_issues(question_type, question, difficulty)
+            outcome = "repaired_by_model"
+        except Exception as e:
+            logger.warning(f"Field repair of a {question_type} question failed: {str(e)}")
+
+    if issues:
+        validation_metrics.record(question_type, found, "rejected")
+        raise QuestionGenerationError(
+            f"Generated {question_type} question is invalid: {'; '.join(i.message for i in issues)}")
+    validation_metrics.record(question_type, found, outcome)
+    return json.dumps(question)
@@ -0,0 +1,555 @@
+"""
+Retrieval service module
+
+This module keeps a local BM25 index over the topic trees and the stored
+questions, and retrieves short context snippets for Quick Search answers.
+
+The index is an inverted index held in NumPy arrays: postings (term, doc,
+term frequency) are kept sorted by term, with per-term offsets, plus a small
+unsorted tail of recently added postings. A query gathers the postings of its
+terms from both parts and scores all matching documents at once with
+np.bincount. The tail is merged into the sorted part when it grows, so adding
+documents is cheap and incremental.
+
+A background thread picks up new topics and new bank questions and persists
+the index, so queries never wait for indexing.
+"""
+import os
+import re
+import json
+import glob
+import atexit
+import logging
+import itertools
+import threading
+from collections import Counter
+
+import numpy as np
+
+from src.config.app_config import get_retrieval_settings
+from src.services.bank_snapshot import pack_strings, unpack_strings
+from src.services.question_bank import get_question_bank
+from src.services.topic_service import TOPICS_DIR, get_topic_index
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# BM25 parameters
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Words ignored when indexing and querying
+STOPWORDS = frozenset(
+    "a an and are as at be by can do does for from how i in is it of on or the this to was what when where "
+    "which who why with you your".split()
+)
+
+# Tail postings that trigger a merge into the sorted part (at least, or a quarter of the sorted part)
+MIN_MERGE_POSTINGS = 20000
+
+# Maximum length of one snippet in characters
+MAX_SNIPPET_CHARS = 600
+
+# Documents added per lock acquisition while refreshing, so queries can interleave
+REFRESH_BATCH = 500
+
+# Rough number of characters per token, for the context budget
+CHARS_PER_TOKEN = 4
+
+# Key prefixes of the two document sources
+TOPIC_PREFIX = "topic:"
+QUESTION_PREFIX = "question:"
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+# Versions of index contents, unique across all indexes of the process
+_index_versions = itertools.count(1)
+
+
+def tokenize(text):
+    """
+    Split text into lowercase alphanumeric terms, dropping stopwords.
+
+    Args:
+        text (str): The text
+
+    Returns:
+        list: The terms, in order
+    """
+    return [token for token in _TOKEN_PATTERN.findall(text.casefold()) if token not in STOPWORDS]
+
+
+def _grow(array, size):
+    """
+    Return array with room for at least size entries, doubling its capacity and zero-filling.
+    """
+    if size <= len(array):
+        return array
+    grown = np.zeros(max(size, 2 * len(array)), dtype=array.dtype)
+    grown[:len(array)] = array
+    return grown
+
+
+class BM25Index:
+    """
+    Incremental BM25 index over short documents, each with a unique key and a display snippet.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._vocab = {}
+        self._terms = []
+        self._keys = []
+        self._key_docs = {}
+        self._snippets = []
+        self._doc_count = 0
+        self._doc_len = np.zeros(1024, dtype=np.float32)
+        self._live = np.zeros(1024, dtype=bool)
+        self._df = np.zeros(1024, dtype=np.int64)
+        self._post_term = np.zeros(4096, dtype=np.int32)
+        self._post_doc = np.zeros(4096, dtype=np.int32)
+        self._post_tf = np.zeros(4096, dtype=np.float32)
+        self._post_count = 0
+        # Postings [0, _sorted_count) are sorted by term and indexed by _term_offsets
+        self._sorted_count = 0
+        self._term_offsets = np.zeros(1, dtype=np.int64)
+        self._total_len = 0.0
+        # Free-form state of the document sources, persisted with the index
+        self.meta = {}
+        # Changes whenever a document is added or removed, e.g. to key caches of retrieval results
+        self.version = next(_index_versions)
+
+    def __len__(self):
+        return len(self._key_docs)
+
+    def __contains__(self, key):
+        return key in self._key_docs
+
+    def keys(self, prefix=""):
+        """
+        Get the keys of the indexed documents starting with prefix.
+        """
+        with self._lock:
+            return [key for key in self._key_docs if key.startswith(prefix)]
+
+    def add(self, key, text, snippet):
+        """
+        Index a document.
+
+        Args:
+            key (str): Unique key of the document
+            text (str): The text to index
+            snippet (str): The text returned when the document matches
+
+        Returns:
+            bool: False if a document with this key is already indexed
+        """
+        counts = Counter(tokenize(text))
+        with self._lock:
+            if key in self._key_docs:
+                return False
+            doc = self._doc_count
+            term_ids = []
+            for term in counts:
+                term_id = self._vocab.get(term)
+                if term_id is None:
+                    term_id = self._vocab[term] = len(self._terms)
+                    self._terms.append(term)
+                term_ids.append(term_id)
+
+            start, end = self._post_count, self._post_count + len(term_ids)
+            self._post_term = _grow(self._post_term, end)
+            self._post_doc = _grow(self._post_doc, end)
+            self._post_tf = _grow(self._post_tf, end)
+            self._post_term[start:end] = term_ids
+            self._post_doc[start:end] = doc
+            self._post_tf[start:end] = list(counts.values())
+            self._post_count = end
+
+            self._doc_len = _grow(self._doc_len, doc + 1)
+            self._live = _grow(self._live, doc + 1)
+            self._df = _grow(self._df, len(self._terms))
+            self._doc_len[doc] = sum(counts.values())
+            self._live[doc] = True
+            self._df[term_ids] += 1
+            self._total_len += self._doc_len[doc]
+            self._keys.append(key)
+            self._key_docs[key] = doc
+            self._snippets.append(snippet)
+            self._doc_count += 1
+            self.version = next(_index_versions)
+
+            if end - self._sorted_count > max(MIN_MERGE_POSTINGS, self._sorted_count // 4):
+                self._merge()
+            return True
+
+    def remove(self, key):
+        """
+        Remove a document. Its postings are dropped at the next merge.
+
+        Args:
+            key (str): The key of the document
+
+        Returns:
+            bool: False if no document has this key
+        """
+        with self._lock:
+            doc = self._key_docs.pop(key, None)
+            if doc is None:
+                return False
+            self._live[doc] = False
+            self._total_len -= self._doc_len[doc]
+            count = self._post_count
+            self._df[self._post_term[:count][self._post_doc[:count] == doc]] -= 1
+            self.version = next(_index_versions)
+            return True
+
+    def _merge(self):
+        """
+        Sort all live postings by term and rebuild the term offsets; the caller holds the lock.
+        """
+        count = self._post_count
+        docs = self._post_doc[:count]
+        keep = self._live[docs]
+        terms, docs, tfs = self._post_term[:count][keep], docs[keep], self._post_tf[:count][keep]
+        order = np.argsort(terms, kind="stable")
+        count = len(order)
+        self._post_term[:count] = terms[order]
+        self._post_doc[:count] = docs[order]
+        self._post_tf[:count] = tfs[order]
+        self._post_count = self._sorted_count = count
+        self._term_offsets = np.zeros(len(self._terms) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(self._post_term[:count], minlength=len(self._terms)), out=self._term_offsets[1:])
+
+    def search(self, query, k=5):
+        """
+        Find the documents best matching a query.
+
+        Args:
+            query (str): The query text
+            k (int): Maximum number of results
+
+        Returns:
+            list: (key, snippet, score) tuples, best first
+        """
+        with self._lock:
+            term_ids = np.array(sorted({self._vocab[t] for t in tokenize(query) if t in self._vocab}), dtype=np.int64)
+            live_count = len(self._key_docs)
+            if not len(term_ids) or not live_count:
+                return []
+
+            # Postings of the query terms from the sorted part (by offset) and the tail (by scan)
+            parts = []
+            sorted_terms = term_ids[term_ids < len(self._term_offsets) - 1]
+            for term_id in sorted_terms:
+                start, end = self._term_offsets[term_id], self._term_offsets[term_id + 1]
+                parts.append(np.arange(start, end))
+            tail = np.arange(self._sorted_count, self._post_count)
+            parts.append(tail[np.isin(self._post_term[self._sorted_count:self._post_count], term_ids)])
+            positions = np.concatenate(parts)
+            if not len(positions):
+                return []
+
+            terms = self._post_term[positions]
+            docs = self._post_doc[positions]
+            tfs = self._post_tf[positions]
+            df = self._df[terms]
+            idf = np.log1p((live_count - df + 0.5) / (df + 0.5))
+            avg_len = self._total_len / live_count
+            norm = BM25_K1 * (1.0 - BM25_B + BM25_B * self._doc_len[docs] / avg_len)
+            contributions = idf * tfs * (BM25_K1 + 1.0) / (tfs + norm)
+            contributions[~self._live[docs]] = 0.0
+
+            scores = np.bincount(docs, weights=contributions, minlength=self._doc_count)
+            top = np.argpartition(-scores, k - 1)[:k] if len(scores) > k else np.arange(len(scores))
+            top = top[np.argsort(-scores[top], kind="stable")]
+            return [(self._keys[doc], self._snippets[doc], float(scores[doc])) for doc in top if scores[doc] > 0]
+
+    def save(self, path):
+        """
+        Write the index to an .npz file atomically.
+
+        Args:
+            path (str): The file path
+        """
+        with self._lock:
+            self._merge()
+            count, docs = self._post_count, self._doc_count
+            term_offsets, term_data = pack_strings(self._terms)
+            key_offsets, key_data = pack_strings(self._keys)
+            snippet_offsets, snippet_data = pack_strings(self._snippets)
+            arrays = {
+                "term_offsets": term_offsets, "term_data": term_data,
+                "key_offsets": key_offsets, "key_data": key_data,
+                "snippet_offsets": snippet_offsets, "snippet_data": snippet_data,
+                "doc_len": self._doc_len[:docs].copy(), "live": self._live[:docs].copy(),
+                "post_term": self._post_term[:count].copy(), "post_doc": self._post_doc[:count].copy(),
+                "post_tf": self._post_tf[:count].copy(),
+                "meta": np.array(json.dumps(self.meta)),
+            }
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(f, **arrays)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Read an index written by save.
+
+        Args:
+            path (str): The file path
+
+        Returns:
+            BM25Index: The index
+        """
+        with np.load(path, allow_pickle=False) as data:
+            index = cls()
+            index._terms = unpack_strings(data["term_offsets"], data["term_data"])
+            index._vocab = {term: term_id for term_id, term in enumerate(index._terms)}
+            index._keys = unpack_strings(data["key_offsets"], data["key_data"])
+            index._snippets = unpack_strings(data["snippet_offsets"], data["snippet_data"])
+            index._doc_len = data["doc_len"]
+            index._live = data["live"]
+            index._post_term = data["post_term"]
+            index._post_doc = data["post_doc"]
+            index._post_tf = data["post_tf"]
+            index.meta = json.loads(str(data["meta"]))
+        index._doc_count = len(index._keys)
+        index._key_docs = {key: doc for doc, key in enumerate(index._keys) if index._live[doc]}
+        index._post_count = len(index._post_term)
+        index._df = np.bincount(index._post_term, minlength=len(index._terms)).astype(np.int64)
+        index._total_len = float(index._doc_len[index._live].sum())
+        index._merge()
+        return index
+
+
+def iter_topic_paths(trees):
+    """
+    Yield the comma-separated path of every node in topic trees.
+
+    Args:
+        trees: Root topic structures with "topicName" and "subTopics"
+    """
+    stack = [(tree, []) for tree in reversed(list(trees))]
+    while stack:
+        topic, parents = stack.pop()
+        path = parents + [topic["topicName"]]
+        yield ", ".join(path)
+        for child in reversed(topic.get("subTopics") or []):
+            stack.append((child, path))
+
+
+def load_topic_trees(topics_dir=TOPICS_DIR):
+    """
+    Get the current topic trees, from the watcher's index when there is one.
+
+    Args:
+        topics_dir (str): Directory of the topic JSON files, used without an index
+
+    Returns:
+        list: Root topic structures
+    """
+    index = get_topic_index()
+    if index is not None and index.tree_count:
+        return list(index.trees)
+    trees = []
+    for path in sorted(glob.glob(os.path.join(topics_dir, "*.json"))):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                trees.append(json.load(f))
+        except (OSError, ValueError) as e:
+            logger.warning(f"Skipping unreadable topic file {path}: {str(e)}")
+    return trees
+
+
+def question_document(payload):
+    """
+    Build the indexed text and the snippet of a stored question.
+
+    Args:
+        payload (str): The question JSON string
+
+    Returns:
+        tuple: (text, snippet), or None if the payload is malformed
+    """
+    try:
+        question = json.loads(payload)
+        text = question["question"]
+    except (ValueError, KeyError, TypeError):
+        return None
+    if "options" in question and "correct_answers" in question:
+        options = question["options"]
+        answer = ", ".join(options[i] for i in question["correct_answers"] if 0 <= i < len(options))
+        answer = f"{answer}. {question.get('explanation', '')}"
+    else:
+        answer = question.get("solution") or question.get("explanation", "")
+    snippet = f"Q: {text} A: {answer}".strip()
+    if len(snippet) > MAX_SNIPPET_CHARS:
+        snippet = snippet[:MAX_SNIPPET_CHARS - 3].rstrip() + "..."
+    return f"{text} {answer}", snippet
+
+
+class ContextRetriever:
+    """
+    Keeps a BM25 index of topics and bank questions up to date and retrieves context for answers.
+    """
+
+    def __init__(self, index_path=None, bank=None, topics_dir=TOPICS_DIR, refresh_interval=5.0):
+        """
+        Initialize the retriever, loading the index saved at index_path.
+
+        Args:
+            index_path (str, optional): The index file; None keeps the index in memory only
+            bank (QuestionBank, optional): The question bank (default: the shared bank)
+            topics_dir (str): Directory of the topic JSON files
+            refresh_interval (float): Seconds between background refreshes
+        """
+        self.index_path = index_path
+        self.bank = bank if bank is not None else get_question_bank()
+        self.topics_dir = topics_dir
+        self.refresh_interval = refresh_interval
+        self.index = BM25Index()
+        if index_path and os.path.exists(index_path):
+            try:
+                self.index = BM25Index.load(index_path)
+                logger.info(f"Loaded retrieval index with {len(self.index)} documents from {index_path}")
+            except (OSError, ValueError, KeyError) as e:
+                logger.error(f"Error loading retrieval index {index_path}: {str(e)}")
+        self._dirty = False
+        self._stop = threading.Event()
+        self._thread = None
+
+    def refresh(self):
+        """
+        Index new topics and bank questions, and drop topics that no longer exist.
+
+        Returns:
+            int: The number of documents added or removed
+        """
+        changes = 0
+        topic_paths = set(iter_topic_paths(load_topic_trees(self.topics_dir)))
+        for key in self.index.keys(TOPIC_PREFIX):
+            if key[len(TOPIC_PREFIX):] not in topic_paths:
+                changes += self.index.remove(key)
+        for path in topic_paths:
+            changes += self.index.add(f"{TOPIC_PREFIX}{path}", path, f"Topic: {path}")
+
+        start = self.index.meta.get("bank_rows", 0)
+        end = len(self.bank)
+        for batch_start in range(start, end, REFRESH_BATCH):
+            for row in range(batch_start, min(batch_start + REFRESH_BATCH, end)):
+                document = question_document(self.bank.payload(row))
+                if document is not None:
+                    changes += self.index.add(f"{QUESTION_PREFIX}{self.bank.item_id(row)}", *document)
+            self.index.meta["bank_rows"] = min(batch_start + REFRESH_BATCH, end)
+
+        if changes:
+            self._dirty = True
+            logger.info(f"Retrieval index refreshed: {changes} changes, {len(self.index)} documents")
+        return changes
+
+    def save(self):
+        """
+        Persist the index if it changed.
+        """
+        if not self.index_path or not self._dirty:
+            return
+        self._dirty = False
+        try:
+            self.index.save(self.index_path)
+        except OSError as e:
+            self._dirty = True
+            logger.error(f"Error saving retrieval index to {self.index_path}: {str(e)}")
+
+    def retrieve(self, question, k, max_tokens):
+        """
+        Get the snippets best matching a question, within a token budget.
+
+        Snippets are taken in rank order while they fit in the budget.
+
+        Args:
+            question (str): The question
+            k (int): Maximum number of snippets
+            max_tokens (int): Budget for all snippets together
+
+        Returns:
+            list: (key, snippet) tuples, best first
+        """
+        budget = max_tokens * CHARS_PER_TOKEN
+        selected = []
+        for key, snippet, _ in self.index.search(question, k):
+            if len(snippet) > budget:
+                continue
+            selected.append((key, snippet))
+            budget -= len(snippet)
+        return selected
+
+    def _run(self):
+        """
+        Refresh and save periodically until stopped.
+        """
+        while True:
+            try:
+                self.refresh()
+                self.save()
+            except Exception as e:
+                logger.error(f"Error refreshing retrieval index: {str(e)}")
+            if self._stop.wait(self.refresh_interval):
+                break
+
+    def start(self):
+        """
+        Start refreshing the index in a background thread.
+        """
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="retrieval-indexer", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """
+        Stop the background thread and save the index.
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        self.save()
+
+
+# Shared retriever, created on first use
+_retriever = None
+_retriever_lock = threading.Lock()
+
+
+def get_context_retriever():
+    """
+    Get the shared context retriever, starting its background indexer on first use.
+
+    Returns:
+        ContextRetriever: The shared retriever, or None if retrieval is disabled
+    """
+    global _retriever
+    settings = get_retrieval_settings()
+    if not settings["enabled"]:
+        return None
+    with _retriever_lock:
+        if _retriever is None:
+            _retriever = ContextRetriever(settings["index_path"], refresh_interval=settings["refresh_interval"])
+            _retriever.start()
+            atexit.register(_retriever.stop)
+        return _retriever
+
+
+def set_context_retriever(retriever):
+    """
+    Replace the shared retriever, e.g. with an in-memory one in tests.
+
+    Args:
+        retriever (ContextRetriever or None): The retriever to use, or None to create the configured one
+    """
+    global _retriever
+    with _retriever_lock:
+        _retriever = retriever
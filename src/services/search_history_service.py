@@ -0,0 +1,261 @@
+"""
+Search history service module
+
+This module persists Quick Search questions and answers in SQLite with an
+FTS5 full-text index, so past answers can be found again by any words of the
+question or answer. Writes are buffered and committed in batches by a
+background thread, so recording an answer never waits on the disk.
+"""
+import os
+import re
+import time
+import atexit
+import sqlite3
+import logging
+import threading
+
+from src.config.app_config import get_search_history_path
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Seconds between write-behind flushes
+FLUSH_INTERVAL = 0.5
+
+# Number of pending entries that triggers an immediate flush
+FLUSH_BATCH_SIZE = 64
+
+# Maximum number of query terms used for a full-text lookup
+MAX_QUERY_TERMS = 12
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS search_history (
+    id INTEGER PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    question TEXT NOT NULL,
+    answer TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS search_history_user_time ON search_history (user_id, created_at);
+CREATE VIRTUAL TABLE IF NOT EXISTS search_history_fts USING fts5(
+    question, answer, content='search_history', content_rowid='id'
+);
+CREATE TRIGGER IF NOT EXISTS search_history_ai AFTER INSERT ON search_history BEGIN
+    INSERT INTO search_history_fts (rowid, question, answer) VALUES (new.id, new.question, new.answer);
+END;
+CREATE TRIGGER IF NOT EXISTS search_history_ad AFTER DELETE ON search_history BEGIN
+    INSERT INTO search_history_fts (search_history_fts, rowid, question, answer)
+    VALUES ('delete', old.id, old.question, old.answer);
+END;
+"""
+
+
+def build_match_query(text):
+    """
+    Build an FTS5 MATCH expression from free text typed by a user.
+
+    Each word becomes a quoted prefix term, so partially typed words match and
+    FTS5 operators in the text have no effect. Terms are OR-ed and ranked by bm25.
+
+    Args:
+        text (str): The user's text
+
+    Returns:
+        str: The MATCH expression, or None if the text has no searchable words
+    """
+    terms = []
+    for word in re.findall(r"\w+", text.lower()):
+        if len(word) > 1 and word not in terms:
+            terms.append(word)
+    if not terms:
+        return None
+    return " OR ".join(f'"{term}"*' for term in terms[:MAX_QUERY_TERMS])
+
+
+class SearchHistoryStore:
+    """
+    SQLite-backed Quick Search history with full-text lookup and write-behind.
+    """
+
+    def __init__(self, db_path, flush_interval=FLUSH_INTERVAL):
+        """
+        Open (or create) the history database.
+
+        Args:
+            db_path (str): Path of the SQLite database
+            flush_interval (float): Seconds between write-behind flushes
+
+        Raises:
+            sqlite3.Error: If the database cannot be opened or FTS5 is unavailable
+        """
+        self.db_path = db_path
+        self.flush_interval = flush_interval
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        # One connection for lookups and one for the writer; WAL lets them run concurrently
+        self._write_connection = self._connect()
+        self._write_connection.execute("PRAGMA journal_mode=WAL")
+        self._write_connection.executescript(_SCHEMA)
+        self._read_connection = self._connect()
+        self._read_lock = threading.Lock()
+
+        self._pending = []
+        self._pending_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="search-history-writer", daemon=True)
+        self._thread.start()
+
+    def _connect(self):
+        """
+        Open a connection usable from any thread; callers serialize access with a lock.
+
+        Returns:
+            sqlite3.Connection: The connection
+        """
+        connection = sqlite3.connect(self.db_path, timeout=10, check_same_thread=False)
+        connection.row_factory = sqlite3.Row
+        connection.execute("PRAGMA synchronous=NORMAL")
+        return connection
+
+    def record(self, user_id, question, answer):
+        """
+        Queue a question and its answer for writing.
+
+        Args:
+            user_id (str): The user the entry belongs to
+            question (str): The question asked
+            answer (str): The answer shown
+        """
+        with self._pending_lock:
+            self._pending.append((user_id, question, answer, time.time()))
+            if len(self._pending) >= FLUSH_BATCH_SIZE:
+                self._wake.set()
+
+    def flush(self):
+        """
+        Write all pending entries in one transaction.
+
+        Returns:
+            int: The number of entries written
+        """
+        with self._flush_lock:
+            # Entries stay pending (and visible to recent()) until they are committed
+            with self._pending_lock:
+                batch = list(self._pending)
+            if not batch:
+                return 0
+            try:
+                with self._write_connection:
+                    self._write_connection.executemany(
+                        "INSERT INTO search_history (user_id, question, answer, created_at) VALUES (?, ?, ?, ?)",
+                        batch
+                    )
+            except sqlite3.Error as e:
+                # Keep the entries for the next attempt
+                logger.error(f"Error writing search history: {str(e)}")
+                return 0
+            with self._pending_lock:
+                del self._pending[:len(batch)]
+            return len(batch)
+
+    def _run(self):
+        """
+        Flush pending entries periodically until closed.
+        """
+        while not self._closed:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+
+    def search(self, user_id, text, limit=5):
+        """
+        Find a user's past entries matching free text, best matches first.
+
+        Args:
+            user_id (str): The user whose history is searched
+            text (str): The text typed by the user
+            limit (int): Maximum number of entries
+
+        Returns:
+            list: Dicts with question, answer and created_at
+        """
+        match = build_match_query(text)
+        if match is None:
+            return []
+        with self._read_lock:
+            rows = self._read_connection.execute(
+                "SELECT h.question, h.answer, h.created_at FROM search_history_fts "
+                "JOIN search_history h ON h.id = search_history_fts.rowid "
+                "WHERE search_history_fts MATCH ? AND h.user_id = ? "
+                "ORDER BY bm25(search_history_fts, 2.0, 1.0) LIMIT ?",
+                (match, user_id, limit)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def recent(self, user_id, limit=5):
+        """
+        Get a user's most recent entries, including ones not written yet.
+
+        Args:
+            user_id (str): The user whose history is read
+            limit (int): Maximum number of entries
+
+        Returns:
+            list: Dicts with question, answer and created_at, newest first
+        """
+        with self._pending_lock:
+            pending = [{"question": question, "answer": answer, "created_at": created_at}
+                       for pending_user, question, answer, created_at in reversed(self._pending)
+                       if pending_user == user_id]
+        with self._read_lock:
+            rows = self._read_connection.execute(
+                "SELECT question, answer, created_at FROM search_history "
+                "WHERE user_id = ? ORDER BY created_at DESC LIMIT ?",
+                (user_id, limit)
+            ).fetchall()
+        # An entry committed between the two reads appears in both
+        seen = {(entry["question"], entry["created_at"]) for entry in pending}
+        stored = [dict(row) for row in rows if (row["question"], row["created_at"]) not in seen]
+        return (pending + stored)[:limit]
+
+    def close(self):
+        """
+        Stop the writer thread and write the remaining entries.
+        """
+        self._closed = True
+        self._wake.set()
+        self._thread.join(timeout=5)
+        self.flush()
+        self._write_connection.close()
+        self._read_connection.close()
+
+
+# Shared store, created on first use
+_store = None
+_store_failed = False
+_store_lock = threading.Lock()
+
+
+def get_search_history_store():
+    """
+    Get the shared search history store, opening it on first use.
+
+    Returns:
+        SearchHistoryStore: The store, or None if the database cannot be used
+    """
+    global _store, _store_failed
+    with _store_lock:
+        if _store is None and not _store_failed:
+            db_path = get_search_history_path()
+            try:
+                _store = SearchHistoryStore(db_path)
+                atexit.register(_store.close)
+            except (sqlite3.Error, OSError) as e:
+                # Search history then lives in the session only
+                _store_failed = True
+                logger.error(f"Search history database {db_path} unavailable: {str(e)}")
+        return _store
@@ -0,0 +1,171 @@
+"""
+Token budget module
+
+This module keeps rolling windows of observed completion lengths for each
+question type and difficulty, and derives adaptive max_completion_tokens
+limits from them.
+"""
+import math
+import logging
+import threading
+from collections import deque
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Limits used until enough completions have been observed for a key
+DEFAULT_TOKEN_LIMITS = {
+    "mcq": 800,
+    "subjective": 800,
+    "coding": 1500,
+    # The two phases of two-phase generation (see question_service)
+    "mcq:stem": 400,
+    "subjective:stem": 256,
+    "mcq:explanation": 600,
+    "subjective:explanation": 800,
+}
+
+# Number of recent completions kept per (question type, difficulty)
+HISTORY_SIZE = 200
+
+# Minimum number of samples before the observed distribution is trusted
+MIN_SAMPLES = 20
+
+# Percentile of observed lengths the limit is based on
+TARGET_PERCENTILE = 0.95
+
+# Multiplicative headroom added on top of the percentile
+HEADROOM = 1.25
+
+# Hard bounds for any limit handed to the API
+MIN_TOKEN_LIMIT = 256
+MAX_TOKEN_LIMIT = 4096
+
+# Growth factor applied when a completion stops with a "length" finish reason
+RETRY_GROWTH_FACTOR = 2
+
+
+class TokenBudget:
+    """
+    Thread-safe tracker of completion lengths that computes adaptive token limits.
+    """
+
+    def __init__(self, default_limits=None, history_size=HISTORY_SIZE, min_samples=MIN_SAMPLES,
+                 percentile=TARGET_PERCENTILE, headroom=HEADROOM,
+                 min_limit=MIN_TOKEN_LIMIT, max_limit=MAX_TOKEN_LIMIT):
+        """
+        Initialize the token budget.
+
+        Args:
+            default_limits (dict, optional): Limits per question type used before enough samples exist
+            history_size (int): Number of recent samples kept per key
+            min_samples (int): Samples required before adapting the limit
+            percentile (float): Percentile (0-1) of observed lengths to target
+            headroom (float): Multiplier applied on top of the percentile
+            min_limit (int): Lower bound for any computed limit
+            max_limit (int): Upper bound for any computed limit
+        """
+        self.default_limits = dict(default_limits or DEFAULT_TOKEN_LIMITS)
+        self.history_size = history_size
+        self.min_samples = min_samples
+        self.percentile = percentile
+        self.headroom = headroom
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self._samples = {}
+        self._truncations = {}
+        self._lock = threading.Lock()
+
+    def record(self, question_type, difficulty, completion_tokens):
+        """
+        Record the length of a completion that finished normally.
+
+        Args:
+            question_type (str): The question type ("mcq", "subjective", "coding")
+            difficulty (str): The difficulty level of the question
+            completion_tokens (int): Number of completion tokens used
+        """
+        if not isinstance(completion_tokens, int) or completion_tokens <= 0:
+            return
+
+        key = (question_type, difficulty)
+        with self._lock:
+            window = self._samples.get(key)
+            if window is None:
+                window = deque(maxlen=self.history_size)
+                self._samples[key] = window
+            window.append(completion_tokens)
+
+    def record_truncation(self, question_type, difficulty):
+        """
+        Record that a completion was cut off by the token limit.
+
+        Args:
+            question_type (str): The question type
+            difficulty (str): The difficulty level of the question
+        """
+        key = (question_type, difficulty)
+        with self._lock:
+            self._truncations[key] = self._truncations.get(key, 0) + 1
+
+    def get_limit(self, question_type, difficulty):
+        """
+        Get the max_completion_tokens limit for a question type and difficulty.
+
+        Args:
+            question_type (str): The question type
+            difficulty (str): The difficulty level of the question
+
+        Returns:
+            int: The token limit to request
+        """
+        default = self.default_limits.get(question_type, self.max_limit)
+        with self._lock:
+            window = self._samples.get((question_type, difficulty))
+            if window is None or len(window) < self.min_samples:
+                return default
+            observed = sorted(window)
+
+        index = min(len(observed) - 1, int(math.ceil(self.percentile * len(observed))) - 1)
+        limit = int(math.ceil(observed[index] * self.headroom))
+        return max(self.min_limit, min(self.max_limit, limit))
+
+    def get_retry_limit(self, current_limit):
+        """
+        Get a larger limit to retry with after a "length" finish reason.
+
+        Args:
+            current_limit (int): The limit the truncated request used
+
+        Returns:
+            int: The larger limit, or None if the maximum has already been reached
+        """
+        if current_limit >= self.max_limit:
+            return None
+        return min(self.max_limit, current_limit * RETRY_GROWTH_FACTOR)
+
+    def get_stats(self):
+        """
+        Get a snapshot of the observed lengths and current limits.
+
+        Returns:
+            dict: Mapping of "type/difficulty" to sample count, p50, limit and truncations
+        """
+        with self._lock:
+            keys = set(self._samples) | set(self._truncations)
+            snapshot = {key: (sorted(self._samples.get(key, ())), self._truncations.get(key, 0))
+                        for key in keys}
+
+        stats = {}
+        for (question_type, difficulty), (observed, truncations) in snapshot.items():
+            stats[f"{question_type}/{difficulty}"] = {
+                "samples": len(observed),
+                "p50": observed[len(observed) // 2] if observed else None,
+                "limit": self.get_limit(question_type, difficulty),
+                "truncations": truncations,
+            }
+        return stats
+
+
+# Shared budget used by the question service
+token_budget = TokenBudget()
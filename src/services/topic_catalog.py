@@ -0,0 +1,410 @@
+"""
+Topic catalog module
+
+This module compiles every topic tree in topic_store/topics into a single
+binary catalog, and loads it back with one memory-mapped read.
+
+Layout (little-endian, sections aligned to 8 bytes):
+    header          magic, format version, node/tree/string counts,
+                    string table size and a digest of the source JSON files
+    tree_roots      int32[tree_count]   node index of each tree's root
+    node_name       int32[node_count]   string id of the topic name
+    node_topic_id   int32[node_count]   string id of the topic id
+    node_parent     int32[node_count]   parent node index, -1 for roots
+    node_first      int32[node_count]   index of the first child
+    node_children   int32[node_count]   number of children
+    string_offsets  uint32[string_count + 1]
+    string_data     UTF-8 bytes of all strings
+
+Nodes are numbered breadth-first within each tree, so the children of a node
+are contiguous and any path is materialized by walking node_parent.
+"""
+import os
+import sys
+import mmap
+import glob
+import json
+import struct
+import random
+import hashlib
+import time
+import logging
+import threading
+from collections import deque
+
+import numpy as np
+
+from src.utils.error_handlers import handle_exceptions
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+CATALOG_MAGIC = b"DMTC"
+CATALOG_VERSION = 1
+
+# magic, version, reserved, node count, tree count, string count, string bytes, source digest
+_HEADER = struct.Struct("<4sHHIIII32s")
+
+_NODE_ARRAYS = ("node_name", "node_topic_id", "node_parent", "node_first", "node_children")
+
+
+def _align(offset):
+    """
+    Round an offset up to the next multiple of 8.
+    """
+    return (offset + 7) & ~7
+
+
+def compute_source_digest(topic_files):
+    """
+    Compute a digest identifying a set of topic JSON files and their versions.
+
+    Args:
+        topic_files (list): Paths of the topic JSON files
+
+    Returns:
+        bytes: A 32-byte SHA-256 digest over file names, sizes and modification times
+
+    Raises:
+        OSError: If a file cannot be stat'ed
+    """
+    digest = hashlib.sha256()
+    for path in sorted(topic_files):
+        stat = os.stat(path)
+        digest.update(f"{os.path.basename(path)}\0{stat.st_size}\0{stat.st_mtime_ns}\n".encode("utf-8"))
+    return digest.digest()
+
+
+@handle_exceptions
+def compile_topic_catalog(topics_dir, catalog_path):
+    """
+    Compile all topic JSON files in a directory into a binary catalog.
+
+    The catalog is written to a temporary file and atomically renamed, so
+    readers never see a partially written catalog.
+
+    Args:
+        topics_dir (str): Directory containing the topic JSON files
+        catalog_path (str): Path of the catalog to write
+
+    Returns:
+        int: The number of trees compiled
+    """
+    topic_files = sorted(glob.glob(os.path.join(topics_dir, "*.json")))
+
+    strings = {}
+    arrays = {name: [] for name in _NODE_ARRAYS}
+    tree_roots = []
+
+    def intern(value):
+        if value not in strings:
+            strings[value] = len(strings)
+        return strings[value]
+
+    for path in topic_files:
+        with open(path, "r", encoding="utf-8") as f:
+            tree = json.load(f)
+
+        root_index = len(arrays["node_name"])
+        tree_roots.append(root_index)
+        # Breadth-first numbering keeps each node's children contiguous
+        queue = deque([(tree, -1)])
+        next_index = root_index + 1
+        while queue:
+            topic, parent = queue.popleft()
+            children = topic.get("subTopics") or []
+            arrays["node_name"].append(intern(topic["topicName"]))
+            arrays["node_topic_id"].append(intern(topic.get("topicId", "")))
+            arrays["node_parent"].append(parent)
+            arrays["node_first"].append(next_index)
+            arrays["node_children"].append(len(children))
+            node_index = len(arrays["node_name"]) - 1
+            for child in children:
+                queue.append((child, node_index))
+            next_index += len(children)
+
+    encoded = [value.encode("utf-8") for value in strings]
+    offsets = np.zeros(len(encoded) + 1, dtype="<u4")
+    np.cumsum([len(value) for value in encoded], out=offsets[1:])
+    string_data = b"".join(encoded)
+
+    sections = [np.asarray(tree_roots, dtype="<i4")]
+    sections += [np.asarray(arrays[name], dtype="<i4") for name in _NODE_ARRAYS]
+    sections.append(offsets)
+
+    header = _HEADER.pack(
+        CATALOG_MAGIC, CATALOG_VERSION, 0,
+        len(arrays["node_name"]), len(tree_roots), len(encoded), len(string_data),
+        compute_source_digest(topic_files)
+    )
+
+    tmp_path = f"{catalog_path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(header)
+        for section in sections + [string_data]:
+            f.write(b"\0" * (_align(f.tell()) - f.tell()))
+            f.write(section.tobytes() if isinstance(section, np.ndarray) else section)
+    os.replace(tmp_path, catalog_path)
+
+    logger.info(f"Compiled topic catalog {catalog_path}: {len(tree_roots)} trees, {len(arrays['node_name'])} topics")
+    return len(tree_roots)
+
+
+class TopicCatalog:
+    """
+    A read-only, memory-mapped view of a compiled topic catalog.
+
+    The section attributes (tree_roots, node_name, ...) are zero-copy
+    sequences of ints over the mapped file.
+    """
+
+    def __init__(self, catalog_path):
+        """
+        Memory-map a catalog file and expose its sections as zero-copy views.
+
+        Args:
+            catalog_path (str): Path of the catalog file
+
+        Raises:
+            ValueError: If the file is not a catalog of the supported version
+        """
+        with open(catalog_path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if len(self._mmap) < _HEADER.size:
+            raise ValueError("Topic catalog is truncated")
+        (magic, version, _, node_count, tree_count,
+         string_count, string_bytes, digest) = _HEADER.unpack_from(self._mmap, 0)
+        if magic != CATALOG_MAGIC:
+            raise ValueError("Not a topic catalog")
+        if version != CATALOG_VERSION:
+            raise ValueError(f"Unsupported topic catalog version {version}")
+
+        self.path = catalog_path
+        self.source_digest = digest
+        self.tree_count = tree_count
+        self.node_count = node_count
+
+        offset = _HEADER.size
+        views = {}
+        layout = [("tree_roots", "i", tree_count)]
+        layout += [(name, "i", node_count) for name in _NODE_ARRAYS]
+        layout.append(("string_offsets", "I", string_count + 1))
+        for name, type_code, count in layout:
+            offset = _align(offset)
+            views[name] = self._view(offset, type_code, count)
+            offset += 4 * count
+        self._string_start = _align(offset)
+        if self._string_start + string_bytes > len(self._mmap):
+            raise ValueError("Topic catalog is truncated")
+
+        self.tree_roots = views["tree_roots"]
+        self.node_name = views["node_name"]
+        self.node_topic_id = views["node_topic_id"]
+        self.node_parent = views["node_parent"]
+        self.node_first = views["node_first"]
+        self.node_children = views["node_children"]
+        self.string_offsets = views["string_offsets"]
+
+    def _view(self, offset, type_code, count):
+        """
+        Create a zero-copy view of a 32-bit integer section.
+
+        Memoryviews are used on little-endian hosts because indexing them is
+        much cheaper than indexing NumPy arrays element by element.
+
+        Args:
+            offset (int): Byte offset of the section
+            type_code (str): "i" for int32 or "I" for uint32
+            count (int): Number of elements
+
+        Returns:
+            A sequence of Python ints supporting indexing and len()
+        """
+        end = offset + 4 * count
+        if end > len(self._mmap):
+            raise ValueError("Topic catalog is truncated")
+        if sys.byteorder == "little":
+            return memoryview(self._mmap)[offset:end].cast(type_code)
+        dtype = "<i4" if type_code == "i" else "<u4"
+        return np.frombuffer(self._mmap, dtype=dtype, count=count, offset=offset).astype(dtype[1:]).tolist()
+
+    def get_string(self, string_id):
+        """
+        Decode a string from the string table.
+
+        Args:
+            string_id (int): The string id
+
+        Returns:
+            str: The decoded string
+        """
+        start = self._string_start + self.string_offsets[string_id]
+        end = self._string_start + self.string_offsets[string_id + 1]
+        return self._mmap[start:end].decode("utf-8")
+
+    def get_path(self, node):
+        """
+        Get the names on the path from a tree root down to a node.
+
+        Args:
+            node (int): The node index
+
+        Returns:
+            list: Topic names from the root to the node
+        """
+        names = []
+        while node >= 0:
+            names.append(self.get_string(self.node_name[node]))
+            node = self.node_parent[node]
+        return names[::-1]
+
+    def random_descendant_path(self, node, rng=random):
+        """
+        Walk randomly from a node down to a leaf.
+
+        Args:
+            node (int): The node to start from
+            rng: Source of randomness (default: the random module)
+
+        Returns:
+            list: Topic names from the start node down to the selected leaf
+        """
+        names = [self.get_string(self.node_name[node])]
+        while self.node_children[node]:
+            node = self.node_first[node] + rng.randrange(self.node_children[node])
+            names.append(self.get_string(self.node_name[node]))
+        return names
+
+    def get_random_topic_path(self, rng=random):
+        """
+        Select a random topic path, with the same distribution as the JSON layout.
+
+        A random tree is chosen; half of the time the walk starts from one of
+        its top-level subtopics instead of the root.
+
+        Args:
+            rng: Source of randomness (default: the random module)
+
+        Returns:
+            list: Topic names of the selected path, or None if the catalog is empty
+        """
+        if not self.tree_count:
+            return None
+        node = self.tree_roots[rng.randrange(self.tree_count)]
+        if self.node_children[node] and rng.choice([True, False]):
+            node = self.node_first[node] + rng.randrange(self.node_children[node])
+        return self.random_descendant_path(node, rng)
+
+    def to_tree(self, tree_index):
+        """
+        Materialize one tree in the nested dictionary format of the JSON files.
+
+        Args:
+            tree_index (int): Index of the tree
+
+        Returns:
+            dict: The nested topic structure
+        """
+        def build(node):
+            first, count = self.node_first[node], self.node_children[node]
+            return {
+                "topicId": self.get_string(self.node_topic_id[node]),
+                "topicName": self.get_string(self.node_name[node]),
+                "subTopics": [build(child) for child in range(first, first + count)],
+            }
+
+        return build(self.tree_roots[tree_index])
+
+    def close(self):
+        """
+        Release the memory map.
+        """
+        # Release the views first; an mmap cannot be closed while buffers are exported
+        for name in ("tree_roots", "string_offsets") + _NODE_ARRAYS:
+            view = getattr(self, name)
+            if isinstance(view, memoryview):
+                view.release()
+            setattr(self, name, None)
+        self._mmap.close()
+
+
+def load_topic_catalog(catalog_path, topics_dir):
+    """
+    Load a catalog if it exists and is up to date with the topic JSON files.
+
+    Args:
+        catalog_path (str): Path of the catalog file
+        topics_dir (str): Directory containing the topic JSON files
+
+    Returns:
+        TopicCatalog: The loaded catalog, or None if it is missing, invalid or stale
+    """
+    if not os.path.exists(catalog_path):
+        return None
+    try:
+        catalog = TopicCatalog(catalog_path)
+    except (OSError, ValueError) as e:
+        logger.warning(f"Ignoring unreadable topic catalog {catalog_path}: {str(e)}")
+        return None
+
+    try:
+        current_digest = compute_source_digest(glob.glob(os.path.join(topics_dir, "*.json")))
+    except OSError:
+        current_digest = None
+    if catalog.source_digest != current_digest:
+        logger.warning(f"Topic catalog {catalog_path} is stale; run Update Topics to rebuild it")
+        catalog.close()
+        return None
+    return catalog
+
+
+# Longest time a cached catalog is served before the topic files are checked again
+CATALOG_REVALIDATE_SECONDS = 5.0
+
+# Cached catalog per (catalog path, topics dir), with the stamp and source digest it was validated against
+_catalog_cache = {}
+_catalog_lock = threading.Lock()
+
+
+def get_topic_catalog(catalog_path, topics_dir):
+    """
+    Get the loaded catalog, reloading it only when the catalog or a topic file changes.
+
+    Two stat calls notice a rewritten catalog and added, removed or renamed
+    topic files, which change the directory's modification time. Files edited
+    in place only change the digest of the topic files' names, sizes and
+    modification times, which is recomputed at most every
+    CATALOG_REVALIDATE_SECONDS. Replaced catalogs are closed.
+
+    Args:
+        catalog_path (str): Path of the catalog file
+        topics_dir (str): Directory containing the topic JSON files
+
+    Returns:
+        TopicCatalog: The loaded catalog, or None if it is missing, invalid or stale
+    """
+    try:
+        stamp = (os.stat(catalog_path).st_mtime_ns, os.stat(topics_dir).st_mtime_ns)
+    except OSError:
+        return None
+
+    key = (catalog_path, topics_dir)
+    now = time.monotonic()
+    with _catalog_lock:
+        cached = _catalog_cache.get(key)
+        if cached is not None and cached["stamp"] == stamp and now - cached["checked_at"] < CATALOG_REVALIDATE_SECONDS:
+            return cached["catalog"]
+        try:
+            digest = compute_source_digest(glob.glob(os.path.join(topics_dir, "*.json")))
+        except OSError:
+            digest = None
+        if cached is not None and cached["stamp"] == stamp and cached["digest"] == digest:
+            cached["checked_at"] = now
+            return cached["catalog"]
+
+        if cached is not None and cached["catalog"] is not None:
+            cached["catalog"].close()
+        catalog = load_topic_catalog(catalog_path, topics_dir)
+        _catalog_cache[key] = {"stamp": stamp, "digest": digest, "checked_at": now, "catalog": catalog}
+        return catalog
@@ -8,96 +8,217 @@ import os
 import glob
 import random
 import logging
-from src.utils.error_handlers import handle_exceptions, TopicRetrievalError
+from src.services.topic_catalog import compile_topic_catalog, get_topic_catalog
+from src.utils.error_handlers import handle_exceptions, TopicRetrievalError, TopicParseError
+from src.utils.tracing import traced
 
 # Set up logging
 logger = logging.getLogger(__name__)
 
+# Topic store locations
+RAW_TOPICS_DIR = 'topic_store/raw/'  # Directory containing raw text files
+TOPICS_DIR = 'topic_store/topics/'  # Directory to save the JSON files
+CATALOG_PATH = 'topic_store/catalog.bin'  # Compiled catalog of all JSON files
 
-@handle_exceptions
-def parse_indented_file(file_path):
+
+# Number of columns a tab advances to when measuring indentation
+DEFAULT_TAB_WIDTH = 4
+
+# In-memory topic index kept up to date by the topic store watcher.
+# It is replaced as a whole, never mutated, so readers need no lock.
+_topic_index = None
+
+
+def set_topic_index(index):
     """
-    Parses an indented text file to create a nested topic structure.
+    Replace the in-memory topic index used for topic selection.
 
     Args:
-        file_path (str): The path to the indented text file.
+        index: The new index (see topic_watcher.TopicIndex), or None to use the topic files
+    """
+    global _topic_index
+    _topic_index = index
+
+
+def get_topic_index():
+    """
+    Get the current in-memory topic index.
 
     Returns:
-        dict: A nested dictionary representing the topic structure.
+        The current index, or None if no watcher has built one
     """
-    try:
-        with open(file_path, 'r', encoding="utf-8") as f:
-            lines = f.readlines()
+    return _topic_index
+
+
+def iter_indented_lines(file_path, tab_width=DEFAULT_TAB_WIDTH):
+    """
+    Stream the non-empty lines of an indented text file.
 
-        topic_structure = None
-        # Stack will store tuples of (topic, indentation_level)
-        topic_stack = []
+    Lines are read one at a time, so memory use does not depend on the file size.
+    Tabs advance indentation to the next multiple of tab_width, as in an editor.
 
-        for line in lines:
+    Args:
+        file_path (str): The path to the indented text file.
+        tab_width (int): The tab width used to measure indentation.
+
+    Yields:
+        tuple: (line_number, indentation_level, text) for each non-empty line.
+    """
+    with open(file_path, 'r', encoding="utf-8") as f:
+        for line_number, line in enumerate(f, start=1):
             stripped_line = line.strip()
             if not stripped_line:  # Skip empty lines
                 continue
 
-            # Compute indentation level (number of leading spaces)
-            level = len(line) - len(line.lstrip())
+            # Compute indentation level in columns, expanding tabs
+            indentation = line[:len(line) - len(line.lstrip())]
+            yield line_number, len(indentation.expandtabs(tab_width)), stripped_line
+
+
+def iter_indented_topics(file_path, tab_width=DEFAULT_TAB_WIDTH):
+    """
+    Stream the root topics of an indented text file as nested topic structures.
+
+    Each root is yielded as soon as the next root starts, so only one tree is
+    held in memory at a time.
+
+    Args:
+        file_path (str): The path to the indented text file.
+        tab_width (int): The tab width used to measure indentation.
+
+    Yields:
+        dict: A nested dictionary for each root topic, in file order.
+
+    Raises:
+        TopicParseError: If a line dedents to a level that matches no enclosing topic.
+    """
+    root = None
+    # Stack will store tuples of (topic, indentation_level)
+    topic_stack = []
+
+    for line_number, level, stripped_line in iter_indented_lines(file_path, tab_width):
+        # Create a new topic
+        new_topic = {
+            'topicId': stripped_line.lower().replace(" ", "_"),
+            'topicName': stripped_line,
+            'subTopics': []
+        }
+
+        # Adjust the stack: pop until the top element has a lower indentation than the current level.
+        popped_level = None
+        while topic_stack and topic_stack[-1][1] >= level:
+            popped_level = topic_stack.pop()[1]
+
+        # A dedent must return exactly to the level of an enclosing topic
+        if popped_level is not None and popped_level != level:
+            raise TopicParseError(
+                f"Indentation of {level} columns does not match any enclosing level",
+                file_path=file_path,
+                line_number=line_number
+            )
+
+        if not topic_stack:
+            # This is a new root topic; the previous one is complete
+            if root is not None:
+                yield root
+            root = new_topic
+        else:
+            # Add as a subtopic of the current parent
+            topic_stack[-1][0]['subTopics'].append(new_topic)
+
+        # Push the new topic and its level onto the stack
+        topic_stack.append((new_topic, level))
+
+    if root is not None:
+        yield root
+
+
+@handle_exceptions
+def parse_indented_roots(file_path, tab_width=DEFAULT_TAB_WIDTH):
+    """
+    Parses an indented text file into a list of every root topic structure.
+
+    Args:
+        file_path (str): The path to the indented text file.
+        tab_width (int): The tab width used to measure indentation.
+
+    Returns:
+        list: A nested dictionary for each root topic, in file order.
+    """
+    try:
+        return list(iter_indented_topics(file_path, tab_width))
+    except Exception as e:
+        logger.error(f"Error parsing indented file {file_path}: {str(e)}")
+        raise
 
-            # Create a new topic
-            new_topic = {
-                'topicId': stripped_line.lower().replace(" ", "_"),
-                'topicName': stripped_line,
-                'subTopics': []
-            }
 
-            # Adjust the stack: pop until the top element has a lower indentation than the current level.
-            while topic_stack and topic_stack[-1][1] >= level:
-                topic_stack.pop()
+@handle_exceptions
+def parse_indented_file(file_path, tab_width=DEFAULT_TAB_WIDTH):
+    """
+    Parses an indented text file to create a nested topic structure.
 
-            if not topic_stack:
-                # This is the main (or a new root) topic
-                topic_structure = new_topic
-            else:
-                # Add as a subtopic of the current parent
-                topic_stack[-1][0]['subTopics'].append(new_topic)
+    Only the first root topic is returned; use parse_indented_roots or
+    iter_indented_topics for files with several roots.
 
-            # Push the new topic and its level onto the stack
-            topic_stack.append((new_topic, level))
+    Args:
+        file_path (str): The path to the indented text file.
+        tab_width (int): The tab width used to measure indentation.
 
-        return topic_structure
+    Returns:
+        dict: A nested dictionary representing the first root topic, or None if the file is empty.
+    """
+    try:
+        return next(iter_indented_topics(file_path, tab_width), None)
     except Exception as e:
         logger.error(f"Error parsing indented file {file_path}: {str(e)}")
         raise
 
 
+def write_topic_json(topic_structure, output_directory):
+    """
+    Writes a root topic structure to its JSON file.
+
+    Args:
+        topic_structure (dict): The nested topic structure of a root topic.
+        output_directory (str): The directory to save the JSON file in.
+
+    Returns:
+        str: The path of the written JSON file.
+    """
+    main_topic_name = topic_structure['topicName']
+    output_file_path = os.path.join(output_directory, f"{main_topic_name.lower().replace(' ', '_')}.json")
+
+    with open(output_file_path, 'w', encoding="utf-8") as json_file:
+        json.dump(topic_structure, json_file, indent=4)
+
+    logger.info(f"Generated JSON file: {output_file_path}")
+    return output_file_path
+
+
 @handle_exceptions
 def generate_json_from_indented_file(input_file, output_directory):
     """
-    Generates a JSON file from an indented text file.
+    Generates a JSON file for each root topic of an indented text file.
 
     Args:
         input_file (str): The path to the indented text file.
-        output_directory (str): The directory to save the generated JSON file.
+        output_directory (str): The directory to save the generated JSON files.
         
     Returns:
-        bool: True if successful, False otherwise
+        bool: True if at least one JSON file was generated, False otherwise
     """
     # Ensure output directory exists
     if not os.path.exists(output_directory):
         os.makedirs(output_directory)
-        
-    topic_structure = parse_indented_file(input_file)
 
-    if topic_structure:
-        main_topic_name = topic_structure['topicName']
-        output_file_path = os.path.join(output_directory, f"{main_topic_name.lower().replace(' ', '_')}.json")
+    generated = 0
+    for topic_structure in iter_indented_topics(input_file):
+        write_topic_json(topic_structure, output_directory)
+        generated += 1
 
-        with open(output_file_path, 'w', encoding="utf-8") as json_file:
-            json.dump(topic_structure, json_file, indent=4)
-
-        logger.info(f"Generated JSON file: {output_file_path}")
-        return True
-    else:
+    if not generated:
         logger.warning(f"No topics found in the input file: {input_file}")
-        return False
+    return generated > 0
 
 
 @handle_exceptions
@@ -105,11 +226,13 @@ def update_topics():
     """
     Update topics by processing raw text files into JSON format.
     
+    The JSON files are then compiled into a single binary catalog for fast loading.
+    
     Returns:
         bool: True if successful, False otherwise
     """
-    output_dir = 'topic_store/topics/'  # Directory to save the JSON files
-    raw_dir = 'topic_store/raw/'  # Directory containing raw text files
+    output_dir = TOPICS_DIR
+    raw_dir = RAW_TOPICS_DIR
     
     # Ensure directories exist
     if not os.path.exists(raw_dir):
@@ -132,6 +255,12 @@ def update_topics():
         except Exception as e:
             logger.error(f"Error processing {input_file_path}: {str(e)}")
     
+    try:
+        compile_topic_catalog(output_dir, CATALOG_PATH)
+    except Exception as e:
+        # The JSON files remain usable without the catalog
+        logger.error(f"Error compiling topic catalog: {str(e)}")
+    
     return success_count > 0
 
 
@@ -156,15 +285,28 @@ def load_random_subtopic(topic):
     return path
 
 
+@traced("topic.select")
 @handle_exceptions
 def get_random_topic():
     """
-    Loads a random path of subtopics from JSON files in the topic_store/topics directory.
+    Loads a random path of subtopics from the topic_store/topics directory.
+    
+    Uses the in-memory index maintained by the topic store watcher when it has
+    topics, then the compiled topic catalog when it is up to date, otherwise
+    reads a random JSON file.
 
     Returns:
         str: A comma-separated string representing the path of selected topics if found, otherwise None.
     """
-    topic_files = glob.glob('topic_store/topics/*.json')  # Get all JSON files in the specified directory
+    index = _topic_index
+    if index is not None and index.tree_count:
+        return ', '.join(index.get_random_topic_path())
+
+    catalog = get_topic_catalog(CATALOG_PATH, TOPICS_DIR)
+    if catalog is not None and catalog.tree_count:
+        return ', '.join(catalog.get_random_topic_path())
+    
+    topic_files = glob.glob(os.path.join(TOPICS_DIR, '*.json'))  # Get all JSON files in the specified directory
     if not topic_files:
         logger.warning("No topic files found.")
         raise TopicRetrievalError("No topic files found. Please update topics first.")
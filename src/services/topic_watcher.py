@@ -0,0 +1,308 @@
+"""
+Topic watcher module
+
+This module keeps an in-memory topic index in sync with topic_store/raw from
+a background thread. Each poll costs one stat per known directory and file:
+directories are only listed again when their modification time changes, and
+only raw files whose stat signature changed are parsed again. The new index
+is built off to the side and swapped in with a single assignment, so user
+requests never wait for a rebuild.
+"""
+import os
+import time
+import random
+import logging
+import threading
+
+from src.config.app_config import get_topic_watch_interval
+from src.services.topic_service import (
+    RAW_TOPICS_DIR, TOPICS_DIR, iter_indented_topics, write_topic_json, set_topic_index
+)
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Extension of raw topic files
+RAW_TOPIC_EXTENSION = ".txt"
+
+
+class TopicIndex:
+    """
+    An immutable snapshot of all root topics parsed from the raw topic files.
+    """
+
+    def __init__(self, file_topics):
+        """
+        Initialize the index.
+
+        Args:
+            file_topics (dict): Maps each raw file path to a tuple of its root topic structures
+        """
+        self.file_topics = file_topics
+        self.trees = tuple(root for path in sorted(file_topics) for root in file_topics[path])
+        self.tree_count = len(self.trees)
+
+    def get_random_topic_path(self, rng=random):
+        """
+        Select a random topic path, with the same distribution as the JSON layout.
+
+        A random tree is chosen; half of the time the walk starts from one of
+        its top-level subtopics instead of the root.
+
+        Args:
+            rng: Source of randomness (default: the random module)
+
+        Returns:
+            list: Topic names of the selected path, or None if the index is empty
+        """
+        if not self.tree_count:
+            return None
+        topic = rng.choice(self.trees)
+        if topic['subTopics'] and rng.choice([True, False]):
+            topic = rng.choice(topic['subTopics'])
+        path = [topic['topicName']]
+        while topic['subTopics']:
+            topic = rng.choice(topic['subTopics'])
+            path.append(topic['topicName'])
+        return path
+
+
+def _stat_signature(path):
+    """
+    Get the signature used to detect changes to a file.
+
+    Args:
+        path (str): The file path
+
+    Returns:
+        tuple: (mtime_ns, size, inode), or None if the file does not exist
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+
+
+class TopicStoreWatcher:
+    """
+    Polls the raw topic directory and hot-swaps the topic index when it changes.
+    """
+
+    def __init__(self, raw_dir=RAW_TOPICS_DIR, topics_dir=TOPICS_DIR, interval=5.0, on_swap=set_topic_index):
+        """
+        Initialize the watcher.
+
+        Args:
+            raw_dir (str): Directory containing the raw topic files
+            topics_dir (str): Directory the JSON files of changed raw files are written to
+            interval (float): Seconds between polls
+            on_swap (callable): Called with each new TopicIndex
+        """
+        self.raw_dir = os.path.normpath(raw_dir)
+        self.topics_dir = topics_dir
+        self.interval = interval
+        self.on_swap = on_swap
+
+        # Stat cache: directory -> mtime_ns, raw file -> stat signature
+        self._dir_mtimes = {}
+        self._file_stats = {}
+        self._file_topics = {}
+
+        self.index = None
+        self.reload_count = 0
+        self.last_reload = None
+        self.last_error = None
+
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def _walk(self, directory, found_files):
+        """
+        Record a directory tree in the stat cache, collecting its raw files.
+        """
+        for dir_path, _, file_names in os.walk(directory):
+            mtime = _stat_signature(dir_path)
+            if mtime is not None:
+                self._dir_mtimes[dir_path] = mtime[0]
+            for name in file_names:
+                if name.endswith(RAW_TOPIC_EXTENSION):
+                    found_files.add(os.path.join(dir_path, name))
+
+    def _scan(self):
+        """
+        Find the raw files that appeared, changed or disappeared since the last scan.
+
+        Known directories are only listed again when their modification time
+        changed; known files are only stat'ed.
+
+        Returns:
+            tuple: (changed file paths, removed file paths)
+        """
+        known_files = set(self._file_stats)
+        current_files = set(known_files)
+
+        if not self._dir_mtimes:
+            self._walk(self.raw_dir, current_files)
+        else:
+            for directory, mtime in list(self._dir_mtimes.items()):
+                signature = _stat_signature(directory)
+                if signature is None:
+                    # The directory is gone, and so is everything below it
+                    prefix = directory + os.sep
+                    for path in [d for d in self._dir_mtimes if d == directory or d.startswith(prefix)]:
+                        del self._dir_mtimes[path]
+                    current_files = {f for f in current_files if not f.startswith(prefix)}
+                    continue
+                if signature[0] == mtime:
+                    continue
+
+                self._dir_mtimes[directory] = signature[0]
+                listed = {os.path.join(directory, name) for name in os.listdir(directory)}
+                for path in listed:
+                    if path.endswith(RAW_TOPIC_EXTENSION) and os.path.isfile(path):
+                        current_files.add(path)
+                    elif os.path.isdir(path) and path not in self._dir_mtimes:
+                        self._walk(path, current_files)
+                current_files -= {f for f in current_files if os.path.dirname(f) == directory and f not in listed}
+
+        changed = []
+        removed = []
+        for path in current_files:
+            signature = _stat_signature(path)
+            if signature is None:
+                removed.append(path)
+            elif self._file_stats.get(path) != signature:
+                self._file_stats[path] = signature
+                changed.append(path)
+        removed.extend(known_files - current_files)
+        for path in removed:
+            self._file_stats.pop(path, None)
+        return sorted(changed), sorted(set(removed))
+
+    def poll(self):
+        """
+        Check the raw directory once and swap in a new index if anything changed.
+
+        The first poll parses every raw file. Later polls parse only changed
+        files and also write their JSON files, so a restart sees them too.
+
+        Returns:
+            bool: True if a new index was swapped in
+        """
+        with self._lock:
+            initial = self.index is None
+            changed, removed = self._scan()
+            if not initial and not changed and not removed:
+                return False
+
+            file_topics = dict(self._file_topics)
+            for path in removed:
+                file_topics.pop(path, None)
+            for path in changed:
+                try:
+                    roots = tuple(iter_indented_topics(path))
+                except Exception as e:
+                    # Keep serving the previous version of the file until it is fixed
+                    self.last_error = f"{path}: {str(e)}"
+                    logger.error(f"Error parsing topic file {path}: {str(e)}")
+                    continue
+                file_topics[path] = roots
+                if not initial:
+                    self._write_json(roots)
+
+            self._file_topics = file_topics
+            self.index = TopicIndex(file_topics)
+            self.reload_count += 1
+            self.last_reload = time.time()
+            self.on_swap(self.index)
+            logger.info(f"Topic index reloaded: {self.index.tree_count} topics from {len(file_topics)} files "
+                        f"({len(changed)} changed, {len(removed)} removed)")
+            return True
+
+    def _write_json(self, roots):
+        """
+        Write the JSON files of the root topics of a changed raw file.
+        """
+        try:
+            os.makedirs(self.topics_dir, exist_ok=True)
+            for root in roots:
+                write_topic_json(root, self.topics_dir)
+        except OSError as e:
+            logger.error(f"Error writing topic JSON files: {str(e)}")
+
+    def _run(self):
+        """
+        Poll until stopped.
+        """
+        while not self._stop_event.is_set():
+            try:
+                self.poll()
+            except Exception as e:
+                self.last_error = str(e)
+                logger.error(f"Topic watcher poll failed: {str(e)}")
+            self._stop_event.wait(self.interval)
+
+    def start(self):
+        """
+        Start polling in a daemon thread.
+        """
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="topic-watcher", daemon=True)
+        self._thread.start()
+        logger.info(f"Watching {self.raw_dir} for topic changes every {self.interval:g}s")
+
+    def stop(self, timeout=None):
+        """
+        Stop polling.
+
+        Args:
+            timeout (float, optional): Seconds to wait for the thread to exit
+        """
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def get_status(self):
+        """
+        Get a summary of the watcher state for display.
+
+        Returns:
+            dict: Topic and file counts, reload count, last reload time and last error
+        """
+        index = self.index
+        return {
+            "running": self._thread is not None and self._thread.is_alive(),
+            "topics": index.tree_count if index is not None else 0,
+            "files": len(index.file_topics) if index is not None else 0,
+            "reloads": self.reload_count,
+            "last_reload": self.last_reload,
+            "last_error": self.last_error,
+        }
+
+
+# Shared watcher, created on first use
+_watcher = None
+_watcher_lock = threading.Lock()
+
+
+def get_topic_watcher():
+    """
+    Get the shared topic store watcher, starting it on first use.
+
+    Returns:
+        TopicStoreWatcher: The running watcher, or None if watching is disabled
+    """
+    global _watcher
+    with _watcher_lock:
+        if _watcher is None:
+            interval = get_topic_watch_interval()
+            if interval <= 0:
+                return None
+            _watcher = TopicStoreWatcher(interval=interval)
+            _watcher.start()
+        return _watcher
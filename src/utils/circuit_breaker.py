@@ -0,0 +1,239 @@
+"""
+Circuit breaker utilities module
+
+This module provides a circuit breaker for calls to a remote service such as
+the LLM backend. The breaker keeps the outcomes of the calls made in a
+rolling time window. A call fails if it raises or if it takes longer than the
+slow-call threshold. Once enough calls have been made and the failed share
+reaches the threshold, the breaker opens: calls are rejected at once with
+CircuitOpenError, so callers can fall back without waiting for timeouts.
+After a cool-down the breaker is half-open and lets a single probe call
+through. A successful probe closes the breaker; a failed one opens it again.
+"""
+import time
+import logging
+import threading
+from collections import deque
+
+from src.config.app_config import get_circuit_breaker_settings
+from src.utils.error_handlers import CircuitOpenError
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Breaker states
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """
+    Thread-safe circuit breaker with a rolling error-rate and latency window.
+    """
+
+    def __init__(self, name="llm", window_seconds=60.0, min_calls=5, failure_rate=0.5, slow_call_seconds=20.0,
+                 open_seconds=30.0, clock=time.monotonic):
+        """
+        Initialize the breaker in the closed state.
+
+        Args:
+            name (str): Name used in logs and stats
+            window_seconds (float): Length of the rolling window of call outcomes
+            min_calls (int): Calls in the window needed before the breaker can open
+            failure_rate (float): Share of failed calls in the window that opens the breaker
+            slow_call_seconds (float): Calls taking longer than this count as failed
+            open_seconds (float): Time the breaker stays open before a probe call
+            clock (callable): Time source, replaceable in tests
+        """
+        self.name = name
+        self.window_seconds = window_seconds
+        self.min_calls = max(1, min_calls)
+        self.failure_rate = failure_rate
+        self.slow_call_seconds = slow_call_seconds
+        self.open_seconds = open_seconds
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._probing = False
+        # (finish time, failed) of the calls in the window, oldest first
+        self._outcomes = deque()
+        self._failures = 0
+        self._stats = {"calls": 0, "failures": 0, "slow_calls": 0, "rejected": 0, "opened": 0}
+
+    @property
+    def state(self):
+        """
+        The current state: "closed", "open" or "half_open".
+        """
+        with self._lock:
+            self._update_state(self.clock())
+            return self._state
+
+    def _update_state(self, now):
+        """
+        Move an open breaker to half-open once its cool-down has passed; the caller holds the lock.
+        """
+        if self._state == OPEN and now - self._opened_at >= self.open_seconds:
+            self._state = HALF_OPEN
+            self._probing = False
+            logger.info(f"Circuit breaker '{self.name}' half-open, probing the service")
+
+    def _prune(self, now):
+        """
+        Drop outcomes older than the window; the caller holds the lock.
+        """
+        while self._outcomes and now - self._outcomes[0][0] > self.window_seconds:
+            _, failed = self._outcomes.popleft()
+            self._failures -= failed
+
+    def _open(self, now):
+        """
+        Open the breaker; the caller holds the lock.
+        """
+        self._state = OPEN
+        self._opened_at = now
+        self._probing = False
+        self._stats["opened"] += 1
+
+    def allow(self):
+        """
+        Check whether a call may be made now, claiming the probe slot when half-open.
+
+        Every allowed call must be followed by record_success or record_failure.
+
+        Returns:
+            bool: True if the call may be made
+        """
+        with self._lock:
+            self._update_state(self.clock())
+            if self._state == CLOSED:
+                return True
+            if self._state == HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+            self._stats["rejected"] += 1
+            return False
+
+    def record_success(self, duration):
+        """
+        Record a call that returned, failing it if it was too slow.
+
+        Args:
+            duration (float): The call duration in seconds
+        """
+        slow = duration > self.slow_call_seconds
+        with self._lock:
+            if slow:
+                self._stats["slow_calls"] += 1
+            self._record(not slow)
+
+    def record_failure(self):
+        """
+        Record a call that raised.
+        """
+        with self._lock:
+            self._record(False)
+
+    def _record(self, ok):
+        """
+        Add a call outcome and update the state; the caller holds the lock.
+        """
+        now = self.clock()
+        self._stats["calls"] += 1
+        self._stats["failures"] += not ok
+        if self._state == HALF_OPEN:
+            if ok:
+                self._state = CLOSED
+                self._outcomes.clear()
+                self._failures = 0
+                logger.info(f"Circuit breaker '{self.name}' closed, the service recovered")
+            else:
+                self._open(now)
+                logger.warning(f"Circuit breaker '{self.name}' probe failed, open for {self.open_seconds:.0f} s")
+            return
+        if self._state == OPEN:
+            # A call allowed before the breaker opened finished late
+            return
+
+        self._outcomes.append((now, not ok))
+        self._failures += not ok
+        self._prune(now)
+        calls = len(self._outcomes)
+        if calls >= self.min_calls and self._failures >= self.failure_rate * calls:
+            self._open(now)
+            logger.warning(f"Circuit breaker '{self.name}' open for {self.open_seconds:.0f} s: "
+                           f"{self._failures} of {calls} recent calls failed or were slow")
+
+    def call(self, func, *args, **kwargs):
+        """
+        Call func through the breaker.
+
+        Args:
+            func (callable): The function to call
+            *args: Positional arguments for func
+            **kwargs: Keyword arguments for func
+
+        Returns:
+            The result of func
+
+        Raises:
+            CircuitOpenError: If the breaker is open
+        """
+        if not self.allow():
+            raise CircuitOpenError(f"The {self.name} service is temporarily unavailable")
+        start = time.perf_counter()
+        try:
+            result = func(*args, **kwargs)
+        except Exception:
+            self.record_failure()
+            raise
+        self.record_success(time.perf_counter() - start)
+        return result
+
+    def stats(self):
+        """
+        Get the breaker state and call counters.
+
+        Returns:
+            dict: The state, the failed share of the window and the lifetime counters
+        """
+        with self._lock:
+            now = self.clock()
+            self._update_state(now)
+            self._prune(now)
+            calls = len(self._outcomes)
+            return dict(self._stats, state=self._state, window_calls=calls,
+                        window_failure_rate=self._failures / calls if calls else 0.0)
+
+
+# Shared breaker around LLM calls, created on first use
+_circuit_breaker = None
+_circuit_breaker_lock = threading.Lock()
+
+
+def get_circuit_breaker():
+    """
+    Get the shared circuit breaker for LLM calls.
+
+    Returns:
+        CircuitBreaker: The shared breaker
+    """
+    global _circuit_breaker
+    with _circuit_breaker_lock:
+        if _circuit_breaker is None:
+            _circuit_breaker = CircuitBreaker("llm", **get_circuit_breaker_settings())
+        return _circuit_breaker
+
+
+def set_circuit_breaker(breaker):
+    """
+    Replace the shared breaker, e.g. with one on a fake clock in tests.
+
+    Args:
+        breaker (CircuitBreaker or None): The breaker to use, or None to re-read the configuration
+    """
+    global _circuit_breaker
+    with _circuit_breaker_lock:
+        _circuit_breaker = breaker
@@ -16,11 +16,25 @@ class QuestionGenerationError(Exception):
     pass
 
 
+class CircuitOpenError(Exception):
+    """Exception raised when a call is rejected because its circuit breaker is open."""
+    pass
+
+
 class TopicRetrievalError(Exception):
     """Exception raised for errors during topic retrieval."""
     pass
 
 
+class TopicParseError(Exception):
+    """Exception raised for malformed raw topic files."""
+    
+    def __init__(self, message, file_path=None, line_number=None):
+        super().__init__(f"{file_path}:{line_number}: {message}" if line_number else message)
+        self.file_path = file_path
+        self.line_number = line_number
+
+
 def handle_exceptions(func):
     """
     Decorator to handle exceptions in functions.
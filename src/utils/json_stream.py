@@ -0,0 +1,104 @@
+"""
+JSON stream utilities module
+
+This module provides an incremental parser for a JSON object that arrives in
+chunks, such as a streamed structured completion. The parser emits each
+top-level field as soon as its value is complete, so callers can use the
+first fields of an object while the rest is still being generated.
+"""
+import json
+import logging
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+
+class IncrementalJSONParser:
+    """
+    Parses the top-level fields of a JSON object from chunks of text.
+
+    Every chunk is scanned once. The parser only tracks nesting depth and
+    string state; each completed field value is decoded with json.loads.
+    """
+
+    def __init__(self):
+        """
+        Initialize the parser for a new object.
+        """
+        self.reset()
+
+    def reset(self):
+        """
+        Discard all input, e.g. before parsing a retried completion.
+        """
+        self._buffer = ""
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._member_start = None
+        self._colon = None
+        self.fields = {}
+        self.done = False
+
+    def feed(self, chunk):
+        """
+        Add a chunk of text.
+
+        Args:
+            chunk (str): The next part of the JSON text
+
+        Returns:
+            list: The (name, value) pairs of the fields completed by this chunk, in order
+
+        Raises:
+            ValueError: If a completed field is not valid JSON
+        """
+        self._buffer += chunk
+        completed = []
+        buffer = self._buffer
+        for i in range(self._pos, len(buffer)):
+            if self.done:
+                break
+            c = buffer[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif c == "\\":
+                    self._escape = True
+                elif c == '"':
+                    self._in_string = False
+            elif c == '"':
+                self._in_string = True
+            elif c in "{[":
+                self._depth += 1
+                if self._depth == 1:
+                    self._member_start = i + 1
+            elif c in "}]":
+                if self._depth == 1:
+                    self._end_member(i, completed)
+                    self.done = True
+                self._depth -= 1
+            elif self._depth == 1:
+                if c == ",":
+                    self._end_member(i, completed)
+                    self._member_start = i + 1
+                elif c == ":" and self._colon is None:
+                    self._colon = i
+        self._pos = len(buffer)
+        return completed
+
+    def _end_member(self, end, completed):
+        """
+        Decode the field ending before index end and add it to completed.
+        """
+        start, colon = self._member_start, self._colon
+        self._colon = None
+        if colon is None:
+            if self._buffer[start:end].strip():
+                raise ValueError(f"Expected a field at offset {start}")
+            return
+        name = json.loads(self._buffer[start:colon])
+        value = json.loads(self._buffer[colon + 1:end])
+        self.fields[name] = value
+        completed.append((name, value))
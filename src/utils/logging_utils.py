@@ -2,39 +2,199 @@
 Logging utilities module
 
 This module sets up logging for the application.
+
+Log calls only put the record on a queue; a listener thread does the file and
+stdout I/O, so logging never blocks a user's rerun on disk or terminal writes.
+The log file has a stable name and is rotated by size and by age.
 """
-import logging
 import os
 import sys
-from datetime import datetime
+import json
+import time
+import queue
+import atexit
+import logging
+import itertools
+import threading
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+from src.config.app_config import get_logging_settings
+
+# Name of the active log file in the log directory; rotated files get .1, .2, ...
+LOG_FILE_NAME = "deepmindset.log"
+
+# Line format of text logs
+LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+
+# Listener and queue handler of the active logging setup
+_listener = None
+_queue_handler = None
+_setup_lock = threading.Lock()
+
+
+class RotatingLogFileHandler(RotatingFileHandler):
+    """
+    A file handler rotating when the file exceeds a size or a time period ends.
+
+    Time periods are aligned to multiples of rotate_seconds since the epoch
+    (daily periods end at midnight UTC), so a restarted process rotates a
+    file written in an earlier period on its first record.
+    """
+
+    def __init__(self, filename, max_bytes=0, rotate_seconds=0, backup_count=0, encoding="utf-8"):
+        """
+        Initialize the handler.
+
+        Args:
+            filename (str): Path of the log file
+            max_bytes (int): Rotate before the file would exceed this size (0 disables)
+            rotate_seconds (float): Length of a rotation period in seconds (0 disables)
+            backup_count (int): Number of rotated files to keep
+            encoding (str): File encoding
+        """
+        super().__init__(filename, maxBytes=max_bytes, backupCount=backup_count, encoding=encoding)
+        self.rotate_seconds = rotate_seconds
+        try:
+            last_write = os.stat(filename).st_mtime if os.path.getsize(filename) else time.time()
+        except OSError:
+            last_write = time.time()
+        self._period = self._get_period(last_write)
+
+    def _get_period(self, timestamp):
+        """
+        Get the rotation period a timestamp falls into.
+        """
+        return int(timestamp // self.rotate_seconds) if self.rotate_seconds else 0
+
+    def shouldRollover(self, record):
+        if self.rotate_seconds and self._get_period(record.created) != self._period:
+            return 1
+        return super().shouldRollover(record)
+
+    def doRollover(self):
+        super().doRollover()
+        self._period = self._get_period(time.time())
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """
+    Formats each record as one JSON object per line.
+    """
+
+    def format(self, record):
+        entry = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "thread": record.threadName,
+        }
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
 
+class DebugSamplingFilter(logging.Filter):
+    """
+    Keeps a fraction of DEBUG records, counted per call site.
+
+    With a rate of 0.1, every tenth record from each logging statement is kept,
+    so a noisy loop is thinned without hiding rare messages entirely.
+    Records above DEBUG always pass.
+    """
+
+    def __init__(self, rate=1.0):
+        """
+        Initialize the filter.
+
+        Args:
+            rate (float): Fraction of DEBUG records to keep, between 0 and 1
+        """
+        super().__init__()
+        self.rate = rate
+        self._every = max(1, round(1 / rate)) if rate > 0 else 0
+        self._counters = {}
+
+    def filter(self, record):
+        if record.levelno > logging.DEBUG or self.rate >= 1:
+            return True
+        if not self._every:
+            return False
+        key = (record.pathname, record.lineno)
+        counter = self._counters.get(key)
+        if counter is None:
+            counter = self._counters.setdefault(key, itertools.count())
+        return next(counter) % self._every == 0
 
-def setup_logging(log_level=logging.INFO):
+
+def setup_logging(log_level=None, log_dir="logs", settings=None):
     """
     Set up logging for the application.
-    
+
+    Calling it again while logging is set up has no effect, so it is safe to
+    call on every Streamlit rerun.
+
     Args:
-        log_level: The logging level to use (default: INFO)
-    """
-    # Create logs directory if it doesn't exist
-    if not os.path.exists("logs"):
-        os.makedirs("logs")
-    
-    # Set up filename with timestamp
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    log_file = os.path.join("logs", f"deepmindset_{timestamp}.log")
-    
-    # Configure logging
-    logging.basicConfig(
-        level=log_level,
-        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-        handlers=[
-            logging.FileHandler(log_file),
-            logging.StreamHandler(sys.stdout)
-        ]
-    )
-    
+        log_level: The logging level to use (default: LOG_LEVEL, or INFO)
+        log_dir (str): Directory of the log file (default: logs)
+        settings (dict, optional): Logging settings (default: from get_logging_settings)
+
+    Returns:
+        logging.Logger: The logger of this module
+    """
+    global _listener, _queue_handler
+    with _setup_lock:
+        if _listener is not None:
+            return logging.getLogger(__name__)
+
+        settings = settings or get_logging_settings()
+        if log_level is None:
+            log_level = getattr(logging, settings["level"], logging.INFO)
+
+        # Create logs directory if it doesn't exist
+        os.makedirs(log_dir, exist_ok=True)
+
+        formatter = JsonLinesFormatter() if settings["json_format"] else logging.Formatter(LOG_FORMAT)
+        file_handler = RotatingLogFileHandler(
+            os.path.join(log_dir, LOG_FILE_NAME),
+            max_bytes=settings["max_bytes"],
+            rotate_seconds=settings["rotate_seconds"],
+            backup_count=settings["backup_count"]
+        )
+        stream_handler = logging.StreamHandler(sys.stdout)
+        for handler in (file_handler, stream_handler):
+            handler.setFormatter(formatter)
+
+        # Requests only enqueue records; sampling runs first so dropped records cost nothing more
+        log_queue = queue.SimpleQueue()
+        _queue_handler = QueueHandler(log_queue)
+        _queue_handler.addFilter(DebugSamplingFilter(settings["debug_sample_rate"]))
+
+        root_logger = logging.getLogger()
+        root_logger.setLevel(log_level)
+        root_logger.addHandler(_queue_handler)
+
+        _listener = QueueListener(log_queue, file_handler, stream_handler, respect_handler_level=True)
+        _listener.start()
+        atexit.register(shutdown_logging)
+
     # Log application start
     logging.info("DeepMindset.ai application started")
-    
-    return logging.getLogger(__name__) 
\ No newline at end of file
+
+    return logging.getLogger(__name__)
+
+
+def shutdown_logging():
+    """
+    Write all queued records, stop the listener thread and close the log file.
+    """
+    global _listener, _queue_handler
+    with _setup_lock:
+        if _listener is None:
+            return
+        logging.getLogger().removeHandler(_queue_handler)
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+        _queue_handler = None
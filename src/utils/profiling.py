@@ -0,0 +1,294 @@
+"""
+Profiling utilities module
+
+This module provides opt-in profiling of Streamlit reruns and service calls.
+A sampled fraction of reruns (or any rerun requested by an admin with the
+profile token) runs under cProfile or a stack sampler, and the result is
+written to the profile directory, which keeps only the newest files.
+
+Only one profile is collected at a time; reruns arriving while another is
+being profiled run unprofiled.
+"""
+import os
+import sys
+import hmac
+import time
+import random
+import logging
+import cProfile
+import functools
+import itertools
+import threading
+import contextvars
+from collections import Counter
+from contextlib import contextmanager
+
+from src.config.app_config import get_profiling_settings
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Seconds between stack samples in "sample" mode
+SAMPLE_INTERVAL = 0.005
+
+# Prefix of the files written to the profile directory
+PROFILE_FILE_PREFIX = "profile_"
+
+# Whether the current code already runs inside a profiled region
+_profiling_active = contextvars.ContextVar("profiling_active", default=False)
+
+
+class StackSampler:
+    """
+    Samples the stack of one thread at a fixed interval from a background thread.
+
+    The result is written in the folded format used by flame graph tools:
+    one "outer;...;inner count" line per distinct stack.
+    """
+
+    def __init__(self, thread_id, interval=SAMPLE_INTERVAL):
+        """
+        Initialize the sampler.
+
+        Args:
+            thread_id (int): Identifier of the thread to sample
+            interval (float): Seconds between samples
+        """
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def _sample(self):
+        """
+        Record the current stack of the sampled thread.
+        """
+        frame = sys._current_frames().get(self.thread_id)
+        names = []
+        while frame is not None:
+            code = frame.f_code
+            names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+            frame = frame.f_back
+        if names:
+            self.stacks[";".join(reversed(names))] += 1
+
+    def _run(self):
+        """
+        Sample until stopped.
+        """
+        while not self._stop_event.wait(self.interval):
+            self._sample()
+
+    def enable(self):
+        """
+        Start sampling.
+        """
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+        self._thread.start()
+
+    def disable(self):
+        """
+        Stop sampling.
+        """
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def dump_stats(self, path):
+        """
+        Write the folded stacks to a file.
+
+        Args:
+            path (str): The output file
+        """
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+class Profiler:
+    """
+    Decides which reruns and service calls to profile and writes their profiles.
+    """
+
+    def __init__(self, settings):
+        """
+        Initialize the profiler.
+
+        Args:
+            settings (dict): Profiling settings (see get_profiling_settings)
+        """
+        self.settings = settings
+        self._lock = threading.Lock()
+        self._counter = itertools.count()
+
+    def should_profile(self, admin_token=None):
+        """
+        Decide whether to profile a rerun.
+
+        Args:
+            admin_token (str, optional): The profile token supplied with the request
+
+        Returns:
+            bool: True to profile
+        """
+        expected = self.settings["admin_token"]
+        if admin_token and expected and hmac.compare_digest(str(admin_token), expected):
+            return True
+        return self.settings["enabled"] and random.random() < self.settings["sample_rate"]
+
+    @contextmanager
+    def profile(self, name, admin_token=None, services=False):
+        """
+        Profile a block of code if it is selected.
+
+        Args:
+            name (str): Name used in the profile file name
+            admin_token (str, optional): The profile token supplied with the request
+            services (bool): Whether the block is a service call (profiled only with PROFILE_SERVICES)
+
+        Yields:
+            bool: Whether the block is being profiled
+        """
+        selected = not _profiling_active.get() and (
+            self.settings["services"] and self.should_profile() if services else self.should_profile(admin_token)
+        )
+        if not selected or not self._lock.acquire(blocking=False):
+            yield False
+            return
+
+        if self.settings["mode"] == "sample":
+            profiler = StackSampler(threading.get_ident())
+        else:
+            profiler = cProfile.Profile()
+        token = _profiling_active.set(True)
+        start = time.perf_counter()
+        try:
+            profiler.enable()
+        except ValueError as e:
+            # Another profiler (e.g. a debugger) is already active
+            _profiling_active.reset(token)
+            self._lock.release()
+            logger.warning(f"Could not start profiler: {str(e)}")
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            profiler.disable()
+            _profiling_active.reset(token)
+            self._lock.release()
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            # Writing the file can take a while; keep it off the profiled thread
+            threading.Thread(target=self._write, args=(profiler, name, elapsed_ms), daemon=True).start()
+
+    def _write(self, profiler, name, elapsed_ms):
+        """
+        Write a profile and remove the oldest files beyond the configured maximum.
+        """
+        directory = self.settings["directory"]
+        extension = ".folded" if isinstance(profiler, StackSampler) else ".prof"
+        file_name = (f"{PROFILE_FILE_PREFIX}{time.strftime('%Y%m%d_%H%M%S')}_{os.getpid()}_"
+                     f"{next(self._counter)}_{name}_{elapsed_ms:.0f}ms{extension}")
+        try:
+            os.makedirs(directory, exist_ok=True)
+            profiler.dump_stats(os.path.join(directory, file_name))
+            logger.info(f"Wrote profile {file_name}")
+            self.rotate()
+        except OSError as e:
+            logger.error(f"Error writing profile {file_name}: {str(e)}")
+
+    def rotate(self):
+        """
+        Delete the oldest profile files beyond the configured maximum.
+        """
+        directory = self.settings["directory"]
+        paths = [os.path.join(directory, name) for name in os.listdir(directory)
+                 if name.startswith(PROFILE_FILE_PREFIX)]
+        paths.sort(key=lambda path: os.stat(path).st_mtime_ns)
+        for path in paths[:max(0, len(paths) - self.settings["max_files"])]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+# Shared profiler, created on first use; None when profiling is off
+_profiler = None
+_profiler_configured = False
+_profiler_lock = threading.Lock()
+
+
+def get_profiler():
+    """
+    Get the shared profiler, configuring it from the environment on first use.
+
+    Returns:
+        Profiler: The profiler, or None if neither sampling nor an admin token is configured
+    """
+    global _profiler, _profiler_configured
+    if _profiler_configured:
+        return _profiler
+    with _profiler_lock:
+        if not _profiler_configured:
+            settings = get_profiling_settings()
+            if settings["enabled"] or settings["admin_token"]:
+                _profiler = Profiler(settings)
+                logger.info(f"Profiling enabled ({settings['mode']}), writing to {settings['directory']}")
+            _profiler_configured = True
+        return _profiler
+
+
+def set_profiler(profiler):
+    """
+    Replace the shared profiler, e.g. in tests.
+
+    Args:
+        profiler (Profiler or None): The profiler to use, or None to disable profiling
+    """
+    global _profiler, _profiler_configured
+    with _profiler_lock:
+        _profiler = profiler
+        _profiler_configured = True
+
+
+@contextmanager
+def profile_rerun(admin_token=None):
+    """
+    Profile a Streamlit rerun if it is sampled or requested with the admin token.
+
+    Args:
+        admin_token (str, optional): The value of the "profile" query parameter
+
+    Yields:
+        bool: Whether the rerun is being profiled
+    """
+    profiler = get_profiler()
+    if profiler is None:
+        yield False
+        return
+    with profiler.profile("rerun", admin_token=admin_token) as active:
+        yield active
+
+
+def profile_service_call(func):
+    """
+    Decorator profiling sampled calls of a service function when PROFILE_SERVICES is on.
+
+    Calls made inside a profiled rerun are already covered and are not profiled separately.
+
+    Args:
+        func: The service function
+
+    Returns:
+        The wrapped function
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        profiler = get_profiler()
+        if profiler is None:
+            return func(*args, **kwargs)
+        with profiler.profile(func.__name__, services=True):
+            return func(*args, **kwargs)
+    return wrapper
@@ -0,0 +1,223 @@
+"""
+Rate limiter utilities module
+
+This module provides the rate limit shared by all calls to a remote service
+such as the LLM backend. A token bucket bounds the request rate, with bursts
+up to a fixed size. A second bound caps the number of calls in flight. Callers
+wait for a slot instead of being rejected, so bursts of requests (an exam
+generating all its questions at once, many sessions prefetching) are spread
+out rather than running into the upstream limit.
+
+When the service answers a call with a rate-limit error (HTTP 429), new calls
+are paused for a back-off that doubles while the errors continue.
+"""
+import time
+import logging
+import threading
+from contextlib import contextmanager
+
+from src.config.app_config import get_rate_limit_settings
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Time after a rate-limit error during which the limiter reports upstream pressure
+PRESSURE_WINDOW_SECONDS = 60.0
+
+
+def is_rate_limit_error(error):
+    """
+    Check whether an exception reports that the service is rate limiting its callers.
+
+    Args:
+        error (Exception): The exception raised by a call
+
+    Returns:
+        bool: True for HTTP 429 errors, such as openai.RateLimitError
+    """
+    return getattr(error, "status_code", None) == 429
+
+
+class RateLimiter:
+    """
+    Thread-safe token bucket and concurrency limit with back-off on rate-limit errors.
+    """
+
+    def __init__(self, name="llm", requests_per_minute=500, burst=50, max_concurrent=32, backoff_seconds=1.0,
+                 max_backoff_seconds=30.0):
+        """
+        Initialize the limiter with a full bucket.
+
+        Args:
+            name (str): Name used in logs
+            requests_per_minute (float): Sustained request rate; 0 for no rate limit
+            burst (int): Requests that may start at once after an idle period
+            max_concurrent (int): Calls in flight at the same time; 0 for no limit
+            backoff_seconds (float): Pause after a first rate-limit error
+            max_backoff_seconds (float): Longest pause after repeated rate-limit errors
+        """
+        self.name = name
+        self.rate = requests_per_minute / 60.0
+        self.burst = max(1, burst)
+        self.max_concurrent = max_concurrent
+        self.backoff_seconds = backoff_seconds
+        self.max_backoff_seconds = max_backoff_seconds
+        self._condition = threading.Condition()
+        self._tokens = float(self.burst)
+        self._refilled_at = time.monotonic()
+        self._in_flight = 0
+        self._waiting = 0
+        self._paused_until = 0.0
+        self._backoff = 0.0
+        self._throttled_at = None
+        self._stats = {"acquired": 0, "throttled": 0, "timeouts": 0, "wait_seconds": 0.0}
+
+    def _refill(self, now):
+        """
+        Add the tokens earned since the last refill; the caller holds the lock.
+        """
+        if self.rate > 0:
+            self._tokens = min(self.burst, self._tokens + (now - self._refilled_at) * self.rate)
+        self._refilled_at = now
+
+    def _delay(self, now):
+        """
+        Get how long a caller has to wait for a slot, 0 if one is free; the caller holds the lock.
+        """
+        if now < self._paused_until:
+            return self._paused_until - now
+        if self.max_concurrent and self._in_flight >= self.max_concurrent:
+            # Woken up by release
+            return None
+        if self.rate > 0 and self._tokens < 1:
+            return (1 - self._tokens) / self.rate
+        return 0
+
+    def acquire(self, timeout=None):
+        """
+        Wait for a slot. Every acquired slot must be released.
+
+        Args:
+            timeout (float, optional): Maximum time to wait, in seconds
+
+        Raises:
+            TimeoutError: If no slot became free in time
+        """
+        start = time.monotonic()
+        with self._condition:
+            self._waiting += 1
+            try:
+                while True:
+                    now = time.monotonic()
+                    self._refill(now)
+                    delay = self._delay(now)
+                    if delay == 0:
+                        break
+                    if timeout is not None:
+                        remaining = start + timeout - now
+                        if remaining <= 0:
+                            self._stats["timeouts"] += 1
+                            raise TimeoutError(f"No {self.name} rate limit slot within {timeout} s")
+                        delay = remaining if delay is None else min(delay, remaining)
+                    self._condition.wait(delay)
+            finally:
+                self._waiting -= 1
+            if self.rate > 0:
+                self._tokens -= 1
+            self._in_flight += 1
+            self._stats["acquired"] += 1
+            self._stats["wait_seconds"] += time.monotonic() - start
+
+    def release(self, throttled=False):
+        """
+        Free a slot.
+
+        Args:
+            throttled (bool): Whether the call failed with a rate-limit error
+        """
+        with self._condition:
+            self._in_flight -= 1
+            now = time.monotonic()
+            if throttled:
+                self._backoff = min(self.max_backoff_seconds, self._backoff * 2 or self.backoff_seconds)
+                self._paused_until = max(self._paused_until, now + self._backoff)
+                self._tokens = 0.0
+                self._throttled_at = now
+                self._stats["throttled"] += 1
+                logger.warning(f"Rate limited by the {self.name} service, pausing calls for {self._backoff:.1f} s")
+            elif now >= self._paused_until:
+                self._backoff = 0.0
+            self._condition.notify_all()
+
+    @contextmanager
+    def slot(self, timeout=None):
+        """
+        Hold a slot for the duration of a call, backing off if the call is rate limited.
+
+        Args:
+            timeout (float, optional): Maximum time to wait for the slot, in seconds
+
+        Raises:
+            TimeoutError: If no slot became free in time
+        """
+        self.acquire(timeout)
+        try:
+            yield
+        except Exception as e:
+            self.release(throttled=is_rate_limit_error(e))
+            raise
+        self.release()
+
+    def under_pressure(self):
+        """
+        Check whether the service rate limited a call recently.
+
+        Returns:
+            bool: True within PRESSURE_WINDOW_SECONDS of a rate-limit error
+        """
+        with self._condition:
+            return self._throttled_at is not None and time.monotonic() - self._throttled_at < PRESSURE_WINDOW_SECONDS
+
+    def stats(self):
+        """
+        Get the limiter state and counters.
+
+        Returns:
+            dict: Calls in flight and waiting, available tokens, the remaining pause and lifetime counters
+        """
+        with self._condition:
+            now = time.monotonic()
+            self._refill(now)
+            return dict(self._stats, in_flight=self._in_flight, waiting=self._waiting, tokens=self._tokens,
+                        paused_seconds=max(0.0, self._paused_until - now))
+
+
+# Shared limiter of LLM calls, created on first use
+_rate_limiter = None
+_rate_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter():
+    """
+    Get the shared rate limiter of LLM calls.
+
+    Returns:
+        RateLimiter: The shared limiter
+    """
+    global _rate_limiter
+    with _rate_limiter_lock:
+        if _rate_limiter is None:
+            _rate_limiter = RateLimiter("llm", **get_rate_limit_settings())
+        return _rate_limiter
+
+
+def set_rate_limiter(limiter):
+    """
+    Replace the shared limiter, e.g. with a tighter one in tests.
+
+    Args:
+        limiter (RateLimiter or None): The limiter to use, or None to re-read the configuration
+    """
+    global _rate_limiter
+    with _rate_limiter_lock:
+        _rate_limiter = limiter
@@ -2,18 +2,35 @@
 Thread management utilities
 
 This module provides utilities for managing background threads safely.
+The worker pool scales between configurable bounds: workers are added when
+tasks queue up or wait too long for a worker, unless the LLM service is
+rate limiting calls, and workers that stay idle are retired. The pool size
+and scaling events are available from get_pool_stats().
 """
 import threading
 import logging
 import time
 import random
-from queue import Queue
+import functools
+from collections import deque
+from concurrent.futures import Future
+from queue import Queue, Empty
+
+from src.config.app_config import get_worker_pool_settings
+from src.utils.rate_limiter import get_rate_limiter
+from src.utils.tracing import propagate
 
 # Set up logging
 logger = logging.getLogger(__name__)
 
-# Maximum number of worker threads
-MAX_WORKERS = 3
+# Smoothing factor of the task wait time moving average
+WAIT_EWMA_ALPHA = 0.2
+
+# Number of recent scaling events kept for get_pool_stats
+MAX_SCALING_EVENTS = 100
+
+# Longest time an idle worker waits for a task before checking whether to retire
+IDLE_POLL_SECONDS = 1.0
 
 # Thread-safe queue for tasks
 task_queue = Queue()
@@ -24,6 +41,15 @@ workers = []
 # Flag to control worker threads
 should_stop = False
 
+# Guards workers and the pool metrics below
+_pool_lock = threading.Lock()
+_busy_workers = 0
+# Tasks queued or running; each needs a worker of its own
+_pending_tasks = 0
+_wait_ewma = 0.0
+_scaling_events = deque(maxlen=MAX_SCALING_EVENTS)
+_pool_counters = {"started": 0, "retired": 0, "held": 0, "tasks": 0}
+
 
 def add_task(func, *args, **kwargs):
     """
@@ -34,36 +60,121 @@ def add_task(func, *args, **kwargs):
         *args: Arguments to pass to the function
         **kwargs: Keyword arguments to pass to the function
     """
-    task_queue.put((func, args, kwargs))
+    global _pending_tasks
+    
+    with _pool_lock:
+        _pending_tasks += 1
+    # Carry the caller's trace over to the worker thread
+    task_queue.put((propagate(func), args, kwargs, time.monotonic()))
     ensure_workers()
 
 
+def submit_task(func, *args, **kwargs):
+    """
+    Add a task to the background task queue and return a future for its result
+    
+    Args:
+        func: The function to call
+        *args: Arguments to pass to the function
+        **kwargs: Keyword arguments to pass to the function
+        
+    Returns:
+        Future: A future resolved with the function's result or exception.
+            Cancelling it before a worker picks it up skips the call.
+    """
+    future = Future()
+    
+    @functools.wraps(func)
+    def run():
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            result = func(*args, **kwargs)
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        future.set_result(result)
+    
+    add_task(run)
+    return future
+
+
+def _record_scaling(action, reason):
+    """
+    Count and log a change of the pool size; the caller holds the pool lock.
+    """
+    _pool_counters["started" if action == "start" else "retired"] += 1
+    _scaling_events.append({"time": time.time(), "action": action, "workers": len(workers), "reason": reason})
+    logger.info(f"Worker pool {'grew' if action == 'start' else 'shrank'} to {len(workers)} workers ({reason})")
+
+
+def _retire_if_idle(thread, idle_since, settings):
+    """
+    Retire the calling worker if it has been idle too long, the pool is above its minimum and no task is queued.
+    
+    Returns:
+        bool: True if the worker must stop, also when stop_workers already dropped it from the pool
+    """
+    with _pool_lock:
+        if thread not in workers:
+            return True
+    if time.monotonic() - idle_since < settings["idle_seconds"]:
+        return False
+    with _pool_lock:
+        # A task queued meanwhile may have been counted on this worker by ensure_workers
+        if len(workers) <= settings["min_workers"] or thread not in workers or _pending_tasks > _busy_workers:
+            return False
+        workers.remove(thread)
+        _record_scaling("retire", f"idle for {settings['idle_seconds']:g} s")
+    return True
+
+
 def worker_thread():
     """
     Worker thread that processes tasks from the queue
     """
-    global should_stop
+    global _busy_workers, _pending_tasks, _wait_ewma
     
     logger.info("Starting worker thread")
+    current = threading.current_thread()
+    idle_since = time.monotonic()
     
     while not should_stop:
         try:
-            # Get a task with a 1-second timeout
+            settings = get_worker_pool_settings()
+            # Get a task, retiring the worker once it has been idle for long enough
             try:
-                task, args, kwargs = task_queue.get(timeout=1)
-            except:
-                # No task available, continue the loop
+                task, args, kwargs, queued_at = task_queue.get(
+                    timeout=min(IDLE_POLL_SECONDS, settings["idle_seconds"] or IDLE_POLL_SECONDS))
+            except Empty:
+                if _retire_if_idle(current, idle_since, settings):
+                    break
                 continue
             
+            wait = time.monotonic() - queued_at
+            with _pool_lock:
+                _busy_workers += 1
+                _wait_ewma = (1 - WAIT_EWMA_ALPHA) * _wait_ewma + WAIT_EWMA_ALPHA * wait
+                _pool_counters["tasks"] += 1
+            
             # Execute the task
             try:
                 logger.info(f"Executing background task: {task.__name__}")
                 task(*args, **kwargs)
             except Exception as e:
                 logger.error(f"Error in background task {task.__name__}: {str(e)}")
+            finally:
+                with _pool_lock:
+                    _busy_workers -= 1
+                    _pending_tasks -= 1
             
             # Mark the task as done
             task_queue.task_done()
+            idle_since = time.monotonic()
+            
+            # Tasks that waited too long call for more workers
+            if wait > settings["target_wait"] and not task_queue.empty():
+                ensure_workers()
             
         except Exception as e:
             logger.error(f"Error in worker thread: {str(e)}")
@@ -75,19 +186,69 @@ def worker_thread():
 
 def ensure_workers():
     """
-    Ensure that worker threads are running
+    Ensure that enough worker threads are running for the queued tasks
+    
+    The pool is topped up to its minimum size, and to one worker whenever a
+    task is pending. Beyond that, it grows while there are more pending tasks
+    than workers: by one worker per check, or at once by the whole backlog
+    when tasks have been waiting longer than the target on average, up to the
+    maximum size. While the LLM service is rate limiting calls, the pool does
+    not grow beyond that floor, since more workers would only wait for the
+    rate limit.
     """
     global workers
     
-    # Clean up any dead workers
-    workers = [w for w in workers if w.is_alive()]
+    settings = get_worker_pool_settings()
+    with _pool_lock:
+        # Clean up any dead workers
+        workers = [w for w in workers if w.is_alive()]
+        
+        size = len(workers)
+        backlog = _pending_tasks - size
+        # With a minimum of 0, pending tasks still need a worker
+        floor = max(settings["min_workers"], 1 if _pending_tasks else 0)
+        target, reason = size, None
+        if size < floor:
+            target, reason = floor, "minimum size"
+        elif backlog > 0 and _wait_ewma > settings["target_wait"]:
+            target, reason = size + backlog, f"average task wait {_wait_ewma:.2f} s"
+        elif backlog > 0:
+            target, reason = size + 1, f"{backlog} tasks waiting for a worker"
+        target = min(target, settings["max_workers"])
+        
+        if target > max(size, floor) and get_rate_limiter().under_pressure():
+            _pool_counters["held"] += 1
+            target, reason = max(size, floor), "minimum size"
+        
+        # Start new workers if needed
+        while len(workers) < target:
+            thread = threading.Thread(target=worker_thread, daemon=True)
+            thread.start()
+            workers.append(thread)
+            _record_scaling("start", reason)
+
+
+def get_pool_stats():
+    """
+    Get the size, load and scaling history of the worker pool
     
-    # Start new workers if needed
-    while len(workers) < MAX_WORKERS:
-        thread = threading.Thread(target=worker_thread, daemon=True)
-        thread.start()
-        workers.append(thread)
-        logger.info(f"Started new worker thread (total: {len(workers)})")
+    Returns:
+        dict: Current workers, busy workers and queued tasks, the size bounds, the average
+            task wait in seconds, counters of started and retired workers, scale-ups held back
+            by rate limiting and executed tasks, and the recent scaling events
+    """
+    settings = get_worker_pool_settings()
+    with _pool_lock:
+        return dict(
+            _pool_counters,
+            workers=len(workers),
+            busy=_busy_workers,
+            queued=task_queue.qsize(),
+            min_workers=settings["min_workers"],
+            max_workers=settings["max_workers"],
+            average_wait=_wait_ewma,
+            events=list(_scaling_events),
+        )
 
 
 def stop_workers():
@@ -102,12 +263,15 @@ def stop_workers():
     should_stop = True
     
     # Wait for all threads to stop
-    for worker in workers:
+    with _pool_lock:
+        stopping = list(workers)
+    for worker in stopping:
         if worker.is_alive():
             worker.join(timeout=2)
     
     # Clear the workers list
-    workers = []
+    with _pool_lock:
+        workers = []
     
     # Reset the stop flag
     should_stop = False
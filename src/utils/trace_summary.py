@@ -0,0 +1,178 @@
+"""
+Trace summary module
+
+This module summarizes a JSONL trace file written by the tracing module: for
+each stage (span name) it reports the number of spans, latency percentiles,
+and the self time (duration minus same-thread child spans), so it shows
+where the time of a request actually went.
+
+Usage:
+    python -m src.utils.trace_summary logs/traces.jsonl --root question.load
+"""
+import sys
+import json
+import argparse
+from collections import defaultdict
+
+
+def load_spans(path):
+    """
+    Read the spans of a trace file, skipping malformed lines.
+
+    Args:
+        path (str): The JSONL trace file
+
+    Returns:
+        list: The span dictionaries
+    """
+    spans = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                span = json.loads(line)
+            except ValueError:
+                continue
+            if span.get("duration_ms") is not None:
+                spans.append(span)
+    return spans
+
+
+def percentile(sorted_values, q):
+    """
+    Get a percentile of sorted values by linear interpolation.
+
+    Args:
+        sorted_values (list): Values in ascending order
+        q (float): The percentile, between 0 and 100
+
+    Returns:
+        float: The percentile value
+    """
+    if not sorted_values:
+        return 0.0
+    position = (len(sorted_values) - 1) * q / 100.0
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+
+def filter_traces(spans, root_name):
+    """
+    Keep the spans of traces containing a span with the given name, limited to its subtree.
+
+    Args:
+        spans (list): The span dictionaries
+        root_name (str): Name of the span to treat as the root
+
+    Returns:
+        list: The spans of those subtrees
+    """
+    children = defaultdict(list)
+    for span in spans:
+        children[span.get("parent_id")].append(span)
+
+    selected = []
+    stack = [span for span in spans if span["name"] == root_name]
+    while stack:
+        span = stack.pop()
+        selected.append(span)
+        stack.extend(children.get(span["span_id"], []))
+    return selected
+
+
+def summarize_spans(spans, percentiles=(50, 90, 99)):
+    """
+    Compute per-stage statistics.
+
+    Args:
+        spans (list): The span dictionaries
+        percentiles (tuple): The percentiles to report
+
+    Returns:
+        list: One dict per stage (name, count, errors, mean_ms, self_ms, share and
+            p<q>_ms for each percentile), sorted by total self time, descending
+    """
+    # Children running on the parent's thread are nested in its time; others overlap it
+    nested_ms = defaultdict(float)
+    by_id = {span["span_id"]: span for span in spans}
+    for span in spans:
+        parent = by_id.get(span.get("parent_id"))
+        if parent is not None and parent.get("thread") == span.get("thread"):
+            nested_ms[parent["span_id"]] += span["duration_ms"]
+
+    stages = defaultdict(lambda: {"durations": [], "self_ms": 0.0, "errors": 0})
+    for span in spans:
+        stage = stages[span["name"]]
+        stage["durations"].append(span["duration_ms"])
+        stage["self_ms"] += max(0.0, span["duration_ms"] - nested_ms[span["span_id"]])
+        if span.get("error"):
+            stage["errors"] += 1
+
+    total_self_ms = sum(stage["self_ms"] for stage in stages.values()) or 1.0
+    rows = []
+    for name, stage in stages.items():
+        durations = sorted(stage["durations"])
+        row = {
+            "name": name,
+            "count": len(durations),
+            "errors": stage["errors"],
+            "mean_ms": sum(durations) / len(durations),
+            "self_ms": stage["self_ms"],
+            "share": stage["self_ms"] / total_self_ms,
+        }
+        for q in percentiles:
+            row[f"p{q:g}_ms"] = percentile(durations, q)
+        rows.append(row)
+    return sorted(rows, key=lambda row: row["self_ms"], reverse=True)
+
+
+def format_summary(rows, percentiles=(50, 90, 99)):
+    """
+    Format per-stage statistics as a text table.
+
+    Args:
+        rows (list): The output of summarize_spans
+        percentiles (tuple): The percentiles to show
+
+    Returns:
+        str: The table
+    """
+    header = f"{'stage':<20} {'count':>7} {'errors':>6} {'mean ms':>9}"
+    header += "".join(f" {f'p{q:g} ms':>9}" for q in percentiles)
+    header += f" {'self ms':>10} {'self %':>7}"
+    lines = [header]
+    for row in rows:
+        line = f"{row['name']:<20} {row['count']:>7} {row['errors']:>6} {row['mean_ms']:>9.1f}"
+        line += "".join(f" {row[f'p{q:g}_ms']:>9.1f}" for q in percentiles)
+        line += f" {row['self_ms']:>10.0f} {row['share']:>7.1%}"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    """
+    Print the per-stage summary of a trace file.
+
+    Args:
+        argv (list, optional): Command line arguments (default: sys.argv[1:])
+    """
+    parser = argparse.ArgumentParser(description="Summarize where time goes in a JSONL trace file.")
+    parser.add_argument("trace_file", help="Trace file written with TRACE_FILE set")
+    parser.add_argument("--root", help="Only include the subtrees of spans with this name, e.g. question.load")
+    parser.add_argument("--percentiles", default="50,90,99", help="Comma-separated percentiles to report")
+    args = parser.parse_args(argv)
+
+    percentiles = tuple(float(q) for q in args.percentiles.split(","))
+    spans = load_spans(args.trace_file)
+    if args.root:
+        spans = filter_traces(spans, args.root)
+    if not spans:
+        print("No spans found.", file=sys.stderr)
+        return
+    traces = len({span["trace_id"] for span in spans})
+    print(f"{len(spans)} spans in {traces} traces")
+    print(format_summary(summarize_spans(spans, percentiles), percentiles))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,358 @@
+"""
+Tracing utilities module
+
+This module provides lightweight, dependency-free request tracing. Spans nest
+through a context variable, share the trace ID of their root span, and are
+appended as JSON lines to the file named by TRACE_FILE by a background thread.
+Summarize a trace file with `python -m src.utils.trace_summary`.
+
+When tracing is disabled, start_span yields a shared no-op span and costs a
+single check.
+"""
+import os
+import json
+import time
+import random
+import atexit
+import logging
+import functools
+import threading
+import contextvars
+from contextlib import contextmanager
+
+from src.config.app_config import get_tracing_settings
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Seconds between flushes of exported spans to the trace file
+FLUSH_INTERVAL = 1.0
+
+# The span the current code runs in
+_current_span = contextvars.ContextVar("current_span", default=None)
+
+
+def _new_id(bits):
+    """
+    Generate a random hexadecimal identifier.
+    """
+    return f"{random.getrandbits(bits):0{bits // 4}x}"
+
+
+class Span:
+    """
+    A timed operation within a trace.
+    """
+
+    def __init__(self, name, trace_id, parent_id=None, recording=True, attributes=None):
+        """
+        Initialize and start the span.
+
+        Args:
+            name (str): The stage name, e.g. "llm.call"
+            trace_id (str): ID of the trace the span belongs to
+            parent_id (str, optional): ID of the parent span
+            recording (bool): Whether the span is exported when it ends
+            attributes (dict, optional): Initial attributes
+        """
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = _new_id(32)
+        self.parent_id = parent_id
+        self.recording = recording
+        self.attributes = attributes or {}
+        self.error = None
+        self.start_time = time.time()
+        self.duration_ms = None
+        self.thread = threading.current_thread().name
+        self._start_perf = time.perf_counter()
+
+    def set_attribute(self, key, value):
+        """
+        Set an attribute of the span.
+
+        Args:
+            key (str): The attribute name
+            value: A JSON-serializable value
+        """
+        self.attributes[key] = value
+
+    def end(self):
+        """
+        Record the span duration.
+        """
+        self.duration_ms = (time.perf_counter() - self._start_perf) * 1000
+
+    def to_dict(self):
+        """
+        Convert the span to the exported JSON structure.
+
+        Returns:
+            dict: The span fields
+        """
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start": self.start_time,
+            "duration_ms": self.duration_ms,
+            "thread": self.thread,
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+
+class _NoopSpan:
+    """
+    Span returned while tracing is disabled; all operations do nothing.
+    """
+
+    recording = False
+    trace_id = None
+
+    def set_attribute(self, key, value):
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class JsonlSpanExporter:
+    """
+    Buffers finished spans and appends them to a JSONL file from a background thread.
+    """
+
+    def __init__(self, path, flush_interval=FLUSH_INTERVAL):
+        """
+        Initialize the exporter.
+
+        Args:
+            path (str): The trace file
+            flush_interval (float): Seconds between flushes
+        """
+        self.path = path
+        self.flush_interval = flush_interval
+        self._buffer = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._thread = None
+        self._stop_event = threading.Event()
+
+    def export(self, span):
+        """
+        Queue a finished span for writing.
+
+        Args:
+            span (Span): The finished span
+        """
+        with self._lock:
+            self._buffer.append(span.to_dict())
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="trace-exporter", daemon=True)
+                self._thread.start()
+
+    def flush(self):
+        """
+        Write all buffered spans to the trace file.
+        """
+        with self._flush_lock:
+            with self._lock:
+                spans, self._buffer = self._buffer, []
+            if not spans:
+                return
+            try:
+                directory = os.path.dirname(self.path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write("".join(json.dumps(span, default=str) + "\n" for span in spans))
+            except OSError as e:
+                logger.error(f"Error writing trace file {self.path}: {str(e)}")
+
+    def _run(self):
+        """
+        Flush periodically until closed.
+        """
+        while not self._stop_event.wait(self.flush_interval):
+            self.flush()
+
+    def close(self):
+        """
+        Stop the background thread and write the remaining spans.
+        """
+        self._stop_event.set()
+        self.flush()
+
+
+class Tracer:
+    """
+    Creates spans and hands recorded ones to an exporter.
+    """
+
+    def __init__(self, exporter, sample_rate=1.0):
+        """
+        Initialize the tracer.
+
+        Args:
+            exporter: Object with an export(span) method
+            sample_rate (float): Fraction of traces that are recorded
+        """
+        self.exporter = exporter
+        self.sample_rate = sample_rate
+
+    def create_span(self, name, attributes):
+        """
+        Create a span as a child of the current span, or as the root of a new trace.
+        """
+        parent = _current_span.get()
+        if parent is None:
+            recording = self.sample_rate >= 1 or random.random() < self.sample_rate
+            return Span(name, _new_id(64), recording=recording, attributes=attributes)
+        return Span(name, parent.trace_id, parent.span_id, parent.recording, attributes)
+
+    def finish_span(self, span):
+        """
+        End a span and export it if its trace is sampled.
+        """
+        span.end()
+        if span.recording:
+            self.exporter.export(span)
+
+
+# Shared tracer, created on first use; None when tracing is disabled
+_tracer = None
+_tracer_configured = False
+_tracer_lock = threading.Lock()
+
+
+def get_tracer():
+    """
+    Get the shared tracer, configuring it from the environment on first use.
+
+    Returns:
+        Tracer: The tracer, or None if tracing is disabled
+    """
+    global _tracer, _tracer_configured
+    if _tracer_configured:
+        return _tracer
+    with _tracer_lock:
+        if not _tracer_configured:
+            trace_file, sample_rate = get_tracing_settings()
+            if trace_file:
+                exporter = JsonlSpanExporter(trace_file)
+                atexit.register(exporter.close)
+                _tracer = Tracer(exporter, sample_rate)
+                logger.info(f"Tracing {sample_rate:.0%} of requests to {trace_file}")
+            _tracer_configured = True
+        return _tracer
+
+
+def set_tracer(tracer):
+    """
+    Replace the shared tracer, e.g. with one using an in-memory exporter in tests.
+
+    Args:
+        tracer (Tracer or None): The tracer to use, or None to disable tracing
+    """
+    global _tracer, _tracer_configured
+    with _tracer_lock:
+        _tracer = tracer
+        _tracer_configured = True
+
+
+@contextmanager
+def start_span(name, **attributes):
+    """
+    Time a block of code as a span of the current trace.
+
+    Exceptions are recorded on the span and re-raised.
+
+    Args:
+        name (str): The stage name
+        **attributes: Initial span attributes
+
+    Yields:
+        Span: The span, for setting further attributes
+    """
+    tracer = get_tracer()
+    if tracer is None:
+        yield _NOOP_SPAN
+        return
+
+    span = tracer.create_span(name, attributes)
+    token = _current_span.set(span)
+    try:
+        yield span
+    except BaseException as e:
+        span.error = type(e).__name__
+        raise
+    finally:
+        _current_span.reset(token)
+        tracer.finish_span(span)
+
+
+def traced(name):
+    """
+    Decorator running each call of a function in a span.
+
+    Args:
+        name (str): The stage name
+
+    Returns:
+        The decorator
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with start_span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def get_current_trace_id():
+    """
+    Get the ID of the trace the current code runs in.
+
+    Returns:
+        str: The trace ID, or None outside of a trace
+    """
+    span = _current_span.get()
+    return span.trace_id if span is not None else None
+
+
+def propagate(func):
+    """
+    Bind a function to the current trace before handing it to another thread.
+
+    The returned function runs in a copy of the current context, recording
+    the time it waited to start as a "queue.wait" span and the call itself as
+    a "task" span. Outside of a recorded trace the function is returned unchanged.
+
+    Args:
+        func: The function to hand off
+
+    Returns:
+        The function to run on the other thread
+    """
+    parent = _current_span.get()
+    tracer = get_tracer()
+    if tracer is None or parent is None or not parent.recording:
+        return func
+
+    context = contextvars.copy_context()
+    queued = Span("queue.wait", parent.trace_id, parent.span_id)
+
+    def run(*args, **kwargs):
+        # The wait ends on the worker thread and overlaps the caller's own spans
+        queued.thread = threading.current_thread().name
+        tracer.finish_span(queued)
+        with start_span("task", function=getattr(func, "__name__", repr(func))):
+            return func(*args, **kwargs)
+
+    @functools.wraps(func)
+    def run_in_context(*args, **kwargs):
+        return context.run(run, *args, **kwargs)
+
+    return run_in_context
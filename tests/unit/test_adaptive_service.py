@@ -0,0 +1,169 @@
+"""
+Unit tests for the question bank and adaptive service modules.
+"""
+import os
+import json
+import tempfile
+import unittest
+
+from src.services.adaptive_service import AdaptiveEngine, ability_to_difficulty
+from src.services.bank_snapshot import open_snapshot, write_snapshot
+from src.services.question_bank import QuestionBank, make_item_id
+
+
+def make_mcq(text, difficulty="Medium"):
+    """Build an MCQ JSON string."""
+    return json.dumps({"question": text, "options": ["a", "b", "c", "d"], "correct_answers": [0],
+                       "explanation": "", "difficulty": difficulty})
+
+
+class TestQuestionBank(unittest.TestCase):
+    """Test cases for storing and reloading generated questions."""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, "bank", "questions.jsonl")
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_add_and_reload(self):
+        """Test that stored questions survive a reload with their metadata."""
+        bank = QuestionBank(self.path)
+        item_id = bank.add("mcq", "ML, SGD", "Hard", make_mcq("What is SGD?", "Hard"))
+        self.assertEqual(item_id, make_item_id("mcq", "What is SGD?"))
+        bank.add("subjective", "ML", "Easy", json.dumps({"question": "Explain ML", "explanation": "",
+                                                        "difficulty": "Easy"}))
+
+        reloaded = QuestionBank(self.path)
+        self.assertEqual(len(reloaded), 2)
+        row = reloaded.index_of(item_id)
+        self.assertEqual(reloaded.topic(row), "ML, SGD")
+        self.assertEqual(json.loads(reloaded.payload(row))["question"], "What is SGD?")
+        types, _, levels = reloaded.columns()
+        self.assertEqual(list(types), [0, 1])
+        self.assertEqual(list(levels), [2, 0])
+
+    def test_duplicates_errors_and_truncated_lines_are_skipped(self):
+        """Test that duplicates, error placeholders and a truncated last line are not loaded."""
+        bank = QuestionBank(self.path)
+        bank.add("mcq", "A", "Easy", make_mcq("Q1"))
+        bank.add("mcq", "A", "Easy", make_mcq("Q1"))
+        self.assertIsNone(bank.add("mcq", "A", "Easy", make_mcq("Error generating question.")))
+        self.assertIsNone(bank.add("mcq", "A", "Easy", "not json"))
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write('{"id": "trunc')
+        self.assertEqual(len(QuestionBank(self.path)), 1)
+
+    def test_columns_grow_past_initial_capacity(self):
+        """Test that the metadata columns grow as questions are added."""
+        bank = QuestionBank()
+        for i in range(3000):
+            bank.add("mcq", f"T{i % 7}", "Easy", make_mcq(f"Q{i}"))
+        types, topics, _ = bank.columns()
+        self.assertEqual(len(types), 3000)
+        self.assertEqual(bank.topic_count, 7)
+        self.assertEqual(bank.topic(2999), "T3")
+        self.assertFalse(topics.flags.writeable)
+
+
+class TestAdaptiveEngine(unittest.TestCase):
+    """Test cases for ability estimation and item selection."""
+
+    def setUp(self):
+        self.bank = QuestionBank()
+        for level in ("Easy", "Medium", "Hard", "Expert"):
+            for topic in ("A", "B"):
+                for i in range(3):
+                    self.bank.add("mcq", topic, level, make_mcq(f"{topic} {level} {i}", level))
+        self.bank.add("subjective", "A", "Medium", json.dumps({"question": "S", "explanation": "",
+                                                              "difficulty": "Medium"}))
+        self.engine = AdaptiveEngine(self.bank, seed=0)
+
+    def level_of(self, row):
+        """Difficulty label of a selected row."""
+        return json.loads(self.bank.payload(row))["difficulty"]
+
+    def test_new_user_gets_medium_questions(self):
+        """Test that an unknown user is matched to items at the default ability."""
+        row, probability = self.engine.select("u1")
+        self.assertEqual(self.level_of(row), "Medium")
+        self.assertAlmostEqual(probability, 0.5)
+        self.assertEqual(self.engine.suggest_difficulty("u1"), "Medium")
+
+    def test_correct_answers_raise_ability_and_selected_difficulty(self):
+        """Test that a streak of correct answers moves selection to harder questions."""
+        for _ in range(8):
+            row, _ = self.engine.select("u1")
+            self.engine.record("u1", self.bank.item_id(row), True)
+        self.assertGreater(self.engine.ability("u1"), 1.0)
+        row, _ = self.engine.select("u1")
+        self.assertIn(self.level_of(row), ("Hard", "Expert"))
+
+    def test_topic_offsets_and_filters(self):
+        """Test per-topic abilities, topic filtering and type filtering."""
+        for i in range(3):
+            self.engine.record("u1", make_item_id("mcq", f"A Medium {i}"), False)
+        self.assertLess(self.engine.ability("u1", "A"), self.engine.ability("u1", "B"))
+        row, _ = self.engine.select("u1", topic="B")
+        self.assertEqual(self.bank.topic(row), "B")
+        self.assertIsNone(self.engine.select("u1", topic="missing"))
+        row, _ = self.engine.select("u1", question_type="subjective")
+        self.assertEqual(json.loads(self.bank.payload(row))["question"], "S")
+
+    def test_answered_and_excluded_items_are_not_repeated(self):
+        """Test that selection skips answered and excluded questions until none are left."""
+        seen = set()
+        while True:
+            selected = self.engine.select("u1", topic="A", exclude=[make_item_id("mcq", "A Easy 0")])
+            if selected is None:
+                break
+            item_id = self.bank.item_id(selected[0])
+            self.assertNotIn(item_id, seen)
+            seen.add(item_id)
+            self.engine.record("u1", item_id, True)
+        self.assertEqual(len(seen), 11)
+
+    def test_missing_ids_are_ignored_with_a_snapshot_bank(self):
+        """Test that a None id, as passed before the first question is shown, is ignored by a snapshot bank."""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            write_snapshot(self.bank, tmp_dir)
+            bank = QuestionBank(snapshot=open_snapshot(tmp_dir))
+            self.assertIsNone(bank.index_of(None))
+            self.assertNotIn(None, bank)
+            self.assertIsNotNone(AdaptiveEngine(bank, seed=0).select("u1", "mcq", exclude=[None]))
+
+    def test_batch_update_moves_item_difficulty(self):
+        """Test that items answered wrongly become harder and unknown ids are ignored."""
+        item_id = make_item_id("mcq", "B Easy 0")
+        before = self.engine.item_difficulty(item_id)
+        applied = self.engine.record_batch("u1", [item_id, "missing"], [False, True])
+        self.assertEqual(applied, 1)
+        self.assertGreater(self.engine.item_difficulty(item_id), before)
+        self.assertIsNone(self.engine.item_difficulty("missing"))
+
+    def test_state_persists(self):
+        """Test that abilities, item difficulties and answered questions survive a restart."""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "state.npz")
+            engine = AdaptiveEngine(self.bank, state_path=path, save_interval=60)
+            for i in range(3):
+                engine.record("u1", make_item_id("mcq", f"B Hard {i}"), True)
+            engine.close()
+
+            restored = AdaptiveEngine(self.bank, state_path=path)
+            self.assertAlmostEqual(restored.ability("u1", "B"), engine.ability("u1", "B"))
+            self.assertEqual(list(restored._users["u1"].seen), list(engine._users["u1"].seen))
+            item_id = make_item_id("mcq", "B Hard 0")
+            self.assertAlmostEqual(restored.item_difficulty(item_id), engine.item_difficulty(item_id))
+
+    def test_ability_to_difficulty(self):
+        """Test mapping abilities to difficulty labels."""
+        self.assertEqual(ability_to_difficulty(-3), "Easy")
+        self.assertEqual(ability_to_difficulty(0.4), "Medium")
+        self.assertEqual(ability_to_difficulty(1.6), "Hard")
+        self.assertEqual(ability_to_difficulty(9), "Expert")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,140 @@
+"""
+Unit tests for the answer cache and its use by the answer service.
+"""
+import unittest
+from unittest.mock import patch
+
+from src.services.answer_cache import AnswerCache, answer_cache, make_cache_key, normalize_query
+from src.services.answer_service import get_gpt_answer, is_successful_answer
+from src.services.llm_backend import LLMBackend, LLMResponse, set_llm_backend
+from src.utils.circuit_breaker import set_circuit_breaker
+
+
+class FakeClock:
+    """Manually advanced time source."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class CountingBackend(LLMBackend):
+    """Backend returning a fixed answer, or raising, and counting calls."""
+
+    name = "counting"
+
+    def __init__(self, error=None):
+        self.calls = 0
+        self.error = error
+
+    def complete(self, messages, max_tokens, model=None, temperature=0.7):
+        self.calls += 1
+        if self.error:
+            raise self.error
+        return LLMResponse(f"Answer to {messages[-1]['content']}")
+
+
+class TestAnswerCache(unittest.TestCase):
+    """Test cases for the LRU/TTL answer cache."""
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.cache = AnswerCache(max_bytes=10000, ttl_seconds=60, error_ttl_seconds=5, clock=self.clock)
+
+    def test_normalization(self):
+        """Test that keys ignore case, repeated whitespace and compatibility characters."""
+        self.assertEqual(normalize_query("  What   is\tDropout?\n"), "what is dropout?")
+        self.assertEqual(normalize_query("ＲｅＬＵ"), "relu")
+        self.assertEqual(make_cache_key("What is ReLU", "m", max_tokens=300),
+                         make_cache_key("what  is relu ", "m", max_tokens=300))
+        self.assertNotEqual(make_cache_key("q", "m", max_tokens=300), make_cache_key("q", "m", max_tokens=301))
+
+    def test_ttl_and_negative_ttl(self):
+        """Test that answers and errors expire after their own TTLs."""
+        self.cache.put(("a",), "answer")
+        self.cache.put(("e",), "Error: timeout", is_error=True)
+        self.clock.now += 10
+        self.assertIsNone(self.cache.get(("e",)))
+        self.assertEqual(self.cache.get(("a",)).value, "answer")
+        self.clock.now += 60
+        self.assertIsNone(self.cache.get(("a",)))
+        self.assertEqual(self.cache.get_stats()["expirations"], 2)
+
+    def test_lru_eviction_by_bytes(self):
+        """Test that least recently used entries are evicted once the byte budget is exceeded."""
+        value = "x" * 2000
+        for key in "abcd":
+            self.cache.put((key,), value)
+        self.cache.get(("a",))
+        self.cache.put(("e",), value)
+        stats = self.cache.get_stats()
+        self.assertLessEqual(stats["bytes"], 10000)
+        self.assertEqual(stats["evictions"], 1)
+        self.assertIsNone(self.cache.get(("b",)))
+        self.assertIsNotNone(self.cache.get(("a",)))
+        # Values larger than the whole budget are not cached
+        self.cache.put(("huge",), "x" * 20000)
+        self.assertIsNone(self.cache.get(("huge",)))
+
+    def test_hit_ratio(self):
+        """Test hit, error hit and miss accounting."""
+        self.cache.put(("a",), "answer")
+        self.cache.put(("e",), "Error", is_error=True)
+        self.cache.get(("a",))
+        self.cache.get(("e",))
+        self.cache.get(("missing",))
+        stats = self.cache.get_stats()
+        self.assertEqual((stats["hits"], stats["error_hits"], stats["misses"]), (1, 1, 1))
+        self.assertAlmostEqual(stats["hit_ratio"], 2 / 3)
+
+
+class TestAnswerServiceCache(unittest.TestCase):
+    """Test cases for caching in get_gpt_answer."""
+
+    def setUp(self):
+        answer_cache.clear()
+        self.env = patch.dict("os.environ", {"RETRIEVAL_ENABLED": "false"})
+        self.env.start()
+
+    def tearDown(self):
+        self.env.stop()
+        answer_cache.clear()
+        set_llm_backend(None)
+        set_circuit_breaker(None)
+
+    def test_repeated_question_uses_cache(self):
+        """Test that a repeat differing only in case and whitespace does not call the backend."""
+        backend = CountingBackend()
+        set_llm_backend(backend)
+        first = get_gpt_answer("What is dropout?")
+        second = get_gpt_answer("  what is   DROPOUT? ")
+        self.assertEqual(first, second)
+        self.assertEqual(backend.calls, 1)
+
+    def test_errors_are_cached_briefly(self):
+        """Test that a failing request is cached as an error with the short TTL."""
+        backend = CountingBackend(error=RuntimeError("rate limited"))
+        set_llm_backend(backend)
+        self.assertEqual(get_gpt_answer("Why?"), "Error: rate limited")
+        self.assertEqual(get_gpt_answer("why?"), "Error: rate limited")
+        self.assertEqual(backend.calls, 1)
+        with patch.object(answer_cache, "error_ttl_seconds", 0):
+            answer_cache.clear()
+            get_gpt_answer("Why?")
+            get_gpt_answer("Why?")
+        self.assertEqual(backend.calls, 3)
+
+    def test_only_model_answers_count_as_successful(self):
+        """Test that errors and the empty-question reply are not treated as answers to keep in the history."""
+        set_llm_backend(CountingBackend())
+        self.assertTrue(is_successful_answer(get_gpt_answer("What is dropout?")))
+        self.assertFalse(is_successful_answer(get_gpt_answer("  ")))
+        set_llm_backend(CountingBackend(error=RuntimeError("rate limited")))
+        self.assertFalse(is_successful_answer(get_gpt_answer("Why?")))
+        self.assertFalse(is_successful_answer(None))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,161 @@
+"""
+Unit tests for the attempt log and attempt analytics modules.
+"""
+import os
+import time
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from src.services.attempt_analytics import (
+    accuracy_trend, difficulty_accuracy, load_attempts, topic_accuracy, weakest_topics
+)
+from src.services.attempt_log import SEGMENT_PREFIX, SEGMENT_SUFFIX, AttemptLog, list_segments
+
+DAY = 86400
+
+
+class TestAttemptLog(unittest.TestCase):
+    """Test cases for buffering and writing attempt segments."""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.directory = os.path.join(self.tmp_dir.name, "attempts")
+        # A long interval keeps the background writer out of the way; tests flush explicitly
+        self.log = AttemptLog(self.directory, flush_interval=60, max_segments=3)
+
+    def tearDown(self):
+        self.log.close()
+        self.tmp_dir.cleanup()
+
+    def test_attempts_are_batched_into_segments(self):
+        """Test that buffered attempts are written as one segment per flush."""
+        self.log.record("u1", "ML, Optimization", "Easy", True, 4.5)
+        self.log.record("u2", "ML, Regularization", "Hard", False, 12.0)
+        self.assertEqual(list_segments(self.directory), [])
+
+        self.assertEqual(self.log.flush(), 2)
+        self.assertEqual(self.log.flush(), 0)
+        self.assertEqual(len(list_segments(self.directory)), 1)
+
+        df = load_attempts(self.directory)
+        self.assertEqual(list(df["user"]), ["u1", "u2"])
+        self.assertEqual(list(df["topic"]), ["ML, Optimization", "ML, Regularization"])
+        self.assertEqual(list(df["correct"]), [True, False])
+        self.assertAlmostEqual(float(df["seconds"].iloc[1]), 12.0)
+
+    def test_segments_are_compacted(self):
+        """Test that segments beyond the limit are merged without losing or relabelling rows."""
+        rows = [("u1", "A", "Easy"), ("u2", "B", "Hard"), ("u1", "C", "Medium"), ("u3", "A", "Easy")]
+        for user, topic, difficulty in rows:
+            self.log.record(user, topic, difficulty, user == "u1", 1.0)
+            self.log.flush()
+
+        self.assertEqual(len(list_segments(self.directory)), 1)
+        df = load_attempts(self.directory)
+        self.assertEqual(list(zip(df["user"], df["topic"], df["difficulty"])), rows)
+
+    def test_failed_compaction_does_not_write_attempts_twice(self):
+        """Test that attempts already written are not requeued when merging segments fails."""
+        os.makedirs(self.directory)
+        with open(os.path.join(self.directory, f"{SEGMENT_PREFIX}{0:020d}{SEGMENT_SUFFIX}"), "wb") as f:
+            f.write(b"corrupt")
+        for user in ("u1", "u2", "u3"):
+            self.log.record(user, "A", "Easy", True, 1.0)
+            self.assertEqual(self.log.flush(), 1)
+        self.assertEqual(self.log.flush(), 0)
+        self.assertEqual(len(list_segments(self.directory)), 4)
+
+    def test_writer_survives_a_failed_flush(self):
+        """Test that an unexpected error does not stop the background writer."""
+        log = AttemptLog(self.directory, flush_interval=0.05)
+        flush = log.flush
+        calls = []
+
+        def failing_flush():
+            calls.append(None)
+            if len(calls) == 1:
+                raise ValueError("corrupt segment")
+            return flush()
+
+        with patch.object(log, "flush", side_effect=failing_flush):
+            log.record("u1", "A", "Easy", True, 1.0)
+            deadline = time.time() + 5
+            while not list_segments(self.directory) and time.time() < deadline:
+                time.sleep(0.05)
+        log.close()
+        self.assertGreater(len(calls), 1)
+        self.assertEqual(len(load_attempts(self.directory)), 1)
+
+    def test_close_flushes_pending_attempts(self):
+        """Test that closing writes attempts still in the buffer."""
+        self.log.record("u1", "A", "Easy", True, 1.0)
+        self.log.close()
+        self.assertEqual(len(load_attempts(self.directory)), 1)
+
+    def test_missing_directory_loads_empty(self):
+        """Test that analytics on an empty log return empty results."""
+        df = load_attempts(os.path.join(self.tmp_dir.name, "missing"))
+        self.assertTrue(df.empty)
+        self.assertTrue(topic_accuracy(df).empty)
+        self.assertTrue(accuracy_trend(df).empty)
+
+
+class TestAttemptAnalytics(unittest.TestCase):
+    """Test cases for the vectorized accuracy statistics."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp_dir = tempfile.TemporaryDirectory()
+        log = AttemptLog(cls.tmp_dir.name, flush_interval=60)
+        start = 100 * DAY
+        attempts = [
+            ("u1", "ML, Optimization, SGD", "Easy", True, start),
+            ("u1", "ML, Optimization, Adam", "Easy", True, start + 10),
+            ("u1", "ML, Regularization", "Hard", False, start + 20),
+            ("u1", "ML, Regularization", "Hard", False, start + DAY),
+            ("u1", "ML, Regularization", "Hard", True, start + DAY + 5),
+            ("u2", "ML, Regularization", "Medium", True, start + 2 * DAY),
+        ]
+        for user, topic, difficulty, correct, timestamp in attempts:
+            log.record(user, topic, difficulty, correct, 5.0, timestamp=timestamp)
+        log.close()
+        cls.df = load_attempts(cls.tmp_dir.name)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tmp_dir.cleanup()
+
+    def test_topic_accuracy(self):
+        """Test per-topic counts and accuracy, optionally aggregated to a path level."""
+        stats = topic_accuracy(self.df)
+        self.assertEqual(stats.loc["ML, Regularization", "attempts"], 4)
+        self.assertAlmostEqual(stats.loc["ML, Regularization", "accuracy"], 0.5)
+
+        by_level = topic_accuracy(self.df, level=2)
+        self.assertEqual(by_level.loc["ML, Optimization", "attempts"], 2)
+        self.assertAlmostEqual(by_level.loc["ML, Optimization", "accuracy"], 1.0)
+
+        self.assertEqual(topic_accuracy(self.df, user_id="u2")["attempts"].sum(), 1)
+
+    def test_difficulty_accuracy(self):
+        """Test per-difficulty accuracy."""
+        stats = difficulty_accuracy(self.df)
+        self.assertAlmostEqual(stats.loc["Hard", "accuracy"], 1 / 3)
+        self.assertEqual(stats.loc["Easy", "correct"], 2)
+
+    def test_accuracy_trend(self):
+        """Test daily buckets of attempts and accuracy."""
+        trend = accuracy_trend(self.df, bucket_seconds=DAY)
+        self.assertEqual(list(trend["attempts"]), [3, 2, 1])
+        self.assertEqual(list(trend["correct"]), [2, 1, 1])
+
+    def test_weakest_topics(self):
+        """Test that a user's least accurate topics with enough attempts come first."""
+        weakest = weakest_topics(self.df, "u1", min_attempts=2)
+        self.assertEqual(list(weakest.index), ["ML, Regularization"])
+        self.assertEqual(len(weakest_topics(self.df, "u1", min_attempts=1)), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
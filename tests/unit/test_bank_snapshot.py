@@ -0,0 +1,123 @@
+"""
+Unit tests for the bank snapshot module.
+"""
+import os
+import json
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from src.services.bank_snapshot import BankSnapshot, import_snapshot, open_snapshot, validate_payloads, write_snapshot
+from src.services.question_bank import QuestionBank, make_item_id
+
+
+def make_mcq(text, difficulty="Medium"):
+    """Build an MCQ JSON string."""
+    return json.dumps({"question": text, "options": ["a", "b", "c", "d"], "correct_answers": [0],
+                       "explanation": "Because.", "difficulty": difficulty})
+
+
+class TestBankSnapshot(unittest.TestCase):
+    """Test cases for exporting, opening and importing question bank snapshots."""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.snapshot_dir = os.path.join(self.tmp_dir.name, "snapshot")
+        self.bank = QuestionBank()
+        self.bank.add("mcq", "ML, Ünïcode", "Hard", make_mcq("Qué es SGD?", "Hard"))
+        self.bank.add("mcq", "ML", "Easy", make_mcq("What is ML?", "Easy"))
+        self.bank.add("subjective", "ML", "Medium", json.dumps({"question": "Explain ML", "explanation": "...",
+                                                               "difficulty": "Medium"}))
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_round_trip(self):
+        """Test that a snapshot serves the same questions, ids and metadata as the bank."""
+        self.assertEqual(write_snapshot(self.bank, self.snapshot_dir), {"exported": 3, "invalid": 0})
+        snapshot = BankSnapshot(self.snapshot_dir)
+        self.assertEqual(len(snapshot), 3)
+        self.assertEqual(snapshot.payload(0), self.bank.payload(0))
+        self.assertEqual(snapshot.topic_names[snapshot.topics[0]], "ML, Ünïcode")
+        self.assertEqual(snapshot.find(make_item_id("subjective", "Explain ML")), 2)
+        self.assertIsNone(snapshot.find("0000000000000000"))
+
+    def test_bank_on_snapshot_appends_new_questions(self):
+        """Test that a bank opened on a snapshot serves its rows and appends new ones after them."""
+        write_snapshot(self.bank, self.snapshot_dir)
+        path = os.path.join(self.tmp_dir.name, "bank.jsonl")
+        bank = QuestionBank(path, snapshot=open_snapshot(self.snapshot_dir))
+        self.assertEqual(len(bank), 3)
+        self.assertIn(make_item_id("mcq", "What is ML?"), bank)
+        self.assertIsNone(bank.add("mcq", "ML", "Easy", "not json"))
+        bank.add("mcq", "ML", "Easy", make_mcq("What is ML?", "Easy"))
+        new_id = bank.add("mcq", "Stats", "Expert", make_mcq("What is a prior?", "Expert"))
+        self.assertEqual(len(bank), 4)
+        self.assertEqual(bank.index_of(new_id), 3)
+        self.assertEqual(bank.topic(3), "Stats")
+        self.assertEqual(list(bank.columns()[2]), [2, 0, 1, 3])
+
+        reopened = QuestionBank(path, snapshot=open_snapshot(self.snapshot_dir))
+        self.assertEqual(len(reopened), 4)
+        self.assertEqual(reopened.item_id(3), new_id)
+
+    def test_bank_on_snapshot_parses_only_questions_added_after_the_export(self):
+        """Test that the part of the bank file covered by the snapshot is skipped at startup."""
+        path = os.path.join(self.tmp_dir.name, "bank.jsonl")
+        bank = QuestionBank(path)
+        for i in range(3):
+            bank.add("mcq", "ML", "Easy", make_mcq(f"Question {i}?", "Easy"))
+        write_snapshot(bank, self.snapshot_dir)
+        new_id = bank.add("mcq", "Stats", "Hard", make_mcq("What is a prior?", "Hard"))
+
+        with patch.object(QuestionBank, "_append", autospec=True, side_effect=QuestionBank._append) as append:
+            reopened = QuestionBank(path, snapshot=open_snapshot(self.snapshot_dir))
+        self.assertEqual(append.call_count, 1)
+        self.assertEqual((len(reopened), reopened.index_of(new_id)), (4, 3))
+
+    def test_bank_file_not_covered_by_the_snapshot_is_parsed_in_full(self):
+        """Test that a bank file other than the exported one is parsed from the start."""
+        path = os.path.join(self.tmp_dir.name, "bank.jsonl")
+        bank = QuestionBank(path)
+        bank.add("mcq", "ML", "Easy", make_mcq("What is ML?", "Easy"))
+        write_snapshot(bank, self.snapshot_dir)
+        os.remove(path)
+        other = QuestionBank(path)
+        for i in range(3):
+            other.add("mcq", "Stats", "Hard", make_mcq(f"Other question {i}?", "Hard"))
+
+        reopened = QuestionBank(path, snapshot=open_snapshot(self.snapshot_dir))
+        self.assertEqual(len(reopened), 4)
+
+    def test_invalid_questions_are_dropped(self):
+        """Test bulk validation, including the fallback for malformed JSON."""
+        bad_mcq = json.dumps({"question": "Missing fields"})
+        self.assertEqual(list(validate_payloads("mcq", [make_mcq("a"), bad_mcq, make_mcq("b")])),
+                         [True, False, True])
+        self.assertEqual(list(validate_payloads("mcq", [make_mcq("a"), '{"question": '])), [True, False])
+
+        self.bank.add("mcq", "ML", "Easy", bad_mcq)
+        self.assertEqual(write_snapshot(self.bank, self.snapshot_dir), {"exported": 3, "invalid": 1})
+
+    def test_import_merges_into_bank(self):
+        """Test that importing adds only questions the bank does not have."""
+        write_snapshot(self.bank, self.snapshot_dir)
+        target = QuestionBank()
+        target.add("mcq", "ML", "Easy", make_mcq("What is ML?", "Easy"))
+        stats = import_snapshot(BankSnapshot(self.snapshot_dir), target)
+        self.assertEqual(stats, {"added": 2, "duplicate": 1, "invalid": 0})
+        row = target.index_of(make_item_id("mcq", "Qué es SGD?"))
+        self.assertEqual(target.topic(row), "ML, Ünïcode")
+        self.assertEqual(target.columns()[2][row], 2)
+
+    def test_export_replaces_existing_snapshot(self):
+        """Test that exporting over a snapshot replaces it and leaves no temporary directories."""
+        write_snapshot(self.bank, self.snapshot_dir)
+        write_snapshot(QuestionBank(), self.snapshot_dir)
+        self.assertEqual(len(BankSnapshot(self.snapshot_dir)), 0)
+        self.assertEqual(os.listdir(self.tmp_dir.name), ["snapshot"])
+        self.assertIsNone(open_snapshot(os.path.join(self.tmp_dir.name, "missing")))
+
+
+if __name__ == "__main__":
+    unittest.main()
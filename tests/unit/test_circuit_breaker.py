@@ -0,0 +1,83 @@
+"""
+Unit tests for the circuit breaker utilities module.
+"""
+import unittest
+
+from src.utils.circuit_breaker import CircuitBreaker
+from src.utils.error_handlers import CircuitOpenError
+
+
+class FakeClock:
+    """Manually advanced time source."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def fail():
+    """Raise like an unavailable service."""
+    raise RuntimeError("service unavailable")
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    """Test cases for the circuit breaker state machine."""
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.breaker = CircuitBreaker(window_seconds=60, min_calls=4, failure_rate=0.5, slow_call_seconds=10,
+                                      open_seconds=30, clock=self.clock)
+
+    def test_opens_on_error_rate(self):
+        """Test that the breaker opens once enough calls fail and then rejects calls at once."""
+        self.assertEqual(self.breaker.call(lambda: "ok"), "ok")
+        self.assertEqual(self.breaker.call(lambda: "ok"), "ok")
+        with self.assertRaises(RuntimeError):
+            self.breaker.call(fail)
+        self.assertEqual(self.breaker.state, "closed")
+        with self.assertRaises(RuntimeError):
+            self.breaker.call(fail)
+        self.assertEqual(self.breaker.state, "open")
+        with self.assertRaises(CircuitOpenError):
+            self.breaker.call(lambda: "ok")
+        stats = self.breaker.stats()
+        self.assertEqual((stats["calls"], stats["failures"], stats["rejected"], stats["opened"]), (4, 2, 1, 1))
+
+    def test_slow_calls_count_as_failures(self):
+        """Test that successful calls slower than the threshold open the breaker."""
+        for _ in range(4):
+            self.breaker.record_success(12.0)
+        self.assertEqual(self.breaker.state, "open")
+        self.assertEqual(self.breaker.stats()["slow_calls"], 4)
+
+    def test_old_failures_leave_the_window(self):
+        """Test that only calls within the rolling window count."""
+        for _ in range(3):
+            self.breaker.record_failure()
+        self.clock.now += 61
+        self.breaker.record_failure()
+        self.breaker.record_success(0.1)
+        self.assertEqual(self.breaker.state, "closed")
+        self.assertEqual(self.breaker.stats()["window_calls"], 2)
+
+    def test_half_open_probe(self):
+        """Test that a single probe is let through after the cool-down, reopening or closing the breaker."""
+        for _ in range(4):
+            self.breaker.record_failure()
+        self.clock.now += 30
+        self.assertEqual(self.breaker.state, "half_open")
+        self.assertTrue(self.breaker.allow())
+        self.assertFalse(self.breaker.allow())
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, "open")
+
+        self.clock.now += 30
+        self.assertEqual(self.breaker.call(lambda: "recovered"), "recovered")
+        self.assertEqual(self.breaker.state, "closed")
+        self.assertEqual(self.breaker.stats()["window_calls"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
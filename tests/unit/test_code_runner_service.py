@@ -0,0 +1,124 @@
+"""
+Unit tests for the code runner service module.
+"""
+import os
+import time
+import unittest
+
+from src.services.code_runner_service import (
+    WarmInterpreterPool,
+    parse_examples,
+    parse_arguments,
+    find_entry_point,
+    run_tests
+)
+
+EXAMPLES = """Example 1:
+**Input:** `nums = [2, 7, 11, 15], target = 9`
+**Output:** `[0, 1]`
+Explanation: nums[0] + nums[1] == 9.
+
+Example 2:
+Input: nums = [3, 2, 4], target = 6
+Output: [1, 2]
+"""
+
+SOLUTION = """
+def two_sum(nums, target):
+    seen = {}
+    for i, n in enumerate(nums):
+        if target - n in seen:
+            return [seen[target - n], i]
+        seen[n] = i
+"""
+
+
+class TestCodeRunnerParsing(unittest.TestCase):
+    """Test cases for parsing examples and user code."""
+
+    def test_parse_examples(self):
+        """Test extracting input/output pairs from markdown examples."""
+        cases = parse_examples(EXAMPLES)
+        self.assertEqual(cases, [
+            {"input": "nums = [2, 7, 11, 15], target = 9", "expected": "[0, 1]"},
+            {"input": "nums = [3, 2, 4], target = 6", "expected": "[1, 2]"},
+        ])
+
+    def test_parse_arguments(self):
+        """Test splitting example inputs into argument sources."""
+        self.assertEqual(parse_arguments("[1, 2], 3"), (["[1, 2]", "3"], {}))
+        self.assertEqual(parse_arguments("s = 'abc', k = 2"), ([], {"s": "'abc'", "k": "2"}))
+        with self.assertRaises(ValueError):
+            parse_arguments("__import__('os')")
+        for malformed in ("1) + (2", "1), g(2", "**{'a': 1}"):
+            with self.assertRaises(ValueError):
+                parse_arguments(malformed)
+
+    def test_find_entry_point(self):
+        """Test locating the function or method to call."""
+        self.assertEqual(find_entry_point(SOLUTION), {"name": "two_sum"})
+        self.assertEqual(
+            find_entry_point("class Solution:\n    def solve(self, x):\n        return x\n"),
+            {"class": "Solution", "name": "solve"}
+        )
+        with self.assertRaises(ValueError):
+            find_entry_point("x = 1\n")
+
+
+class TestRunTests(unittest.TestCase):
+    """Test cases for running code in the sandbox."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.pool = WarmInterpreterPool(size=2)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.pool.close()
+
+    def test_passing_solution(self):
+        """Test that a correct solution passes every example."""
+        test_run = run_tests(SOLUTION, EXAMPLES, pool=self.pool)
+        self.assertIsNone(test_run["error"])
+        self.assertEqual([result["status"] for result in test_run["results"]], ["passed", "passed"])
+
+    def test_failing_solution(self):
+        """Test that wrong answers and exceptions are reported per case."""
+        code = "def two_sum(nums, target):\n    if target == 6:\n        raise ValueError('bad')\n    return [1, 0]\n"
+        results = run_tests(code, EXAMPLES, pool=self.pool)["results"]
+        self.assertEqual(results[0]["status"], "failed")
+        self.assertEqual(results[0]["actual"], "[1, 0]")
+        self.assertEqual(results[1]["status"], "error")
+        self.assertIn("ValueError", results[1]["error"])
+
+    def test_wall_clock_limit(self):
+        """Test that a case exceeding the wall-clock limit is stopped."""
+        code = "import time\ndef f(x):\n    time.sleep(30)\n"
+        results = run_tests(code, "Input: 1\nOutput: 1", wall_seconds=0.5, pool=self.pool)["results"]
+        self.assertEqual(results[0]["status"], "timeout")
+
+    @unittest.skipUnless(hasattr(os, "fork"), "requires os.fork")
+    def test_wall_clock_limit_stops_child_processes(self):
+        """Test that a child process holding the output pipe does not outlive the wall-clock limit."""
+        code = ("import os, time\ndef f(x):\n    try:\n        if os.fork() == 0:\n            time.sleep(30)\n"
+                "    except OSError:\n        pass\n    time.sleep(30)\n")
+        start = time.perf_counter()
+        results = run_tests(code, "Input: 1\nOutput: 1", wall_seconds=0.5, pool=self.pool)["results"]
+        self.assertEqual(results[0]["status"], "timeout")
+        self.assertLess(time.perf_counter() - start, 5)
+
+    @unittest.skipUnless(hasattr(os, "getuid") and os.getuid() == 0, "requires root")
+    def test_solutions_started_by_root_run_unprivileged(self):
+        """Test that submitted code does not run as root."""
+        code = "import os\ndef f(x):\n    return os.getuid()\n"
+        results = run_tests(code, "Input: 1\nOutput: 65534", pool=self.pool)["results"]
+        self.assertEqual(results[0]["status"], "passed")
+
+    def test_syntax_error(self):
+        """Test that syntax errors are reported without running anything."""
+        test_run = run_tests("def f(x) return x", EXAMPLES, pool=self.pool)
+        self.assertIn("Syntax error on line 1", test_run["error"])
+
+
+if __name__ == "__main__":
+    unittest.main()
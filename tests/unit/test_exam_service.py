@@ -0,0 +1,75 @@
+"""
+Unit tests for the exam service module.
+"""
+import json
+import time
+import threading
+import unittest
+
+from src.services.exam_service import Exam, MAX_EXAM_QUESTIONS
+
+
+def make_generator(delay=0.0, fail_topics=()):
+    """Build an MCQ generator whose correct answer is the topic number modulo 4."""
+    def generate(topic, difficulty):
+        time.sleep(delay)
+        if topic in fail_topics:
+            raise RuntimeError("model error")
+        number = int(topic.split()[-1])
+        return json.dumps({"question": f"Question on {topic}?", "options": ["a", "b", "c", "d"],
+                           "correct_answers": [number % 4], "explanation": "Because.", "difficulty": difficulty})
+    return generate
+
+
+class TestExam(unittest.TestCase):
+    """Test cases for concurrently generated exams."""
+
+    def test_questions_are_generated_concurrently(self):
+        """Test that an exam takes about as long as one question, not one wait per question."""
+        start = time.perf_counter()
+        exam = Exam([f"Topic {i}" for i in range(20)], "Easy", generate_func=make_generator(delay=0.2))
+        self.assertEqual(exam.question(19, timeout=None)["question"], "Question on Topic 19?")
+        for i in range(20):
+            exam.question(i, timeout=None)
+        self.assertLess(time.perf_counter() - start, 1.5)
+        self.assertEqual(exam.ready_count(), 20)
+
+    def test_questions_can_be_answered_as_they_arrive(self):
+        """Test that a ready question is available while another is still being generated."""
+        release = threading.Event()
+
+        def generate(topic, difficulty):
+            if topic == "Topic 1":
+                release.wait(5)
+            return make_generator()(topic, difficulty)
+        exam = Exam(["Topic 0", "Topic 1"], "Easy", generate_func=generate)
+        self.assertIsNotNone(exam.question(0, timeout=5))
+        self.assertIsNone(exam.question(1))
+        self.assertIsNone(exam.question(1, timeout=0.01))
+        self.assertEqual(exam.ready_count(), 1)
+        release.set()
+        self.assertIsNotNone(exam.question(1, timeout=5))
+
+    def test_score_counts_correct_and_unanswered_questions(self):
+        """Test scoring, leaving out questions that failed to generate."""
+        exam = Exam([f"Topic {i}" for i in range(4)], "Medium",
+                    generate_func=make_generator(fail_topics=("Topic 3",)))
+        exam.answer(0, [0])
+        exam.answer(1, [3])
+        exam.answer(1, [1])
+        result = exam.score()
+        self.assertEqual((result["correct"], result["answered"], result["total"]), (2, 2, 3))
+        self.assertEqual([row["index"] for row in result["results"]], [0, 1, 2])
+        self.assertFalse(result["results"][2]["answered"])
+        self.assertEqual(exam.question(3)["question"], "Error generating question.")
+
+    def test_exam_length_is_bounded(self):
+        """Test that empty and oversized exams are rejected."""
+        with self.assertRaises(ValueError):
+            Exam([], "Easy", generate_func=make_generator())
+        with self.assertRaises(ValueError):
+            Exam(["Topic 0"] * (MAX_EXAM_QUESTIONS + 1), "Easy", generate_func=make_generator())
+
+
+if __name__ == "__main__":
+    unittest.main()
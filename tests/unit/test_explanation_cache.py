@@ -0,0 +1,57 @@
+"""
+Unit tests for the explanation cache module.
+"""
+import threading
+import unittest
+
+from src.services.explanation_cache import ExplanationCache
+
+
+class TestExplanationCache(unittest.TestCase):
+    """Test cases for the cache of background explanation generations."""
+
+    def test_generation_is_shared_by_key(self):
+        """Test that requests for the same question share one background generation."""
+        cache = ExplanationCache()
+        calls = []
+        release = threading.Event()
+
+        def explain(text):
+            calls.append(text)
+            release.wait(5)
+            return f"Because {text}"
+        first = cache.get_or_submit(("mcq", "Q1"), explain, "one")
+        second = cache.get_or_submit(("mcq", "Q1"), explain, "one")
+        self.assertIs(first, second)
+        self.assertEqual(cache.get_stats()["pending"], 1)
+        release.set()
+        self.assertEqual(first.result(timeout=5), "Because one")
+        self.assertEqual(calls, ["one"])
+        self.assertEqual(cache.get_stats()["hits"], 1)
+
+    def test_failed_generation_is_retried(self):
+        """Test that a failed generation is replaced by a new one on the next request."""
+        cache = ExplanationCache()
+        outcomes = [ValueError("model error"), "Because"]
+
+        def explain():
+            outcome = outcomes.pop(0)
+            if isinstance(outcome, Exception):
+                raise outcome
+            return outcome
+        with self.assertRaises(ValueError):
+            cache.get_or_submit(("mcq", "Q1"), explain).result(timeout=5)
+        self.assertEqual(cache.get_or_submit(("mcq", "Q1"), explain).result(timeout=5), "Because")
+
+    def test_least_recently_used_entries_are_evicted(self):
+        """Test that the cache keeps at most max_entries explanations."""
+        cache = ExplanationCache(max_entries=2)
+        for key in ("Q1", "Q2", "Q3"):
+            cache.get_or_submit(("mcq", key), str, key).result(timeout=5)
+        self.assertIsNone(cache.get(("mcq", "Q1")))
+        self.assertEqual(cache.get(("mcq", "Q3")).result(), "Q3")
+        self.assertEqual(cache.get_stats()["evictions"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,99 @@
+"""
+Unit tests for the request hedging module.
+"""
+import threading
+import unittest
+
+from src.services.hedging import RequestHedger
+
+
+class TestRequestHedger(unittest.TestCase):
+    """Test cases for hedged calls, the hedge rate cap and latency stats."""
+
+    def setUp(self):
+        self.hedger = RequestHedger(percentile=0.9, max_hedge_rate=0.5, min_samples=5, min_deadline=0.01)
+        self.release = threading.Event()
+
+    def tearDown(self):
+        self.release.set()
+        self.hedger.shutdown()
+
+    def warm_up(self, key="mcq", calls=5):
+        """Make fast calls so the key has a deadline."""
+        for _ in range(calls):
+            self.hedger.call(key, lambda: "fast")
+
+    def slow_then_fast(self):
+        """Build a request that hangs on its first call and returns at once afterwards."""
+        calls = []
+
+        def request():
+            calls.append(None)
+            if len(calls) == 1:
+                self.release.wait(5)
+                return "slow"
+            return "hedge"
+        return request
+
+    def test_no_hedging_before_enough_samples(self):
+        """Test that calls are not hedged until the key has a deadline."""
+        self.assertIsNone(self.hedger.deadline("mcq"))
+        self.assertEqual(self.hedger.call("mcq", lambda: "result"), "result")
+        self.assertEqual(self.hedger.stats()["mcq"]["hedges"], 0)
+
+    def test_slow_request_is_hedged(self):
+        """Test that a request slower than the deadline is hedged and the hedge wins."""
+        self.warm_up()
+        self.assertEqual(self.hedger.call("mcq", self.slow_then_fast()), "hedge")
+        stats = self.hedger.stats()["mcq"]
+        self.assertEqual((stats["calls"], stats["hedges"], stats["hedge_wins"]), (6, 1, 1))
+        self.assertLess(stats["effective_p99"], 5)
+
+    def test_hedge_uses_fallback_request(self):
+        """Test that the hedge runs hedge_func instead of repeating the request."""
+        self.warm_up()
+        result = self.hedger.call("mcq", lambda: self.release.wait(5) and "slow", hedge_func=lambda: "fallback")
+        self.assertEqual(result, "fallback")
+
+    def test_hedge_rate_is_capped(self):
+        """Test that no more than max_hedge_rate of recent calls are hedged."""
+        self.warm_up()
+        self.hedger.max_hedge_rate = 0.0
+        threading.Timer(0.2, self.release.set).start()
+        self.assertEqual(self.hedger.call("mcq", self.slow_then_fast()), "slow")
+        stats = self.hedger.stats()["mcq"]
+        self.assertEqual((stats["hedges"], stats["capped"], stats["hedge_rate"]), (0, 1, 0.0))
+
+    def test_invalid_result_does_not_win(self):
+        """Test that an invalid first result waits for the other request."""
+        self.warm_up()
+        outcomes = iter([None, "valid"])
+
+        def request():
+            outcome = next(outcomes)
+            if outcome is None:
+                self.release.wait(0.3)
+            return outcome
+        self.assertEqual(self.hedger.call("mcq", request, is_valid=lambda r: r is not None), "valid")
+
+    def test_failures_propagate(self):
+        """Test that the exception is raised when every request fails."""
+        def fail():
+            raise RuntimeError("down")
+        with self.assertRaises(RuntimeError):
+            self.hedger.call("mcq", fail)
+
+    def test_shutdown_cancels_queued_requests(self):
+        """Test that shutdown cancels requests still waiting for a worker."""
+        hedger = RequestHedger(max_workers=1)
+        running = hedger._submit(lambda: self.release.wait(5))
+        queued = hedger._submit(lambda: "queued")
+        hedger.shutdown()
+        self.assertTrue(queued.cancelled())
+        self.release.set()
+        self.assertTrue(running.result(timeout=5))
+        self.assertEqual(hedger._futures, set())
+
+
+if __name__ == "__main__":
+    unittest.main()
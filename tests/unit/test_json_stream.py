@@ -0,0 +1,65 @@
+"""
+Unit tests for the JSON stream utilities module.
+"""
+import json
+import unittest
+
+from src.utils.json_stream import IncrementalJSONParser
+
+
+class TestIncrementalJSONParser(unittest.TestCase):
+    """Test cases for the incremental JSON parser."""
+
+    DOCUMENT = {
+        "question": 'Which "quoted" text, with {braces} and [brackets], is \\ escaped?',
+        "options": ["a, b", "c: d", "été", "}"],
+        "correct_answers": [0, 2],
+        "meta": {"nested": [1, {"deep": True}], "empty": {}},
+        "explanation": "Line one\nLine two",
+    }
+
+    def test_fields_are_emitted_as_they_complete(self):
+        """Test that each field is emitted by the chunk that completes it, in order."""
+        parser = IncrementalJSONParser()
+        self.assertEqual(parser.feed('{"question": "Why?", "opt'), [("question", "Why?")])
+        self.assertEqual(parser.feed('ions": ["A", "B"]'), [])
+        self.assertEqual(parser.feed(', "correct_answers": [1], "explanation": "Because'), [
+            ("options", ["A", "B"]), ("correct_answers", [1])])
+        self.assertFalse(parser.done)
+        self.assertEqual(parser.feed('."}'), [("explanation", "Because.")])
+        self.assertTrue(parser.done)
+
+    def test_any_chunk_boundary_gives_the_same_fields(self):
+        """Test that escapes, separators in strings and nested values survive every split."""
+        text = json.dumps(self.DOCUMENT, ensure_ascii=False)
+        for size in (1, 2, 3, 7, len(text)):
+            parser = IncrementalJSONParser()
+            emitted = []
+            for i in range(0, len(text), size):
+                emitted.extend(parser.feed(text[i:i + size]))
+            self.assertEqual(emitted, list(self.DOCUMENT.items()))
+            self.assertEqual(parser.fields, self.DOCUMENT)
+
+    def test_empty_object_and_trailing_text(self):
+        """Test an empty object, and that text after the object is ignored."""
+        parser = IncrementalJSONParser()
+        self.assertEqual(parser.feed(' {} '), [])
+        self.assertTrue(parser.done)
+        self.assertEqual(parser.feed('{"a": 1}'), [])
+
+    def test_reset_starts_a_new_object(self):
+        """Test that reset discards a partial object."""
+        parser = IncrementalJSONParser()
+        parser.feed('{"question": "Cut off", "options": ["A"')
+        parser.reset()
+        self.assertEqual(parser.feed('{"question": "Again"}'), [("question", "Again")])
+        self.assertEqual(parser.fields, {"question": "Again"})
+
+    def test_invalid_field_raises(self):
+        """Test that a malformed field value raises ValueError."""
+        with self.assertRaises(ValueError):
+            IncrementalJSONParser().feed('{"question": tru, ')
+
+
+if __name__ == "__main__":
+    unittest.main()
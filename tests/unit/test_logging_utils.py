@@ -0,0 +1,125 @@
+"""
+Unit tests for the logging utilities module.
+"""
+import os
+import json
+import logging
+import tempfile
+import unittest
+
+from src.utils.logging_utils import (
+    LOG_FILE_NAME,
+    RotatingLogFileHandler,
+    JsonLinesFormatter,
+    DebugSamplingFilter,
+    setup_logging,
+    shutdown_logging
+)
+
+
+def make_record(message="message", level=logging.INFO, lineno=1, created=None):
+    """Create a log record, optionally with a given creation time."""
+    record = logging.LogRecord("test", level, "test.py", lineno, message, None, None)
+    if created is not None:
+        record.created = created
+    return record
+
+
+class TestRotatingLogFileHandler(unittest.TestCase):
+    """Test cases for size- and time-based rotation."""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, "app.log")
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_rotates_by_size(self):
+        """Test that the file is rotated before it would exceed the maximum size."""
+        handler = RotatingLogFileHandler(self.path, max_bytes=100, backup_count=2)
+        for i in range(10):
+            handler.emit(make_record(f"line {i} " + "x" * 30))
+        handler.close()
+        self.assertTrue(os.path.exists(self.path + ".1"))
+        self.assertTrue(os.path.exists(self.path + ".2"))
+        self.assertFalse(os.path.exists(self.path + ".3"))
+        self.assertLessEqual(os.path.getsize(self.path), 100)
+
+    def test_rotates_when_period_ends(self):
+        """Test that a record from a later period starts a new file."""
+        handler = RotatingLogFileHandler(self.path, rotate_seconds=60, backup_count=1)
+        now = handler._period * 60 + 1
+        handler.emit(make_record("first", created=now))
+        handler.emit(make_record("second", created=now + 120))
+        handler.close()
+        with open(self.path + ".1", encoding="utf-8") as f:
+            self.assertEqual(f.read(), "first\n")
+        with open(self.path, encoding="utf-8") as f:
+            self.assertEqual(f.read(), "second\n")
+
+    def test_restart_rotates_file_from_earlier_period(self):
+        """Test that a file last written in an earlier period is rotated on the first record."""
+        with open(self.path, "w", encoding="utf-8") as f:
+            f.write("old\n")
+        os.utime(self.path, (0, 0))
+        handler = RotatingLogFileHandler(self.path, rotate_seconds=60, backup_count=1)
+        handler.emit(make_record("new"))
+        handler.close()
+        with open(self.path + ".1", encoding="utf-8") as f:
+            self.assertEqual(f.read(), "old\n")
+
+
+class TestFormattingAndSampling(unittest.TestCase):
+    """Test cases for JSON lines output and debug sampling."""
+
+    def test_json_lines_formatter(self):
+        """Test that records are formatted as single-line JSON objects."""
+        line = JsonLinesFormatter().format(make_record("multi\nline ∑", level=logging.WARNING))
+        self.assertNotIn("\n", line)
+        entry = json.loads(line)
+        self.assertEqual(entry["message"], "multi\nline ∑")
+        self.assertEqual(entry["level"], "WARNING")
+        self.assertEqual(entry["logger"], "test")
+
+    def test_debug_sampling_per_call_site(self):
+        """Test that a fraction of DEBUG records is kept per call site and other levels always pass."""
+        sampler = DebugSamplingFilter(0.25)
+        kept = [sampler.filter(make_record(level=logging.DEBUG, lineno=1)) for _ in range(8)]
+        self.assertEqual(kept, [True, False, False, False, True, False, False, False])
+        self.assertTrue(sampler.filter(make_record(level=logging.DEBUG, lineno=2)))
+        self.assertTrue(all(sampler.filter(make_record(level=logging.INFO)) for _ in range(4)))
+        self.assertFalse(DebugSamplingFilter(0).filter(make_record(level=logging.DEBUG)))
+
+
+class TestSetupLogging(unittest.TestCase):
+    """Test cases for the queue-based logging setup."""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.root_level = logging.getLogger().level
+        self.settings = {
+            "level": "INFO", "json_format": True, "max_bytes": 0,
+            "rotate_seconds": 0, "backup_count": 0, "debug_sample_rate": 1.0,
+        }
+
+    def tearDown(self):
+        shutdown_logging()
+        logging.getLogger().setLevel(self.root_level)
+        self.tmp_dir.cleanup()
+
+    def test_records_are_written_by_listener(self):
+        """Test that records reach the stable log file once the queue is drained."""
+        setup_logging(log_dir=self.tmp_dir.name, settings=self.settings)
+        # A second call, as on every rerun, must not add another handler
+        setup_logging(log_dir=self.tmp_dir.name, settings=self.settings)
+        logging.getLogger("src.services.topic_service").info("Processing: raw.txt")
+        shutdown_logging()
+
+        with open(os.path.join(self.tmp_dir.name, LOG_FILE_NAME), encoding="utf-8") as f:
+            messages = [json.loads(line)["message"] for line in f]
+        self.assertEqual(messages, ["DeepMindset.ai application started", "Processing: raw.txt"])
+
+
+if __name__ == "__main__":
+    unittest.main()
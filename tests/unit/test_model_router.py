@@ -0,0 +1,104 @@
+"""
+Unit tests for the model router module.
+"""
+import os
+import json
+import tempfile
+import unittest
+
+from src.services.llm_backend import LLMResponse, OfflineBackend, set_llm_backend
+from src.services.model_router import ModelRouter, load_routing_policy, set_model_router
+from src.services.question_bank import QuestionBank, set_question_bank
+from src.services.question_service import generate_coding_question, generate_mcq_question
+from src.utils.error_handlers import CircuitOpenError
+
+POLICY = {
+    "mcq:Easy": ["fast", "strong"],
+    "mcq:*": ["strong"],
+    "*": ["default"],
+}
+
+
+class ModelRecordingBackend(OfflineBackend):
+    """Offline backend recording the model of every request."""
+
+    def __init__(self):
+        super().__init__()
+        self.models = []
+
+    def parse(self, messages, response_format, max_completion_tokens, model=None, temperature=0.7):
+        self.models.append(model)
+        return super().parse(messages, response_format, max_completion_tokens, model=model)
+
+
+class TestModelRouter(unittest.TestCase):
+    """Test cases for policy lookup, automatic selection and route stats."""
+
+    def test_policy_lookup(self):
+        """Test that the most specific route wins and its first candidate is used by default."""
+        router = ModelRouter(POLICY)
+        self.assertEqual(router.route("mcq", "Easy"), "mcq:Easy")
+        self.assertEqual(router.route("mcq", "Hard"), "mcq:*")
+        self.assertEqual(router.route("answer"), "*")
+        self.assertEqual(router.select("mcq", "Easy"), "fast")
+        self.assertEqual(router.select("coding", "Expert"), "default")
+
+    def test_automatic_selection(self):
+        """Test that automatic mode measures every candidate, then prefers the better one."""
+        router = ModelRouter(POLICY, auto=True, min_samples=2, explore_rate=0.0)
+        for latency, model in ((0.5, "fast"), (0.5, "fast"), (2.0, "strong")):
+            self.assertEqual(router.select("mcq", "Easy"), model)
+            router.record("mcq", "Easy", model, latency, completion_tokens=300)
+        router.record("mcq", "Easy", "strong", 2.0, completion_tokens=300)
+        self.assertEqual(router.select("mcq", "Easy"), "fast")
+
+        for _ in range(10):
+            router.record("mcq", "Easy", "fast", 0.5, ok=False)
+        self.assertEqual(router.select("mcq", "Easy"), "strong")
+        stats = router.stats()["mcq:Easy"]
+        self.assertEqual(stats["candidates"], ["fast", "strong"])
+        self.assertEqual((stats["models"]["fast"]["calls"], stats["models"]["fast"]["failures"]), (12, 10))
+
+    def test_call_records_outcomes(self):
+        """Test that call records failures and invalid responses, but not breaker rejections."""
+        router = ModelRouter(POLICY)
+        response = router.call("mcq", "Easy", "fast", lambda m: LLMResponse("{}", completion_tokens=50, model=m),
+                               is_valid=lambda r: False)
+        self.assertEqual(response.model, "fast")
+        for error in (RuntimeError("down"), CircuitOpenError("open")):
+            with self.assertRaises(type(error)):
+                router.call("mcq", "Easy", "fast", lambda m: (_ for _ in ()).throw(error))
+        stats = router.stats()["mcq:Easy"]["models"]["fast"]
+        self.assertEqual((stats["calls"], stats["failures"], stats["completion_tokens"]), (2, 2, 50))
+
+    def test_load_policy(self):
+        """Test loading a policy file, rejecting malformed ones."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "policy.json")
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(POLICY, f)
+            self.assertEqual(load_routing_policy(path), POLICY)
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump({"mcq:*": "strong"}, f)
+            self.assertIsNone(load_routing_policy(path))
+            self.assertIsNone(load_routing_policy(os.path.join(directory, "missing.json")))
+
+    def test_question_service_uses_routed_model(self):
+        """Test that question generation sends each request to the model of its route."""
+        backend = ModelRecordingBackend()
+        set_llm_backend(backend)
+        set_question_bank(QuestionBank())
+        set_model_router(ModelRouter(POLICY))
+        try:
+            generate_mcq_question("Calculus", "Easy")
+            generate_mcq_question("Calculus", "Hard")
+            generate_coding_question(None, "Expert")
+        finally:
+            set_llm_backend(None)
+            set_question_bank(None)
+            set_model_router(None)
+        self.assertEqual(backend.models, ["fast", "strong", "default"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,76 @@
+"""
+Unit tests for the prefetch service module.
+"""
+import threading
+import unittest
+from concurrent.futures import Future
+from unittest.mock import patch
+
+from src.services.prefetch_service import SpeculativePrefetch
+
+
+class TestSpeculativePrefetch(unittest.TestCase):
+    """Test cases for the speculative prefetch slot."""
+
+    def test_take_returns_result_for_matching_key(self):
+        """Test that a completed prefetch is consumed for the same key."""
+        prefetch = SpeculativePrefetch()
+        prefetch.schedule(("Easy", False, None), lambda: ("Topic", "{}"))
+        prefetch.future.result(timeout=5)
+        self.assertEqual(prefetch.take(("Easy", False, None)), ("Topic", "{}"))
+        # A prefetch can only be consumed once
+        self.assertIsNone(prefetch.take(("Easy", False, None)))
+
+    def test_take_discards_result_for_other_key(self):
+        """Test that a prefetch generated for other settings is discarded."""
+        prefetch = SpeculativePrefetch()
+        prefetch.schedule(("Easy", False, None), lambda: ("Topic", "{}"))
+        self.assertIsNone(prefetch.take(("Hard", False, None)))
+        self.assertIsNone(prefetch.future)
+
+    def test_schedule_is_idempotent_for_same_key(self):
+        """Test that rescheduling with the same key keeps the pending prefetch."""
+        with patch("src.services.prefetch_service.submit_task", return_value=Future()) as mock_submit:
+            prefetch = SpeculativePrefetch()
+            prefetch.schedule(("Easy", True, "Topic"), print)
+            prefetch.schedule(("Easy", True, "Topic"), print)
+            self.assertEqual(mock_submit.call_count, 1)
+
+    def test_schedule_replaces_prefetch_when_settings_change(self):
+        """Test that a queued prefetch is cancelled when the settings change."""
+        with patch("src.services.prefetch_service.submit_task", side_effect=[Future(), Future()]):
+            prefetch = SpeculativePrefetch()
+            prefetch.schedule(("Easy", False, None), print)
+            first = prefetch.future
+            prefetch.schedule(("Medium", False, None), print)
+            self.assertTrue(first.cancelled())
+            self.assertEqual(prefetch.key, ("Medium", False, None))
+
+    def test_take_waits_for_running_prefetch(self):
+        """Test that a prefetch already being generated is waited for."""
+        started = threading.Event()
+        release = threading.Event()
+
+        def slow_generation():
+            started.set()
+            release.wait(5)
+            return "done"
+
+        prefetch = SpeculativePrefetch()
+        prefetch.schedule(("Easy", False, None), slow_generation)
+        self.assertTrue(started.wait(5))
+        threading.Timer(0.05, release.set).start()
+        self.assertEqual(prefetch.take(("Easy", False, None), timeout=5), "done")
+
+    def test_take_returns_none_on_failure(self):
+        """Test that a failed prefetch falls back to inline generation."""
+        def failing_generation():
+            raise RuntimeError("boom")
+
+        prefetch = SpeculativePrefetch()
+        prefetch.schedule(("Easy", False, None), failing_generation)
+        self.assertIsNone(prefetch.take(("Easy", False, None), timeout=5))
+
+
+if __name__ == "__main__":
+    unittest.main()
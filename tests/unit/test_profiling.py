@@ -0,0 +1,136 @@
+"""
+Unit tests for the profiling module.
+"""
+import os
+import time
+import pstats
+import tempfile
+import threading
+import unittest
+
+from src.utils.profiling import (
+    Profiler,
+    StackSampler,
+    profile_rerun,
+    profile_service_call,
+    set_profiler
+)
+
+
+def busy_work(seconds=0.05):
+    """Spin the CPU for a while so samplers have something to record."""
+    deadline = time.perf_counter() + seconds
+    total = 0
+    while time.perf_counter() < deadline:
+        total += sum(range(100))
+    return total
+
+
+class TestProfiler(unittest.TestCase):
+    """Test cases for selecting, writing and rotating profiles."""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.settings = {
+            "enabled": True, "services": False, "mode": "cprofile", "directory": self.tmp_dir.name,
+            "admin_token": "secret", "sample_rate": 1.0, "max_files": 3,
+        }
+
+    def tearDown(self):
+        set_profiler(None)
+        self.tmp_dir.cleanup()
+
+    def use_profiler(self, **overrides):
+        self.settings.update(overrides)
+        profiler = Profiler(self.settings)
+        set_profiler(profiler)
+        return profiler
+
+    def wait_for_files(self, count):
+        """Wait until the background writer has produced the given number of files."""
+        for _ in range(200):
+            files = sorted(os.listdir(self.tmp_dir.name))
+            if len(files) >= count:
+                return files
+            time.sleep(0.01)
+        return sorted(os.listdir(self.tmp_dir.name))
+
+    def test_sampled_rerun_writes_cprofile_stats(self):
+        """Test that a sampled rerun produces a .prof file readable by pstats."""
+        self.use_profiler()
+        with profile_rerun() as active:
+            busy_work()
+        self.assertTrue(active)
+        files = self.wait_for_files(1)
+        self.assertEqual(len(files), 1)
+        self.assertTrue(files[0].endswith(".prof"))
+        stats = pstats.Stats(os.path.join(self.tmp_dir.name, files[0]))
+        self.assertTrue(any(function[2] == "busy_work" for function in stats.stats))
+
+    def test_unsampled_rerun_is_not_profiled(self):
+        """Test that a zero sample rate profiles nothing."""
+        self.use_profiler(sample_rate=0.0)
+        with profile_rerun() as active:
+            pass
+        self.assertFalse(active)
+        self.assertEqual(os.listdir(self.tmp_dir.name), [])
+
+    def test_admin_token_forces_profile(self):
+        """Test that only the configured admin token forces profiling when sampling is off."""
+        profiler = self.use_profiler(enabled=False)
+        self.assertTrue(profiler.should_profile("secret"))
+        self.assertFalse(profiler.should_profile("wrong"))
+        self.assertFalse(profiler.should_profile(None))
+
+    def test_nested_service_call_is_not_profiled_separately(self):
+        """Test that service calls inside a profiled rerun do not start a second profile."""
+        self.use_profiler(services=True)
+
+        @profile_service_call
+        def service():
+            return busy_work(0.01)
+
+        with profile_rerun():
+            service()
+        service()
+        files = self.wait_for_files(2)
+        self.assertEqual(len(files), 2)
+        self.assertEqual(sum("_rerun_" in name for name in files), 1)
+        self.assertEqual(sum("_service_" in name for name in files), 1)
+
+    def test_rotation_keeps_newest_files(self):
+        """Test that only the configured number of profile files is kept."""
+        profiler = self.use_profiler(max_files=2)
+        for i in range(4):
+            path = os.path.join(self.tmp_dir.name, f"profile_{i}.prof")
+            with open(path, "w") as f:
+                f.write("x")
+            os.utime(path, ns=(i * 10 ** 9, i * 10 ** 9))
+        with open(os.path.join(self.tmp_dir.name, "notes.txt"), "w") as f:
+            f.write("kept")
+        profiler.rotate()
+        self.assertEqual(sorted(os.listdir(self.tmp_dir.name)), ["notes.txt", "profile_2.prof", "profile_3.prof"])
+
+    def test_stack_sampler_mode(self):
+        """Test that sampling mode writes folded stacks including the profiled function."""
+        self.use_profiler(mode="sample")
+        with profile_rerun():
+            busy_work(0.1)
+        files = self.wait_for_files(1)
+        self.assertTrue(files[0].endswith(".folded"))
+        with open(os.path.join(self.tmp_dir.name, files[0]), encoding="utf-8") as f:
+            content = f.read()
+        self.assertIn("busy_work", content)
+
+    def test_stack_sampler_counts(self):
+        """Test that each folded line ends with a positive sample count."""
+        sampler = StackSampler(threading.get_ident(), interval=0.001)
+        sampler.enable()
+        busy_work(0.05)
+        sampler.disable()
+        self.assertTrue(sampler.stacks)
+        self.assertTrue(all(count > 0 for count in sampler.stacks.values()))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -3,16 +3,38 @@ Unit tests for the question service module.
 """
 import unittest
 import json
+import threading
 from unittest.mock import patch, MagicMock
 
-from src.services.question_service import generate_mcq_question, generate_subjective_question
+from src.services.llm_backend import OfflineBackend, set_llm_backend
+from src.services.question_bank import QuestionBank, set_question_bank
+from src.utils.circuit_breaker import CircuitBreaker, set_circuit_breaker
+from src.services.question_service import (
+    generate_mcq_question, generate_subjective_question, generate_coding_question, request_explanation
+)
+from src.services.explanation_cache import explanation_cache
+from src.services.question_stream import QuestionStream
+from src.models.question_models import MCQFormat, SubjectiveQuestionFormat, CodingQuestionFormat
 from src.utils.error_handlers import QuestionGenerationError
+from src.utils import thread_manager
 
 
+@patch.dict("os.environ", {"LLM_BACKEND": "openai", "OPENAI_API_KEY": "test-key"})
 class TestQuestionService(unittest.TestCase):
     """Test cases for the question service module."""
 
-    @patch("src.services.question_service.OpenAI")
+    def setUp(self):
+        # Re-create the backend so each test gets a client from the patched OpenAI class
+        set_llm_backend(None)
+        set_question_bank(QuestionBank())
+        set_circuit_breaker(None)
+
+    def tearDown(self):
+        set_llm_backend(None)
+        set_question_bank(None)
+        set_circuit_breaker(None)
+
+    @patch("src.services.llm_backend.OpenAI")
     @patch("src.services.question_service.build_mcq_question_generation_prompt")
     def test_generate_mcq_question_success(self, mock_build_prompt, mock_openai):
         """Test generating an MCQ question successfully."""
@@ -52,7 +74,7 @@ class TestQuestionService(unittest.TestCase):
         # Verify that the OpenAI client was called correctly
         mock_client.beta.chat.completions.parse.assert_called_once()
 
-    @patch("src.services.question_service.OpenAI")
+    @patch("src.services.llm_backend.OpenAI")
     @patch("src.services.question_service.build_mcq_question_generation_prompt")
     def test_generate_mcq_question_error(self, mock_build_prompt, mock_openai):
         """Test handling an error when generating an MCQ question."""
@@ -77,7 +99,7 @@ class TestQuestionService(unittest.TestCase):
         self.assertEqual(result_json["explanation"], "Test error")
         self.assertEqual(result_json["difficulty"], "Easy")
 
-    @patch("src.services.question_service.OpenAI")
+    @patch("src.services.llm_backend.OpenAI")
     @patch("src.services.question_service.build_subjective_question_generation_prompt")
     def test_generate_subjective_question_success(self, mock_build_prompt, mock_openai):
         """Test generating a subjective question successfully."""
@@ -113,7 +135,7 @@ class TestQuestionService(unittest.TestCase):
         # Verify that the OpenAI client was called correctly
         mock_client.beta.chat.completions.parse.assert_called_once()
 
-    @patch("src.services.question_service.OpenAI")
+    @patch("src.services.llm_backend.OpenAI")
     @patch("src.services.question_service.build_subjective_question_generation_prompt")
     def test_generate_subjective_question_error(self, mock_build_prompt, mock_openai):
         """Test handling an error when generating a subjective question."""
@@ -136,6 +158,156 @@ class TestQuestionService(unittest.TestCase):
         self.assertEqual(result_json["explanation"], "Test error")
         self.assertEqual(result_json["difficulty"], "Easy")
 
+    @patch("src.services.question_service.token_budget")
+    @patch("src.services.llm_backend.OpenAI")
+    @patch("src.services.question_service.build_mcq_question_generation_prompt")
+    def test_generate_mcq_question_retries_on_length(self, mock_build_prompt, mock_openai, mock_budget):
+        """Test that a truncated completion is retried with a larger token limit."""
+        mock_build_prompt.return_value = "test prompt"
+        mock_budget.get_limit.return_value = 400
+        mock_budget.get_retry_limit.return_value = 800
+        
+        mock_client = MagicMock()
+        mock_openai.return_value = mock_client
+        
+        # First response is truncated, the second finishes normally
+        truncated_response = MagicMock()
+        truncated_response.choices[0].finish_reason = "length"
+        complete_response = MagicMock()
+        complete_response.choices[0].finish_reason = "stop"
+        complete_response.choices[0].message.content = json.dumps({
+            "question": "Test question?", "options": ["A", "B", "C", "D"], "correct_answers": [0],
+            "explanation": "A is correct", "difficulty": "Easy"
+        })
+        complete_response.usage.completion_tokens = 500
+        mock_client.beta.chat.completions.parse.side_effect = [truncated_response, complete_response]
+        
+        result = generate_mcq_question("Test Topic", "Easy")
+        
+        self.assertEqual(json.loads(result)["question"], "Test question?")
+        limits = [call.kwargs["max_completion_tokens"]
+                  for call in mock_client.beta.chat.completions.parse.call_args_list]
+        self.assertEqual(limits, [400, 800])
+        mock_budget.record_truncation.assert_called_once_with("mcq", "Easy")
+        mock_budget.record.assert_called_once_with("mcq", "Easy", 500)
+
+
+class TestQuestionServiceOffline(unittest.TestCase):
+    """Test cases for question generation through the offline backend."""
+
+    def setUp(self):
+        set_llm_backend(OfflineBackend())
+        self.bank = QuestionBank()
+        set_question_bank(self.bank)
+        set_circuit_breaker(None)
+
+    def tearDown(self):
+        set_llm_backend(None)
+        set_question_bank(None)
+        set_circuit_breaker(None)
+
+    def test_offline_questions_match_schemas(self):
+        """Test that the offline backend returns schema-valid questions."""
+        mcq = MCQFormat.model_validate_json(generate_mcq_question("Calculus, chain rule", "Hard"))
+        self.assertEqual(mcq.difficulty, "Hard")
+        self.assertIn("Calculus, chain rule", mcq.question)
+        self.assertTrue(all(0 <= i < len(mcq.options) for i in mcq.correct_answers))
+        
+        subjective = SubjectiveQuestionFormat.model_validate_json(generate_subjective_question("Calculus", "Easy"))
+        self.assertEqual(subjective.difficulty, "Easy")
+        
+        coding = CodingQuestionFormat.model_validate_json(generate_coding_question(None, "Expert"))
+        self.assertEqual(coding.language, "python")
+
+    def test_offline_questions_are_deterministic(self):
+        """Test that identical requests produce identical questions."""
+        self.assertEqual(generate_mcq_question("Calculus", "Easy"), generate_mcq_question("Calculus", "Easy"))
+        self.assertNotEqual(generate_mcq_question("Calculus", "Easy"), generate_mcq_question("Algebra", "Easy"))
+
+    def test_generated_questions_are_stored_in_bank(self):
+        """Test that successful questions are added to the question bank once."""
+        generate_mcq_question("Calculus", "Easy")
+        generate_mcq_question("Calculus", "Easy")
+        generate_coding_question(None, "Hard")
+        self.assertEqual(len(self.bank), 2)
+        types, _, levels = self.bank.columns()
+        self.assertEqual(list(types), [0, 2])
+        self.assertEqual(list(levels), [0, 2])
+        self.assertEqual(self.bank.topic(0), "Calculus")
+
+    def test_open_breaker_serves_stored_questions(self):
+        """Test that an open breaker serves a stored question of a nearby topic, then recovers."""
+        stored = generate_mcq_question("Calculus, Derivatives", "Medium")
+        generate_mcq_question("Algebra", "Medium")
+        now = [0.0]
+        breaker = CircuitBreaker(min_calls=1, open_seconds=30, clock=lambda: now[0])
+        breaker.record_failure()
+        set_circuit_breaker(breaker)
+
+        self.assertEqual(generate_mcq_question("Calculus, Limits", "Hard"), stored)
+        self.assertEqual(json.loads(generate_mcq_question("Biology", "Hard"))["question"], "Error generating question.")
+        self.assertEqual(len(self.bank), 2)
+
+        now[0] = 31.0
+        self.assertNotEqual(generate_mcq_question("Calculus, Limits", "Hard"), stored)
+        self.assertEqual(breaker.state, "closed")
+        self.assertEqual(len(self.bank), 3)
+
+    def test_streamed_fields_arrive_before_the_question_is_finished(self):
+        """Test that streamed fields are passed on in order and match the finished question."""
+        streamed = []
+        result = generate_mcq_question("Calculus", "Easy", on_field=lambda name, value: streamed.append((name, value)))
+        self.assertEqual([name for name, _ in streamed],
+                         ["question", "options", "correct_answers", "explanation", "difficulty"])
+        self.assertEqual(dict(streamed), json.loads(result))
+        self.assertEqual(result, generate_mcq_question("Calculus", "Easy"))
+
+    def test_question_stream_shows_fields_before_the_explanation(self):
+        """Test that a question stream hands out the stem while generation is still running."""
+        set_llm_backend(OfflineBackend(latency_ms=300))
+        stream = QuestionStream(generate_mcq_question, "Calculus", "Easy")
+        fields = stream.wait_for(("question", "options", "correct_answers"))
+        self.assertFalse(stream.done())
+        self.assertNotIn("explanation", fields)
+        self.assertEqual(fields["difficulty"], "Easy")
+        question = stream.result()
+        self.assertEqual(question["options"], fields["options"])
+        self.assertIn("explanation", question)
+
+    @patch.dict("os.environ", {"WORKER_POOL_MIN": "1", "WORKER_POOL_MAX": "1"})
+    def test_question_stream_does_not_wait_for_background_tasks(self):
+        """Test that a question stream runs while the background pool is busy with other work."""
+        set_llm_backend(OfflineBackend())
+        thread_manager.stop_workers()
+        release = threading.Event()
+        thread_manager.submit_task(release.wait, 10)
+        try:
+            stream = QuestionStream(generate_mcq_question, "Calculus", "Easy")
+            self.assertNotEqual(stream.result(timeout=5)["question"], "Error generating question.")
+        finally:
+            release.set()
+            thread_manager.stop_workers()
+
+    @patch.dict("os.environ", {"TWO_PHASE_GENERATION": "true"})
+    def test_two_phase_generation_explains_in_the_background(self):
+        """Test that two-phase questions come without an explanation, which is generated once and stored."""
+        explanation_cache.clear()
+        mcq = json.loads(generate_mcq_question("Calculus", "Easy"))
+        self.assertEqual(set(mcq), {"question", "options", "correct_answers", "difficulty"})
+        future = request_explanation("mcq", "Calculus", mcq)
+        self.assertTrue(future.result(timeout=5))
+        self.assertIs(request_explanation("mcq", "Calculus", mcq), future)
+        self.assertEqual(explanation_cache.get_stats()["misses"], 1)
+        
+        stored = MCQFormat.model_validate_json(self.bank.payload(0))
+        self.assertEqual(stored.explanation, future.result())
+        self.assertEqual(stored.options, mcq["options"])
+        
+        subjective = json.loads(generate_subjective_question("Calculus", "Hard"))
+        self.assertEqual(set(subjective), {"question", "difficulty"})
+        self.assertTrue(request_explanation("subjective", "Calculus", subjective).result(timeout=5))
+        self.assertEqual(len(self.bank), 2)
+
 
 if __name__ == "__main__":
     unittest.main() 
\ No newline at end of file
@@ -0,0 +1,120 @@
+"""
+Unit tests for the question validation module.
+"""
+import json
+import unittest
+
+from src.services.llm_backend import LLMBackend, LLMResponse, set_llm_backend
+from src.services.question_bank import QuestionBank, set_question_bank
+from src.services.question_service import generate_mcq_question
+from src.services.question_validation import find_issues, validate_question, validation_metrics
+from src.utils.error_handlers import QuestionGenerationError
+
+
+def make_mcq(options, correct_answers, difficulty="Medium"):
+    """Build an MCQ JSON string."""
+    return json.dumps({"question": "Which is a regularizer?", "options": options,
+                       "correct_answers": correct_answers, "explanation": "Dropout regularizes.",
+                       "difficulty": difficulty})
+
+
+class RepairingBackend(LLMBackend):
+    """Backend returning an MCQ with an out-of-range answer, then the repaired fields."""
+
+    name = "repairing"
+
+    def __init__(self):
+        self.formats = []
+
+    def parse(self, messages, response_format, max_completion_tokens, model=None, temperature=0.7):
+        self.formats.append(response_format)
+        if len(self.formats) == 1:
+            content = make_mcq(["Dropout", "ReLU", "Adam", "Softmax"], [4], "Hard")
+        else:
+            content = json.dumps({"options": ["Dropout", "ReLU", "Adam", "Softmax"], "correct_answers": [0]})
+        return LLMResponse(content, completion_tokens=100, model=model)
+
+
+class TestQuestionValidation(unittest.TestCase):
+    """Test cases for semantic checks, local repairs and field regeneration."""
+
+    def setUp(self):
+        validation_metrics.clear()
+
+    def tearDown(self):
+        validation_metrics.clear()
+
+    def test_valid_question_is_unchanged(self):
+        """Test that a valid question is returned as is."""
+        raw = make_mcq(["a", "b", "c", "d"], [1])
+        self.assertIs(validate_question("mcq", raw, "Medium"), raw)
+        self.assertEqual(validation_metrics.stats()["outcomes"], {"mcq:valid": 1})
+
+    def test_local_repairs(self):
+        """Test that the difficulty is normalized and duplicate options are merged with answers remapped."""
+        raw = make_mcq(["a", "b", " A", "c", "d"], [2, 3], difficulty="medium")
+        question = json.loads(validate_question("mcq", raw, "Medium"))
+        self.assertEqual(question["options"], ["a", "b", "c", "d"])
+        self.assertEqual(question["correct_answers"], [0, 2])
+        self.assertEqual(question["difficulty"], "Medium")
+        stats = validation_metrics.stats()
+        self.assertEqual(stats["failures"], {"mcq:difficulty_mismatch": 1, "mcq:duplicate_options": 1})
+        self.assertEqual(stats["outcomes"], {"mcq:repaired_locally": 1})
+
+    def test_faulty_fields_are_regenerated(self):
+        """Test that only the faulty field group is regenerated when local repair is not enough."""
+        requests = []
+
+        def repair(question, fields, issues):
+            requests.append((fields, [issue.category for issue in issues]))
+            return {"options": question["options"] + ["d"], "correct_answers": [0]}
+        question = json.loads(validate_question("mcq", make_mcq(["a", "b", "c"], [5]), "Medium", repair))
+        self.assertEqual(requests, [(["options", "correct_answers"], ["too_few_options", "answer_out_of_range"])])
+        self.assertEqual(question["options"], ["a", "b", "c", "d"])
+        self.assertEqual(validation_metrics.stats()["outcomes"], {"mcq:repaired_by_model": 1})
+
+    def test_unrepairable_question_is_rejected(self):
+        """Test that a question still invalid after repair raises and is counted as rejected."""
+        with self.assertRaises(QuestionGenerationError):
+            validate_question("mcq", make_mcq(["a", "b", "c", "d"], []), "Medium")
+        with self.assertRaises(QuestionGenerationError):
+            validate_question("mcq", json.dumps({"question": "?"}), "Medium")
+        stats = validation_metrics.stats()
+        self.assertEqual(stats["outcomes"], {"mcq:rejected": 2})
+        self.assertEqual(stats["failures"], {"mcq:no_correct_answer": 1, "mcq:schema": 1})
+
+    def test_partial_question_checks_only_its_fields(self):
+        """Test that a question stem without an explanation is validated on its own fields."""
+        fields = ("question", "options", "correct_answers", "difficulty")
+        stem = json.dumps({"question": "Which is a regularizer?", "options": ["a", "b", "c", "d"],
+                           "correct_answers": [1], "difficulty": "Medium"})
+        self.assertIs(validate_question("mcq", stem, "Medium", fields=fields), stem)
+        with self.assertRaises(QuestionGenerationError):
+            validate_question("mcq", stem.replace("[1]", "[7]"), "Medium", fields=fields)
+
+    def test_python_code_must_compile(self):
+        """Test that Python code fields that do not parse are reported."""
+        question = {"question": "Sum", "description": "d", "examples": "e", "solution": "s",
+                    "code_solution": "def f(:\n    pass", "starter_code": "def f():\n    pass\n",
+                    "language": "python", "explanation": "x", "difficulty": "Easy"}
+        self.assertEqual([(i.field, i.category) for i in find_issues("coding", question, "Easy")],
+                         [("code_solution", "code_syntax")])
+        question["language"] = "rust"
+        self.assertEqual(find_issues("coding", question, "Easy"), [])
+
+    def test_question_service_repairs_fields(self):
+        """Test that generation asks the model for only the faulty fields and serves the repaired question."""
+        backend = RepairingBackend()
+        set_llm_backend(backend)
+        set_question_bank(QuestionBank())
+        try:
+            question = json.loads(generate_mcq_question("Regularization", "Hard"))
+        finally:
+            set_llm_backend(None)
+            set_question_bank(None)
+        self.assertEqual(question["correct_answers"], [0])
+        self.assertEqual(list(backend.formats[1].model_fields), ["options", "correct_answers"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,82 @@
+"""
+Unit tests for the rate limiter utilities module.
+"""
+import time
+import threading
+import unittest
+
+from src.utils.rate_limiter import RateLimiter
+
+
+class RateLimitedError(Exception):
+    """Error carrying an HTTP 429 status, like openai.RateLimitError."""
+
+    status_code = 429
+
+
+class TestRateLimiter(unittest.TestCase):
+    """Test cases for the shared rate limiter."""
+
+    def test_concurrency_is_capped(self):
+        """Test that no more than max_concurrent calls run at once."""
+        limiter = RateLimiter(requests_per_minute=0, max_concurrent=2)
+        running, peak, lock = [0], [0], threading.Lock()
+
+        def call():
+            with limiter.slot():
+                with lock:
+                    running[0] += 1
+                    peak[0] = max(peak[0], running[0])
+                time.sleep(0.05)
+                with lock:
+                    running[0] -= 1
+        threads = [threading.Thread(target=call) for _ in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(peak[0], 2)
+        self.assertEqual(limiter.stats()["acquired"], 6)
+
+    def test_rate_allows_a_burst_then_spreads_requests(self):
+        """Test that requests beyond the burst wait for tokens to refill."""
+        limiter = RateLimiter(requests_per_minute=600, burst=3, max_concurrent=0)
+        start = time.monotonic()
+        for _ in range(3):
+            with limiter.slot():
+                pass
+        self.assertLess(time.monotonic() - start, 0.05)
+        for _ in range(2):
+            with limiter.slot():
+                pass
+        self.assertGreaterEqual(time.monotonic() - start, 0.15)
+
+    def test_rate_limit_error_pauses_calls(self):
+        """Test that a 429 error pauses new calls and is reported as upstream pressure."""
+        limiter = RateLimiter(requests_per_minute=0, max_concurrent=0, backoff_seconds=0.2)
+        with self.assertRaises(RateLimitedError):
+            with limiter.slot():
+                raise RateLimitedError()
+        self.assertTrue(limiter.under_pressure())
+        with self.assertRaises(TimeoutError):
+            limiter.acquire(timeout=0.05)
+        start = time.monotonic()
+        with limiter.slot():
+            pass
+        self.assertGreater(time.monotonic() - start, 0.05)
+        stats = limiter.stats()
+        self.assertEqual((stats["throttled"], stats["timeouts"], stats["in_flight"]), (1, 1, 0))
+
+    def test_other_errors_release_without_pausing(self):
+        """Test that errors other than rate limiting free the slot without a pause."""
+        limiter = RateLimiter(requests_per_minute=0, max_concurrent=1)
+        with self.assertRaises(ValueError):
+            with limiter.slot():
+                raise ValueError()
+        limiter.acquire(timeout=0.01)
+        limiter.release()
+        self.assertFalse(limiter.under_pressure())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,183 @@
+"""
+Unit tests for the retrieval service module.
+"""
+import os
+import json
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from src.services import retrieval_service
+from src.services.retrieval_service import BM25Index, ContextRetriever, set_context_retriever, tokenize
+from src.services.answer_cache import answer_cache
+from src.services.answer_service import get_gpt_answer
+from src.services.llm_backend import LLMBackend, LLMResponse, set_llm_backend
+from src.services.question_bank import QuestionBank, make_item_id
+
+
+def make_mcq(text, answer, explanation):
+    """Build an MCQ JSON string whose first option is correct."""
+    return json.dumps({"question": text, "options": [answer, "other", "neither", "both"], "correct_answers": [0],
+                       "explanation": explanation, "difficulty": "Easy"})
+
+
+class RecordingBackend(LLMBackend):
+    """Backend recording the messages of every call."""
+
+    name = "recording"
+
+    def __init__(self):
+        self.calls = []
+
+    def complete(self, messages, max_tokens, model=None, temperature=0.7):
+        self.calls.append(messages)
+        return LLMResponse("An answer.")
+
+
+class TestBM25Index(unittest.TestCase):
+    """Test cases for the incremental BM25 index."""
+
+    def setUp(self):
+        self.index = BM25Index()
+        self.index.add("dropout", "Dropout randomly zeroes activations to regularize networks", "dropout")
+        self.index.add("relu", "ReLU is an activation function", "relu")
+        self.index.add("sgd", "Stochastic gradient descent updates weights", "sgd")
+
+    def test_tokenize(self):
+        """Test that terms are lowercased alphanumerics without stopwords."""
+        self.assertEqual(tokenize("What is the ReLU-6 activation?"), ["relu", "6", "activation"])
+
+    def test_ranking(self):
+        """Test that the best matching document ranks first and non-matching ones are left out."""
+        results = self.index.search("What does dropout do to activations?", k=5)
+        self.assertEqual(results[0][0], "dropout")
+        self.assertNotIn("sgd", [key for key, _, _ in results])
+        self.assertEqual(self.index.search("quantum chromodynamics"), [])
+        self.assertFalse(self.index.add("relu", "duplicate", "duplicate"))
+
+    def test_incremental_add_and_merge(self):
+        """Test that documents added after a merge are found together with merged ones."""
+        with patch.object(retrieval_service, "MIN_MERGE_POSTINGS", 5):
+            for i in range(50):
+                self.index.add(f"doc{i}", f"filler text number {i}", f"doc{i}")
+        self.assertGreater(self.index._sorted_count, 0)
+        self.index.add("adam", "Adam adapts gradient step sizes", "adam")
+        keys = [key for key, _, _ in self.index.search("gradient", k=10)]
+        self.assertEqual(sorted(keys), ["adam", "sgd"])
+        self.assertEqual(self.index.search("number 7", k=1)[0][0], "doc7")
+
+    def test_remove(self):
+        """Test that removed documents are no longer returned, before and after a merge."""
+        self.assertTrue(self.index.remove("relu"))
+        self.assertFalse(self.index.remove("relu"))
+        self.assertEqual(self.index.search("relu"), [])
+        self.index._merge()
+        self.assertEqual(self.index.search("relu activations")[0][0], "dropout")
+        self.assertEqual(len(self.index), 2)
+
+    def test_save_and_load(self):
+        """Test that a saved index loads with the same documents, results and metadata."""
+        self.index.remove("sgd")
+        self.index.meta["bank_rows"] = 3
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "index.npz")
+            self.index.save(path)
+            loaded = BM25Index.load(path)
+        self.assertEqual(sorted(loaded.keys()), ["dropout", "relu"])
+        self.assertEqual(loaded.meta, {"bank_rows": 3})
+        self.assertEqual(loaded.search("activation function"), self.index.search("activation function"))
+        loaded.add("sgd", "Stochastic gradient descent", "sgd")
+        self.assertEqual(loaded.search("gradient")[0][0], "sgd")
+
+
+class TestContextRetriever(unittest.TestCase):
+    """Test cases for indexing topics and bank questions and retrieving context."""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.topics_dir = self.tmp_dir.name
+        self.write_topics({"topicName": "Machine Learning", "subTopics": [
+            {"topicName": "Regularization", "subTopics": [{"topicName": "Dropout", "subTopics": []}]}
+        ]})
+        self.bank = QuestionBank()
+        self.bank.add("mcq", "ML", "Easy", make_mcq("What does dropout prevent?", "Overfitting",
+                                                   "Dropout zeroes random units during training."))
+        self.topic_index = patch.object(retrieval_service, "get_topic_index", return_value=None)
+        self.topic_index.start()
+        self.retriever = ContextRetriever(bank=self.bank, topics_dir=self.topics_dir)
+
+    def tearDown(self):
+        self.topic_index.stop()
+        self.tmp_dir.cleanup()
+
+    def write_topics(self, tree):
+        """Write the topic tree file."""
+        with open(os.path.join(self.topics_dir, "topics.json"), "w", encoding="utf-8") as f:
+            json.dump(tree, f)
+
+    def test_refresh_indexes_topics_and_new_questions(self):
+        """Test that refresh indexes every topic path and only questions added since the last refresh."""
+        self.assertEqual(self.retriever.refresh(), 4)
+        self.assertEqual(self.retriever.refresh(), 0)
+        self.assertIn("topic:Machine Learning, Regularization, Dropout", self.retriever.index)
+        item_id = self.bank.add("mcq", "ML", "Easy", make_mcq("What is ReLU?", "max(0, x)", "A rectifier."))
+        self.assertEqual(self.retriever.refresh(), 1)
+        self.assertEqual(self.retriever.retrieve("relu", 1, 100), [
+            (f"question:{item_id}", "Q: What is ReLU? A: max(0, x). A rectifier.")
+        ])
+
+        self.write_topics({"topicName": "Statistics", "subTopics": []})
+        self.retriever.refresh()
+        self.assertEqual(self.retriever.index.keys("topic:"), ["topic:Statistics"])
+
+    def test_budget_limits_snippets(self):
+        """Test that snippets which do not fit the token budget are skipped."""
+        self.retriever.refresh()
+        keys = [key for key, _ in self.retriever.retrieve("dropout", 5, 400)]
+        self.assertEqual(keys[0], f"question:{make_item_id('mcq', 'What does dropout prevent?')}")
+        self.assertEqual(len(keys), 2)
+        small = self.retriever.retrieve("dropout", 5, 15)
+        self.assertEqual([key for key, _ in small], ["topic:Machine Learning, Regularization, Dropout"])
+
+    def test_answers_include_retrieved_context(self):
+        """Test that get_gpt_answer adds matching snippets to the prompt, and nothing without a match."""
+        self.retriever.refresh()
+        backend = RecordingBackend()
+        set_llm_backend(backend)
+        set_context_retriever(self.retriever)
+        answer_cache.clear()
+        try:
+            get_gpt_answer("Why use dropout?")
+            get_gpt_answer("What is quantum chromodynamics?")
+        finally:
+            set_context_retriever(None)
+            set_llm_backend(None)
+            answer_cache.clear()
+        grounded, ungrounded = backend.calls
+        self.assertEqual(len(grounded), 3)
+        self.assertIn("Q: What does dropout prevent? A: Overfitting.", grounded[1]["content"])
+        self.assertEqual([m["role"] for m in ungrounded], ["system", "user"])
+
+    def test_cached_answers_skip_retrieval_until_the_index_changes(self):
+        """Test that a repeated question is answered from the cache without searching the index."""
+        self.retriever.refresh()
+        backend = RecordingBackend()
+        set_llm_backend(backend)
+        set_context_retriever(self.retriever)
+        answer_cache.clear()
+        try:
+            with patch.object(self.retriever, "retrieve", wraps=self.retriever.retrieve) as retrieve:
+                get_gpt_answer("Why use dropout?")
+                get_gpt_answer("why use dropout?")
+                self.assertEqual((retrieve.call_count, len(backend.calls)), (1, 1))
+                self.retriever.index.add("topic:Statistics, Bayesian dropout", "Bayesian dropout", "Topic")
+                get_gpt_answer("Why use dropout?")
+                self.assertEqual((retrieve.call_count, len(backend.calls)), (2, 2))
+        finally:
+            set_context_retriever(None)
+            set_llm_backend(None)
+            answer_cache.clear()
+
+
+if __name__ == "__main__":
+    unittest.main()
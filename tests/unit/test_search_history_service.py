@@ -0,0 +1,67 @@
+"""
+Unit tests for the search history service module.
+"""
+import os
+import tempfile
+import unittest
+
+from src.services.search_history_service import SearchHistoryStore, build_match_query
+
+
+class TestSearchHistoryStore(unittest.TestCase):
+    """Test cases for persisting and searching Quick Search history."""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmp_dir.name, "history", "search.db")
+        # A long interval keeps the background writer out of the way; tests flush explicitly
+        self.store = SearchHistoryStore(self.db_path, flush_interval=60)
+
+    def tearDown(self):
+        self.store.close()
+        self.tmp_dir.cleanup()
+
+    def test_writes_are_deferred_until_flush(self):
+        """Test that recorded entries are only written when flushed, but are visible in recent()."""
+        self.store.record("u1", "What is dropout?", "A regularization technique.")
+        self.assertEqual(self.store.search("u1", "dropout"), [])
+        self.assertEqual(self.store.recent("u1")[0]["question"], "What is dropout?")
+
+        self.assertEqual(self.store.flush(), 1)
+        self.assertEqual(self.store.flush(), 0)
+        self.assertEqual(len(self.store.recent("u1")), 1)
+        self.assertEqual(self.store.search("u1", "dropout")[0]["answer"], "A regularization technique.")
+
+    def test_search_ranks_matches_and_isolates_users(self):
+        """Test prefix matching, bm25 ranking and per-user isolation."""
+        self.store.record("u1", "How does batch normalization work?", "It normalizes activations per batch.")
+        self.store.record("u1", "What is gradient descent?", "An optimization method.")
+        self.store.record("u2", "Explain batch normalization", "Private answer.")
+        self.store.flush()
+
+        results = self.store.search("u1", "batch norm")
+        self.assertEqual([item["question"] for item in results], ["How does batch normalization work?"])
+        self.assertEqual(self.store.search("u1", "optimiz")[0]["question"], "What is gradient descent?")
+        self.assertEqual(self.store.search("u3", "batch"), [])
+
+    def test_query_syntax_is_escaped(self):
+        """Test that FTS5 operators and punctuation typed by users do not cause errors."""
+        self.store.record("u1", "What is AND in SQL?", "A boolean operator.")
+        self.store.flush()
+        for text in ['"unbalanced', "NEAR(a b)", "col:value*", "-", "AND OR NOT"]:
+            self.store.search("u1", text)
+        self.assertIsNone(build_match_query("?! -"))
+        self.assertEqual(build_match_query('say "hi" hi'), '"say"* OR "hi"*')
+
+    def test_history_persists_across_stores(self):
+        """Test that closing flushes pending entries and a new store sees them."""
+        self.store.record("u1", "What is a transformer?", "An attention-based architecture.")
+        self.store.close()
+
+        self.store = SearchHistoryStore(self.db_path, flush_interval=60)
+        self.assertEqual(self.store.search("u1", "transformer")[0]["answer"], "An attention-based architecture.")
+        self.assertEqual(len(self.store.recent("u1")), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,86 @@
+"""
+Unit tests for the thread management utilities module.
+"""
+import time
+import threading
+import unittest
+from unittest.mock import patch, MagicMock
+
+from src.utils import thread_manager
+from src.utils.rate_limiter import set_rate_limiter
+
+POOL_ENV = {"WORKER_POOL_MIN": "1", "WORKER_POOL_MAX": "4", "WORKER_POOL_IDLE_SECONDS": "0.2"}
+
+
+def wait_until(condition, timeout=5):
+    """Poll a condition until it holds or the timeout passes."""
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+@patch.dict("os.environ", POOL_ENV)
+class TestWorkerPool(unittest.TestCase):
+    """Test cases for the autoscaling worker pool."""
+
+    def setUp(self):
+        thread_manager.stop_workers()
+        set_rate_limiter(None)
+
+    def tearDown(self):
+        thread_manager.stop_workers()
+        set_rate_limiter(None)
+
+    def test_pool_grows_with_queue_depth_up_to_its_maximum(self):
+        """Test that queued tasks start workers, never more than the maximum."""
+        release = threading.Event()
+        futures = [thread_manager.submit_task(release.wait, 5) for _ in range(6)]
+        self.assertTrue(wait_until(lambda: thread_manager.get_pool_stats()["busy"] == 4))
+        stats = thread_manager.get_pool_stats()
+        self.assertEqual((stats["workers"], stats["queued"], stats["max_workers"]), (4, 2, 4))
+        self.assertEqual([(event["action"], event["workers"]) for event in stats["events"][-4:]],
+                         [("start", 1), ("start", 2), ("start", 3), ("start", 4)])
+        release.set()
+        self.assertTrue(all(future.result(timeout=5) for future in futures))
+
+    def test_idle_workers_retire_down_to_the_minimum(self):
+        """Test that workers idle for longer than the idle timeout are retired."""
+        release = threading.Event()
+        futures = [thread_manager.submit_task(release.wait, 5) for _ in range(3)]
+        self.assertTrue(wait_until(lambda: thread_manager.get_pool_stats()["workers"] == 3))
+        release.set()
+        for future in futures:
+            future.result(timeout=5)
+        self.assertTrue(wait_until(lambda: thread_manager.get_pool_stats()["workers"] == 1))
+        self.assertEqual([(event["action"], event["workers"]) for event in thread_manager.get_pool_stats()["events"][-2:]],
+                         [("retire", 2), ("retire", 1)])
+
+    def test_rate_limiting_holds_the_pool_at_its_minimum(self):
+        """Test that the pool does not grow while the LLM service is rate limiting calls."""
+        limiter = MagicMock()
+        limiter.under_pressure.return_value = True
+        set_rate_limiter(limiter)
+        release = threading.Event()
+        futures = [thread_manager.submit_task(release.wait, 5) for _ in range(3)]
+        self.assertTrue(wait_until(lambda: thread_manager.get_pool_stats()["busy"] == 1))
+        stats = thread_manager.get_pool_stats()
+        self.assertEqual(stats["workers"], 1)
+        self.assertGreater(stats["held"], 0)
+        release.set()
+        for future in futures:
+            future.result(timeout=5)
+
+    @patch.dict("os.environ", {"WORKER_POOL_MIN": "0"})
+    def test_pending_tasks_get_a_worker_with_a_minimum_of_zero(self):
+        """Test that a pool allowed to shrink to zero still runs tasks while rate limiting holds growth."""
+        limiter = MagicMock()
+        limiter.under_pressure.return_value = True
+        set_rate_limiter(limiter)
+        self.assertEqual(thread_manager.submit_task(lambda: "done").result(timeout=5), "done")
+        self.assertTrue(wait_until(lambda: thread_manager.get_pool_stats()["workers"] == 0))
+        self.assertEqual(thread_manager.submit_task(lambda: "again").result(timeout=5), "again")
+
+
+if __name__ == "__main__":
+    unittest.main()
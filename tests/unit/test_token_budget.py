@@ -0,0 +1,56 @@
+"""
+Unit tests for the token budget module.
+"""
+import unittest
+
+from src.services.token_budget import TokenBudget
+
+
+class TestTokenBudget(unittest.TestCase):
+    """Test cases for the token budget module."""
+
+    def test_default_limit_until_enough_samples(self):
+        """Test that the default limit is used before min_samples is reached."""
+        budget = TokenBudget(default_limits={"mcq": 800}, min_samples=5)
+        for _ in range(4):
+            budget.record("mcq", "Easy", 200)
+        self.assertEqual(budget.get_limit("mcq", "Easy"), 800)
+
+    def test_limit_follows_percentile_with_headroom(self):
+        """Test that the limit is the target percentile plus headroom."""
+        budget = TokenBudget(min_samples=10, percentile=0.9, headroom=1.5, min_limit=1)
+        for tokens in range(100, 1100, 100):
+            budget.record("mcq", "Easy", tokens)
+        # 90th percentile of 100..1000 is 900, plus 50% headroom
+        self.assertEqual(budget.get_limit("mcq", "Easy"), 1350)
+        # Other difficulties keep their own history
+        self.assertEqual(budget.get_limit("mcq", "Hard"), 800)
+
+    def test_limit_is_clamped(self):
+        """Test that computed limits stay within the configured bounds."""
+        budget = TokenBudget(min_samples=1, min_limit=256, max_limit=2000)
+        budget.record("mcq", "Easy", 10)
+        budget.record("coding", "Expert", 5000)
+        self.assertEqual(budget.get_limit("mcq", "Easy"), 256)
+        self.assertEqual(budget.get_limit("coding", "Expert"), 2000)
+
+    def test_retry_limit(self):
+        """Test that retry limits grow until the maximum is reached."""
+        budget = TokenBudget(max_limit=3000)
+        self.assertEqual(budget.get_retry_limit(1000), 2000)
+        self.assertEqual(budget.get_retry_limit(2000), 3000)
+        self.assertIsNone(budget.get_retry_limit(3000))
+
+    def test_invalid_samples_are_ignored(self):
+        """Test that missing or invalid token counts are not recorded."""
+        budget = TokenBudget(min_samples=1)
+        budget.record("mcq", "Easy", None)
+        budget.record("mcq", "Easy", 0)
+        budget.record_truncation("mcq", "Easy")
+        stats = budget.get_stats()
+        self.assertEqual(stats["mcq/Easy"]["samples"], 0)
+        self.assertEqual(stats["mcq/Easy"]["truncations"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,111 @@
+"""
+Unit tests for the topic catalog module.
+"""
+import os
+import json
+import random
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from src.services.topic_catalog import (
+    TopicCatalog,
+    compile_topic_catalog,
+    load_topic_catalog,
+    get_topic_catalog
+)
+
+TREES = [
+    {
+        "topicId": "calculus",
+        "topicName": "Calculus",
+        "subTopics": [
+            {"topicId": "differentiation", "topicName": "Differentiation", "subTopics": []},
+            {"topicId": "optimization", "topicName": "Optimization", "subTopics": [
+                {"topicId": "chain_rule", "topicName": "Chain rule", "subTopics": []},
+            ]},
+        ]
+    },
+    {"topicId": "linear_algebra", "topicName": "Linear Algebra ∑", "subTopics": []},
+]
+
+
+class TestTopicCatalog(unittest.TestCase):
+    """Test cases for compiling and loading the topic catalog."""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.topics_dir = os.path.join(self.tmp_dir.name, "topics")
+        os.makedirs(self.topics_dir)
+        for tree in TREES:
+            with open(os.path.join(self.topics_dir, f"{tree['topicId']}.json"), "w", encoding="utf-8") as f:
+                json.dump(tree, f, indent=4)
+        self.catalog_path = os.path.join(self.tmp_dir.name, "catalog.bin")
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_round_trip(self):
+        """Test that compiled trees are materialized unchanged."""
+        self.assertEqual(compile_topic_catalog(self.topics_dir, self.catalog_path), 2)
+        catalog = load_topic_catalog(self.catalog_path, self.topics_dir)
+        self.assertIsNotNone(catalog)
+        self.assertEqual(catalog.node_count, 5)
+        self.assertEqual(sorted([catalog.to_tree(i) for i in range(2)], key=lambda t: t["topicId"]), TREES)
+        catalog.close()
+
+    def test_random_paths_follow_the_trees(self):
+        """Test that random paths are valid root-to-leaf or subtopic-to-leaf paths."""
+        compile_topic_catalog(self.topics_dir, self.catalog_path)
+        catalog = TopicCatalog(self.catalog_path)
+        valid = {
+            ("Calculus", "Differentiation"), ("Calculus", "Optimization", "Chain rule"),
+            ("Differentiation",), ("Optimization", "Chain rule"), ("Linear Algebra ∑",),
+        }
+        rng = random.Random(0)
+        paths = {tuple(catalog.get_random_topic_path(rng)) for _ in range(200)}
+        self.assertEqual(paths, valid)
+        catalog.close()
+
+    def test_stale_catalog_is_rejected(self):
+        """Test that a catalog is ignored once the topic files change."""
+        compile_topic_catalog(self.topics_dir, self.catalog_path)
+        with open(os.path.join(self.topics_dir, "new.json"), "w", encoding="utf-8") as f:
+            json.dump({"topicId": "new", "topicName": "New", "subTopics": []}, f)
+        self.assertIsNone(load_topic_catalog(self.catalog_path, self.topics_dir))
+        self.assertIsNone(get_topic_catalog(self.catalog_path, self.topics_dir))
+
+    def test_catalog_is_reloaded_after_a_topic_file_is_edited_in_place(self):
+        """Test that editing a topic file is noticed once the catalog is revalidated, and the old catalog closed."""
+        compile_topic_catalog(self.topics_dir, self.catalog_path)
+        catalog = get_topic_catalog(self.catalog_path, self.topics_dir)
+        self.assertIsNotNone(catalog)
+        directory_stat = os.stat(self.topics_dir)
+        path = os.path.join(self.topics_dir, f"{TREES[0]['topicId']}.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(dict(TREES[0], topicName="Edited"), f)
+        os.utime(self.topics_dir, ns=(directory_stat.st_atime_ns, directory_stat.st_mtime_ns))
+        self.assertIs(get_topic_catalog(self.catalog_path, self.topics_dir), catalog)
+
+        with patch("src.services.topic_catalog.CATALOG_REVALIDATE_SECONDS", 0):
+            self.assertIsNone(get_topic_catalog(self.catalog_path, self.topics_dir))
+        self.assertIsNone(catalog.node_name)
+
+    def test_cached_catalog_is_served_without_hashing_the_topic_files(self):
+        """Test that repeated lookups within the revalidation interval only stat the catalog and directory."""
+        compile_topic_catalog(self.topics_dir, self.catalog_path)
+        catalog = get_topic_catalog(self.catalog_path, self.topics_dir)
+        with patch("src.services.topic_catalog.compute_source_digest") as digest:
+            for _ in range(10):
+                self.assertIs(get_topic_catalog(self.catalog_path, self.topics_dir), catalog)
+        digest.assert_not_called()
+
+    def test_invalid_catalog_is_rejected(self):
+        """Test that files with a wrong magic or version are ignored."""
+        with open(self.catalog_path, "wb") as f:
+            f.write(b"NOPE" + b"\0" * 64)
+        self.assertIsNone(load_topic_catalog(self.catalog_path, self.topics_dir))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -8,13 +8,15 @@ import tempfile
 from unittest.mock import patch, mock_open, MagicMock
 
 from src.services.topic_service import (
+    iter_indented_lines,
     parse_indented_file,
+    parse_indented_roots,
     generate_json_from_indented_file,
     update_topics,
     load_random_subtopic,
     get_random_topic
 )
-from src.utils.error_handlers import TopicRetrievalError
+from src.utils.error_handlers import TopicRetrievalError, TopicParseError
 
 
 class TestTopicService(unittest.TestCase):
@@ -36,6 +38,43 @@ Topic 2
             self.assertEqual(result["subTopics"][0]["topicName"], "Subtopic 1.1")
             self.assertEqual(len(result["subTopics"][0]["subTopics"]), 1)  # One sub-subtopic
 
+    def test_parse_indented_roots(self):
+        """Test that every root of a file is returned."""
+        mock_file_content = """Topic 1
+    Subtopic 1.1
+Topic 2
+    Subtopic 2.1
+"""
+        with patch("builtins.open", mock_open(read_data=mock_file_content)):
+            result = parse_indented_roots("fake_path.txt")
+            self.assertEqual([root["topicName"] for root in result], ["Topic 1", "Topic 2"])
+            self.assertEqual(result[1]["subTopics"][0]["topicName"], "Subtopic 2.1")
+
+    def test_parse_indented_file_with_tabs(self):
+        """Test that tabs are expanded to the tab width when measuring indentation."""
+        mock_file_content = "Topic 1\n\tSubtopic 1.1\n    Subtopic 1.2\n\t    Subtopic 1.2.1\n"
+        with patch("builtins.open", mock_open(read_data=mock_file_content)):
+            self.assertEqual(
+                [level for _, level, _ in iter_indented_lines("fake_path.txt", tab_width=4)],
+                [0, 4, 4, 8]
+            )
+            result = parse_indented_file("fake_path.txt")
+            self.assertEqual(len(result["subTopics"]), 2)
+            self.assertEqual(result["subTopics"][1]["subTopics"][0]["topicName"], "Subtopic 1.2.1")
+
+    def test_parse_indented_file_malformed(self):
+        """Test that inconsistent dedents are reported with their line number."""
+        mock_file_content = """Topic 1
+    Subtopic 1.1
+        Subtopic 1.1.1
+
+  Subtopic 1.2
+"""
+        with patch("builtins.open", mock_open(read_data=mock_file_content)):
+            with self.assertRaises(TopicParseError) as context:
+                parse_indented_roots("fake_path.txt")
+            self.assertEqual(context.exception.line_number, 5)
+
     def test_generate_json_from_indented_file(self):
         """Test generating JSON from an indented file."""
         mock_file_content = """Topic 1
@@ -49,9 +88,10 @@ Topic 2
                     self.assertTrue(result)
                     mock_json_dump.assert_called_once()
 
+    @patch("src.services.topic_service.compile_topic_catalog")
     @patch("src.services.topic_service.glob.glob")
     @patch("src.services.topic_service.generate_json_from_indented_file")
-    def test_update_topics_success(self, mock_generate, mock_glob):
+    def test_update_topics_success(self, mock_generate, mock_glob, mock_compile):
         """Test updating topics successfully."""
         mock_glob.return_value = ["file1.txt", "file2.txt"]
         mock_generate.return_value = True
@@ -60,6 +100,7 @@ Topic 2
             result = update_topics()
             self.assertTrue(result)
             self.assertEqual(mock_generate.call_count, 2)  # Called for each file
+            mock_compile.assert_called_once()
 
     @patch("src.services.topic_service.glob.glob")
     def test_update_topics_no_files(self, mock_glob):
@@ -89,11 +130,12 @@ Topic 2
             self.assertEqual(result[0], "Topic 1")
             self.assertEqual(result[1], "Subtopic 1.1")
 
+    @patch("src.services.topic_service.get_topic_catalog", return_value=None)
     @patch("src.services.topic_service.glob.glob")
     @patch("builtins.open", new_callable=mock_open)
     @patch("json.load")
     @patch("random.choice")
-    def test_get_random_topic(self, mock_random, mock_json_load, mock_file_open, mock_glob):
+    def test_get_random_topic(self, mock_random, mock_json_load, mock_file_open, mock_glob, mock_catalog):
         """Test getting a random topic."""
         # Mock the glob to return a file
         mock_glob.return_value = ["topic1.json"]
@@ -111,8 +153,9 @@ Topic 2
         result = get_random_topic()
         self.assertEqual(result, "Topic 1")
 
+    @patch("src.services.topic_service.get_topic_catalog", return_value=None)
     @patch("src.services.topic_service.glob.glob")
-    def test_get_random_topic_no_files(self, mock_glob):
+    def test_get_random_topic_no_files(self, mock_glob, mock_catalog):
         """Test getting a random topic with no files."""
         mock_glob.return_value = []
         
@@ -0,0 +1,141 @@
+"""
+Unit tests for the topic watcher module.
+"""
+import os
+import json
+import random
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from src.services import topic_service
+from src.services.topic_watcher import TopicIndex, TopicStoreWatcher
+
+
+def write_file(path, content, mtime_ns=None):
+    """Write a raw topic file, optionally forcing its modification time."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(content)
+    if mtime_ns is not None:
+        os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def bump_mtime(path, offset_ns):
+    """Move a path's modification time forward, as a later write would."""
+    mtime_ns = os.stat(path).st_mtime_ns + offset_ns
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+class TestTopicStoreWatcher(unittest.TestCase):
+    """Test cases for the topic store watcher."""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.raw_dir = os.path.join(self.tmp_dir.name, "raw")
+        self.topics_dir = os.path.join(self.tmp_dir.name, "topics")
+        write_file(os.path.join(self.raw_dir, "ml.txt"), "Machine Learning\n    Supervised\n    Unsupervised\n")
+        self.swapped = []
+        self.watcher = TopicStoreWatcher(self.raw_dir, self.topics_dir, interval=0.01, on_swap=self.swapped.append)
+
+    def tearDown(self):
+        self.watcher.stop(timeout=5)
+        self.tmp_dir.cleanup()
+
+    def topic_names(self):
+        return sorted(tree["topicName"] for tree in self.watcher.index.trees)
+
+    def test_initial_poll_builds_index(self):
+        """Test that the first poll parses every raw file without writing JSON files."""
+        self.assertTrue(self.watcher.poll())
+        self.assertEqual(self.topic_names(), ["Machine Learning"])
+        self.assertIs(self.swapped[-1], self.watcher.index)
+        self.assertFalse(os.path.exists(self.topics_dir))
+
+    def test_unchanged_store_is_not_reparsed(self):
+        """Test that a poll without changes neither parses nor swaps."""
+        self.watcher.poll()
+        with patch("src.services.topic_watcher.iter_indented_topics") as mock_parse:
+            self.assertFalse(self.watcher.poll())
+            mock_parse.assert_not_called()
+        self.assertEqual(len(self.swapped), 1)
+
+    def test_only_changed_files_are_reparsed(self):
+        """Test that a modified file is re-parsed alone and its JSON file is written."""
+        stats_path = os.path.join(self.raw_dir, "stats.txt")
+        write_file(stats_path, "Statistics\n    Bayes\n")
+        self.watcher.poll()
+        previous_index = self.watcher.index
+
+        write_file(stats_path, "Statistics\n    Bayes\n    Sampling\n")
+        bump_mtime(stats_path, 10 ** 9)
+        with patch("src.services.topic_watcher.iter_indented_topics",
+                   wraps=topic_service.iter_indented_topics) as mock_parse:
+            self.assertTrue(self.watcher.poll())
+            mock_parse.assert_called_once_with(stats_path)
+
+        self.assertIsNot(self.watcher.index, previous_index)
+        with open(os.path.join(self.topics_dir, "statistics.json"), "r", encoding="utf-8") as f:
+            self.assertEqual(len(json.load(f)["subTopics"]), 2)
+
+    def test_added_and_removed_files(self):
+        """Test that files in new subdirectories are picked up and deleted files dropped."""
+        self.watcher.poll()
+        write_file(os.path.join(self.raw_dir, "nested", "dl.txt"), "Deep Learning\n    CNN\n")
+        bump_mtime(self.raw_dir, 10 ** 9)
+        self.watcher.poll()
+        self.assertEqual(self.topic_names(), ["Deep Learning", "Machine Learning"])
+
+        os.remove(os.path.join(self.raw_dir, "ml.txt"))
+        bump_mtime(self.raw_dir, 2 * 10 ** 9)
+        self.assertTrue(self.watcher.poll())
+        self.assertEqual(self.topic_names(), ["Deep Learning"])
+
+    def test_parse_error_keeps_previous_version(self):
+        """Test that a malformed edit keeps serving the last good version of the file."""
+        path = os.path.join(self.raw_dir, "ml.txt")
+        self.watcher.poll()
+        write_file(path, "Machine Learning\n        Deep\n  Shallow\n")
+        bump_mtime(path, 10 ** 9)
+        self.watcher.poll()
+        self.assertEqual(self.topic_names(), ["Machine Learning"])
+        self.assertIn("ml.txt", self.watcher.get_status()["last_error"])
+
+    def test_background_thread_swaps_index(self):
+        """Test that the running watcher publishes an index without any request."""
+        self.watcher.start()
+        for _ in range(500):
+            if self.swapped:
+                break
+            self.watcher._stop_event.wait(0.01)
+        self.assertTrue(self.swapped)
+        self.assertTrue(self.watcher.get_status()["running"])
+
+
+class TestTopicIndex(unittest.TestCase):
+    """Test cases for topic selection from the in-memory index."""
+
+    def test_random_paths_follow_the_trees(self):
+        """Test that random paths are walks from a root or top-level subtopic down to a leaf."""
+        tree = {"topicName": "A", "subTopics": [
+            {"topicName": "B", "subTopics": [{"topicName": "C", "subTopics": []}]},
+        ]}
+        index = TopicIndex({"a.txt": (tree,)})
+        paths = {tuple(index.get_random_topic_path(random.Random(seed))) for seed in range(20)}
+        self.assertEqual(paths, {("A", "B", "C"), ("B", "C")})
+        self.assertIsNone(TopicIndex({}).get_random_topic_path())
+
+    def test_get_random_topic_prefers_index(self):
+        """Test that get_random_topic uses the swapped-in index before the topic files."""
+        tree = {"topicName": "Only", "subTopics": []}
+        topic_service.set_topic_index(TopicIndex({"only.txt": (tree,)}))
+        try:
+            with patch("src.services.topic_service.get_topic_catalog") as mock_catalog:
+                self.assertEqual(topic_service.get_random_topic(), "Only")
+                mock_catalog.assert_not_called()
+        finally:
+            topic_service.set_topic_index(None)
+
+
+if __name__ == "__main__":
+    unittest.main()
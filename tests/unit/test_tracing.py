@@ -0,0 +1,159 @@
+"""
+Unit tests for the tracing and trace summary modules.
+"""
+import os
+import json
+import time
+import tempfile
+import unittest
+
+from src.utils import thread_manager
+from src.utils.tracing import (
+    JsonlSpanExporter,
+    Tracer,
+    get_current_trace_id,
+    set_tracer,
+    start_span,
+    traced
+)
+from src.utils.trace_summary import filter_traces, percentile, summarize_spans
+
+
+class MemoryExporter:
+    """Collects exported spans in a list."""
+
+    def __init__(self):
+        self.spans = []
+
+    def export(self, span):
+        self.spans.append(span.to_dict())
+
+    def by_name(self, name):
+        return [span for span in self.spans if span["name"] == name]
+
+
+class TestTracing(unittest.TestCase):
+    """Test cases for spans, sampling and propagation."""
+
+    def setUp(self):
+        self.exporter = MemoryExporter()
+        set_tracer(Tracer(self.exporter))
+
+    def tearDown(self):
+        set_tracer(None)
+
+    def test_nested_spans_share_trace(self):
+        """Test that child spans carry the root's trace ID and their parent's span ID."""
+        @traced("question.generate")
+        def generate():
+            with start_span("llm.call", attempt=0) as span:
+                span.set_attribute("finish_reason", "stop")
+            return get_current_trace_id()
+
+        with start_span("rerun") as root:
+            trace_id = generate()
+
+        self.assertEqual(trace_id, root.trace_id)
+        self.assertIsNone(get_current_trace_id())
+        llm, generate_span, rerun = self.exporter.spans
+        self.assertEqual({llm["trace_id"], generate_span["trace_id"]}, {rerun["trace_id"]})
+        self.assertEqual(llm["parent_id"], generate_span["span_id"])
+        self.assertEqual(generate_span["parent_id"], rerun["span_id"])
+        self.assertEqual(llm["attributes"], {"attempt": 0, "finish_reason": "stop"})
+        self.assertGreaterEqual(rerun["duration_ms"], generate_span["duration_ms"])
+
+    def test_error_is_recorded(self):
+        """Test that an exception is recorded on the span and re-raised."""
+        with self.assertRaises(ValueError):
+            with start_span("question.decode"):
+                raise ValueError("bad JSON")
+        self.assertEqual(self.exporter.spans[0]["error"], "ValueError")
+
+    def test_unsampled_trace_is_not_exported(self):
+        """Test that no span of an unsampled trace is exported."""
+        set_tracer(Tracer(self.exporter, sample_rate=0.0))
+        with start_span("rerun"):
+            with start_span("llm.call"):
+                pass
+        self.assertEqual(self.exporter.spans, [])
+
+    def test_disabled_tracing_is_a_no_op(self):
+        """Test that spans still work as context managers without a tracer."""
+        set_tracer(None)
+        with start_span("rerun") as span:
+            span.set_attribute("page", "MCQ")
+            self.assertIsNone(get_current_trace_id())
+
+    def test_propagation_through_thread_manager(self):
+        """Test that background tasks join the submitting trace with a queue wait span."""
+        with start_span("rerun") as root:
+            future = thread_manager.submit_task(traced("question.generate")(lambda: get_current_trace_id()))
+        self.assertEqual(future.result(timeout=10), root.trace_id)
+
+        root_id = self.exporter.by_name("rerun")[0]["span_id"]
+        for _ in range(100):
+            if self.exporter.by_name("task"):
+                break
+            time.sleep(0.01)
+        queue_wait = self.exporter.by_name("queue.wait")[0]
+        task = self.exporter.by_name("task")[0]
+        generate = self.exporter.by_name("question.generate")[0]
+        self.assertEqual(queue_wait["parent_id"], root_id)
+        self.assertEqual(task["parent_id"], root_id)
+        self.assertEqual(generate["parent_id"], task["span_id"])
+        self.assertEqual(task["thread"], queue_wait["thread"])
+        self.assertNotEqual(task["thread"], self.exporter.by_name("rerun")[0]["thread"])
+
+    def test_jsonl_exporter(self):
+        """Test that the exporter appends one JSON object per span."""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "traces", "traces.jsonl")
+            exporter = JsonlSpanExporter(path, flush_interval=60)
+            set_tracer(Tracer(exporter))
+            with start_span("rerun"):
+                with start_span("topic.select"):
+                    pass
+            exporter.close()
+            with open(path, encoding="utf-8") as f:
+                names = [json.loads(line)["name"] for line in f]
+        self.assertEqual(names, ["topic.select", "rerun"])
+
+
+class TestTraceSummary(unittest.TestCase):
+    """Test cases for summarizing trace files."""
+
+    def make_span(self, span_id, name, duration_ms, parent_id=None, thread="MainThread", trace_id="t1"):
+        return {"trace_id": trace_id, "span_id": span_id, "parent_id": parent_id, "name": name,
+                "duration_ms": duration_ms, "thread": thread, "error": None}
+
+    def test_percentile(self):
+        """Test percentile interpolation."""
+        self.assertEqual(percentile([10.0, 20.0, 30.0], 50), 20.0)
+        self.assertEqual(percentile([10.0, 20.0], 90), 19.0)
+        self.assertEqual(percentile([], 99), 0.0)
+
+    def test_self_time_excludes_nested_spans(self):
+        """Test that self time subtracts same-thread children but not spans on other threads."""
+        spans = [
+            self.make_span("a", "rerun", 100.0),
+            self.make_span("b", "llm.call", 70.0, parent_id="a"),
+            self.make_span("c", "queue.wait", 30.0, parent_id="a", thread="Thread-1"),
+        ]
+        rows = {row["name"]: row for row in summarize_spans(spans)}
+        self.assertEqual(rows["rerun"]["self_ms"], 30.0)
+        self.assertEqual(rows["llm.call"]["self_ms"], 70.0)
+        self.assertEqual(summarize_spans(spans)[0]["name"], "llm.call")
+
+    def test_filter_traces(self):
+        """Test that only the subtrees of the requested root are kept."""
+        spans = [
+            self.make_span("a", "rerun", 100.0),
+            self.make_span("b", "question.load", 80.0, parent_id="a"),
+            self.make_span("c", "llm.call", 70.0, parent_id="b"),
+            self.make_span("d", "topic.select", 1.0, parent_id="a"),
+        ]
+        self.assertEqual(sorted(span["span_id"] for span in filter_traces(spans, "question.load")), ["b", "c"])
+
+
+if __name__ == "__main__":
+    unittest.main()